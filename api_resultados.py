@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+API de Consulta de Resultados
+Servicio HTTP local de solo lectura sobre el historial de ejecuciones: filtros por endpoint,
+fechas, concurrencia y métrica, paginación, agregados por cubetas de tiempo y caché LRU de
+respuestas. Incluye un benchmark de carga del propio servicio
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from exportar_metricas import CAMPOS_METRICAS
+from historial_resultados import crear_analizador, iterar_ejecuciones, listar_resultados, resumir_ejecucion
+from sitio_resultados import firma_archivo, tipo_prueba
+from utilidades_wrk import parsear_comando_wrk, parsear_duracion
+
+PUERTO_API = 8097
+CAPACIDAD_CACHE = 1024
+# Segundos entre revisiones del directorio de resultados (no se hace un glob por request)
+REVISION_INDICE = 5
+POR_PAGINA = 50
+MAX_POR_PAGINA = 500
+ESTADISTICOS = ['n', 'media', 'min', 'max', 'p50', 'p90', 'p95', 'p99']
+ESTADISTICOS_POR_DEFECTO = 'n,media,p50,p90,p99'
+AGRUPACIONES = ['endpoint', 'prueba', 'tipo', 'conexiones', 'host']
+
+def metricas_planas(datos):
+    """Métricas numéricas de una prueba con los mismos nombres que las exportaciones"""
+    metricas = {nombre: datos[clave] for clave, nombre in CAMPOS_METRICAS
+                if isinstance(datos.get(clave), (int, float))}
+    metricas.update({percentil.replace('.', '_'): valor for percentil, valor in datos.get('percentiles', {}).items()})
+    return metricas
+
+def parsear_fecha(texto):
+    """Fecha ISO ('2024-05-01' o '2024-05-01T10:30') a segundos desde la época"""
+    try:
+        return datetime.fromisoformat(texto).timestamp()
+    except ValueError:
+        raise ValueError(f"Fecha no válida: {texto} (usa AAAA-MM-DD o AAAA-MM-DDTHH:MM)")
+
+def parsear_cubeta(texto):
+    """Tamaño de cubeta en segundos: las duraciones de wrk más días ('1d') y semanas ('1w')"""
+    texto = str(texto).strip().lower()
+    if texto[-1:] in ('d', 'w') and texto[:-1].replace('.', '', 1).isdigit():
+        return float(texto[:-1]) * (86400 if texto[-1] == 'd' else 7 * 86400)
+    return parsear_duracion(texto)
+
+def fecha_iso(marca):
+    return datetime.fromtimestamp(marca).isoformat(timespec='seconds')
+
+def percentil(ordenados, p):
+    """Percentil con interpolación lineal sobre valores ya ordenados"""
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+def calcular_estadisticos(valores, estadisticos):
+    ordenados = sorted(valores)
+    resultado = {}
+    for nombre in estadisticos:
+        if nombre == 'n':
+            resultado[nombre] = len(ordenados)
+        elif nombre == 'media':
+            resultado[nombre] = statistics.fmean(ordenados)
+        elif nombre == 'min':
+            resultado[nombre] = ordenados[0]
+        elif nombre == 'max':
+            resultado[nombre] = ordenados[-1]
+        else:
+            resultado[nombre] = percentil(ordenados, float(nombre[1:]))
+    return resultado
+
+def registros_de_archivo(marca, ruta, analizador):
+    """Resumir todas las pruebas de un archivo en registros consultables"""
+    registros = []
+    ejecucion = os.path.basename(ruta).rsplit('.', 1)[0].replace('resultados_pruebas_carga_', '')
+    for prueba in iterar_ejecuciones(archivos=[(marca, ruta)]):
+        normalizada = resumir_ejecucion(prueba, analizador)
+        if not normalizada:
+            continue
+        opciones = parsear_comando_wrk(prueba['datos'].get('comando') or '')
+        url = urlsplit(opciones['url'] or '')
+        registros.append({
+            'id': f"{ejecucion}/{prueba['clave']}",
+            'ejecucion': ejecucion,
+            'prueba': prueba['clave'],
+            'tipo': tipo_prueba(prueba['datos']),
+            'host': url.hostname,
+            'endpoint': url.path or None,
+            'conexiones': opciones['conexiones'],
+            'hilos': opciones['hilos'],
+            'inicio': normalizada['inicio'],
+            'fin': normalizada['fin'],
+            'metricas': metricas_planas(normalizada['resumen']),
+            'series': [{'marca': punto['marca'], 'etapa': punto['etapa'], 'metricas': metricas_planas(punto['datos'])}
+                       for punto in normalizada['series']]
+        })
+    return registros
+
+class IndiceResultados:
+    """Registros de todas las ejecuciones en memoria; solo se releen los archivos nuevos o modificados"""
+
+    def __init__(self, directorio='.', revision=REVISION_INDICE):
+        self.directorio = directorio
+        self.revision = revision
+        self.archivos = {}
+        self.registros = []
+        self.version = 0
+        self.ultima_revision = 0.0
+        self._candado = threading.Lock()
+
+    def actualizar(self, forzar=False):
+        """Revisar el directorio como máximo cada `revision` segundos; devuelve la versión del índice"""
+        with self._candado:
+            if not forzar and time.monotonic() - self.ultima_revision < self.revision:
+                return self.version
+            self.ultima_revision = time.monotonic()
+            actuales = {os.path.basename(ruta): (marca, ruta) for marca, ruta in listar_resultados(self.directorio)}
+            cambios = [nombre for nombre in self.archivos if nombre not in actuales]
+            for nombre in cambios:
+                del self.archivos[nombre]
+            analizador = None
+            for nombre, (marca, ruta) in actuales.items():
+                try:
+                    firma = firma_archivo(ruta)
+                except OSError:
+                    continue
+                if self.archivos.get(nombre, (None,))[0] == firma:
+                    continue
+                analizador = analizador or crear_analizador()
+                self.archivos[nombre] = (firma, registros_de_archivo(marca, ruta, analizador))
+                cambios.append(nombre)
+            if cambios:
+                self.registros = sorted((r for _, registros in self.archivos.values() for r in registros),
+                                        key=lambda r: r['fin'])
+                self.version += 1
+            return self.version
+
+    def filtrar(self, filtros):
+        """Registros que cumplen los filtros ya validados"""
+        resultado = self.registros
+        if 'endpoint' in filtros:
+            resultado = [r for r in resultado if r['endpoint'] and filtros['endpoint'] in r['endpoint']]
+        for campo in ('prueba', 'tipo', 'host', 'ejecucion'):
+            if campo in filtros:
+                resultado = [r for r in resultado if r[campo] == filtros[campo]]
+        if 'desde' in filtros:
+            resultado = [r for r in resultado if r['fin'] >= filtros['desde']]
+        if 'hasta' in filtros:
+            resultado = [r for r in resultado if r['fin'] < filtros['hasta']]
+        if 'conexiones' in filtros:
+            resultado = [r for r in resultado if r['conexiones'] == filtros['conexiones']]
+        if 'conexiones_min' in filtros:
+            resultado = [r for r in resultado if (r['conexiones'] or 0) >= filtros['conexiones_min']]
+        if 'conexiones_max' in filtros:
+            resultado = [r for r in resultado if (r['conexiones'] or 0) <= filtros['conexiones_max']]
+        if 'metrica' in filtros:
+            resultado = [r for r in resultado if filtros['metrica'] in r['metricas']]
+        return resultado
+
+    def nombres_metricas(self):
+        conteo = {}
+        for registro in self.registros:
+            for nombre in registro['metricas']:
+                conteo[nombre] = conteo.get(nombre, 0) + 1
+        return conteo
+
+def leer_filtros(parametros):
+    """Validar los filtros comunes de la consulta; ValueError si alguno no es válido"""
+    filtros = {campo: parametros[campo] for campo in ('endpoint', 'prueba', 'tipo', 'host', 'ejecucion', 'metrica')
+               if parametros.get(campo)}
+    for campo in ('desde', 'hasta'):
+        if parametros.get(campo):
+            filtros[campo] = parsear_fecha(parametros[campo])
+    for campo in ('conexiones', 'conexiones_min', 'conexiones_max'):
+        if parametros.get(campo):
+            try:
+                filtros[campo] = int(parametros[campo])
+            except ValueError:
+                raise ValueError(f"'{campo}' debe ser un entero")
+    return filtros
+
+def entero_en_rango(parametros, campo, defecto, minimo, maximo):
+    try:
+        valor = int(parametros.get(campo, defecto))
+    except ValueError:
+        raise ValueError(f"'{campo}' debe ser un entero")
+    if not minimo <= valor <= maximo:
+        raise ValueError(f"'{campo}' debe estar entre {minimo} y {maximo}")
+    return valor
+
+def consultar_ejecuciones(indice, parametros):
+    """Página de ejecuciones filtradas, más recientes primero salvo `orden`"""
+    filtros = leer_filtros(parametros)
+    pagina = entero_en_rango(parametros, 'pagina', 1, 1, 10 ** 9)
+    por_pagina = entero_en_rango(parametros, 'por_pagina', POR_PAGINA, 1, MAX_POR_PAGINA)
+    registros = indice.filtrar(filtros)
+
+    orden = parametros.get('orden', '-fin')
+    campo, descendente = orden.lstrip('-'), orden.startswith('-')
+    # Una métrica mal escrita dejaría la página vacía sin explicación
+    metricas_conocidas = {nombre for _, nombre in CAMPOS_METRICAS} | set(indice.nombres_metricas())
+    if campo not in ('fin', 'inicio', 'conexiones') and campo not in metricas_conocidas:
+        raise ValueError(f"'orden' no válido: {orden!r} (fin, inicio, conexiones o una métrica de /metricas, "
+                         f"con '-' para descendente)")
+    if campo in ('fin', 'inicio', 'conexiones'):
+        registros = sorted(registros, key=lambda r: r[campo] or 0, reverse=descendente)
+    else:
+        registros = sorted((r for r in registros if campo in r['metricas']),
+                           key=lambda r: r['metricas'][campo], reverse=descendente)
+
+    seleccion = [m for m in parametros.get('metricas', '').split(',') if m]
+    inicio = (pagina - 1) * por_pagina
+    resultados = []
+    for registro in registros[inicio:inicio + por_pagina]:
+        metricas = registro['metricas']
+        resultados.append({
+            'id': registro['id'], 'ejecucion': registro['ejecucion'], 'prueba': registro['prueba'],
+            'tipo': registro['tipo'], 'host': registro['host'], 'endpoint': registro['endpoint'],
+            'conexiones': registro['conexiones'], 'hilos': registro['hilos'],
+            'inicio': fecha_iso(registro['inicio']), 'fin': fecha_iso(registro['fin']),
+            'metricas': {m: metricas[m] for m in seleccion if m in metricas} if seleccion else metricas
+        })
+    return {
+        'total': len(registros),
+        'pagina': pagina,
+        'por_pagina': por_pagina,
+        'paginas': -(-len(registros) // por_pagina),
+        'resultados': resultados
+    }
+
+def consultar_agregados(indice, parametros):
+    """Estadísticos de una métrica por cubeta de tiempo (y opcionalmente por grupo)"""
+    if not parametros.get('metrica'):
+        raise ValueError("Falta 'metrica' (ver /metricas)")
+    metrica = parametros['metrica']
+    filtros = leer_filtros(parametros)
+    cubeta = parsear_cubeta(parametros.get('cubeta', '1d'))
+    if cubeta <= 0:
+        raise ValueError("'cubeta' debe ser mayor que cero")
+    estadisticos = parametros.get('estadisticos', ESTADISTICOS_POR_DEFECTO).split(',')
+    desconocidos = [e for e in estadisticos if e not in ESTADISTICOS]
+    if desconocidos:
+        raise ValueError(f"Estadísticos no válidos: {', '.join(desconocidos)} ({', '.join(ESTADISTICOS)})")
+    nivel = parametros.get('nivel', 'ejecucion')
+    if nivel not in ('ejecucion', 'intervalo'):
+        raise ValueError("'nivel' debe ser 'ejecucion' o 'intervalo'")
+    agrupar = parametros.get('agrupar')
+    if agrupar and agrupar not in AGRUPACIONES:
+        raise ValueError(f"'agrupar' debe ser uno de: {', '.join(AGRUPACIONES)}")
+
+    # Con nivel=intervalo cada intervalo o tramo es una muestra, ubicada en su propio instante
+    grupos = {}
+    for registro in indice.filtrar({k: v for k, v in filtros.items() if k != 'metrica'}):
+        if nivel == 'ejecucion':
+            muestras = [(registro['fin'], registro['metricas'].get(metrica))]
+        else:
+            muestras = [(punto['marca'], punto['metricas'].get(metrica)) for punto in registro['series']]
+        grupo = registro[agrupar] if agrupar else None
+        for marca, valor in muestras:
+            if valor is None or ('desde' in filtros and marca < filtros['desde']) \
+                    or ('hasta' in filtros and marca >= filtros['hasta']):
+                continue
+            clave = (grupo, int(marca // cubeta))
+            grupos.setdefault(clave, []).append(valor)
+
+    cubetas = []
+    for (grupo, numero), valores in sorted(grupos.items(), key=lambda par: (str(par[0][0]), par[0][1])):
+        cubetas.append(dict({'grupo': grupo} if agrupar else {},
+                            inicio=fecha_iso(numero * cubeta), fin=fecha_iso((numero + 1) * cubeta),
+                            **calcular_estadisticos(valores, estadisticos)))
+    return {'metrica': metrica, 'nivel': nivel, 'cubeta_s': cubeta, 'agrupar': agrupar, 'cubetas': cubetas}
+
+class CacheLRU:
+    """Respuestas ya serializadas por clave; la menos usada recientemente sale primero"""
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        self.capacidad = capacidad
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self._candado = threading.Lock()
+
+    def obtener(self, clave):
+        with self._candado:
+            if clave in self.entradas:
+                self.entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self.entradas[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        if not self.capacidad:
+            return
+        with self._candado:
+            self.entradas[clave] = valor
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.capacidad:
+                self.entradas.popitem(last=False)
+
+    def estado(self):
+        consultas = self.aciertos + self.fallos
+        return {'capacidad': self.capacidad, 'entradas': len(self.entradas), 'aciertos': self.aciertos,
+                'fallos': self.fallos, 'tasa_aciertos': self.aciertos / consultas if consultas else None}
+
+CONSULTAS = {
+    '/ejecuciones': consultar_ejecuciones,
+    '/agregados': consultar_agregados,
+    '/metricas': lambda indice, parametros: {'metricas': indice.nombres_metricas()}
+}
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo salen en dos escrituras; sin Nagle el cliente keep-alive no espera su ACK retardado
+    disable_nagle_algorithm = True
+    indice = None
+    cache = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def responder(self, estado, datos, cache='MISS'):
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.send_header('X-Cache', cache)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip('/') or '/'
+        version = self.indice.actualizar()
+        if ruta == '/salud':
+            cuerpo = {'ejecuciones': len(self.indice.registros), 'archivos': len(self.indice.archivos),
+                      'version_indice': version, 'cache': self.cache.estado()}
+            self.responder(200, json.dumps(cuerpo).encode(), 'BYPASS')
+            return
+        if ruta not in CONSULTAS:
+            self.responder(404, json.dumps({'error': 'no encontrado', 'rutas': list(CONSULTAS) + ['/salud']}).encode())
+            return
+        parametros = dict(parse_qsl(partes.query))
+        # La versión del índice forma parte de la clave: al llegar resultados nuevos las entradas viejas dejan de usarse
+        clave = (version, ruta, tuple(sorted(parametros.items())))
+        datos = self.cache.obtener(clave)
+        if datos is not None:
+            self.responder(200, datos, 'HIT')
+            return
+        try:
+            datos = json.dumps(CONSULTAS[ruta](self.indice, parametros), ensure_ascii=False).encode()
+        except ValueError as e:
+            self.responder(400, json.dumps({'error': str(e)}, ensure_ascii=False).encode())
+            return
+        self.cache.guardar(clave, datos)
+        self.responder(200, datos)
+
+def crear_servidor(directorio='.', puerto=PUERTO_API, capacidad_cache=CAPACIDAD_CACHE, host='127.0.0.1'):
+    indice = IndiceResultados(directorio)
+    indice.actualizar(forzar=True)
+    manejador = type('ManejadorConfigurado', (ManejadorAPI,), {'indice': indice, 'cache': CacheLRU(capacidad_cache)})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+def _proceso_servidor(directorio, puerto, capacidad_cache, listo):
+    servidor = crear_servidor(directorio, puerto, capacidad_cache)
+    listo.put(servidor.server_address[1])
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def escribir_resultados_sinteticos(directorio, archivos, pruebas_por_archivo, rng):
+    """Archivos de resultados sintéticos repartidos en 90 días, con dos endpoints y varias concurrencias"""
+    from benchmark_herramientas import generar_resultados
+    urls = ['https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage',
+            'https://yasta.bancounion.com.bo/gateway/user/verify/number?username=65663503']
+    fin = time.time()
+    for i in range(archivos):
+        momento = datetime.fromtimestamp(fin - rng.uniform(0, 90 * 86400))
+        resultados = generar_resultados(pruebas_por_archivo, rng)
+        for datos in resultados.values():
+            datos['comando'] = (f"wrk -t32 -c{rng.choice([1000, 3000, 10000, 50000])} -d300s "
+                                f"{rng.choice(urls)}")
+            datos['timestamp'] = momento.isoformat()
+        nombre = f"resultados_pruebas_carga_{momento.strftime('%Y%m%d_%H%M%S')}_{i:04d}.json"
+        with open(os.path.join(directorio, nombre), 'w',
+                  encoding='utf-8') as f:
+            json.dump(resultados, f)
+
+def consultas_benchmark(rng, cantidad):
+    """Mezcla fija de consultas; se repiten entre clientes como en los paneles reales"""
+    consultas = []
+    for _ in range(cantidad):
+        if rng.random() < 0.5:
+            consultas.append(f"/ejecuciones?endpoint={rng.choice(['pagos', 'verify'])}"
+                             f"&conexiones={rng.choice([1000, 3000, 10000, 50000])}"
+                             f"&pagina={rng.randint(1, 2)}&por_pagina=10&metricas=rps,p99")
+        else:
+            consultas.append(f"/agregados?metrica={rng.choice(['rps', 'p99', 'latencia_promedio_ms'])}"
+                             f"&cubeta={rng.choice(['1d', '7d'])}&agrupar=endpoint")
+    return consultas
+
+def medir_api(puerto, consultas, clientes, duracion):
+    """Clientes keep-alive que recorren las consultas durante `duracion` segundos"""
+    latencias, errores = [], [0]
+    candado = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def cliente(semilla):
+        rng = random.Random(semilla)
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        propias = []
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                conexion.request('GET', rng.choice(consultas))
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status != 200:
+                    raise http.client.HTTPException(respuesta.status)
+                propias.append((time.perf_counter() - inicio) * 1000)
+            except (OSError, http.client.HTTPException):
+                with candado:
+                    errores[0] += 1
+                conexion.close()
+                conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        conexion.close()
+        with candado:
+            latencias.extend(propias)
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    ordenadas = sorted(latencias) or [0.0]
+    return {
+        'requests': len(latencias),
+        'errores': errores[0],
+        'rps': len(latencias) / transcurrido,
+        'latencia_p50': percentil(ordenadas, 50),
+        'latencia_p99': percentil(ordenadas, 99)
+    }
+
+def benchmark_api(directorio=None, archivos=200, pruebas_por_archivo=4, clientes=16, duracion=10,
+                  capacidad_cache=CAPACIDAD_CACHE, consultas_distintas=200, semilla=42):
+    """RPS y latencia de la API sin caché y con caché sobre resultados reales o sintéticos"""
+    rng = random.Random(semilla)
+    temporal = None
+    if directorio is None:
+        temporal = tempfile.TemporaryDirectory()
+        directorio = temporal.name
+        escribir_resultados_sinteticos(directorio, archivos, pruebas_por_archivo, rng)
+    consultas = consultas_benchmark(rng, consultas_distintas)
+    contexto = multiprocessing.get_context('fork')
+    resultado = {'timestamp': datetime.now().isoformat(), 'clientes': clientes, 'duracion': duracion,
+                 'consultas_distintas': consultas_distintas, 'fases': {}}
+    try:
+        for fase, capacidad in (('sin_cache', 0), ('con_cache', capacidad_cache)):
+            listo = contexto.Queue()
+            proceso = contexto.Process(target=_proceso_servidor, args=(directorio, 0, capacidad, listo), daemon=True)
+            inicio_indice = time.perf_counter()
+            proceso.start()
+            puerto = listo.get(timeout=600)
+            resultado['indexado_s'] = time.perf_counter() - inicio_indice
+            try:
+                medicion = medir_api(puerto, consultas, clientes, duracion)
+                conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+                conexion.request('GET', '/salud')
+                salud = json.loads(conexion.getresponse().read())
+                conexion.close()
+                medicion['cache'] = salud['cache']
+                resultado['ejecuciones'] = salud['ejecuciones']
+                resultado['fases'][fase] = medicion
+            finally:
+                proceso.terminate()
+                proceso.join()
+    finally:
+        if temporal:
+            temporal.cleanup()
+    return resultado
+
+def mostrar_benchmark(resultado):
+    print(f"\n{'='*64}")
+    print(f"🔎 BENCHMARK DE LA API ({resultado['ejecuciones']:,} ejecuciones, {resultado['clientes']} clientes)")
+    print(f"{'='*64}")
+    print(f"Indexado inicial: {resultado['indexado_s']:.2f}s")
+    print(f"{'Fase':<12}{'RPS':>10}{'P50 ms':>10}{'P99 ms':>10}{'Errores':>9}{'Aciertos':>10}")
+    for fase, medicion in resultado['fases'].items():
+        tasa = medicion['cache']['tasa_aciertos']
+        print(f"{fase:<12}{medicion['rps']:>10,.0f}{medicion['latencia_p50']:>10.2f}{medicion['latencia_p99']:>10.2f}"
+              f"{medicion['errores']:>9,}{'-' if not tasa else f'{tasa:.0%}':>10}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='API HTTP local de solo lectura sobre el historial de resultados, con caché LRU'
+    )
+    subparsers = parser.add_subparsers(dest='accion')
+
+    servir = subparsers.add_parser('servir', help='Iniciar la API')
+    servir.add_argument('--puerto', type=int, default=PUERTO_API)
+    servir.add_argument('--host', default='127.0.0.1', help='Interfaz donde escuchar')
+    servir.add_argument('--directorio', default='.', help='Directorio con resultados_pruebas_carga_*.json')
+    servir.add_argument('--cache', type=int, default=CAPACIDAD_CACHE, help='Respuestas en la caché LRU (0 = sin caché)')
+
+    benchmark = subparsers.add_parser('benchmark', help='Medir RPS y latencia de la API sin y con caché')
+    benchmark.add_argument('--directorio', help='Usar resultados reales en lugar de sintéticos')
+    benchmark.add_argument('--archivos', type=int, default=200, help='Archivos sintéticos')
+    benchmark.add_argument('--pruebas', type=int, default=4, help='Pruebas por archivo sintético')
+    benchmark.add_argument('--clientes', type=int, default=16, help='Clientes concurrentes keep-alive')
+    benchmark.add_argument('--duracion', default='10s', help='Duración de cada fase')
+    benchmark.add_argument('--cache', type=int, default=CAPACIDAD_CACHE, help='Capacidad de la caché en la fase con caché')
+    benchmark.add_argument('--consultas', type=int, default=200, help='Consultas distintas en la mezcla')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+
+    if args.accion == 'servir':
+        servidor = crear_servidor(args.directorio, args.puerto, args.cache, args.host)
+        indice = servidor.RequestHandlerClass.indice
+        print(f"🔎 API de resultados en http://{args.host}:{args.puerto} "
+              f"({len(indice.registros):,} ejecuciones de {len(indice.archivos):,} archivos)")
+        print("   GET /ejecuciones?endpoint=pagos&desde=2024-05-01&conexiones=10000&metricas=rps,p99&pagina=1")
+        print("   GET /agregados?metrica=p99&cubeta=1d&estadisticos=p50,p90,max&agrupar=endpoint")
+        print("   GET /metricas | GET /salud")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            servidor.server_close()
+        return
+
+    if args.accion == 'benchmark':
+        print(f"🔎 Benchmark de la API: {args.clientes} clientes, {args.duracion} por fase...")
+        resultado = benchmark_api(args.directorio, args.archivos, args.pruebas, args.clientes,
+                                  parsear_duracion(args.duracion), args.cache, args.consultas)
+        mostrar_benchmark(resultado)
+        archivo = f"api_resultados_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Benchmark guardado en: {archivo}")
+        return
+
+    parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de las Herramientas de Análisis
+Mide parsers, generación de reportes, carga de JSON y arranque de comandos con datos sintéticos
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+# Comandos cuyo tiempo de arranque se mide (sin argumentos muestran la ayuda y terminan)
+COMANDOS_ARRANQUE = [
+    'ejecutar_pruebas_carga.py',
+    'sistema_completo_pruebas.py',
+    'generar_reporte_html.py',
+    'prueba_resistencia.py',
+    'ciclo_vida_conexiones.py',
+    'pool_credenciales.py',
+    'cola_pruebas.py',
+    'metricas_servidor.py',
+    'exportar_metricas.py',
+    'sitio_resultados.py',
+    'calibrar_recoleccion.py',
+    'reporte_completo.py',
+    'sonda_fases.py',
+    'reproducir_trafico.py',
+    'espacio_claves.py',
+    'calibrar_generador.py',
+    'modelo_escalabilidad.py',
+    'comparar_destinos.py',
+    'recorridos_usuario.py',
+    'proxy_wan.py',
+    'api_resultados.py'
+]
+
+def generar_salida_wrk(rng, mejorada=True, resumen_json=False):
+    """Generar una salida de wrk realista con distribución de latencia y bloques Lua opcionales"""
+    hilos = rng.choice([12, 32])
+    conexiones = rng.choice([3000, 10000, 50000])
+    latencia = rng.uniform(20, 900)
+    duracion = rng.uniform(299.5, 300.5)
+    requests = int(rng.uniform(2e5, 4e6))
+    errores = [rng.randint(0, 50000) for _ in range(4)]
+    percentiles = sorted(latencia * f for f in (rng.uniform(0.6, 0.9), rng.uniform(1.0, 1.3),
+                                                 rng.uniform(1.6, 2.2), rng.uniform(3, 6)))
+    lineas = [
+        "Running 5m test @ https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage",
+        f"  {hilos} threads and {conexiones} connections",
+        "  Thread Stats   Avg      Stdev     Max   +/- Stdev",
+        f"    Latency   {latencia:.2f}ms  {latencia / 2:.2f}ms   {latencia * 8 / 1000:.2f}s    {rng.uniform(60, 95):.2f}%",
+        f"    Req/Sec   {requests / duracion / hilos:.2f}    {rng.uniform(10, 90):.2f}   {rng.uniform(500, 900):.2f}     {rng.uniform(60, 95):.2f}%",
+        "  Latency Distribution",
+        f"     50%  {percentiles[0]:.2f}ms",
+        f"     75%  {percentiles[1]:.2f}ms",
+        f"     90%  {percentiles[2]:.2f}ms",
+        f"     99%  {percentiles[3]:.2f}ms",
+        f"  {requests} requests in {duracion:.2f}s, {requests * 0.0004:.2f}MB read",
+        f"  Socket errors: connect {errores[0]}, read {errores[1]}, write {errores[2]}, timeout {errores[3]}",
+        f"  Non-2xx or 3xx responses: {rng.randint(0, requests // 20)}",
+        f"Requests/sec:  {requests / duracion:.2f}",
+        f"Transfer/sec:      {requests * 0.0004 / duracion:.2f}MB"
+    ]
+    if mejorada:
+        lineas += [
+            "=== POST PAGOS RESULTS ===",
+            f"Requests: {requests}",
+            f"Duration: {duracion:.2f}s",
+            "",
+            "Status Code Distribution:",
+            f"  200: {int(requests * 0.95)} requests",
+            f"  401: {int(requests * 0.05)} requests",
+            "",
+            "Latency Stats (ms):",
+            f"  Mean: {latencia:.2f}",
+            "=== END POST PAGOS ==="
+        ]
+    if resumen_json:
+        documento = {
+            'version': 1,
+            'scenario': {'name': 'POST PAGOS', 'script': 'post_pagos_enhanced.lua', 'method': 'POST',
+                         'host': 'ws.pagosbolivia.com.bo', 'path': '/api/pagos/ProcessMessage', 'threads': hilos},
+            'summary': {'requests': requests, 'duration_us': int(duracion * 1e6), 'bytes': int(requests * 420),
+                        'requests_per_sec': requests / duracion, 'bytes_per_sec': requests * 420 / duracion},
+            'errors': {'connect': errores[0], 'read': errores[1], 'write': errores[2],
+                       'status': int(requests * 0.05), 'timeout': errores[3]},
+            'status_codes': {'200': int(requests * 0.95), '401': int(requests * 0.05)},
+            'latency_us': {'min': latencia * 100, 'max': latencia * 8000, 'mean': latencia * 1000,
+                           'stdev': latencia * 500,
+                           'percentiles': {p: valor * 1000 for p, valor in zip(('50', '75', '90', '99'), percentiles)}},
+            'thread_requests_per_sec': {'min': 500, 'max': 900, 'mean': requests / duracion / hilos, 'stdev': 40}
+        }
+        lineas += ["=== JSON SUMMARY BEGIN ===", json.dumps(documento), "=== JSON SUMMARY END ==="]
+    return '\n'.join(lineas) + '\n'
+
+def generar_resultados(cantidad_pruebas, rng):
+    """Generar un diccionario de resultados con el formato de guardar_resultados()"""
+    resultados = {}
+    for i in range(cantidad_pruebas):
+        resultados[f"prueba_{i:04d}"] = {
+            'comando': 'wrk -t32 -c50000 -d300s -s post_pagos_enhanced.lua https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage',
+            'stdout': generar_salida_wrk(rng),
+            'stderr': '',
+            'return_code': 0,
+            'execution_time': rng.uniform(300, 310),
+            'timestamp': datetime.now().isoformat(),
+            'nombre_prueba': f"Prueba sintética {i}",
+            'descripcion': 'Datos sintéticos para benchmarks'
+        }
+    return resultados
+
+def medir(funcion, repeticiones, memoria=False):
+    """Ejecutar `funcion` varias veces y devolver tiempos (y pico de memoria opcional)"""
+    tiempos = []
+    pico = 0
+    for _ in range(repeticiones):
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        if memoria:
+            pico = max(pico, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    resultado = {
+        'repeticiones': repeticiones,
+        'mediana_s': statistics.median(tiempos),
+        'min_s': min(tiempos),
+        'max_s': max(tiempos)
+    }
+    if memoria:
+        resultado['pico_memoria_mb'] = pico / 1024 / 1024
+    return resultado
+
+def benchmark_parsers(rng, cantidad, repeticiones):
+    """Throughput de parsear_salida_wrk y parse_wrk_output"""
+    from generar_reporte_html import AnalizadorHTML
+    from generate_graphics import LoadTestAnalyzer
+
+    resultados = {}
+    # 'texto' se parsea con regex; 'json' incluye el resumen de done() y usa el camino rápido
+    for variante, resumen_json in (('texto', False), ('json', True)):
+        salidas = [generar_salida_wrk(rng, resumen_json=resumen_json) for _ in range(cantidad)]
+        megabytes = sum(len(s) for s in salidas) / 1024 / 1024
+        for nombre, parser in (('parsear_salida_wrk', AnalizadorHTML().parsear_salida_wrk),
+                               ('parse_wrk_output', LoadTestAnalyzer().parse_wrk_output)):
+            medicion = medir(lambda: [parser(s) for s in salidas], repeticiones)
+            medicion['salidas_por_s'] = cantidad / medicion['mediana_s']
+            medicion['mb_por_s'] = megabytes / medicion['mediana_s']
+            clave = f"parser.{nombre}" if variante == 'texto' else f"parser.{nombre}.{variante}"
+            resultados[clave] = medicion
+    return resultados
+
+def benchmark_reportes(rng, tamanos, repeticiones):
+    """Tiempo y pico de memoria de los reportes HTML y PNG según la cantidad de ejecuciones"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from generar_reporte_html import AnalizadorHTML
+    from generate_graphics import LoadTestAnalyzer
+
+    resultados = {}
+    for tamano in tamanos:
+        archivo = f"resultados_pruebas_carga_bench_{tamano}.json"
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(generar_resultados(tamano, rng), f)
+
+        def reporte_html():
+            analizador = AnalizadorHTML()
+            analizador.cargar_resultados(archivo)
+            analizador.generar_reporte_html()
+
+        def graficos_png():
+            analizador = LoadTestAnalyzer()
+            analizador.load_results(archivo)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                analizador.create_comparison_charts()
+            plt.close('all')
+
+        resultados[f"reporte.generar_reporte_html.{tamano}"] = medir(reporte_html, repeticiones, memoria=True)
+        resultados[f"reporte.create_comparison_charts.{tamano}"] = medir(graficos_png, repeticiones, memoria=True)
+    return resultados
+
+def benchmark_carga_json(rng, tamanos, repeticiones):
+    """Tiempo de carga de archivos de resultados de distinto tamaño"""
+    resultados = {}
+    for tamano in tamanos:
+        archivo = f"resultados_pruebas_carga_json_{tamano}.json"
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(generar_resultados(tamano, rng), f, indent=2, ensure_ascii=False)
+
+        def cargar():
+            with open(archivo, 'r') as f:
+                json.load(f)
+
+        medicion = medir(cargar, repeticiones)
+        medicion['tamano_mb'] = os.path.getsize(archivo) / 1024 / 1024
+        resultados[f"json.carga.{tamano}"] = medicion
+    return resultados
+
+def benchmark_arranque(repeticiones):
+    """Tiempo de arranque de cada comando hasta mostrar la ayuda"""
+    resultados = {}
+    # Directorio vacío para que ningún comando encuentre resultados y haga trabajo real
+    with tempfile.TemporaryDirectory(prefix='benchmark_arranque_') as vacio:
+        for comando in COMANDOS_ARRANQUE:
+            ruta = os.path.join(DIRECTORIO_REPO, comando)
+            if not os.path.exists(ruta):
+                continue
+
+            def arrancar():
+                subprocess.run([sys.executable, ruta], capture_output=True, timeout=120, cwd=vacio)
+
+            resultados[f"arranque.{comando}"] = medir(arrancar, repeticiones)
+    return resultados
+
+def comparar(actual, archivo_base):
+    """Mostrar la variación de la mediana respecto a un resultado anterior"""
+    with open(archivo_base, 'r', encoding='utf-8') as f:
+        base = json.load(f)['resultados']
+    print(f"\n📊 Comparación con {archivo_base}:")
+    for nombre, medicion in actual.items():
+        if nombre not in base:
+            print(f"  {nombre:<55} (nuevo)")
+            continue
+        anterior = base[nombre]['mediana_s']
+        cambio = (medicion['mediana_s'] - anterior) / anterior if anterior else 0
+        marca = '🔴' if cambio > 0.10 else ('🟢' if cambio < -0.10 else '⚪')
+        print(f"  {marca} {nombre:<53} {anterior * 1000:>10.2f}ms → {medicion['mediana_s'] * 1000:>10.2f}ms ({cambio:+.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de las herramientas de análisis (sin conexión)')
+    parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto benchmark_herramientas_<ts>.json)')
+    parser.add_argument('--comparar', metavar='ARCHIVO', help='Comparar con un resultado anterior')
+    parser.add_argument('--rapido', action='store_true', help='Menos repeticiones y tamaños más pequeños')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla de los datos sintéticos')
+    parser.add_argument('--solo', choices=['parser', 'reporte', 'json', 'arranque'], action='append',
+                        help='Ejecutar solo algunos grupos (repetible)')
+    args = parser.parse_args()
+
+    grupos = args.solo or ['parser', 'reporte', 'json', 'arranque']
+    repeticiones = 3 if args.rapido else 7
+    tamanos_reporte = [2, 8] if args.rapido else [2, 8, 32, 128]
+    tamanos_json = [10, 100] if args.rapido else [10, 100, 1000]
+
+    rng = random.Random(args.semilla)
+    resultados = {}
+    directorio_original = os.getcwd()
+    salida = os.path.abspath(args.salida or f"benchmark_herramientas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    sys.path.insert(0, DIRECTORIO_REPO)
+
+    print("="*60)
+    print("⏱️  BENCHMARKS DE HERRAMIENTAS")
+    print("="*60)
+    with tempfile.TemporaryDirectory(prefix='benchmark_herramientas_') as temporal:
+        os.chdir(temporal)
+        try:
+            if 'parser' in grupos:
+                print("🔍 Parsers...")
+                resultados.update(benchmark_parsers(rng, 200 if args.rapido else 2000, repeticiones))
+            if 'reporte' in grupos:
+                print("🎨 Reportes HTML y PNG...")
+                resultados.update(benchmark_reportes(rng, tamanos_reporte, max(1, repeticiones // 2)))
+            if 'json' in grupos:
+                print("📄 Carga de JSON...")
+                resultados.update(benchmark_carga_json(rng, tamanos_json, repeticiones))
+            if 'arranque' in grupos:
+                print("🚀 Arranque de comandos...")
+                resultados.update(benchmark_arranque(repeticiones))
+        finally:
+            os.chdir(directorio_original)
+
+    for nombre, medicion in resultados.items():
+        extra = ''
+        if 'salidas_por_s' in medicion:
+            extra = f" ({medicion['salidas_por_s']:,.0f} salidas/s)"
+        elif 'pico_memoria_mb' in medicion:
+            extra = f" (pico {medicion['pico_memoria_mb']:.1f} MB)"
+        print(f"  {nombre:<55} {medicion['mediana_s'] * 1000:>10.2f}ms{extra}")
+
+    documento = {
+        'version': 1,
+        'timestamp': datetime.now().isoformat(),
+        'semilla': args.semilla,
+        'rapido': args.rapido,
+        'entorno': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'procesador': platform.processor(),
+            'cpus': os.cpu_count()
+        },
+        'resultados': resultados
+    }
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en: {salida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+if __name__ == "__main__":
+    main()
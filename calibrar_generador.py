@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Calibración del Generador de Carga
+Mide contra un servidor loopback local, con el mismo esquema (http/https) del escenario,
+el techo de RPS y el piso de latencia de cada configuración de wrk en esta máquina y los
+guarda como perfil de la máquina, para que los reportes indiquen cuánto se acercó cada
+prueba al límite del propio generador
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from utilidades_wrk import construir_comando_wrk, ejecutar_wrk, parsear_comando_wrk, parsear_duracion
+
+DIRECTORIO_PERFILES = 'perfiles_generador'
+# Fracción del techo a partir de la cual el resultado refleja al generador más que al servidor
+UMBRAL_TECHO = 0.8
+
+RESPUESTA_LOOPBACK = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                      b"Content-Length: 15\r\n\r\n{\"exists\":true}")
+
+def identificar_maquina():
+    """Datos de la máquina que generan la carga; el host es la clave del perfil"""
+    try:
+        salida = subprocess.run(['wrk', '--version'], capture_output=True, text=True, timeout=5)
+        version_wrk = next((linea.strip() for linea in (salida.stdout + salida.stderr).splitlines()
+                            if linea.startswith('wrk ')), None)
+    except (OSError, subprocess.SubprocessError):
+        version_wrk = None
+    return {
+        'host': socket.gethostname(),
+        'cpus': os.cpu_count(),
+        'plataforma': platform.platform(),
+        'python': platform.python_version(),
+        'wrk': version_wrk
+    }
+
+def clave_configuracion(hilos, conexiones, script, esquema='http'):
+    return f"t{hilos}_c{conexiones}_{os.path.basename(script) if script else 'sin_script'}_{esquema}"
+
+def esquema_url(url):
+    """Esquema (http/https) de una URL; http si no se indica"""
+    return (urlsplit(url).scheme if url else None) or 'http'
+
+def ruta_perfil(host=None, directorio=DIRECTORIO_PERFILES):
+    return os.path.join(directorio, f"{host or socket.gethostname()}.json")
+
+def cargar_perfil_generador(host=None, directorio=DIRECTORIO_PERFILES):
+    """Perfil guardado de la máquina, o None si nunca se calibró"""
+    try:
+        with open(ruta_perfil(host, directorio), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+async def _atender(lector, escritor):
+    """Responder siempre lo mismo, con keep-alive, leyendo el cuerpo si lo hay"""
+    try:
+        while True:
+            cabecera = await lector.readuntil(b"\r\n\r\n")
+            longitud = 0
+            for linea in cabecera.lower().split(b"\r\n"):
+                if linea.startswith(b"content-length:"):
+                    longitud = int(linea[15:].strip() or 0)
+            if longitud:
+                await lector.readexactly(longitud)
+            escritor.write(RESPUESTA_LOOPBACK)
+            await escritor.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+        pass
+    finally:
+        escritor.close()
+
+def _proceso_loopback(conexion, certificado=None):
+    async def servir():
+        contexto_tls = None
+        if certificado:
+            contexto_tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            contexto_tls.load_cert_chain(*certificado)
+        servidor = await asyncio.start_server(_atender, sock=conexion, backlog=4096, ssl=contexto_tls)
+        async with servidor:
+            await servidor.serve_forever()
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+class ServidorLoopback:
+    """Servidor HTTP mínimo con respuesta fija, repartido en varios procesos sobre el mismo socket.
+    Con tls=True atiende HTTPS con un certificado autofirmado temporal"""
+
+    def __init__(self, procesos=None, host='127.0.0.1', puerto=0, tls=False):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.directorio_tls = tempfile.mkdtemp(prefix='loopback_tls_') if tls else None
+        self.certificado = self._generar_certificado() if tls else None
+        self.conexion = socket.create_server((host, puerto), backlog=4096)
+        self.hijos = []
+
+    def _generar_certificado(self):
+        """Certificado y clave autofirmados con openssl, válidos solo para esta calibración"""
+        certificado = os.path.join(self.directorio_tls, 'cert.pem')
+        clave = os.path.join(self.directorio_tls, 'key.pem')
+        try:
+            subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                            '-subj', '/CN=localhost', '-keyout', clave, '-out', certificado],
+                           capture_output=True, check=True, timeout=60)
+        except (OSError, subprocess.SubprocessError) as e:
+            shutil.rmtree(self.directorio_tls, ignore_errors=True)
+            raise RuntimeError(f"No se pudo generar el certificado del loopback TLS con openssl: {e}")
+        return certificado, clave
+
+    @property
+    def url(self):
+        host, puerto = self.conexion.getsockname()[:2]
+        return f"{'https' if self.certificado else 'http'}://{host}:{puerto}"
+
+    def iniciar(self):
+        contexto = multiprocessing.get_context('fork')
+        for _ in range(self.procesos):
+            hijo = contexto.Process(target=_proceso_loopback, args=(self.conexion, self.certificado),
+                                    daemon=True)
+            hijo.start()
+            self.hijos.append(hijo)
+        return self
+
+    def detener(self):
+        for hijo in self.hijos:
+            hijo.terminate()
+        for hijo in self.hijos:
+            hijo.join()
+        self.conexion.close()
+        if self.directorio_tls:
+            shutil.rmtree(self.directorio_tls, ignore_errors=True)
+
+def medir_configuracion(url, hilos, conexiones, script, duracion, args_script=None):
+    """Techo de RPS con la configuración completa y piso de latencia con una conexión por hilo"""
+    from generar_reporte_html import AnalizadorHTML
+    analizador = AnalizadorHTML()
+
+    mediciones = {}
+    for nombre, conexiones_medicion in (('techo', conexiones), ('piso', hilos)):
+        comando = construir_comando_wrk(hilos, conexiones_medicion, duracion, url, script=script,
+                                        extra=['--latency'], args_script=args_script)
+        registro = ejecutar_wrk(comando)
+        if 'error' in registro or registro.get('return_code'):
+            raise RuntimeError(registro.get('error') or registro.get('stderr', '').strip()
+                               or f"wrk terminó con código {registro['return_code']}")
+        mediciones[nombre] = analizador.parsear_salida_wrk(registro['stdout'])
+
+    techo, piso = mediciones['techo'], mediciones['piso']
+    return {
+        'hilos': hilos,
+        'conexiones': conexiones,
+        'script': os.path.basename(script) if script else None,
+        'esquema': esquema_url(url),
+        'duracion': duracion,
+        'rps_techo': techo.get('rps_reportado') or techo.get('rps', 0),
+        'latencia_en_techo': techo.get('latencia_promedio', 0),
+        'errores_en_techo': techo.get('total_errores', 0),
+        'piso_latencia_p50': piso.get('percentiles', {}).get('p50', piso.get('latencia_promedio', 0)),
+        'piso_latencia_p99': piso.get('percentiles', {}).get('p99'),
+        'piso_latencia_promedio': piso.get('latencia_promedio', 0),
+        'fecha': datetime.now().isoformat()
+    }
+
+def buscar_calibracion(perfil, hilos, conexiones, script, esquema='http'):
+    """Calibración exacta para la configuración y el esquema o, si falta, la del mismo script e hilos
+    más cercana, prefiriendo el mismo esquema. Los perfiles anteriores sin esquema se midieron en http"""
+    if not perfil:
+        return None, False
+    nombre_script = os.path.basename(script) if script else None
+    candidatas = [c for c in perfil.get('configuraciones', {}).values()
+                  if c['script'] == nombre_script and c['hilos'] == hilos]
+    if not candidatas:
+        return None, False
+    elegida = min(candidatas, key=lambda c: (c.get('esquema', 'http') != esquema, abs(c['conexiones'] - conexiones)))
+    return elegida, elegida['conexiones'] == conexiones and elegida.get('esquema', 'http') == esquema
+
+def comparar_con_generador(comando, datos, perfil):
+    """Fracción del techo del generador alcanzada y latencia descontando el piso del cliente"""
+    opciones = parsear_comando_wrk(comando)
+    esquema = esquema_url(opciones['url'])
+    calibracion, exacta = buscar_calibracion(perfil, opciones['hilos'] or 1, opciones['conexiones'] or 1,
+                                             opciones['script'], esquema)
+    if not calibracion:
+        return None
+    esquema_calibrado = calibracion.get('esquema', 'http')
+    rps = datos.get('rps_reportado') or datos.get('rps', 0)
+    p50 = datos.get('percentiles', {}).get('p50')
+    piso = calibracion['piso_latencia_p50']
+    return {
+        'configuracion': clave_configuracion(calibracion['hilos'], calibracion['conexiones'], calibracion['script'],
+                                             esquema_calibrado),
+        'exacta': exacta,
+        'esquema': esquema,
+        'esquema_calibrado': esquema_calibrado,
+        'rps': rps,
+        'rps_techo': calibracion['rps_techo'],
+        'fraccion_techo': rps / calibracion['rps_techo'] if calibracion['rps_techo'] else None,
+        'latencia_promedio': datos.get('latencia_promedio', 0),
+        'latencia_promedio_neta': max(0.0, datos.get('latencia_promedio', 0) - calibracion['piso_latencia_promedio']),
+        'p50': p50,
+        'piso_p50': piso,
+        'p50_neta': max(0.0, p50 - piso) if p50 is not None else None
+    }
+
+def crear_seccion_generador(comparaciones, maquina):
+    """Tabla de pruebas frente al techo y al piso del generador calibrado"""
+    def celda(valor):
+        return '<td>-</td>' if valor is None else f"<td>{valor:.2f}</td>"
+
+    def marca(c):
+        if c['exacta']:
+            return ''
+        esquemas = (c.get('esquema_calibrado', 'http'), c.get('esquema', 'http'))
+        return ' (aprox.)' if esquemas[0] == esquemas[1] else f" (aprox., {esquemas[0]}≠{esquemas[1]})"
+
+    filas = []
+    for nombre, c in comparaciones.items():
+        aviso = ' ⚠️' if c['fraccion_techo'] is not None and c['fraccion_techo'] >= UMBRAL_TECHO else ''
+        filas.append(
+            f"<tr><td>{nombre.replace('_', ' ')}</td><td>{c['configuracion']}{marca(c)}</td>"
+            f"<td>{c['rps']:,.1f}</td><td>{c['rps_techo']:,.1f}</td><td>{(c['fraccion_techo'] or 0):.1%}{aviso}</td>"
+            f"<td>{c['latencia_promedio']:.2f}</td><td>{c['latencia_promedio_neta']:.2f}</td>"
+            f"{celda(c['p50'])}<td>{c['piso_p50']:.2f}</td>{celda(c['p50_neta'])}</tr>"
+        )
+    return (
+        f"<p>Perfil del generador de {maquina.get('host', '?')} ({maquina.get('cpus', '?')} CPUs). "
+        f"Techo: RPS máximo de la misma configuración y esquema contra un servidor loopback. Piso: latencia del cliente "
+        f"con una conexión por hilo, que se descuenta de la medida. (aprox.) indica otra configuración o, si se "
+        f"indica, otro esquema (http/https), así que la comparación es inexacta. ⚠️ marca pruebas a más del "
+        f"{UMBRAL_TECHO:.0%} del techo, donde el límite pudo ser el generador y no el servidor.</p>"
+        "<table class=\"tabla-etapas\"><tr><th>Prueba</th><th>Configuración</th><th>RPS</th><th>Techo RPS</th>"
+        "<th>% del techo</th><th>Latencia (ms)</th><th>Latencia neta (ms)</th><th>P50 (ms)</th>"
+        "<th>Piso P50 (ms)</th><th>P50 neto (ms)</th></tr>" + ''.join(filas) + "</table>"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mide el techo de RPS y el piso de latencia de wrk en esta máquina contra un servidor loopback'
+    )
+    parser.add_argument('tipo', nargs='?', choices=['get', 'post'],
+                        help='Escenario cuyo script y configuración calibrar (por defecto ambos)')
+    parser.add_argument('--config', action='append', default=[],
+                        help="Configuración HILOSxCONEXIONES a calibrar (repetible; por defecto la de cada escenario)")
+    parser.add_argument('--duracion', default='15s', help='Duración de cada medición')
+    parser.add_argument('--url', help='Servidor loopback externo (p. ej. nginx) con el esquema del escenario; '
+                                      'por defecto uno interno, con TLS si el escenario es https')
+    parser.add_argument('--procesos', type=int, help='Procesos del servidor loopback interno (por defecto uno por CPU)')
+    parser.add_argument('--directorio', default=DIRECTORIO_PERFILES, help='Directorio de perfiles de máquina')
+    parser.add_argument('--mostrar', action='store_true', help='Mostrar el perfil guardado de esta máquina')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if args.mostrar:
+        perfil = cargar_perfil_generador(directorio=args.directorio)
+        if not perfil:
+            print(f"No hay perfil para {socket.gethostname()} en {args.directorio}")
+            sys.exit(1)
+        print(f"🖥️  {perfil['maquina']['host']} ({perfil['maquina']['cpus']} CPUs, {perfil['maquina']['wrk']})")
+        for clave, c in sorted(perfil['configuraciones'].items()):
+            print(f"  {clave:<45} techo {c['rps_techo']:>12,.1f} RPS | piso P50 {c['piso_latencia_p50']:.3f} ms")
+        return
+
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    escenarios = EjecutorPruebasCarga().comandos_disponibles
+    configuraciones = []
+    for tipo in [args.tipo] if args.tipo else ['get', 'post']:
+        opciones = parsear_comando_wrk(escenarios[tipo]['comando'])
+        pares = [tuple(int(x) for x in c.lower().split('x')) for c in args.config] or \
+                [(opciones['hilos'], opciones['conexiones'])]
+        ruta = '/api/pagos/ProcessMessage' if tipo == 'post' else '/gateway/user/verify/number?username=65663503'
+        esquema = esquema_url(opciones['url'])
+        if args.url and esquema_url(args.url) != esquema:
+            print(f"⚠️  {tipo.upper()} usa {esquema} y --url es {esquema_url(args.url)}: "
+                  f"la calibración quedará como aproximada para este escenario")
+        for hilos, conexiones in pares:
+            configuraciones.append((tipo, hilos, conexiones, opciones['script'], ruta, esquema))
+
+    servidores = {}
+    duracion = parsear_duracion(args.duracion)
+    perfil = cargar_perfil_generador(directorio=args.directorio) or {'configuraciones': {}}
+    perfil['maquina'] = identificar_maquina()
+    try:
+        urls = {}
+        if args.url:
+            urls = {esquema: args.url for *_, esquema in configuraciones}
+        else:
+            for esquema in sorted({esquema for *_, esquema in configuraciones}):
+                servidores[esquema] = ServidorLoopback(args.procesos, tls=esquema == 'https').iniciar()
+                urls[esquema] = servidores[esquema].url
+                print(f"🔁 Servidor loopback {esquema} con {servidores[esquema].procesos} procesos en {urls[esquema]}")
+            print("⚠️  Si el servidor interno se satura antes que wrk, usa --url con un servidor local más rápido (p. ej. nginx)")
+
+        for tipo, hilos, conexiones, script, ruta, esquema in configuraciones:
+            url = urls[esquema]
+            print(f"  ⏱️  {tipo.upper()} -t{hilos} -c{conexiones} ({os.path.basename(script)}, {esquema_url(url)})...")
+            resultado = medir_configuracion(url.rstrip('/') + ruta, hilos, conexiones, script, duracion)
+            resultado['url'] = url
+            perfil['configuraciones'][clave_configuracion(hilos, conexiones, script, resultado['esquema'])] = resultado
+            print(f"     techo {resultado['rps_techo']:,.1f} RPS | piso P50 {resultado['piso_latencia_p50']:.3f} ms")
+    except RuntimeError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    finally:
+        for servidor in servidores.values():
+            servidor.detener()
+
+    os.makedirs(args.directorio, exist_ok=True)
+    with open(ruta_perfil(directorio=args.directorio), 'w', encoding='utf-8') as f:
+        json.dump(perfil, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Perfil del generador guardado en: {ruta_perfil(directorio=args.directorio)}")
+
+if __name__ == "__main__":
+    main()
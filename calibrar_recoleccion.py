@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Calibración del Costo de Recolección en Lua
+Mide contra un servidor local cuánto throughput cuesta cada nivel de recolección por
+respuesta de los scripts mejorados: none (sin response()), sampled (1 de N) y full
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from utilidades_wrk import (MUESTREO_POR_DEFECTO, NIVELES_RECOLECCION, args_recoleccion,
+                            construir_comando_wrk, ejecutar_wrk, parsear_duracion)
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+# Script mejorado y ruta del servidor local para cada escenario
+ESCENARIOS = {
+    'get': ('get_verify_number_enhanced.lua', '/gateway/user/verify/number?username=65663503'),
+    'post': ('post_pagos_enhanced.lua', '/api/pagos/ProcessMessage')
+}
+
+def medir_niveles(url, script, hilos, conexiones, duracion, repeticiones, muestreo, pausa):
+    """Ejecutar cada nivel `repeticiones` veces rotando el orden para repartir la deriva del host"""
+    from generar_reporte_html import AnalizadorHTML
+    analizador = AnalizadorHTML()
+
+    mediciones = {nivel: [] for nivel in NIVELES_RECOLECCION}
+    for ronda in range(repeticiones):
+        desfase = ronda % len(NIVELES_RECOLECCION)
+        for nivel in NIVELES_RECOLECCION[desfase:] + NIVELES_RECOLECCION[:desfase]:
+            comando = construir_comando_wrk(hilos, conexiones, duracion, url, script=script,
+                                            extra=['--latency'], args_script=args_recoleccion(nivel, muestreo))
+            registro = ejecutar_wrk(comando)
+            if 'error' in registro or registro.get('return_code'):
+                raise RuntimeError(registro.get('error') or registro.get('stderr', '').strip()
+                                   or f"wrk terminó con código {registro['return_code']}")
+            datos = analizador.parsear_salida_wrk(registro['stdout'])
+            medicion = {
+                'rps': datos.get('rps_reportado', 0),
+                'latencia_promedio': datos.get('latencia_promedio', 0),
+                'p99': datos.get('percentiles', {}).get('p99', 0)
+            }
+            mediciones[nivel].append(medicion)
+            print(f"  Ronda {ronda + 1}/{repeticiones} {nivel:<8} {medicion['rps']:>12,.1f} RPS | "
+                  f"latencia {medicion['latencia_promedio']:.2f} ms")
+            time.sleep(pausa)
+    return mediciones
+
+def resumir_calibracion(mediciones):
+    """Mediana de RPS por nivel y su costo relativo al nivel 'none'"""
+    base = statistics.median(m['rps'] for m in mediciones['none'])
+    resumen = {}
+    for nivel, lista in mediciones.items():
+        rps = [m['rps'] for m in lista]
+        mediana = statistics.median(rps)
+        resumen[nivel] = {
+            'rps_mediana': mediana,
+            'rps_min': min(rps),
+            'rps_max': max(rps),
+            # Rango relativo entre repeticiones: costos menores que esto no se distinguen del ruido
+            'dispersion': (max(rps) - min(rps)) / mediana if mediana else 0,
+            'costo_throughput': 1 - mediana / base if base else None,
+            'latencia_promedio': statistics.median(m['latencia_promedio'] for m in lista),
+            'p99': statistics.median(m['p99'] for m in lista)
+        }
+    return resumen
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mide el costo en throughput de cada nivel de recolección Lua (none, sampled, full)'
+    )
+    parser.add_argument('tipo', nargs='?', choices=list(ESCENARIOS), help='Script mejorado a calibrar')
+    parser.add_argument('--url', help='Servidor local a usar (por defecto se inicia el servidor simulado)')
+    parser.add_argument('--hilos', type=int, default=2)
+    parser.add_argument('--conexiones', type=int, default=64)
+    parser.add_argument('--duracion', default='10s', help='Duración de cada medición')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Rondas de los tres niveles')
+    parser.add_argument('--muestreo', type=int, default=MUESTREO_POR_DEFECTO, help='N del nivel sampled (1 de N)')
+    parser.add_argument('--pausa', type=float, default=2, help='Segundos entre mediciones')
+    parser.add_argument('--salida', help='Archivo JSON (por defecto calibracion_recoleccion_<ts>.json)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.tipo:
+        parser.error("Indica el tipo de prueba")
+    if args.muestreo < 1:
+        parser.error("--muestreo debe ser al menos 1")
+
+    script, ruta = ESCENARIOS[args.tipo]
+    servidor = None
+    url = args.url
+    if not url:
+        from servidor_simulado import ServidorSimulado
+        servidor = ServidorSimulado().iniciar()
+        url = servidor.url + ruta
+        print(f"🧪 Servidor simulado en {servidor.url}")
+        print("⚠️  El servidor simulado suele saturarse antes que wrk; para medir el costo del cliente usa --url "
+              "con un servidor local más rápido (p. ej. nginx)")
+
+    print(f"🎛️  Calibrando {script} contra {url}")
+    try:
+        mediciones = medir_niveles(url, os.path.join(DIRECTORIO_REPO, script), args.hilos, args.conexiones,
+                                   parsear_duracion(args.duracion), args.repeticiones, args.muestreo, args.pausa)
+    except RuntimeError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    finally:
+        if servidor:
+            servidor.detener()
+
+    resumen = resumir_calibracion(mediciones)
+    ruido = resumen['none']['dispersion']
+    print(f"\n{'='*60}")
+    print("🎛️  COSTO DE CADA NIVEL DE RECOLECCIÓN")
+    print(f"{'='*60}")
+    for nivel, r in resumen.items():
+        etiqueta = f"{nivel} (1/{args.muestreo})" if nivel == 'sampled' else nivel
+        aviso = " (dentro del ruido)" if nivel != 'none' and abs(r['costo_throughput'] or 0) <= max(ruido, r['dispersion']) else ""
+        print(f"  {etiqueta:<16} {r['rps_mediana']:>12,.1f} RPS | costo {r['costo_throughput'] or 0:+.2%}{aviso} | "
+              f"dispersión {r['dispersion']:.2%} | latencia {r['latencia_promedio']:.2f} ms")
+
+    documento = {
+        'timestamp': datetime.now().isoformat(),
+        'script': script,
+        'url': url,
+        'servidor_simulado': servidor is not None,
+        'hilos': args.hilos,
+        'conexiones': args.conexiones,
+        'duracion': args.duracion,
+        'muestreo': args.muestreo,
+        'mediciones': mediciones,
+        'resumen': resumen
+    }
+    salida = args.salida or f"calibracion_recoleccion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Calibración guardada en: {salida}")
+
+if __name__ == "__main__":
+    main()
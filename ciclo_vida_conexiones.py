@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Perfilado del Ciclo de Vida de Conexiones
+Compara conexiones persistentes, una conexión nueva por request y una proporción de reutilización
+"""
+
+import argparse
+import sys
+import time
+
+from utilidades_wrk import (ajustar_comando_wrk, ejecutar_wrk, escribir_script_envoltorio,
+                            parsear_comando_wrk, parsear_duracion)
+
+# Cierra la conexión en la fracción (1 - REUTILIZACION) de los requests, repartida de forma uniforme.
+# Los tres modos usan este mismo request() (REUTILIZACION 1, 0 o la proporción pedida), así que
+# todos pagan la misma llamada a Lua por request y solo difiere la cabecera Connection.
+# Ambas variantes del request se preformatean en init() para no construirlas en cada llamada.
+LUA_CICLO_VIDA = """
+local init_base = init
+local solicitud_persistente, solicitud_cierre
+local contador = 0
+local proporcion_cierre = 1 - REUTILIZACION
+
+function init(args)
+    if init_base then init_base(args) end
+    local cabeceras = {}
+    for clave, valor in pairs(wrk.headers) do cabeceras[clave] = valor end
+    cabeceras["Connection"] = "close"
+    solicitud_persistente = wrk.format()
+    solicitud_cierre = wrk.format(nil, nil, cabeceras)
+end
+
+function request()
+    contador = contador + 1
+    if math.floor(contador * proporcion_cierre) > math.floor((contador - 1) * proporcion_cierre) then
+        return solicitud_cierre
+    end
+    return solicitud_persistente
+end
+"""
+
+def preparar_modos(info_comando, reutilizacion):
+    """Construir los comandos wrk de los tres modos del ciclo de vida"""
+    comando = info_comando['comando']
+    script = parsear_comando_wrk(comando)['script']
+    base = script.rsplit('.', 1)[0]
+
+    modos = [
+        ('persistente', 'persistente', 1.0),
+        ('cierre', 'cierre', 0.0),
+        (f"reutilizacion_{int(round(reutilizacion * 100))}", 'reutilizacion', reutilizacion)
+    ]
+    comandos = []
+    for modo, sufijo, proporcion in modos:
+        script_modo = escribir_script_envoltorio(script, f"{base}_{sufijo}", LUA_CICLO_VIDA,
+                                                 globales={'REUTILIZACION': proporcion})
+        comandos.append((modo, proporcion, ajustar_comando_wrk(comando, script=script_modo)))
+    return comandos
+
+def analizar_ciclo_vida(datos_por_modo):
+    """Cuantificar el costo del handshake a partir de los modos medidos
+
+    wrk inicia el cronómetro de latencia después de conectar y completar el
+    handshake TLS, así que ese costo no aparece en la latencia sino en el
+    throughput. Por la ley de Little cada conexión tarda conexiones/RPS en
+    completar un request; la diferencia de ese tiempo de ciclo respecto al modo
+    persistente es la sobrecarga por request.
+    """
+    persistente = next((d for d in datos_por_modo.values() if d.get('reutilizacion') == 1.0), None)
+    if not persistente or not persistente.get('rps_reportado'):
+        return None
+
+    def tiempo_ciclo(datos):
+        return datos['conexiones'] / datos['rps_reportado'] * 1000 if datos.get('rps_reportado') else None
+
+    ciclo_base = tiempo_ciclo(persistente)
+    analisis = {}
+    for modo, datos in datos_por_modo.items():
+        ciclo = tiempo_ciclo(datos)
+        fraccion_nuevas = 1 - datos['reutilizacion']
+        total_requests = datos.get('total_requests', 0)
+        resultado = {
+            'reutilizacion': datos['reutilizacion'],
+            'rps': datos.get('rps_reportado', 0),
+            'latencia_promedio': datos.get('latencia_promedio', 0),
+            'tiempo_ciclo_ms': ciclo,
+            'sobrecarga_por_request_ms': ciclo - ciclo_base if ciclo is not None else None,
+            'cambio_throughput': datos.get('rps_reportado', 0) / persistente['rps_reportado'] - 1,
+            'errores_socket': datos.get('total_errores', 0),
+            'errores_conexion': datos.get('errores', {}).get('conexion', 0),
+            'errores_por_mil': datos.get('total_errores', 0) / total_requests * 1000 if total_requests else 0
+        }
+        if ciclo is not None and fraccion_nuevas > 0:
+            resultado['sobrecarga_por_conexion_nueva_ms'] = (ciclo - ciclo_base) / fraccion_nuevas
+        analisis[modo] = resultado
+    return analisis
+
+def crear_seccion_ciclo_vida(analisis):
+    """Crear la tabla y los gráficos de la sección de ciclo de vida del dashboard"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    modos = list(analisis.keys())
+    filas = []
+    for modo in modos:
+        a = analisis[modo]
+        sobrecarga_nueva = a.get('sobrecarga_por_conexion_nueva_ms')
+        filas.append(
+            f"<tr><td>{modo}</td><td>{a['reutilizacion']:.0%}</td><td>{a['rps']:.1f}</td>"
+            f"<td>{a['cambio_throughput']:+.1%}</td><td>{a['tiempo_ciclo_ms'] or 0:.2f}</td>"
+            f"<td>{a['sobrecarga_por_request_ms'] or 0:.2f}</td>"
+            f"<td>{'-' if sobrecarga_nueva is None else f'{sobrecarga_nueva:.2f}'}</td>"
+            f"<td>{a['latencia_promedio']:.1f}</td><td>{a['errores_socket']:,} ({a['errores_por_mil']:.2f}‰)</td></tr>"
+        )
+    tabla = (
+        "<table class=\"tabla-etapas\"><tr><th>Modo</th><th>Reutilización</th><th>RPS</th>"
+        "<th>Δ Throughput</th><th>Ciclo por conexión (ms)</th><th>Sobrecarga por request (ms)</th>"
+        "<th>Handshake por conexión nueva (ms)</th><th>Latencia Prom (ms)</th><th>Errores de socket</th></tr>"
+        + ''.join(filas) + "</table>"
+        "<p>wrk mide la latencia después del connect y el handshake TLS; la sobrecarga se estima con la "
+        "ley de Little como la diferencia del tiempo de ciclo (conexiones / RPS) respecto al modo persistente.</p>"
+    )
+
+    fig = make_subplots(rows=1, cols=3, subplot_titles=['RPS por Modo', 'Sobrecarga por Request (ms)',
+                                                        'Errores de Socket por 1000 Requests'])
+    colores = ['#4ECDC4', '#FF6B6B', '#FFE66D']
+    fig.add_trace(go.Bar(x=modos, y=[analisis[m]['rps'] for m in modos], marker_color=colores), row=1, col=1)
+    fig.add_trace(go.Bar(x=modos, y=[analisis[m]['sobrecarga_por_request_ms'] or 0 for m in modos],
+                         marker_color=colores), row=1, col=2)
+    fig.add_trace(go.Bar(x=modos, y=[analisis[m]['errores_por_mil'] for m in modos],
+                         marker_color=colores), row=1, col=3)
+    fig.update_layout(height=400, showlegend=False)
+    return tabla + fig.to_html(full_html=False, include_plotlyjs=False)
+
+def ejecutar_ciclo_vida(tipo_prueba, reutilizacion, duracion=None, conexiones=None, pausa=10):
+    """Ejecutar el mismo escenario en los tres modos y guardar los resultados"""
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    ejecutor = EjecutorPruebasCarga()
+    info = dict(ejecutor.comandos_disponibles[tipo_prueba])
+    info['comando'] = ajustar_comando_wrk(info['comando'], duracion=duracion, conexiones=conexiones)
+
+    modos = preparar_modos(info, reutilizacion)
+    for numero, (modo, proporcion, comando) in enumerate(modos):
+        if numero:
+            print(f"\n⏳ Esperando {pausa} segundos antes del siguiente modo...")
+            time.sleep(pausa)
+        print(f"\n🔄 Modo {modo} (reutilización {proporcion:.0%})")
+        print(f"⚙️  Comando: {comando}")
+        registro = ejecutar_wrk(comando)
+        registro.update({
+            'nombre_prueba': f"{info['nombre']} - {modo}",
+            'descripcion': info['descripcion'],
+            'modo_conexion': modo,
+            'reutilizacion': proporcion,
+            'conexiones': parsear_comando_wrk(comando)['conexiones']
+        })
+        if 'error' in registro:
+            print(f"❌ {registro['error']}")
+        ejecutor.resultados[f"{tipo_prueba}_{modo}"] = registro
+
+    return ejecutor.guardar_resultados()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compara conexiones persistentes, Connection: close y una proporción de reutilización'
+    )
+    parser.add_argument('tipo', nargs='?', choices=['get', 'post'], help='Prueba a ejecutar')
+    parser.add_argument('--reutilizacion', type=float, default=0.8,
+                        help='Fracción de requests que reutilizan la conexión en el modo mixto (0-1)')
+    parser.add_argument('--duracion', help='Duración de cada modo (por defecto la del escenario)')
+    parser.add_argument('--conexiones', type=int, help='Conexiones concurrentes (por defecto las del escenario)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.tipo:
+        parser.error("Indica el tipo de prueba")
+    if not 0 < args.reutilizacion < 1:
+        parser.error("--reutilizacion debe estar entre 0 y 1 (sin incluirlos)")
+
+    duracion = parsear_duracion(args.duracion) if args.duracion else None
+    archivo = ejecutar_ciclo_vida(args.tipo, args.reutilizacion, duracion, args.conexiones)
+
+    from generar_reporte_html import AnalizadorHTML
+    analizador = AnalizadorHTML()
+    analizador.cargar_resultados(archivo)
+    analisis = analizador.analisis_ciclo_vida
+    if analisis:
+        print(f"\n{'='*60}")
+        print("🔌 COSTO DEL CICLO DE VIDA DE CONEXIONES")
+        print(f"{'='*60}")
+        for modo, a in analisis.items():
+            print(f"  {modo:<20} RPS {a['rps']:>10.1f} ({a['cambio_throughput']:+.1%}) | "
+                  f"sobrecarga {a['sobrecarga_por_request_ms'] or 0:.2f} ms/request | "
+                  f"errores {a['errores_socket']:,}")
+    print("\nPara generar el dashboard ejecuta: python3 generar_reporte_html.py")
+
+if __name__ == "__main__":
+    main()
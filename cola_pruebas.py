@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Cola de Pruebas de Carga Compartida
+Daemon local que ejecuta los trabajos por prioridad sin exceder la capacidad del host
+ni atacar el mismo destino dos veces a la vez, y cliente para enviarlos y consultarlos
+"""
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from utilidades_wrk import ajustar_comando_wrk, ejecutar_wrk, parsear_comando_wrk, parsear_duracion
+
+PUERTO_COLA = 8095
+ARCHIVO_ESTADO = 'cola_pruebas_estado.json'
+# Descriptores que se dejan libres para el propio sistema al calcular la capacidad de conexiones
+RESERVA_DESCRIPTORES = 1024
+# Segundos que puede esperar un trabajo que no cabe antes de reservar la capacidad que necesita
+ESPERA_RESERVA = 600
+
+ESTADOS_FINALES = ('completado', 'fallido', 'cancelado', 'interrumpido')
+
+def capacidad_por_defecto():
+    """Estimar la capacidad del host: conexiones según el límite de descriptores e hilos según los CPU"""
+    limite_descriptores = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    if limite_descriptores == resource.RLIM_INFINITY:
+        limite_descriptores = 1_000_000
+    return {
+        'conexiones': max(1, limite_descriptores - RESERVA_DESCRIPTORES),
+        'hilos': os.cpu_count() or 1
+    }
+
+def destino_de_url(url):
+    """Identificar el destino por host y puerto para no atacarlo con dos trabajos a la vez"""
+    partes = urlsplit(url or '')
+    puerto = partes.port or (443 if partes.scheme == 'https' else 80)
+    return f"{partes.hostname}:{puerto}" if partes.hostname else (url or 'desconocido')
+
+def campo_entero(solicitud, campo, defecto, minimo=None):
+    """Leer un entero del trabajo enviado; null o ausente toma el valor por defecto"""
+    valor = solicitud.get(campo)
+    if valor is None:
+        return defecto
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ValueError(f"'{campo}' debe ser un entero")
+    try:
+        entero = int(valor)
+    except ValueError:
+        raise ValueError(f"'{campo}' debe ser un entero, no {valor!r}")
+    if isinstance(valor, float) and entero != valor:
+        raise ValueError(f"'{campo}' debe ser un entero, no {valor!r}")
+    if minimo is not None and entero < minimo:
+        raise ValueError(f"'{campo}' debe ser al menos {minimo}")
+    return entero
+
+class ColaPruebas:
+    def __init__(self, capacidad, archivo_estado=ARCHIVO_ESTADO, espera_reserva=ESPERA_RESERVA):
+        self.capacidad = capacidad
+        self.archivo_estado = archivo_estado
+        self.espera_reserva = espera_reserva
+        self.trabajos = {}
+        self._contador = itertools.count(1)
+        self._condicion = threading.Condition()
+        self._detener = False
+        self.cargar_estado()
+
+    def cargar_estado(self):
+        """Recuperar la cola tras un reinicio; lo que estaba en ejecución queda interrumpido"""
+        if not os.path.exists(self.archivo_estado):
+            return
+        with open(self.archivo_estado, 'r', encoding='utf-8') as f:
+            trabajos = json.load(f)
+        for trabajo in trabajos:
+            if trabajo['estado'] == 'ejecutando':
+                trabajo['estado'] = 'interrumpido'
+                trabajo['error'] = 'El daemon se detuvo durante la ejecución'
+            self.trabajos[trabajo['id']] = trabajo
+        if self.trabajos:
+            self._contador = itertools.count(max(self.trabajos) + 1)
+
+    def guardar_estado(self):
+        """Escribir el estado de forma atómica (se llama con la condición tomada)"""
+        temporal = f"{self.archivo_estado}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(list(self.trabajos.values()), f, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.archivo_estado)
+
+    def enviar(self, solicitud):
+        """Validar un trabajo y encolarlo; devuelve el trabajo registrado"""
+        if not isinstance(solicitud, dict):
+            raise ValueError("El trabajo debe ser un objeto JSON")
+        for campo in ('comando', 'nombre', 'solicitante', 'destino'):
+            if solicitud.get(campo) is not None and not isinstance(solicitud[campo], str):
+                raise ValueError(f"'{campo}' debe ser texto")
+        comando = solicitud.get('comando')
+        if not comando:
+            raise ValueError("El trabajo necesita un comando wrk")
+        opciones = parsear_comando_wrk(comando)
+        conexiones = campo_entero(solicitud, 'conexiones', opciones['conexiones'] or 1, minimo=1)
+        hilos = campo_entero(solicitud, 'hilos', opciones['hilos'] or 1, minimo=1)
+        prioridad = campo_entero(solicitud, 'prioridad', 0)
+        if conexiones > self.capacidad['conexiones'] or hilos > self.capacidad['hilos']:
+            raise ValueError(
+                f"El trabajo pide {conexiones} conexiones y {hilos} hilos; la capacidad del host es "
+                f"{self.capacidad['conexiones']} conexiones y {self.capacidad['hilos']} hilos"
+            )
+
+        with self._condicion:
+            identificador = next(self._contador)
+            trabajo = {
+                'id': identificador,
+                'nombre': solicitud.get('nombre') or f"trabajo_{identificador}",
+                'solicitante': solicitud.get('solicitante', ''),
+                'prioridad': prioridad,
+                'comando': comando,
+                'conexiones': conexiones,
+                'hilos': hilos,
+                'destino': solicitud.get('destino') or destino_de_url(opciones['url']),
+                'estado': 'en_cola',
+                'enviado': time.time(),
+                'inicio': None,
+                'fin': None,
+                'espera_s': None,
+                'ejecucion_s': None,
+                'archivo_resultados': None,
+                'error': None
+            }
+            self.trabajos[identificador] = trabajo
+            self.guardar_estado()
+            self._condicion.notify_all()
+        return dict(trabajo)
+
+    def cancelar(self, identificador):
+        """Cancelar un trabajo que aún no empezó"""
+        with self._condicion:
+            trabajo = self.trabajos.get(identificador)
+            if not trabajo:
+                raise KeyError(identificador)
+            if trabajo['estado'] != 'en_cola':
+                raise ValueError(f"El trabajo {identificador} está {trabajo['estado']} y no puede cancelarse")
+            trabajo['estado'] = 'cancelado'
+            trabajo['fin'] = time.time()
+            self.guardar_estado()
+            self._condicion.notify_all()
+            return dict(trabajo)
+
+    def obtener(self, identificador):
+        with self._condicion:
+            trabajo = self.trabajos.get(identificador)
+            return dict(trabajo) if trabajo else None
+
+    def uso_actual(self):
+        """Conexiones e hilos ocupados por los trabajos en ejecución"""
+        en_ejecucion = [t for t in self.trabajos.values() if t['estado'] == 'ejecutando']
+        return {
+            'conexiones': sum(t['conexiones'] for t in en_ejecucion),
+            'hilos': sum(t['hilos'] for t in en_ejecucion),
+            'destinos': sorted({t['destino'] for t in en_ejecucion})
+        }
+
+    def resumen(self):
+        with self._condicion:
+            return {
+                'capacidad': self.capacidad,
+                'uso': self.uso_actual(),
+                'trabajos': [dict(t) for t in sorted(self.trabajos.values(), key=lambda t: t['id'])]
+            }
+
+    def planificar(self):
+        """Elegir los trabajos que pueden empezar ahora (se llama con la condición tomada)
+
+        Se recorren por prioridad y orden de llegada. Un trabajo cuyo destino ya
+        está en uso se salta; uno que no cabe deja pasar a los siguientes, salvo
+        que lleve más de `espera_reserva` segundos esperando: entonces reserva la
+        capacidad y nadie de menor prioridad puede adelantarlo.
+        """
+        uso = self.uso_actual()
+        conexiones_libres = self.capacidad['conexiones'] - uso['conexiones']
+        hilos_libres = self.capacidad['hilos'] - uso['hilos']
+        destinos_ocupados = set(uso['destinos'])
+        ahora = time.time()
+
+        elegidos = []
+        esperando = sorted((t for t in self.trabajos.values() if t['estado'] == 'en_cola'),
+                           key=lambda t: (-t['prioridad'], t['enviado']))
+        for trabajo in esperando:
+            if trabajo['destino'] in destinos_ocupados:
+                continue
+            if trabajo['conexiones'] <= conexiones_libres and trabajo['hilos'] <= hilos_libres:
+                elegidos.append(trabajo)
+                conexiones_libres -= trabajo['conexiones']
+                hilos_libres -= trabajo['hilos']
+                destinos_ocupados.add(trabajo['destino'])
+            elif ahora - trabajo['enviado'] >= self.espera_reserva:
+                break
+        return elegidos
+
+    def ciclo_planificador(self):
+        """Arrancar trabajos cada vez que cambia la cola o termina una ejecución"""
+        with self._condicion:
+            while not self._detener:
+                for trabajo in self.planificar():
+                    trabajo['estado'] = 'ejecutando'
+                    trabajo['inicio'] = time.time()
+                    trabajo['espera_s'] = trabajo['inicio'] - trabajo['enviado']
+                    print(f"▶️  [{trabajo['id']}] {trabajo['nombre']} tras {trabajo['espera_s']:.1f}s en cola "
+                          f"({trabajo['conexiones']} conexiones, {trabajo['hilos']} hilos, {trabajo['destino']})")
+                    threading.Thread(target=self.ejecutar_trabajo, args=(trabajo,), daemon=True).start()
+                self.guardar_estado()
+                # El tiempo de espera reevalúa las reservas aunque no lleguen eventos
+                self._condicion.wait(timeout=30)
+
+    def ejecutar_trabajo(self, trabajo):
+        """Correr wrk y guardar sus resultados con el formato del ejecutor"""
+        registro = ejecutar_wrk(trabajo['comando'])
+        fin = time.time()
+        registro.update({
+            'nombre_prueba': trabajo['nombre'],
+            'descripcion': f"Trabajo {trabajo['id']} de la cola (prioridad {trabajo['prioridad']})",
+            'espera_cola_s': trabajo['espera_s'],
+            'ejecucion_cola_s': fin - trabajo['inicio']
+        })
+        marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archivo = f"resultados_pruebas_carga_{marca}_cola{trabajo['id']}.json"
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump({trabajo['nombre']: registro}, f, indent=2, ensure_ascii=False)
+
+        with self._condicion:
+            trabajo['fin'] = fin
+            trabajo['ejecucion_s'] = fin - trabajo['inicio']
+            trabajo['archivo_resultados'] = os.path.abspath(archivo)
+            if 'error' in registro or registro.get('return_code'):
+                trabajo['estado'] = 'fallido'
+                trabajo['error'] = registro.get('error') or registro.get('stderr', '')[-500:]
+            else:
+                trabajo['estado'] = 'completado'
+            print(f"{'✅' if trabajo['estado'] == 'completado' else '❌'} [{trabajo['id']}] {trabajo['nombre']} "
+                  f"{trabajo['estado']} en {trabajo['ejecucion_s']:.1f}s")
+            self.guardar_estado()
+            self._condicion.notify_all()
+
+    def detener(self):
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify_all()
+
+class ManejadorCola(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    cola = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def identificador(self):
+        try:
+            return int(self.path.rstrip('/').rsplit('/', 1)[1])
+        except ValueError:
+            return None
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/trabajos':
+            self.responder(200, self.cola.resumen())
+        elif self.path.startswith('/trabajos/'):
+            trabajo = self.cola.obtener(self.identificador())
+            self.responder(200, trabajo) if trabajo else self.responder(404, {'error': 'trabajo no encontrado'})
+        else:
+            self.responder(404, {'error': 'no encontrado'})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/trabajos':
+            self.responder(404, {'error': 'no encontrado'})
+            return
+        longitud = int(self.headers.get('Content-Length') or 0)
+        try:
+            solicitud = json.loads(self.rfile.read(longitud) or b'{}')
+            self.responder(201, self.cola.enviar(solicitud))
+        except (ValueError, TypeError) as e:
+            self.responder(400, {'error': str(e)})
+
+    def do_DELETE(self):
+        try:
+            self.responder(200, self.cola.cancelar(self.identificador()))
+        except KeyError:
+            self.responder(404, {'error': 'trabajo no encontrado'})
+        except ValueError as e:
+            self.responder(409, {'error': str(e)})
+
+def solicitar(servidor, metodo, ruta, cuerpo=None):
+    """Llamar al daemon y devolver la respuesta JSON; los errores HTTP se convierten en RuntimeError"""
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+    peticion = urllib.request.Request(f"{servidor.rstrip('/')}{ruta}", data=datos, method=metodo,
+                                      headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(peticion, timeout=10) as respuesta:
+            return json.loads(respuesta.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read() or b'{}').get('error', str(e)))
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"No se pudo contactar la cola en {servidor}: {e.reason}. "
+                           f"¿Está corriendo 'python3 cola_pruebas.py daemon'?")
+
+def preparar_trabajo(tipo=None, comando=None, duracion=None, conexiones=None, hilos=None):
+    """Construir el comando del trabajo con rutas absolutas para que el daemon lo ejecute desde su directorio"""
+    if not comando:
+        from ejecutar_pruebas_carga import EjecutorPruebasCarga
+        comando = EjecutorPruebasCarga().comandos_disponibles[tipo]['comando']
+    script = parsear_comando_wrk(comando)['script']
+    return ajustar_comando_wrk(
+        comando,
+        duracion=duracion,
+        conexiones=conexiones,
+        hilos=hilos,
+        script=os.path.abspath(script) if script else None
+    )
+
+def formatear_segundos(valor):
+    return '-' if valor is None else f"{valor:.1f}s"
+
+def mostrar_trabajo(trabajo):
+    print(f"  [{trabajo['id']:>3}] {trabajo['nombre']:<24} {trabajo['estado']:<12} prioridad {trabajo['prioridad']:>3} | "
+          f"{trabajo['conexiones']:>6} conexiones, {trabajo['hilos']:>3} hilos | {trabajo['destino']:<28} | "
+          f"espera {formatear_segundos(trabajo['espera_s'])}, ejecución {formatear_segundos(trabajo['ejecucion_s'])}")
+
+def esperar_trabajo(servidor, identificador, intervalo=5):
+    """Consultar el trabajo hasta que termine"""
+    while True:
+        trabajo = solicitar(servidor, 'GET', f"/trabajos/{identificador}")
+        if trabajo['estado'] in ESTADOS_FINALES:
+            return trabajo
+        time.sleep(intervalo)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Cola compartida de pruebas de carga: daemon planificador y cliente'
+    )
+    parser.add_argument('--servidor', default=f"http://127.0.0.1:{PUERTO_COLA}", help='URL del daemon de la cola')
+    subparsers = parser.add_subparsers(dest='accion')
+
+    daemon = subparsers.add_parser('daemon', help='Iniciar el daemon planificador')
+    daemon.add_argument('--puerto', type=int, default=PUERTO_COLA)
+    daemon.add_argument('--max-conexiones', type=int, help='Conexiones simultáneas del host (por defecto según ulimit -n)')
+    daemon.add_argument('--max-hilos', type=int, help='Hilos de wrk simultáneos (por defecto la cantidad de CPU)')
+    daemon.add_argument('--espera-reserva', type=int, default=ESPERA_RESERVA,
+                        help='Segundos de espera tras los que un trabajo grande reserva capacidad')
+    daemon.add_argument('--estado', default=ARCHIVO_ESTADO, help='Archivo donde se persiste la cola')
+
+    enviar = subparsers.add_parser('enviar', help='Encolar un trabajo')
+    enviar.add_argument('tipo', nargs='?', choices=['get', 'post'], help='Escenario a ejecutar')
+    enviar.add_argument('--comando', help='Comando wrk completo en lugar de un escenario')
+    enviar.add_argument('--prioridad', type=int, default=0, help='Mayor número, antes se ejecuta')
+    enviar.add_argument('--conexiones', type=int, help='Conexiones del trabajo (ajusta el comando)')
+    enviar.add_argument('--hilos', type=int, help='Hilos del trabajo (ajusta el comando)')
+    enviar.add_argument('--duracion', help='Duración del trabajo (ajusta el comando)')
+    enviar.add_argument('--destino', help='Identificador del destino (por defecto host:puerto de la URL)')
+    enviar.add_argument('--nombre', help='Nombre del trabajo en los resultados')
+    enviar.add_argument('--esperar', action='store_true', help='Esperar a que el trabajo termine')
+
+    estado = subparsers.add_parser('estado', help='Ver la cola o un trabajo')
+    estado.add_argument('id', nargs='?', type=int)
+
+    cancelar = subparsers.add_parser('cancelar', help='Cancelar un trabajo en cola')
+    cancelar.add_argument('id', type=int)
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+
+    if args.accion == 'daemon':
+        capacidad = capacidad_por_defecto()
+        capacidad['conexiones'] = args.max_conexiones or capacidad['conexiones']
+        capacidad['hilos'] = args.max_hilos or capacidad['hilos']
+        cola = ColaPruebas(capacidad, args.estado, args.espera_reserva)
+        manejador = type('ManejadorConfigurado', (ManejadorCola,), {'cola': cola})
+        servidor = ThreadingHTTPServer(('127.0.0.1', args.puerto), manejador)
+        servidor.daemon_threads = True
+        threading.Thread(target=cola.ciclo_planificador, daemon=True).start()
+        print(f"🗂️  Cola de pruebas escuchando en http://127.0.0.1:{args.puerto}")
+        print(f"   Capacidad: {capacidad['conexiones']:,} conexiones, {capacidad['hilos']} hilos")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            cola.detener()
+            servidor.server_close()
+        return
+
+    try:
+        if args.accion == 'enviar':
+            if not args.tipo and not args.comando:
+                parser.error("Indica el tipo de prueba o --comando")
+            comando = preparar_trabajo(args.tipo, args.comando,
+                                       parsear_duracion(args.duracion) if args.duracion else None,
+                                       args.conexiones, args.hilos)
+            trabajo = solicitar(args.servidor, 'POST', '/trabajos', {
+                'comando': comando,
+                'prioridad': args.prioridad,
+                'destino': args.destino,
+                'nombre': args.nombre or (f"{args.tipo}_test" if args.tipo else None),
+                'solicitante': os.environ.get('USER', '')
+            })
+            print(f"📥 Trabajo {trabajo['id']} encolado ({trabajo['conexiones']} conexiones, "
+                  f"{trabajo['hilos']} hilos, destino {trabajo['destino']})")
+            if args.esperar:
+                trabajo = esperar_trabajo(args.servidor, trabajo['id'])
+                mostrar_trabajo(trabajo)
+                if trabajo['archivo_resultados']:
+                    print(f"📁 Resultados: {trabajo['archivo_resultados']}")
+                sys.exit(0 if trabajo['estado'] == 'completado' else 1)
+        elif args.accion == 'estado':
+            if args.id:
+                trabajo = solicitar(args.servidor, 'GET', f"/trabajos/{args.id}")
+                mostrar_trabajo(trabajo)
+                if trabajo.get('error'):
+                    print(f"  ⚠️  {trabajo['error']}")
+                return
+            resumen = solicitar(args.servidor, 'GET', '/trabajos')
+            uso, capacidad = resumen['uso'], resumen['capacidad']
+            print(f"🗂️  Uso: {uso['conexiones']:,}/{capacidad['conexiones']:,} conexiones, "
+                  f"{uso['hilos']}/{capacidad['hilos']} hilos | destinos activos: {', '.join(uso['destinos']) or '-'}")
+            for trabajo in resumen['trabajos']:
+                mostrar_trabajo(trabajo)
+        elif args.accion == 'cancelar':
+            trabajo = solicitar(args.servidor, 'DELETE', f"/trabajos/{args.id}")
+            print(f"🚫 Trabajo {trabajo['id']} cancelado")
+    except RuntimeError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Comparación A/B de Destinos
+Ejecuta el mismo escenario contra varias URL base (p. ej. gateway blue y green) a la vez en
+procesos aislados o intercalado en rebanadas cortas, y compara cada destino con el primero
+mediante pruebas t pareadas por intervalo
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from estadisticas import prueba_t_pareada
+from utilidades_wrk import (agregar_opcion_wrk, ajustar_comando_wrk, ejecutar_wrk, ejecutar_wrk_por_intervalos,
+                            parsear_comando_wrk, parsear_duracion)
+
+MODOS_DESTINOS = ['simultaneo', 'intercalado']
+REBANADA = 10
+CONFIANZA_DESTINOS = 0.95
+# Margen para que todos los procesos arranquen wrk en el mismo instante
+ARRANQUE_DESTINOS = 2.0
+
+METRICAS_DESTINOS = {
+    'rps': ('RPS', lambda datos: datos.get('rps_reportado') or datos.get('rps', 0)),
+    'latencia_promedio': ('Latencia (ms)', lambda datos: datos.get('latencia_promedio', 0)),
+    'p99': ('P99 (ms)', lambda datos: datos.get('percentiles', {}).get('p99'))
+}
+
+def cambiar_base(url, base):
+    """Reemplazar esquema, host y prefijo de la URL conservando la ruta y la consulta del escenario"""
+    original, nueva = urlsplit(url), urlsplit(base)
+    ruta = nueva.path.rstrip('/') + original.path
+    return urlunsplit((nueva.scheme, nueva.netloc, ruta, original.query, ''))
+
+def parsear_destino(texto):
+    """'nombre=https://host' (o solo la URL, con el host como nombre)"""
+    nombre, _, url = texto.partition('=') if '=' in texto.split('://')[0] else ('', '', texto)
+    if not urlsplit(url).netloc:
+        raise ValueError(f"Destino sin URL base válida: {texto}")
+    return nombre or urlsplit(url).netloc, url
+
+def repartir_cpus(destinos):
+    """CPUs disjuntas para cada destino (None si la plataforma no permite fijar afinidad)"""
+    if not hasattr(os, 'sched_getaffinity'):
+        return [None] * destinos
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < destinos:
+        return [None] * destinos
+    return [cpus[i::destinos] for i in range(destinos)]
+
+def _ejecutar_destino(comando, intervalo, cpus, inicio):
+    """Proceso generador de un destino: fija su afinidad y corre wrk por intervalos desde el inicio común"""
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    time.sleep(max(0.0, inicio - time.time()))
+    return ejecutar_wrk_por_intervalos(comando, intervalo)
+
+def ejecutar_simultaneo(comandos, intervalo=REBANADA, aislar=True):
+    """Todos los destinos a la vez, cada uno en su proceso y con sus CPUs; intervalos alineados en el tiempo"""
+    nombres = list(comandos)
+    cpus = repartir_cpus(len(nombres)) if aislar else [None] * len(nombres)
+    inicio = time.time() + ARRANQUE_DESTINOS
+    with ProcessPoolExecutor(max_workers=len(nombres)) as ejecutor:
+        futuros = {nombre: ejecutor.submit(_ejecutar_destino, comandos[nombre], intervalo, cpus[i], inicio)
+                   for i, nombre in enumerate(nombres)}
+        tramos = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+    return {nombre: {'inicio': inicio, 'intervalos': tramos[nombre], 'cpus': cpus[i]}
+            for i, nombre in enumerate(nombres)}
+
+def ejecutar_intercalado(comandos, rebanada=REBANADA, rondas=None):
+    """Rebanadas cortas alternando destinos; las rondas impares invierten el orden (ABBA)"""
+    nombres = list(comandos)
+    duracion = parsear_comando_wrk(next(iter(comandos.values())))['duracion'] or 60
+    rondas = rondas or max(2, int(duracion // rebanada))
+    inicio = time.time()
+    registros = {nombre: {'inicio': inicio, 'intervalos': [], 'cpus': None} for nombre in nombres}
+    for ronda in range(rondas):
+        orden = nombres if ronda % 2 == 0 else nombres[::-1]
+        for nombre in orden:
+            print(f"  🔀 Ronda {ronda + 1}/{rondas}: {nombre}")
+            marca_inicio = time.time()
+            registro = ejecutar_wrk(ajustar_comando_wrk(comandos[nombre], duracion=rebanada))
+            registro.update({
+                't_inicio': marca_inicio - inicio,
+                't_fin': marca_inicio - inicio + rebanada,
+                'marca_inicio': marca_inicio,
+                'ronda': ronda
+            })
+            registros[nombre]['intervalos'].append(registro)
+    return registros
+
+def comparar_destinos(registros, base, analizador, confianza=CONFIANZA_DESTINOS):
+    """Métricas por intervalo de cada destino y prueba t pareada contra el destino base"""
+    metricas = {}
+    for nombre, registro in registros.items():
+        datos = [analizador.parsear_salida_wrk(tramo.get('stdout', '')) for tramo in registro['intervalos']]
+        metricas[nombre] = {
+            metrica: [extraer(d) if d.get('total_requests') else None for d in datos]
+            for metrica, (_, extraer) in METRICAS_DESTINOS.items()
+        }
+        metricas[nombre]['errores'] = sum(d.get('total_errores', 0) for d in datos)
+        metricas[nombre]['requests'] = sum(d.get('total_requests', 0) for d in datos)
+
+    comparacion = {}
+    for nombre in registros:
+        if nombre == base:
+            continue
+        comparacion[nombre] = {}
+        for metrica in METRICAS_DESTINOS:
+            prueba = prueba_t_pareada(metricas[base][metrica], metricas[nombre][metrica], confianza)
+            validos = [v for v in metricas[base][metrica] if v is not None]
+            media_base = sum(validos) / len(validos) if validos else None
+            prueba['relativa'] = prueba['diferencia'] / media_base \
+                if prueba['diferencia'] is not None and media_base else None
+            prueba['significativa'] = prueba['p_valor'] is not None and prueba['p_valor'] < 1 - confianza
+            comparacion[nombre][metrica] = prueba
+    return {'base': base, 'confianza': confianza, 'metricas': metricas, 'comparacion': comparacion}
+
+def _media(valores):
+    validos = [v for v in valores if v is not None]
+    return sum(validos) / len(validos) if validos else None
+
+def crear_seccion_destinos(resultado):
+    """Tabla por destino con la diferencia frente al base y su significancia"""
+    base = resultado['base']
+    filas = []
+    for nombre, metricas in resultado['metricas'].items():
+        celdas = []
+        for metrica in METRICAS_DESTINOS:
+            media = _media(metricas[metrica])
+            texto = '-' if media is None else f"{media:,.2f}"
+            prueba = resultado['comparacion'].get(nombre, {}).get(metrica)
+            if prueba and prueba['diferencia'] is not None:
+                relativa = f" ({prueba['relativa']:+.1%})" if prueba['relativa'] is not None else ''
+                p = '-' if prueba['p_valor'] is None else f"{prueba['p_valor']:.3g}"
+                marca = ' ✱' if prueba['significativa'] else ''
+                texto += f"<br><small>Δ {prueba['diferencia']:+,.2f}{relativa}, p={p}{marca}</small>"
+            celdas.append(f"<td>{texto}</td>")
+        tasa = metricas['errores'] / metricas['requests'] if metricas['requests'] else 0
+        etiqueta = f"{nombre} (base)" if nombre == base else nombre
+        filas.append(f"<tr><td>{etiqueta}</td>{''.join(celdas)}<td>{tasa:.2%}</td></tr>")
+    return (
+        f"<p>Modo {resultado['modo']}: {resultado['pares']} intervalos por destino. Cada destino se compara con "
+        f"<b>{base}</b> con una prueba t pareada por intervalo (misma ventana de tiempo o misma ronda), que "
+        f"descuenta la deriva del día. ✱ diferencia significativa al {resultado['confianza']:.0%}.</p>"
+        "<table class=\"tabla-etapas\"><tr><th>Destino</th>"
+        + ''.join(f"<th>{titulo}</th>" for titulo, _ in METRICAS_DESTINOS.values())
+        + "<th>Errores</th></tr>" + ''.join(filas) + "</table>"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta el mismo escenario contra varias URL base y compara los destinos con significancia'
+    )
+    parser.add_argument('tipo', nargs='?', choices=['get', 'post'], help='Escenario a ejecutar')
+    parser.add_argument('--destino', action='append', default=[],
+                        help='Destino nombre=URL_BASE (repetible, al menos dos; el primero es la base)')
+    parser.add_argument('--modo', choices=MODOS_DESTINOS, default='intercalado',
+                        help='simultaneo: a la vez en procesos aislados; intercalado: rebanadas alternadas')
+    parser.add_argument('--rebanada', default=f'{REBANADA}s', help='Duración de cada intervalo o rebanada')
+    parser.add_argument('--rondas', type=int, help='Rondas del modo intercalado (por defecto duración / rebanada)')
+    parser.add_argument('--duracion', help='Duración por destino (por defecto la del escenario)')
+    parser.add_argument('--conexiones', type=int, help='Conexiones por destino (por defecto las del escenario)')
+    parser.add_argument('--hilos', type=int, help='Hilos de wrk por destino (por defecto los del escenario)')
+    parser.add_argument('--sin-aislar', action='store_true', help='No fijar CPUs disjuntas en el modo simultáneo')
+    parser.add_argument('--confianza', type=float, default=CONFIANZA_DESTINOS, help='Nivel de confianza')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.tipo:
+        parser.error("Indica el escenario")
+    try:
+        destinos = dict(parsear_destino(texto) for texto in args.destino)
+    except ValueError as e:
+        parser.error(str(e))
+    if len(destinos) < 2:
+        parser.error("Indica al menos dos destinos distintos con --destino")
+
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    from generar_reporte_html import AnalizadorHTML
+    ejecutor = EjecutorPruebasCarga()
+    if not ejecutor.verificar_archivos_lua():
+        sys.exit(1)
+    info = ejecutor.comandos_disponibles[args.tipo]
+    duracion = parsear_duracion(args.duracion) if args.duracion else None
+    comando = agregar_opcion_wrk(ajustar_comando_wrk(info['comando'], duracion=duracion,
+                                                     conexiones=args.conexiones, hilos=args.hilos), '--latency')
+    url = parsear_comando_wrk(comando)['url']
+    comandos = {nombre: ajustar_comando_wrk(comando, url=cambiar_base(url, base)) for nombre, base in destinos.items()}
+    rebanada = parsear_duracion(args.rebanada)
+
+    print(f"🆚 {info['nombre']} contra {len(comandos)} destinos ({args.modo})")
+    for nombre, comando_destino in comandos.items():
+        print(f"  {nombre}: {parsear_comando_wrk(comando_destino)['url']}")
+    if args.modo == 'simultaneo':
+        print("⚠️  Los destinos comparten la máquina generadora: cada uno recibe una parte de las CPUs")
+        registros = ejecutar_simultaneo(comandos, rebanada, aislar=not args.sin_aislar)
+    else:
+        registros = ejecutar_intercalado(comandos, rebanada, args.rondas)
+
+    base = next(iter(destinos))
+    resultado = comparar_destinos(registros, base, AnalizadorHTML(), args.confianza)
+    resultado.update({
+        'modo': args.modo,
+        'rebanada': rebanada,
+        'destinos': destinos,
+        'pares': min(len(registro['intervalos']) for registro in registros.values())
+    })
+
+    print(f"\n📊 Comparación contra {base}:")
+    for nombre, pruebas in resultado['comparacion'].items():
+        for metrica, prueba in pruebas.items():
+            if prueba['diferencia'] is None:
+                continue
+            p = '-' if prueba['p_valor'] is None else f"{prueba['p_valor']:.3g}"
+            relativa = f" ({prueba['relativa']:+.1%})" if prueba['relativa'] is not None else ''
+            print(f"  {nombre} {METRICAS_DESTINOS[metrica][0]:<14} Δ {prueba['diferencia']:+,.2f}{relativa} "
+                  f"p={p} {'✱ significativa' if prueba['significativa'] else ''}")
+
+    for nombre, registro in registros.items():
+        ejecutor.resultados[f"{args.tipo.upper()}_{nombre}"] = dict(
+            registro, comando=comandos[nombre], destino=nombre, nombre_prueba=f"{info['nombre']} - {nombre}",
+            descripcion=info['descripcion'], execution_time=time.time() - registro['inicio']
+        )
+    ejecutor.resultados['_comparacion_destinos'] = resultado
+    archivo = ejecutor.guardar_resultados()
+    print(f"\nPara generar el dashboard ejecuta: python3 generar_reporte_html.py  ({archivo})")
+
+if __name__ == "__main__":
+    main()
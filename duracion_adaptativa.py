@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Duración Adaptativa
+Ejecuta wrk por intervalos y detiene la prueba cuando los intervalos de confianza del RPS
+y del P99 son más angostos que el ancho configurado, entre una duración mínima y una máxima.
+Cada intervalo reabre todas las conexiones, así que se alarga hasta que la rampa de conexión
+pese poco en su media
+"""
+
+import time
+from datetime import datetime
+
+from estadisticas import intervalo_confianza
+from utilidades_wrk import agregar_opcion_wrk, ajustar_comando_wrk, ejecutar_wrk, parsear_comando_wrk
+
+# Semiancho máximo del intervalo de confianza, relativo a la media
+ANCHO_RPS = 0.02
+ANCHO_P99 = 0.05
+CONFIANZA = 0.95
+INTERVALO_ADAPTATIVO = 10
+DURACION_MINIMA = 60
+# Intervalos iniciales que no entran en la estimación (calentamiento de conexiones y del servidor)
+INTERVALOS_DESCARTADOS = 1
+# Conexiones (con TLS) que wrk abre por segundo, para estimar la rampa al inicio de cada intervalo
+CONEXIONES_POR_SEGUNDO = 10000
+# Cada intervalo dura al menos estas veces la rampa, para que la tormenta de conexiones pese poco
+RAZON_RAMPA = 6
+
+MOTIVOS_PARADA = {
+    'convergencia': 'RPS y P99 convergieron',
+    'duracion_maxima': 'se alcanzó la duración máxima sin converger',
+    'error': 'un intervalo de wrk falló'
+}
+
+def estimar_rampa(conexiones, conexiones_por_segundo=CONEXIONES_POR_SEGUNDO):
+    """Segundos que tarda wrk en abrir todas las conexiones al arrancar cada intervalo"""
+    return (conexiones or 1) / conexiones_por_segundo
+
+def evaluar_convergencia(muestras, ancho_rps=ANCHO_RPS, ancho_p99=ANCHO_P99, confianza=CONFIANZA):
+    """Intervalo de confianza de cada métrica sobre las medias por intervalo (batch means)"""
+    estado = {}
+    for metrica, ancho in (('rps', ancho_rps), ('p99', ancho_p99)):
+        media, semiancho = intervalo_confianza([m[metrica] for m in muestras], confianza)
+        relativo = semiancho / media if semiancho is not None and media else None
+        estado[metrica] = {
+            'media': media,
+            'semiancho': semiancho,
+            'relativo': relativo,
+            'objetivo': ancho,
+            'convergida': relativo is not None and relativo <= ancho
+        }
+    estado['convergida'] = estado['rps']['convergida'] and estado['p99']['convergida']
+    return estado
+
+class EjecutorDuracionAdaptativa:
+    def __init__(self, comando, duracion_maxima=None, duracion_minima=DURACION_MINIMA,
+                 intervalo=INTERVALO_ADAPTATIVO, ancho_rps=ANCHO_RPS, ancho_p99=ANCHO_P99,
+                 confianza=CONFIANZA, descartar=INTERVALOS_DESCARTADOS, rampa=None):
+        # Sin máximo explícito se usa la duración (-d) del comando
+        opciones = parsear_comando_wrk(comando)
+        self.comando = agregar_opcion_wrk(comando, '--latency')
+        self.duracion_maxima = duracion_maxima or opciones['duracion'] or 300
+        self.duracion_minima = min(duracion_minima, self.duracion_maxima)
+        self.rampa = rampa if rampa is not None else estimar_rampa(opciones['conexiones'])
+        self.intervalo_solicitado = intervalo
+        self.intervalo = max(intervalo, RAZON_RAMPA * self.rampa)
+        self.ancho_rps = ancho_rps
+        self.ancho_p99 = ancho_p99
+        self.confianza = confianza
+        self.descartar = descartar
+
+    def ejecutar(self):
+        """Ejecutar intervalos hasta converger o llegar al máximo; devuelve el registro para el JSON"""
+        from generar_reporte_html import AnalizadorHTML
+        analizador = AnalizadorHTML()
+
+        if self.intervalo > self.intervalo_solicitado:
+            print(f"  ⚠️  Intervalos de {self.intervalo:.0f}s en lugar de {self.intervalo_solicitado:g}s: cada uno "
+                  f"reabre las conexiones (rampa estimada {self.rampa:.1f}s) y debe durar {RAZON_RAMPA}x la rampa")
+        inicio = time.time()
+        intervalos, muestras, historial = [], [], []
+        estado, motivo = None, None
+        transcurrido = 0.0
+        while True:
+            # Un intervalo final recortado pesaría más la rampa: se termina en lugar de ejecutarlo
+            restante = self.duracion_maxima - transcurrido
+            if restante <= 1e-9 or (intervalos and restante < self.intervalo):
+                motivo = 'duracion_maxima'
+                break
+            duracion = min(self.intervalo, restante)
+            marca_inicio = time.time()
+            registro = ejecutar_wrk(ajustar_comando_wrk(self.comando, duracion=duracion))
+            registro.update({
+                't_inicio': transcurrido,
+                't_fin': transcurrido + duracion,
+                'marca_inicio': marca_inicio
+            })
+            intervalos.append(registro)
+            transcurrido += duracion
+
+            datos = analizador.parsear_salida_wrk(registro.get('stdout', ''))
+            if 'error' in registro or registro.get('return_code') or not datos.get('total_requests'):
+                detalle = registro.get('error') or registro.get('stderr', '').strip() or 'sin requests'
+                print(f"    ❌ Intervalo {len(intervalos)}: {detalle}")
+                motivo = 'error'
+                break
+            if len(intervalos) <= self.descartar:
+                print(f"    ⏳ {transcurrido:>6.0f}s calentamiento (intervalo descartado)")
+                continue
+
+            muestras.append({'rps': datos.get('rps_reportado') or datos.get('rps', 0),
+                             'p99': datos.get('percentiles', {}).get('p99', 0)})
+            estado = evaluar_convergencia(muestras, self.ancho_rps, self.ancho_p99, self.confianza)
+            historial.append({
+                't': transcurrido,
+                'muestras': len(muestras),
+                'rps': estado['rps'],
+                'p99': estado['p99']
+            })
+            print(f"    ⏱️  {transcurrido:>6.0f}s RPS {_formatear_ic(estado['rps'], ',.1f')} | "
+                  f"P99 (ms) {_formatear_ic(estado['p99'], '.2f')}")
+            if transcurrido >= self.duracion_minima and estado['convergida']:
+                motivo = 'convergencia'
+                break
+
+        # Reloj de pared: incluye los reinicios de wrk y las rampas entre intervalos
+        detenida_en = time.time() - inicio
+        print(f"  🏁 Detenida a los {detenida_en:.0f}s ({transcurrido:.0f}s bajo carga): {MOTIVOS_PARADA[motivo]}"
+              + (f" (ahorro de {self.duracion_maxima - detenida_en:.0f}s)" if motivo == 'convergencia' else ''))
+        return {
+            'comando': self.comando,
+            'inicio': inicio,
+            'intervalos': intervalos,
+            'duracion_adaptativa': {
+                'intervalo': self.intervalo,
+                'intervalo_solicitado': self.intervalo_solicitado,
+                'rampa': self.rampa,
+                'duracion_minima': self.duracion_minima,
+                'duracion_maxima': self.duracion_maxima,
+                'ancho_rps': self.ancho_rps,
+                'ancho_p99': self.ancho_p99,
+                'confianza': self.confianza,
+                'descartados': min(self.descartar, len(intervalos)),
+                'motivo': motivo,
+                'detenida_en': detenida_en,
+                'segundos_bajo_carga': transcurrido,
+                'fecha_parada': datetime.now().isoformat(),
+                'estado_final': estado,
+                'historial': historial
+            },
+            'execution_time': time.time() - inicio
+        }
+
+def _formatear_ic(metrica, formato):
+    if metrica['relativo'] is None:
+        return f"{metrica['media']:{formato}} (IC pendiente)"
+    marca = '✅' if metrica['convergida'] else '…'
+    return f"{metrica['media']:{formato}} ±{metrica['relativo']:.1%} {marca}"
+
+def crear_seccion_convergencia(adaptativa):
+    """Evolución del semiancho relativo de los IC frente al objetivo, para el dashboard"""
+    import plotly.graph_objects as go
+
+    historial = adaptativa['historial']
+    texto = (
+        f"<p>Detenida a los {adaptativa['detenida_en']:.0f}s (reloj de pared, con los reinicios de wrk) de un "
+        f"máximo de {adaptativa['duracion_maxima']:.0f}s bajo carga: "
+        f"{MOTIVOS_PARADA.get(adaptativa['motivo'], adaptativa['motivo'])}. Intervalos de "
+        f"{adaptativa['intervalo']:.0f}s (rampa de conexión estimada {adaptativa.get('rampa', 0):.1f}s), IC del {adaptativa['confianza']:.0%}, objetivo ±{adaptativa['ancho_rps']:.1%} "
+        f"en RPS y ±{adaptativa['ancho_p99']:.1%} en P99 (mínimo {adaptativa['duracion_minima']:.0f}s, "
+        f"{adaptativa['descartados']} intervalo(s) de calentamiento descartados).</p>"
+    )
+    if not historial:
+        return texto
+
+    t = [punto['t'] for punto in historial]
+    fig = go.Figure()
+    for metrica, nombre, color in (('rps', 'RPS', '#4ECDC4'), ('p99', 'P99', '#FF6B6B')):
+        fig.add_trace(go.Scatter(x=t, y=[punto[metrica]['relativo'] for punto in historial],
+                                 name=f"Semiancho IC {nombre}", mode='lines+markers', marker_color=color))
+        fig.add_hline(y=adaptativa[f'ancho_{metrica}'], line_dash='dash', line_color=color,
+                      annotation_text=f"Objetivo {nombre}")
+    fig.add_vline(x=adaptativa['duracion_minima'], line_dash='dot', line_color='gray',
+                  annotation_text='Duración mínima')
+    fig.update_layout(height=400, title_text='Convergencia de los Intervalos de Confianza', title_x=0.5,
+                      yaxis_tickformat='.1%')
+    fig.update_xaxes(title_text='Tiempo desde el inicio (s)')
+    fig.update_yaxes(title_text='Semiancho relativo')
+    return texto + fig.to_html(full_html=False, include_plotlyjs=False)
@@ -11,11 +11,29 @@ import argparse
 import sys
 from datetime import datetime
 import os
+import socket
+
+from duracion_adaptativa import ANCHO_P99, ANCHO_RPS, CONFIANZA, DURACION_MINIMA, EjecutorDuracionAdaptativa
+from ensayos_repetidos import ENFRIAMIENTO, ejecutar_ensayos
+from metricas_servidor import INTERVALO_RECOLECCION, INTERVALO_WRK, ejecutar_con_metricas
+from perfilado import PERFILADOR
+from perfiles_carga import EjecutorPerfilCarga, PERFILES_PREDEFINIDOS, cargar_perfil
+from sonda_fases import TASA_SONDA, VENTANA_SONDA, SondaFases
+from utilidades_wrk import (MUESTREO_POR_DEFECTO, NIVELES_RECOLECCION, ajustar_comando_wrk, args_recoleccion,
+                            datos_desde_resumen_json, extraer_resumen_json, parsear_comando_wrk, parsear_duracion)
+from validacion_respuestas import (MUESTREO_VALIDACION, REGLAS_VALIDACION, cargar_reglas, describir_validacion,
+                                   preparar_validacion)
 
 class EjecutorPruebasCarga:
     def __init__(self):
         self.resultados = {}
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.perfil = None
+        self.metricas = None
+        self.sonda = None
+        self.adaptativa = None
+        self.ensayos = None
+        self.validacion = None
         
         # Definir comandos disponibles
         self.comandos_disponibles = {
@@ -23,16 +41,30 @@ class EjecutorPruebasCarga:
                 'nombre': 'GET Verify Number',
                 'descripcion': 'Prueba GET para verificación de número',
                 'comando': 'wrk -t32 -c50000 -d300s -s get_verify_number_enhanced.lua https://yasta.bancounion.com.bo/gateway/user/verify/number?username=65663503',
-                'script_lua': 'get_verify_number_enhanced.lua'
+                'script_lua': 'get_verify_number_enhanced.lua',
+                'metodo': 'GET'
             },
             'post': {
                 'nombre': 'POST Pagos',
                 'descripcion': 'Prueba POST para procesamiento de pagos',
                 'comando': 'wrk -t32 -c50000 -d300s -s post_pagos_enhanced.lua https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage',
-                'script_lua': 'post_pagos_enhanced.lua'
+                'script_lua': 'post_pagos_enhanced.lua',
+                'metodo': 'POST'
             }
         }
     
+    def configurar_recoleccion(self, nivel, muestreo=MUESTREO_POR_DEFECTO):
+        """Pasar el nivel de recolección por respuesta a los scripts Lua mejorados"""
+        for info in self.comandos_disponibles.values():
+            info['comando'] = ajustar_comando_wrk(info['comando'], args_script=args_recoleccion(nivel, muestreo))
+    
+    def configurar_validacion(self, reglas, muestreo=MUESTREO_VALIDACION):
+        """Validar el cuerpo de 1 de cada `muestreo` respuestas con las reglas de cada escenario"""
+        for tipo, info in self.comandos_disponibles.items():
+            if reglas.get(tipo):
+                info['comando'] = preparar_validacion(info['comando'], tipo, reglas[tipo], muestreo)
+        self.validacion = {'reglas': reglas, 'muestreo': muestreo}
+    
     def mostrar_ayuda(self):
         """Mostrar información de ayuda"""
         print("="*70)
@@ -45,10 +77,31 @@ class EjecutorPruebasCarga:
         print("  post    - Ejecutar solo la prueba POST (pagos)")
         print("  ambas   - Ejecutar ambas pruebas secuencialmente")
         print("  -h      - Mostrar esta ayuda")
+        print("\nOpciones adicionales:")
+        print("  --perfil NOMBRE|ARCHIVO.json - Ejecutar con un perfil de carga por etapas")
+        print(f"                                 Predefinidos: {', '.join(PERFILES_PREDEFINIDOS)}")
+        print("  --metricas URL               - Recolectar métricas Prometheus del servidor durante la prueba")
+        print("                                 (--intervalo-metricas S, --intervalo-wrk S)")
+        print("  --adaptativa                 - Detener la prueba cuando los IC de RPS y P99 convergen")
+        print("                                 (--ancho-rps F, --ancho-p99 F, --duracion-min D, --duracion-max D,")
+        print("                                 --rampa D)")
+        print("  --ensayos K                  - Repetir cada prueba K veces en orden aleatorio con IC entre ensayos")
+        print("                                 (--enfriamiento S, --semilla N)")
+        print("  --cola [--prioridad N]       - Encolar en el daemon compartido (cola_pruebas.py)")
+        print("  --sonda [--sonda-tasa R]     - Desglose DNS/TCP/TLS/TTFB/transferencia con una sonda en paralelo")
+        print("  --recoleccion full|sampled|none [--muestreo N]")
+        print("                               - Costo de la recolección por respuesta en los scripts Lua")
+        print("  --validar [--muestreo-validacion N] [--reglas ARCHIVO.json]")
+        print("                               - Goodput: validar el cuerpo de una muestra de respuestas")
         print("\nEjemplos:")
         print("  python3 ejecutar_pruebas_carga.py get")
         print("  python3 ejecutar_pruebas_carga.py post")
         print("  python3 ejecutar_pruebas_carga.py ambas")
+        print("  python3 ejecutar_pruebas_carga.py post --perfil pico")
+        print("  python3 ejecutar_pruebas_carga.py get --metricas http://servidor:9100/metrics")
+        print("  python3 ejecutar_pruebas_carga.py get --adaptativa --duracion-max 600s")
+        print("  python3 ejecutar_pruebas_carga.py ambas --ensayos 5 --enfriamiento 60")
+        print("  python3 ejecutar_pruebas_carga.py post --validar --muestreo-validacion 20")
         print("\nDetalles de las pruebas:")
         for clave, info in self.comandos_disponibles.items():
             print(f"\n  {clave.upper()}:")
@@ -74,7 +127,43 @@ class EjecutorPruebasCarga:
         return True
     
     def ejecutar_comando_wrk(self, nombre_prueba, info_comando):
-        """Ejecutar un comando wrk específico"""
+        """Ejecutar un comando wrk específico (con la sonda de fases en paralelo si está activa)"""
+        sonda = self.iniciar_sonda(info_comando) if self.sonda else None
+        try:
+            if self.perfil:
+                self.ejecutar_con_perfil(nombre_prueba, info_comando)
+            elif self.metricas:
+                self.ejecutar_con_metricas_servidor(nombre_prueba, info_comando)
+            elif self.adaptativa:
+                self.ejecutar_con_duracion_adaptativa(nombre_prueba, info_comando)
+            elif self.ensayos:
+                self.ejecutar_con_ensayos({nombre_prueba: info_comando})
+            else:
+                self.ejecutar_wrk_simple(nombre_prueba, info_comando)
+        finally:
+            if sonda:
+                resultado_sonda = sonda.detener()
+                if nombre_prueba in self.resultados:
+                    self.resultados[nombre_prueba]['sonda_fases'] = resultado_sonda
+                muestras = sum(v['muestras'] for v in resultado_sonda['ventanas'])
+                omitidas = sum(v['omitidas'] for v in resultado_sonda['ventanas'])
+                print(f"🔬 Sonda de fases: {muestras} requests instrumentados"
+                      + (f", {omitidas} turnos omitidos" if omitidas else ''))
+                if resultado_sonda['ultimo_error']:
+                    print(f"⚠️  Último error de la sonda: {resultado_sonda['ultimo_error']}")
+    
+    def iniciar_sonda(self, info_comando):
+        """Sondear el mismo endpoint que wrk a baja tasa mientras dura la prueba"""
+        url = parsear_comando_wrk(info_comando['comando'])['url']
+        metodo = info_comando.get('metodo', 'GET')
+        cabeceras, cuerpo = {}, None
+        if metodo == 'POST':
+            cabeceras['Content-Type'] = 'application/json'
+            cuerpo = '{}'
+        return SondaFases(url, self.sonda['tasa'], self.sonda['ventana'], metodo, cabeceras, cuerpo).iniciar()
+    
+    def ejecutar_wrk_simple(self, nombre_prueba, info_comando):
+        """Ejecutar el comando wrk en una sola pasada"""
         comando = info_comando['comando']
         
         print(f"\n{'='*60}")
@@ -86,13 +175,14 @@ class EjecutorPruebasCarga:
         tiempo_inicio = time.time()
         
         try:
-            resultado = subprocess.run(
-                comando, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                timeout=400  # 400 segundos timeout
-            )
+            with PERFILADOR.etapa(f"wrk {nombre_prueba}", 'wrk'):
+                resultado = subprocess.run(
+                    comando, 
+                    shell=True, 
+                    capture_output=True, 
+                    text=True, 
+                    timeout=400  # 400 segundos timeout
+                )
             
             tiempo_fin = time.time()
             
@@ -117,6 +207,10 @@ class EjecutorPruebasCarga:
                 for linea in lineas:
                     if any(palabra in linea for palabra in ['Requests/sec:', 'Latency', 'requests in', 'Transfer/sec']):
                         print(f"  {linea}")
+                resumen_json = extraer_resumen_json(resultado.stdout) if self.validacion else None
+                descripcion = describir_validacion(datos_desde_resumen_json(resumen_json)) if resumen_json else None
+                if descripcion:
+                    print(f"  ✔️  {descripcion}")
                         
             if resultado.stderr:
                 print(f"\n⚠️  Advertencias/Errores:\n{resultado.stderr}")
@@ -138,11 +232,147 @@ class EjecutorPruebasCarga:
                 'nombre_prueba': info_comando['nombre']
             }
     
+    def ejecutar_con_perfil(self, nombre_prueba, info_comando):
+        """Ejecutar una prueba siguiendo el perfil de carga por etapas"""
+        print(f"\n{'='*60}")
+        print(f"🔄 Iniciando: {info_comando['nombre']} (perfil {self.perfil['nombre']})")
+        print(f"📝 Descripción: {info_comando['descripcion']}")
+        print(f"{'='*60}")
+        
+        try:
+            resultado = EjecutorPerfilCarga(self.perfil, info_comando['comando']).ejecutar()
+            resultado.update({
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre'],
+                'descripcion': info_comando['descripcion']
+            })
+            self.resultados[nombre_prueba] = resultado
+            print(f"\n✅ {info_comando['nombre']} completada en {resultado['execution_time']:.2f} segundos")
+        except Exception as e:
+            print(f"❌ ERROR ejecutando el perfil de {info_comando['nombre']}: {str(e)}")
+            self.resultados[nombre_prueba] = {
+                'comando': info_comando['comando'],
+                'error': str(e),
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre']
+            }
+    
+    def ejecutar_con_metricas_servidor(self, nombre_prueba, info_comando):
+        """Ejecutar una prueba por intervalos recolectando las métricas Prometheus del servidor"""
+        print(f"\n{'='*60}")
+        print(f"🔄 Iniciando: {info_comando['nombre']} (métricas de {self.metricas['url']})")
+        print(f"📝 Descripción: {info_comando['descripcion']}")
+        print(f"⏱️  Intervalos de wrk de {self.metricas['intervalo_wrk']}s, recolección cada {self.metricas['intervalo']}s")
+        print(f"{'='*60}")
+        
+        try:
+            resultado = ejecutar_con_metricas(
+                info_comando['comando'],
+                self.metricas['url'],
+                intervalo_wrk=self.metricas['intervalo_wrk'],
+                intervalo_recoleccion=self.metricas['intervalo'],
+                familias_extra=self.metricas.get('familias')
+            )
+            resultado.update({
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre'],
+                'descripcion': info_comando['descripcion']
+            })
+            self.resultados[nombre_prueba] = resultado
+            metricas = resultado['metricas_servidor']
+            print(f"\n✅ {info_comando['nombre']} completada en {resultado['execution_time']:.2f} segundos")
+            print(f"📡 {len(metricas['t'])} recolecciones, {len(metricas['series'])} series, "
+                  f"{metricas['errores_recoleccion']} fallidas")
+            if metricas['ultimo_error']:
+                print(f"⚠️  Último error de recolección: {metricas['ultimo_error']}")
+        except Exception as e:
+            print(f"❌ ERROR ejecutando {info_comando['nombre']} con métricas: {str(e)}")
+            self.resultados[nombre_prueba] = {
+                'comando': info_comando['comando'],
+                'error': str(e),
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre']
+            }
+    
+    def ejecutar_con_duracion_adaptativa(self, nombre_prueba, info_comando):
+        """Ejecutar por intervalos hasta que RPS y P99 converjan o se llegue a la duración máxima"""
+        config = self.adaptativa
+        print(f"\n{'='*60}")
+        print(f"🔄 Iniciando: {info_comando['nombre']} (duración adaptativa)")
+        print(f"📝 Descripción: {info_comando['descripcion']}")
+        print(f"⏱️  Intervalos de {config['intervalo']}s, objetivo IC {config['confianza']:.0%} "
+              f"±{config['ancho_rps']:.1%} RPS y ±{config['ancho_p99']:.1%} P99")
+        print(f"{'='*60}")
+        
+        try:
+            resultado = EjecutorDuracionAdaptativa(
+                info_comando['comando'],
+                duracion_maxima=config['duracion_maxima'],
+                duracion_minima=config['duracion_minima'],
+                intervalo=config['intervalo'],
+                ancho_rps=config['ancho_rps'],
+                ancho_p99=config['ancho_p99'],
+                confianza=config['confianza'],
+                rampa=config['rampa']
+            ).ejecutar()
+            resultado.update({
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre'],
+                'descripcion': info_comando['descripcion']
+            })
+            self.resultados[nombre_prueba] = resultado
+            print(f"\n✅ {info_comando['nombre']} completada en {resultado['execution_time']:.2f} segundos")
+        except Exception as e:
+            print(f"❌ ERROR ejecutando {info_comando['nombre']} con duración adaptativa: {str(e)}")
+            self.resultados[nombre_prueba] = {
+                'comando': info_comando['comando'],
+                'error': str(e),
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info_comando['nombre']
+            }
+    
+    def ejecutar_con_ensayos(self, pruebas):
+        """Ejecutar K ensayos de cada prueba de {nombre_prueba: info} intercalados en orden aleatorio"""
+        config = self.ensayos
+        print(f"\n{'='*60}")
+        print(f"🔄 Iniciando: {', '.join(info['nombre'] for info in pruebas.values())} "
+              f"({config['ensayos']} ensayos cada una)")
+        print(f"⏳ Enfriamiento de {config['enfriamiento']:g}s entre ensayos")
+        print(f"{'='*60}")
+        
+        try:
+            registros = ejecutar_ensayos({nombre: info['comando'] for nombre, info in pruebas.items()},
+                                         config['ensayos'], config['enfriamiento'], config['semilla'])
+        except Exception as e:
+            print(f"❌ ERROR ejecutando los ensayos: {str(e)}")
+            for nombre, info in pruebas.items():
+                self.resultados[nombre] = {
+                    'comando': info['comando'],
+                    'error': str(e),
+                    'timestamp': datetime.now().isoformat(),
+                    'nombre_prueba': info['nombre']
+                }
+            return
+        
+        for nombre, info in pruebas.items():
+            registros[nombre].update({
+                'timestamp': datetime.now().isoformat(),
+                'nombre_prueba': info['nombre'],
+                'descripcion': info['descripcion']
+            })
+            self.resultados[nombre] = registros[nombre]
+            fallidos = sum(1 for ensayo in registros[nombre]['ensayos'] if 'error' in ensayo or ensayo.get('return_code'))
+            print(f"\n✅ {info['nombre']}: {len(registros[nombre]['ensayos'])} ensayos, {fallidos} fallidos "
+                  f"(semilla {registros[nombre]['semilla']})")
+    
     def guardar_resultados(self):
         """Guardar resultados en archivo JSON"""
         nombre_archivo = f"resultados_pruebas_carga_{self.timestamp}.json"
-        with open(nombre_archivo, 'w', encoding='utf-8') as f:
-            json.dump(self.resultados, f, indent=2, ensure_ascii=False)
+        # Máquina generadora, para comparar con su perfil de calibrar_generador.py
+        self.resultados['_maquina'] = {'host': socket.gethostname()}
+        with PERFILADOR.etapa('escribir_json', 'io'):
+            with open(nombre_archivo, 'w', encoding='utf-8') as f:
+                json.dump(self.resultados, f, indent=2, ensure_ascii=False)
         print(f"\n💾 Resultados guardados en: {nombre_archivo}")
         return nombre_archivo
     
@@ -182,6 +412,14 @@ class EjecutorPruebasCarga:
         print("🚀 Iniciando ejecución de AMBAS pruebas")
         print(f"⏰ Timestamp: {self.timestamp}")
         
+        if self.ensayos:
+            # Los ensayos de las dos pruebas se intercalan en orden aleatorio
+            self.ejecutar_con_ensayos({
+                "GET_verify_number": self.comandos_disponibles['get'],
+                "POST_pagos": self.comandos_disponibles['post']
+            })
+            return self.finalizar_ambas_pruebas()
+        
         # Ejecutar prueba GET
         print("\n🔄 FASE 1: Ejecutando prueba GET...")
         self.ejecutar_comando_wrk("GET_verify_number", self.comandos_disponibles['get'])
@@ -194,7 +432,10 @@ class EjecutorPruebasCarga:
         print("\n🔄 FASE 2: Ejecutando prueba POST...")
         self.ejecutar_comando_wrk("POST_pagos", self.comandos_disponibles['post'])
         
-        # Guardar resultados
+        return self.finalizar_ambas_pruebas()
+    
+    def finalizar_ambas_pruebas(self):
+        """Guardar los resultados de ambas pruebas"""
         archivo_resultados = self.guardar_resultados()
         
         print(f"\n{'='*60}")
@@ -204,6 +445,25 @@ class EjecutorPruebasCarga:
         
         return archivo_resultados
 
+def encolar_pruebas(tipo, prioridad):
+    """Enviar las pruebas al daemon de la cola compartida en lugar de ejecutarlas"""
+    from cola_pruebas import PUERTO_COLA, preparar_trabajo, solicitar
+    servidor = f"http://127.0.0.1:{PUERTO_COLA}"
+    tipos = ['get', 'post'] if tipo == 'ambas' else [tipo]
+    for tipo_prueba in tipos:
+        try:
+            trabajo = solicitar(servidor, 'POST', '/trabajos', {
+                'comando': preparar_trabajo(tipo_prueba),
+                'prioridad': prioridad,
+                'nombre': f"{tipo_prueba}_test",
+                'solicitante': os.environ.get('USER', '')
+            })
+        except RuntimeError as e:
+            print(f"❌ ERROR: {e}")
+            sys.exit(1)
+        print(f"📥 {tipo_prueba.upper()} encolada como trabajo {trabajo['id']} (destino {trabajo['destino']})")
+    print("Consulta el avance con: python3 cola_pruebas.py estado")
+
 def main():
     ejecutor = EjecutorPruebasCarga()
     
@@ -215,6 +475,42 @@ def main():
     parser.add_argument('tipo', nargs='?', 
                        choices=['get', 'post', 'ambas', 'help', '-h'], 
                        help='Tipo de prueba a ejecutar')
+    parser.add_argument('--perfil', help='Perfil de carga por etapas (nombre predefinido o archivo JSON)')
+    parser.add_argument('--metricas', help='Endpoint Prometheus del servidor a recolectar durante la prueba')
+    parser.add_argument('--intervalo-metricas', type=float, default=INTERVALO_RECOLECCION,
+                       help='Segundos entre recolecciones de --metricas')
+    parser.add_argument('--intervalo-wrk', type=int, default=INTERVALO_WRK,
+                       help='Duración de cada intervalo de wrk con --metricas o --adaptativa')
+    parser.add_argument('--adaptativa', action='store_true',
+                       help='Detener la prueba cuando los intervalos de confianza de RPS y P99 convergen')
+    parser.add_argument('--ancho-rps', type=float, default=ANCHO_RPS,
+                       help='Semiancho relativo máximo del IC del RPS (0.02 = ±2%%)')
+    parser.add_argument('--ancho-p99', type=float, default=ANCHO_P99,
+                       help='Semiancho relativo máximo del IC del P99 (0.05 = ±5%%)')
+    parser.add_argument('--confianza', type=float, default=CONFIANZA, help='Nivel de confianza de los IC')
+    parser.add_argument('--duracion-min', default=f"{DURACION_MINIMA}s", help='Duración mínima con --adaptativa')
+    parser.add_argument('--duracion-max', help='Duración máxima con --adaptativa (por defecto la -d del comando)')
+    parser.add_argument('--rampa', help='Rampa de conexión de cada intervalo con --adaptativa '
+                                        '(por defecto estimada por el número de conexiones)')
+    parser.add_argument('--recoleccion', choices=NIVELES_RECOLECCION,
+                       help='Recolección por respuesta en Lua: full (todas), sampled (1 de N) o none')
+    parser.add_argument('--muestreo', type=int, default=MUESTREO_POR_DEFECTO,
+                       help='Con --recoleccion sampled, contar 1 de cada N respuestas')
+    parser.add_argument('--validar', action='store_true',
+                       help='Validar una muestra de respuestas y reportar el goodput')
+    parser.add_argument('--muestreo-validacion', type=int, default=MUESTREO_VALIDACION,
+                       help='Con --validar, revisar 1 de cada N respuestas')
+    parser.add_argument('--reglas', help='Reglas de validación por escenario (JSON {"get": [...], "post": [...]})')
+    parser.add_argument('--sonda', action='store_true',
+                       help='Medir DNS, TCP, TLS, TTFB y transferencia con una sonda de baja tasa en paralelo')
+    parser.add_argument('--sonda-tasa', type=float, default=TASA_SONDA, help='Requests por segundo de la sonda')
+    parser.add_argument('--sonda-ventana', type=float, default=VENTANA_SONDA,
+                       help='Segundos por ventana de histogramas de la sonda')
+    parser.add_argument('--ensayos', type=int, help='Repetir cada prueba K veces en orden aleatorio')
+    parser.add_argument('--enfriamiento', type=float, default=ENFRIAMIENTO, help='Segundos de pausa entre ensayos')
+    parser.add_argument('--semilla', type=int, help='Semilla del orden aleatorio de los ensayos')
+    parser.add_argument('--cola', action='store_true', help='Encolar en el daemon de cola_pruebas.py en lugar de ejecutar')
+    parser.add_argument('--prioridad', type=int, default=0, help='Prioridad del trabajo encolado con --cola')
     
     # Si no hay argumentos, mostrar ayuda
     if len(sys.argv) == 1:
@@ -232,6 +528,80 @@ def main():
         ejecutor.mostrar_ayuda()
         return
     
+    if args.cola:
+        modos = [opcion for opcion, activa in (('--perfil', args.perfil), ('--metricas', args.metricas),
+                                               ('--recoleccion', args.recoleccion), ('--sonda', args.sonda),
+                                               ('--adaptativa', args.adaptativa), ('--ensayos', args.ensayos is not None),
+                                               ('--validar', args.validar or args.reglas)) if activa]
+        if modos:
+            print(f"❌ ERROR: --cola encola el comando wrk del escenario y no se puede combinar con {', '.join(modos)}")
+            sys.exit(1)
+        encolar_pruebas(args.tipo, args.prioridad)
+        return
+    
+    if args.sonda:
+        if args.sonda_tasa <= 0:
+            print("❌ ERROR: --sonda-tasa debe ser mayor que 0")
+            sys.exit(1)
+        ejecutor.sonda = {'tasa': args.sonda_tasa, 'ventana': args.sonda_ventana}
+    
+    if args.recoleccion:
+        ejecutor.configurar_recoleccion(args.recoleccion, args.muestreo)
+    
+    if args.validar or args.reglas:
+        if args.muestreo_validacion < 1:
+            print("❌ ERROR: --muestreo-validacion debe ser al menos 1")
+            sys.exit(1)
+        try:
+            reglas = cargar_reglas(args.reglas) if args.reglas else REGLAS_VALIDACION
+            ejecutor.configurar_validacion(reglas, args.muestreo_validacion)
+        except (OSError, ValueError) as e:
+            print(f"❌ ERROR: {e}")
+            sys.exit(1)
+    
+    if args.perfil:
+        try:
+            ejecutor.perfil = cargar_perfil(args.perfil)
+        except ValueError as e:
+            print(f"❌ ERROR: {e}")
+            sys.exit(1)
+        if args.metricas:
+            print("❌ ERROR: --metricas no se puede combinar con --perfil")
+            sys.exit(1)
+    
+    if args.adaptativa:
+        if args.perfil or args.metricas:
+            print("❌ ERROR: --adaptativa no se puede combinar con --perfil ni --metricas")
+            sys.exit(1)
+        if not 0 < args.confianza < 1:
+            print("❌ ERROR: --confianza debe estar entre 0 y 1")
+            sys.exit(1)
+        ejecutor.adaptativa = {
+            'intervalo': args.intervalo_wrk,
+            'ancho_rps': args.ancho_rps,
+            'ancho_p99': args.ancho_p99,
+            'confianza': args.confianza,
+            'duracion_minima': parsear_duracion(args.duracion_min),
+            'duracion_maxima': parsear_duracion(args.duracion_max) if args.duracion_max else None,
+            'rampa': parsear_duracion(args.rampa) if args.rampa else None
+        }
+    
+    if args.ensayos is not None:
+        if args.ensayos < 2:
+            print("❌ ERROR: --ensayos debe ser al menos 2")
+            sys.exit(1)
+        if args.perfil or args.metricas or args.adaptativa or args.sonda:
+            print("❌ ERROR: --ensayos no se puede combinar con --perfil, --metricas, --adaptativa ni --sonda")
+            sys.exit(1)
+        ejecutor.ensayos = {'ensayos': args.ensayos, 'enfriamiento': args.enfriamiento, 'semilla': args.semilla}
+    
+    if args.metricas:
+        ejecutor.metricas = {
+            'url': args.metricas,
+            'intervalo': args.intervalo_metricas,
+            'intervalo_wrk': args.intervalo_wrk
+        }
+    
     # Ejecutar según el tipo seleccionado
     if args.tipo == 'ambas':
         archivo_resultados = ejecutor.ejecutar_ambas_pruebas()
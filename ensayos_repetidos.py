@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Ensayos Repetidos
+Ejecuta cada escenario K veces en orden aleatorio con pausas de enfriamiento, descarta
+los ensayos atípicos y resume con percentiles fusionados e intervalos de confianza
+"""
+
+import random
+import statistics
+import time
+
+from estadisticas import intervalo_confianza, resumir_ejecuciones
+from utilidades_wrk import agregar_opcion_wrk, ejecutar_wrk
+
+ENSAYOS = 5
+ENFRIAMIENTO = 30
+CONFIANZA_ENSAYOS = 0.95
+# Puntaje z modificado (mediana y MAD) a partir del cual un ensayo es atípico (Iglewicz-Hoaglin)
+UMBRAL_ATIPICO = 3.5
+
+# Métricas por ensayo que se usan para detectar atípicos y reportar intervalos de confianza
+METRICAS_ENSAYO = {
+    'rps': lambda datos: datos.get('rps_reportado') or datos.get('rps', 0),
+    'latencia_promedio': lambda datos: datos.get('latencia_promedio', 0),
+    'p99': lambda datos: datos.get('percentiles', {}).get('p99')
+}
+
+def planificar_ensayos(escenarios, ensayos=ENSAYOS, semilla=None):
+    """Orden de ejecución [(escenario, número de ensayo)]: cada ronda es una permutación aleatoria
+
+    Aleatorizar por rondas reparte la deriva del host y del enlace entre los escenarios
+    sin que ninguno quede concentrado al principio o al final.
+    """
+    rng = random.Random(semilla)
+    orden = []
+    for numero in range(1, ensayos + 1):
+        ronda = list(escenarios)
+        rng.shuffle(ronda)
+        orden.extend((escenario, numero) for escenario in ronda)
+    return orden
+
+def ejecutar_ensayos(comandos, ensayos=ENSAYOS, enfriamiento=ENFRIAMIENTO, semilla=None):
+    """Ejecutar los ensayos de {nombre: comando} y devolver un registro por escenario para el JSON"""
+    semilla = semilla if semilla is not None else random.randrange(2 ** 32)
+    orden = planificar_ensayos(list(comandos), ensayos, semilla)
+    comandos = {nombre: agregar_opcion_wrk(comando, '--latency') for nombre, comando in comandos.items()}
+    registros = {
+        nombre: {'comando': comando, 'ensayos': [], 'semilla': semilla, 'enfriamiento': enfriamiento}
+        for nombre, comando in comandos.items()
+    }
+
+    inicio = time.time()
+    for posicion, (nombre, numero) in enumerate(orden, 1):
+        print(f"  🎲 {posicion}/{len(orden)}: {nombre} ensayo {numero}/{ensayos}")
+        registro = ejecutar_wrk(comandos[nombre])
+        registro.update({'ensayo': numero, 'orden': posicion})
+        if 'error' in registro:
+            print(f"    ❌ {registro['error']}")
+        registros[nombre]['ensayos'].append(registro)
+        if posicion < len(orden) and enfriamiento > 0:
+            time.sleep(enfriamiento)
+
+    for registro in registros.values():
+        registro['execution_time'] = time.time() - inicio
+    return registros
+
+def detectar_atipicos(valores, umbral=UMBRAL_ATIPICO):
+    """Índices cuyo puntaje z modificado supera el umbral (robusto con pocos ensayos)"""
+    disponibles = [v for v in valores if v is not None]
+    if len(disponibles) < 3:
+        return set()
+    mediana = statistics.median(disponibles)
+    mad = statistics.median(abs(v - mediana) for v in disponibles)
+    if not mad:
+        return set()
+    return {i for i, v in enumerate(valores) if v is not None and 0.6745 * abs(v - mediana) / mad > umbral}
+
+def resumir_ensayos(datos_prueba, analizador, umbral=UMBRAL_ATIPICO, confianza=CONFIANZA_ENSAYOS):
+    """Parsear los ensayos, descartar fallidos y atípicos y combinar los aceptados
+
+    Devuelve (resumen, detalle). El resumen fusiona la distribución de latencia de los
+    ensayos aceptados y agrega `intervalos_confianza` con media y semiancho por métrica.
+    """
+    detalle = []
+    for registro in datos_prueba['ensayos']:
+        datos = analizador.parsear_salida_wrk(registro.get('stdout', ''))
+        fallido = 'error' in registro or registro.get('return_code') or not datos.get('total_requests')
+        detalle.append({
+            'ensayo': registro.get('ensayo'),
+            'orden': registro.get('orden'),
+            'datos': datos,
+            'metricas': {metrica: extraer(datos) for metrica, extraer in METRICAS_ENSAYO.items()},
+            'aceptado': not fallido,
+            'motivo': 'fallido' if fallido else None
+        })
+
+    validos = [d for d in detalle if d['aceptado']]
+    for metrica in ('rps', 'p99'):
+        for i in detectar_atipicos([d['metricas'][metrica] for d in validos], umbral):
+            if validos[i]['aceptado']:
+                validos[i]['aceptado'] = False
+                validos[i]['motivo'] = f"atípico en {metrica}"
+
+    aceptados = [d for d in detalle if d['aceptado']]
+    resumen = resumir_ejecuciones([d['datos'] for d in aceptados])
+    if not resumen:
+        return {}, detalle
+
+    resumen['intervalos_confianza'] = {}
+    for metrica in METRICAS_ENSAYO:
+        valores = [d['metricas'][metrica] for d in aceptados if d['metricas'][metrica] is not None]
+        media, semiancho = intervalo_confianza(valores, confianza)
+        resumen['intervalos_confianza'][metrica] = {'media': media, 'semiancho': semiancho}
+    # Las barras muestran la media entre ensayos, que es el centro del intervalo de confianza
+    resumen['rps_reportado'] = resumen['intervalos_confianza']['rps']['media']
+    resumen['confianza'] = confianza
+    resumen['ensayos_aceptados'] = len(aceptados)
+    resumen['ensayos_rechazados'] = len(detalle) - len(aceptados)
+    return resumen, detalle
+
+def formatear_ic(intervalo, formato='{:.1f}'):
+    """'media ± semiancho' o solo la media si no hay suficientes ensayos"""
+    if not intervalo or intervalo['media'] is None:
+        return '-'
+    texto = formato.format(intervalo['media'])
+    if intervalo['semiancho'] is not None:
+        texto += ' ± ' + formato.format(intervalo['semiancho'])
+    return texto
+
+def crear_seccion_ensayos(resumen, detalle):
+    """Tabla de ensayos con su RPS, latencia y P99, marcando los descartados"""
+    filas = []
+    for d in sorted(detalle, key=lambda d: d['ensayo'] or 0):
+        estilo = '' if d['aceptado'] else ' style="color:#999"'
+        celdas = ''.join('<td>-</td>' if d['metricas'][m] is None else f"<td>{d['metricas'][m]:,.2f}</td>"
+                         for m in METRICAS_ENSAYO)
+        estado = '✅ aceptado' if d['aceptado'] else f"❌ {d['motivo']}"
+        filas.append(f"<tr{estilo}><td>{d['ensayo']}</td><td>{d['orden']}</td>{celdas}<td>{estado}</td></tr>")
+    ic = resumen.get('intervalos_confianza', {})
+    return (
+        f"<p>{resumen.get('ensayos_aceptados', 0)} de {len(detalle)} ensayos aceptados. IC del "
+        f"{resumen.get('confianza', CONFIANZA_ENSAYOS):.0%} entre ensayos: RPS {formatear_ic(ic.get('rps'))}, "
+        f"latencia promedio {formatear_ic(ic.get('latencia_promedio'), '{:.2f}')} ms, "
+        f"P99 {formatear_ic(ic.get('p99'), '{:.2f}')} ms. Los percentiles del resumen fusionan las "
+        "distribuciones de los ensayos aceptados.</p>"
+        "<table class=\"tabla-etapas\"><tr><th>Ensayo</th><th>Orden</th><th>RPS</th><th>Latencia (ms)</th>"
+        "<th>P99 (ms)</th><th>Estado</th></tr>" + ''.join(filas) + "</table>"
+    )
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Espacio de Claves para el Escenario GET Verify Number
+Reparte el parámetro `username` sobre un espacio de claves con distribución uniforme, Zipf
+o conjunto caliente, precalculando por hilo la secuencia de claves que recorre wrk
+"""
+
+import argparse
+import os
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utilidades_wrk import ajustar_comando_wrk, escribir_script_envoltorio, parsear_comando_wrk, parsear_duracion
+
+DISTRIBUCIONES = ['uniforme', 'zipf', 'caliente']
+PARAMETRO_CLAVE = 'username'
+CLAVE_BASE = 60000000
+CLAVES = 1000000
+EXPONENTE_ZIPF = 0.99
+# Conjunto caliente: FRACCION_CALIENTE de las claves recibe TRAFICO_CALIENTE de los requests
+FRACCION_CALIENTE = 0.01
+TRAFICO_CALIENTE = 0.9
+LONGITUD_SECUENCIA = 10000
+# Por debajo de esta fracción del espacio recorrida por las secuencias, la distribución teórica ya no describe el tráfico
+COBERTURA_MINIMA = 0.5
+# Marcador que se reemplaza por la clave en la ruta
+MARCADOR_CLAVE = '__CLAVE__'
+
+# Cada hilo lee solo su línea del archivo de claves y preformatea un request por clave
+# distinta; request() recorre la secuencia sin generar números aleatorios ni formatear.
+LUA_CLAVES = """
+local setup_base = setup
+local init_base = init
+local solicitudes = {}
+local indice = 0
+local hilos_creados = 0
+
+function setup(thread)
+    if setup_base then setup_base(thread) end
+    hilos_creados = hilos_creados + 1
+    thread:set("id_hilo", hilos_creados)
+end
+
+local function linea_del_hilo()
+    local archivo = io.open(ARCHIVO_CLAVES, "r")
+    if not archivo then return nil end
+    local buscada = (id_hilo - 1) % HILOS + 1
+    local numero = 0
+    for linea in archivo:lines() do
+        numero = numero + 1
+        if numero == buscada then
+            archivo:close()
+            return linea
+        end
+    end
+    archivo:close()
+    return nil
+end
+
+function init(args)
+    if init_base then init_base(args) end
+    local linea = linea_del_hilo()
+    if not linea then error("sin claves para el hilo " .. tostring(id_hilo) .. " en " .. ARCHIVO_CLAVES) end
+    local formateadas = {}
+    for clave in linea:gmatch("%S+") do
+        local solicitud = formateadas[clave]
+        if not solicitud then
+            solicitud = wrk.format(nil, RUTA_PREFIJO .. clave .. RUTA_SUFIJO)
+            formateadas[clave] = solicitud
+        end
+        solicitudes[#solicitudes + 1] = solicitud
+    end
+end
+
+function request()
+    indice = indice % #solicitudes + 1
+    return solicitudes[indice]
+end
+"""
+
+class EspacioClaves:
+    """Distribución de popularidad sobre `claves` claves consecutivas desde `base`"""
+
+    def __init__(self, distribucion, claves=CLAVES, base=CLAVE_BASE, exponente=EXPONENTE_ZIPF,
+                 fraccion_caliente=FRACCION_CALIENTE, trafico_caliente=TRAFICO_CALIENTE):
+        if distribucion not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución '{distribucion}' no válida ({', '.join(DISTRIBUCIONES)})")
+        if claves < 1:
+            raise ValueError("El espacio debe tener al menos una clave")
+        self.distribucion = distribucion
+        self.claves = int(claves)
+        self.base = int(base)
+        self.exponente = exponente
+        self.calientes = max(1, min(self.claves, int(round(self.claves * fraccion_caliente))))
+        self.trafico_caliente = trafico_caliente
+        # Multiplicador coprimo con el espacio: el rango de popularidad se dispersa sobre las
+        # claves (la más popular no es la primera) sin guardar una permutación
+        self.multiplicador = next(m for m in range(2654435761 % self.claves or 1, 2 ** 63)
+                                  if _mcd(m, self.claves) == 1)
+
+    def _rangos(self, rng, cantidad):
+        """Rango de popularidad (0 = la más popular) de `cantidad` requests"""
+        import numpy as np
+
+        if self.distribucion == 'uniforme':
+            return rng.integers(0, self.claves, cantidad)
+        if self.distribucion == 'zipf':
+            acumulada = np.cumsum(np.arange(1, self.claves + 1, dtype=float) ** -self.exponente)
+            return np.searchsorted(acumulada, rng.random(cantidad) * acumulada[-1], side='right')
+        calientes = rng.random(cantidad) < self.trafico_caliente
+        if self.calientes == self.claves:
+            return rng.integers(0, self.claves, cantidad)
+        return np.where(calientes, rng.integers(0, self.calientes, cantidad),
+                        rng.integers(self.calientes, self.claves, cantidad))
+
+    def generar(self, hilos, longitud=LONGITUD_SECUENCIA, semilla=None):
+        """Matriz hilos x longitud de claves (enteros) según la distribución"""
+        import numpy as np
+
+        rng = np.random.default_rng(semilla)
+        rangos = self._rangos(rng, hilos * longitud).astype(np.int64)
+        return (self.base + (rangos + 1) * self.multiplicador % self.claves).reshape(hilos, longitud)
+
+    def proporcion_cache(self, capacidad):
+        """Fracción de requests que acierta una caché con las `capacidad` claves más populares"""
+        capacidad = max(0, min(int(capacidad), self.claves))
+        if self.distribucion == 'uniforme':
+            return capacidad / self.claves
+        if self.distribucion == 'zipf':
+            import numpy as np
+            pesos = np.arange(1, self.claves + 1, dtype=float) ** -self.exponente
+            return float(pesos[:capacidad].sum() / pesos.sum())
+        if self.distribucion == 'caliente' and self.calientes < self.claves:
+            if capacidad <= self.calientes:
+                return self.trafico_caliente * capacidad / self.calientes
+            return (self.trafico_caliente
+                    + (1 - self.trafico_caliente) * (capacidad - self.calientes) / (self.claves - self.calientes))
+        return capacidad / self.claves
+
+    def secuencia_para_cobertura(self, hilos, cobertura=COBERTURA_MINIMA):
+        """Longitud por hilo con la que una distribución uniforme recorrería `cobertura` del espacio"""
+        import math
+        # Claves distintas esperadas tras n muestras uniformes: claves * (1 - e^(-n / claves))
+        return math.ceil(-self.claves * math.log(1 - cobertura) / hilos)
+
+    def describir(self):
+        if self.distribucion == 'zipf':
+            return f"zipf (s={self.exponente:g}) sobre {self.claves:,} claves"
+        if self.distribucion == 'caliente':
+            return (f"conjunto caliente: {self.calientes:,} de {self.claves:,} claves "
+                    f"reciben el {self.trafico_caliente:.0%} del tráfico")
+        return f"uniforme sobre {self.claves:,} claves"
+
+def _mcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+def proporcion_cache_secuencias(secuencias, capacidad):
+    """Fracción de requests que acierta una caché con las `capacidad` claves más frecuentes de las secuencias
+
+    wrk repite en ciclo la secuencia de cada hilo, así que tras el calentamiento el tráfico
+    real es el de las secuencias generadas y no el de la distribución sobre todo el espacio.
+    """
+    import numpy as np
+
+    _, frecuencias = np.unique(secuencias, return_counts=True)
+    frecuencias = np.sort(frecuencias)[::-1]
+    return float(frecuencias[:max(0, int(capacidad))].sum() / frecuencias.sum())
+
+def plantilla_ruta(url, parametro=PARAMETRO_CLAVE):
+    """Dividir la ruta de la URL en (prefijo, sufijo) alrededor del valor de `parametro`"""
+    partes = urlsplit(url)
+    consulta = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if k != parametro]
+    consulta.append((parametro, MARCADOR_CLAVE))
+    ruta = urlunsplit(('', '', partes.path or '/', urlencode(consulta, safe='_'), ''))
+    prefijo, _, sufijo = ruta.partition(MARCADOR_CLAVE)
+    return prefijo, sufijo
+
+def preparar_script_claves(comando, espacio, archivo_claves, longitud=LONGITUD_SECUENCIA, semilla=None,
+                           parametro=PARAMETRO_CLAVE, capacidades_cache=()):
+    """Escribir las secuencias por hilo y el script envoltorio; devuelve (comando, resumen)
+
+    Los aciertos de caché de `capacidades_cache` se calculan sobre las secuencias que
+    recorrerá wrk; los de la distribución teórica quedan en `cache_teorica`.
+    """
+    import numpy as np
+
+    opciones = parsear_comando_wrk(comando)
+    hilos = opciones['hilos'] or 1
+    secuencias = espacio.generar(hilos, longitud, semilla)
+    with open(archivo_claves, 'w', encoding='utf-8') as f:
+        for fila in secuencias:
+            f.write(' '.join(map(str, fila)) + '\n')
+
+    prefijo, sufijo = plantilla_ruta(opciones['url'], parametro)
+    base = opciones['script'].rsplit('.', 1)[0]
+    script = escribir_script_envoltorio(
+        opciones['script'], f"{base}_claves", LUA_CLAVES,
+        globales={
+            'ARCHIVO_CLAVES': os.path.abspath(archivo_claves),
+            'HILOS': hilos,
+            'RUTA_PREFIJO': prefijo,
+            'RUTA_SUFIJO': sufijo
+        }
+    )
+    _, frecuencias = np.unique(secuencias, return_counts=True)
+    resumen = {
+        'distribucion': espacio.distribucion,
+        'descripcion': espacio.describir(),
+        'claves': espacio.claves,
+        'clave_base': espacio.base,
+        'parametro': parametro,
+        'exponente': espacio.exponente if espacio.distribucion == 'zipf' else None,
+        'claves_calientes': espacio.calientes if espacio.distribucion == 'caliente' else None,
+        'trafico_caliente': espacio.trafico_caliente if espacio.distribucion == 'caliente' else None,
+        'longitud_secuencia': longitud,
+        'semilla': semilla,
+        'claves_distintas': int(len(frecuencias)),
+        'max_por_hilo': int(max(len(np.unique(fila)) for fila in secuencias)),
+        'proporcion_clave_top': float(frecuencias.max() / secuencias.size),
+        'cobertura': len(frecuencias) / espacio.claves,
+        'cache': {str(capacidad): proporcion_cache_secuencias(secuencias, capacidad) for capacidad in capacidades_cache},
+        'cache_teorica': {str(capacidad): espacio.proporcion_cache(capacidad) for capacidad in capacidades_cache}
+    }
+    return ajustar_comando_wrk(comando, script=script), resumen
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta el escenario GET repartiendo username sobre un espacio de claves sesgado'
+    )
+    parser.add_argument('distribucion', nargs='?', choices=DISTRIBUCIONES, help='Distribución de popularidad')
+    parser.add_argument('--claves', type=int, default=CLAVES, help='Tamaño del espacio de claves')
+    parser.add_argument('--base', type=int, default=CLAVE_BASE, help='Primera clave del espacio')
+    parser.add_argument('--exponente', type=float, default=EXPONENTE_ZIPF, help='Exponente s de la distribución Zipf')
+    parser.add_argument('--fraccion-caliente', type=float, default=FRACCION_CALIENTE,
+                        help='Fracción de claves del conjunto caliente')
+    parser.add_argument('--trafico-caliente', type=float, default=TRAFICO_CALIENTE,
+                        help='Fracción de requests que va al conjunto caliente')
+    parser.add_argument('--secuencia', type=int, default=LONGITUD_SECUENCIA,
+                        help='Claves precalculadas por hilo (se recorren en ciclo)')
+    parser.add_argument('--semilla', type=int, help='Semilla para reproducir las secuencias')
+    parser.add_argument('--cache', type=int, action='append', default=[],
+                        help='Mostrar el acierto esperado con una caché de N claves (repetible)')
+    parser.add_argument('--duracion', help='Duración de la prueba (por defecto la del escenario)')
+    parser.add_argument('--conexiones', type=int, help='Conexiones concurrentes (por defecto las del escenario)')
+    parser.add_argument('--hilos', type=int, help='Hilos de wrk (por defecto los del escenario)')
+    parser.add_argument('--url', help='URL del endpoint (por defecto la del escenario GET)')
+    parser.add_argument('--archivo-claves', default='claves_get.txt', help='Archivo con una secuencia por hilo')
+    parser.add_argument('--solo-script', action='store_true', help='Generar el script y mostrar el comando sin ejecutarlo')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.distribucion:
+        parser.error("Indica la distribución")
+    if args.secuencia < 1:
+        parser.error("--secuencia debe ser al menos 1")
+    if not 0 < args.fraccion_caliente <= 1 or not 0 <= args.trafico_caliente <= 1:
+        parser.error("--fraccion-caliente y --trafico-caliente deben estar entre 0 y 1")
+
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    ejecutor = EjecutorPruebasCarga()
+    info = dict(ejecutor.comandos_disponibles['get'])
+    duracion = parsear_duracion(args.duracion) if args.duracion else None
+    comando = ajustar_comando_wrk(info['comando'], duracion=duracion, conexiones=args.conexiones,
+                                  hilos=args.hilos, url=args.url)
+
+    try:
+        espacio = EspacioClaves(args.distribucion, args.claves, args.base, args.exponente,
+                                args.fraccion_caliente, args.trafico_caliente)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    info['comando'], resumen = preparar_script_claves(comando, espacio, args.archivo_claves,
+                                                      args.secuencia, args.semilla, capacidades_cache=args.cache)
+
+    print(f"🗝️  Espacio de claves: {resumen['descripcion']}")
+    print(f"🗝️  {resumen['claves_distintas']:,} claves distintas en las secuencias "
+          f"(hasta {resumen['max_por_hilo']:,} por hilo); la más frecuente recibe el "
+          f"{resumen['proporcion_clave_top']:.2%} de los requests")
+    for capacidad, proporcion in resumen['cache'].items():
+        print(f"🗝️  Caché de {int(capacidad):,} claves más populares: {proporcion:.1%} de aciertos esperados "
+              f"(la distribución sobre todo el espacio daría {resumen['cache_teorica'][capacidad]:.1%})")
+    if resumen['cobertura'] < COBERTURA_MINIMA:
+        hilos = parsear_comando_wrk(info['comando'])['hilos'] or 1
+        print(f"⚠️  Las secuencias solo recorren el {resumen['cobertura']:.1%} del espacio: wrk las repite en ciclo, "
+              f"así que el tráfico real usa {resumen['claves_distintas']:,} claves y no {espacio.claves:,}. "
+              f"Usa --secuencia {espacio.secuencia_para_cobertura(hilos):,} o menos --claves")
+    if args.solo_script:
+        print(f"⚙️  Comando: {info['comando']}")
+        return
+
+    nombre_prueba = f"GET_claves_{args.distribucion}"
+    ejecutor.ejecutar_comando_wrk(nombre_prueba, info)
+    if nombre_prueba in ejecutor.resultados:
+        ejecutor.resultados[nombre_prueba]['espacio_claves'] = resumen
+    archivo = ejecutor.guardar_resultados()
+    print(f"\nPara generar el dashboard ejecuta: python3 generar_reporte_html.py  ({archivo})")
+
+if __name__ == "__main__":
+    main()
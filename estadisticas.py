@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Funciones Estadísticas para Pruebas de Carga
+Combinación de percentiles de varias ejecuciones, resúmenes ponderados, histogramas logarítmicos
+e intervalos de confianza y prueba pareada t de Student
+"""
+
+import math
+
+# Histogramas logarítmicos: cubetas de ~9% de ancho desde 1 µs (valores en ms)
+BASE_HISTOGRAMA = 0.001
+FACTOR_HISTOGRAMA = 2 ** 0.125
+
+def ordenar_percentiles(percentiles):
+    """Convertir {'p50': 1.2, 'p99.9': 8.0} en una lista [(50.0, 1.2), (99.9, 8.0)] ordenada"""
+    puntos = []
+    for clave, valor in percentiles.items():
+        try:
+            puntos.append((float(str(clave).lstrip('p')), float(valor)))
+        except (TypeError, ValueError):
+            continue
+    puntos.sort()
+    # La función de cuantiles debe ser no decreciente
+    resultado = []
+    maximo = 0.0
+    for p, v in puntos:
+        maximo = max(maximo, v)
+        resultado.append((p, maximo))
+    return resultado
+
+def _cdf_desde_percentiles(puntos, x):
+    """Evaluar la función de distribución aproximada (0-100) de una tabla de percentiles"""
+    p_anterior, v_anterior = 0.0, 0.0
+    for p, v in puntos:
+        if x < v:
+            if v == v_anterior:
+                return p
+            return p_anterior + (p - p_anterior) * (x - v_anterior) / (v - v_anterior)
+        p_anterior, v_anterior = p, v
+    return 100.0
+
+def fusionar_percentiles(distribuciones, percentiles_objetivo=None):
+    """Combinar tablas de percentiles ponderadas por número de requests
+
+    `distribuciones` es una lista de tuplas (percentiles, peso). Cada tabla se
+    trata como una función de cuantiles lineal por tramos; la mezcla se invierte
+    por bisección para obtener los percentiles combinados.
+    """
+    tablas = [(ordenar_percentiles(p), peso) for p, peso in distribuciones if p and peso > 0]
+    if not tablas:
+        return {}
+
+    if percentiles_objetivo is None:
+        objetivos = sorted({p for puntos, _ in tablas for p, _ in puntos})
+    else:
+        objetivos = sorted(float(str(p).lstrip('p')) for p in percentiles_objetivo)
+
+    peso_total = sum(peso for _, peso in tablas)
+    limite_superior = max(puntos[-1][1] for puntos, _ in tablas)
+
+    def cdf_mezcla(x):
+        return sum(_cdf_desde_percentiles(puntos, x) * peso for puntos, peso in tablas) / peso_total
+
+    resultado = {}
+    for objetivo in objetivos:
+        bajo, alto = 0.0, limite_superior
+        for _ in range(60):
+            medio = (bajo + alto) / 2
+            if cdf_mezcla(medio) < objetivo:
+                bajo = medio
+            else:
+                alto = medio
+        resultado[f"p{objetivo:g}"] = alto
+    return resultado
+
+def resumir_ejecuciones(lista_datos, concurrentes=False):
+    """Combinar métricas parseadas de varios tramos de wrk en un único resumen
+
+    Con `concurrentes=True` los tramos se ejecutaron a la vez (p. ej. lotes de
+    conexiones desfasados): la duración es la del tramo más largo y los RPS se suman.
+    """
+    lista_datos = [d for d in lista_datos if d.get('total_requests')]
+    if not lista_datos:
+        return {}
+
+    total_requests = sum(d['total_requests'] for d in lista_datos)
+    if concurrentes:
+        duracion = max(d.get('duracion', 0) for d in lista_datos)
+        rps = sum(d['total_requests'] / d['duracion'] for d in lista_datos if d.get('duracion'))
+    else:
+        duracion = sum(d.get('duracion', 0) for d in lista_datos)
+        rps = total_requests / duracion if duracion else 0
+    resumen = {
+        'total_requests': total_requests,
+        'duracion': duracion,
+        'rps': rps,
+        'rps_reportado': rps,
+        'latencia_promedio': sum(d.get('latencia_promedio', 0) * d['total_requests'] for d in lista_datos) / total_requests,
+        'latencia_max': max(d.get('latencia_max', 0) for d in lista_datos),
+        'percentiles': fusionar_percentiles(
+            [(d.get('percentiles', {}), d['total_requests']) for d in lista_datos]
+        )
+    }
+
+    # Desviación estándar combinada a partir de medias y varianzas de cada tramo
+    media = resumen['latencia_promedio']
+    varianza = sum(
+        d['total_requests'] * (d.get('latencia_stdev', 0) ** 2 + (d.get('latencia_promedio', 0) - media) ** 2)
+        for d in lista_datos
+    ) / total_requests
+    resumen['latencia_stdev'] = varianza ** 0.5
+
+    errores = {'conexion': 0, 'lectura': 0, 'escritura': 0, 'timeout': 0}
+    for d in lista_datos:
+        for clave in errores:
+            errores[clave] += d.get('errores', {}).get(clave, 0)
+    resumen['errores'] = errores
+    resumen['total_errores'] = sum(errores.values())
+    resumen['conexiones_exitosas'] = total_requests
+    resumen['conexiones_fallidas'] = errores['conexion']
+    resumen['total_conexiones_intentadas'] = total_requests + errores['conexion']
+    resumen['respuestas_no_exitosas'] = sum(d.get('respuestas_no_exitosas', 0) for d in lista_datos)
+    if duracion:
+        resumen['rps_exitosos'] = rps * (total_requests - resumen['respuestas_no_exitosas']) / total_requests
+
+    codigos = {}
+    for d in lista_datos:
+        for codigo, cantidad in d.get('codigos_estado', {}).items():
+            codigos[codigo] = codigos.get(codigo, 0) + cantidad
+    if codigos:
+        resumen['codigos_estado'] = codigos
+
+    # Validación muestreada: se suman las respuestas revisadas y válidas de todos los tramos
+    validados = [d['validacion'] for d in lista_datos if d.get('validacion')]
+    if validados:
+        revisadas = sum(v['revisadas'] for v in validados)
+        validas = sum(v['validas'] for v in validados)
+        fallas = {}
+        for v in validados:
+            for regla, cantidad in v.get('fallas', {}).items():
+                fallas[regla] = fallas.get(regla, 0) + cantidad
+        resumen['validacion'] = {
+            'muestreo': validados[0]['muestreo'],
+            'revisadas': revisadas,
+            'validas': validas,
+            'fraccion_valida': validas / revisadas if revisadas else 0,
+            'fallas': fallas
+        }
+        resumen['goodput'] = rps * resumen['validacion']['fraccion_valida']
+
+    return resumen
+
+def nuevo_histograma():
+    """Histograma vacío: {'cubetas': {indice: cantidad}, 'n': muestras, 'suma': total en ms}"""
+    return {'cubetas': {}, 'n': 0, 'suma': 0.0}
+
+def registrar_en_histograma(histograma, valor):
+    """Agregar una muestra (en ms) a su cubeta logarítmica"""
+    indice = 0
+    if valor > BASE_HISTOGRAMA:
+        indice = int(math.log(valor / BASE_HISTOGRAMA, FACTOR_HISTOGRAMA))
+    # Las claves son texto para que el histograma sobreviva igual al JSON
+    clave = str(indice)
+    histograma['cubetas'][clave] = histograma['cubetas'].get(clave, 0) + 1
+    histograma['n'] += 1
+    histograma['suma'] += valor
+
+def fusionar_histogramas(histogramas):
+    """Sumar varios histogramas con las mismas cubetas"""
+    resultado = nuevo_histograma()
+    for histograma in histogramas:
+        for clave, cantidad in histograma['cubetas'].items():
+            resultado['cubetas'][clave] = resultado['cubetas'].get(clave, 0) + cantidad
+        resultado['n'] += histograma['n']
+        resultado['suma'] += histograma['suma']
+    return resultado
+
+def percentil_histograma(histograma, percentil):
+    """Valor (centro geométrico de la cubeta) bajo el cual queda el `percentil` de las muestras"""
+    if not histograma['n']:
+        return None
+    objetivo = histograma['n'] * percentil / 100
+    acumulado = 0
+    for indice in sorted(int(clave) for clave in histograma['cubetas']):
+        acumulado += histograma['cubetas'][str(indice)]
+        if acumulado >= objetivo:
+            return BASE_HISTOGRAMA * FACTOR_HISTOGRAMA ** (indice + 0.5)
+    return BASE_HISTOGRAMA * FACTOR_HISTOGRAMA ** (indice + 0.5)
+
+def media_histograma(histograma):
+    return histograma['suma'] / histograma['n'] if histograma['n'] else None
+
+def _beta_incompleta(a, b, x):
+    """Beta incompleta regularizada I_x(a, b) por fracción continua (método de Lentz)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1 - _beta_incompleta(b, a, 1 - x)
+    frente = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                      + a * math.log(x) + b * math.log(1 - x)) / a
+    minimo = 1e-30
+    f, c, d = 1.0, 1.0, 0.0
+    for i in range(400):
+        m = i // 2
+        if i == 0:
+            numerador = 1.0
+        elif i % 2 == 0:
+            numerador = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        else:
+            numerador = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1 + numerador * d
+        d = 1 / (d if abs(d) > minimo else minimo)
+        c = 1 + numerador / c
+        c = c if abs(c) > minimo else minimo
+        f *= c * d
+        if abs(1 - c * d) < 1e-12:
+            break
+    return frente * (f - 1)
+
+def cdf_t(t, grados):
+    """Función de distribución de la t de Student con `grados` grados de libertad"""
+    cola = 0.5 * _beta_incompleta(grados / 2, 0.5, grados / (grados + t * t))
+    return 1 - cola if t >= 0 else cola
+
+def cuantil_t(probabilidad, grados):
+    """Inversa de cdf_t por bisección (sin depender de scipy)"""
+    if probabilidad < 0.5:
+        return -cuantil_t(1 - probabilidad, grados)
+    bajo, alto = 0.0, 1.0
+    while cdf_t(alto, grados) < probabilidad:
+        alto *= 2
+    for _ in range(100):
+        medio = (bajo + alto) / 2
+        if cdf_t(medio, grados) < probabilidad:
+            bajo = medio
+        else:
+            alto = medio
+    return alto
+
+def intervalo_confianza(valores, confianza=0.95):
+    """Media y semiancho del intervalo de confianza t de Student de una muestra
+
+    El semiancho es None con menos de dos valores.
+    """
+    n = len(valores)
+    if not n:
+        return None, None
+    media = sum(valores) / n
+    if n < 2:
+        return media, None
+    desviacion = math.sqrt(sum((v - media) ** 2 for v in valores) / (n - 1))
+    return media, cuantil_t(1 - (1 - confianza) / 2, n - 1) * desviacion / math.sqrt(n)
+
+def prueba_t_pareada(base, otra, confianza=0.95):
+    """Prueba t pareada de `otra - base` sobre muestras alineadas (mismo intervalo o misma ronda)
+
+    Devuelve la diferencia media, su semiancho de confianza y el valor p bilateral;
+    el semiancho y el valor p son None con menos de dos pares.
+    """
+    diferencias = [b - a for a, b in zip(base, otra) if a is not None and b is not None]
+    media, semiancho = intervalo_confianza(diferencias, confianza)
+    if semiancho is None:
+        return {'diferencia': media, 'semiancho': None, 'p_valor': None, 'pares': len(diferencias)}
+    n = len(diferencias)
+    desviacion = math.sqrt(sum((d - media) ** 2 for d in diferencias) / (n - 1))
+    if not desviacion:
+        p_valor = 1.0 if not media else 0.0
+    else:
+        p_valor = 2 * (1 - cdf_t(abs(media) / (desviacion / math.sqrt(n)), n - 1))
+    return {'diferencia': media, 'semiancho': semiancho, 'p_valor': p_valor, 'pares': n}
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Exportador Masivo de Métricas
+Convierte los resultados guardados a OpenMetrics, protocolo de línea de InfluxDB o CSV,
+archivo por archivo y con escrituras por lotes, con modo incremental por marca de agua
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import urllib.request
+
+from historial_resultados import (crear_analizador, iterar_ejecuciones, listar_resultados, marca_de_agua,
+                                  resumir_ejecucion)
+
+FORMATOS = ['openmetrics', 'influx', 'csv']
+TAMANO_LOTE = 5000
+ARCHIVO_MARCA_AGUA = '.marca_exportacion_{formato}.json'
+
+CAMPOS_METRICAS = [
+    ('total_requests', 'requests'),
+    ('duracion', 'duracion_segundos'),
+    ('rps_reportado', 'rps'),
+    ('rps_exitosos', 'rps_exitosos'),
+    ('goodput', 'goodput'),
+    ('latencia_promedio', 'latencia_promedio_ms'),
+    ('latencia_stdev', 'latencia_stdev_ms'),
+    ('latencia_max', 'latencia_max_ms'),
+    ('respuestas_no_exitosas', 'respuestas_no_exitosas'),
+    ('total_errores', 'errores_socket')
+]
+PERCENTILES_CSV = ['p50', 'p75', 'p90', 'p99', 'p99.9', 'p99.99']
+TIPOS_ERROR = ['conexion', 'lectura', 'escritura', 'timeout']
+
+def puntos_ejecucion(ejecucion, analizador):
+    """Convertir una prueba en puntos de medición: uno de resumen y uno por intervalo o tramo"""
+    normalizada = resumir_ejecucion(ejecucion, analizador)
+    if not normalizada:
+        return
+    etiquetas = {
+        'prueba': ejecucion['clave'],
+        'ejecucion': os.path.basename(ejecucion['archivo']).rsplit('.', 1)[0].replace('resultados_pruebas_carga_', '')
+    }
+    yield {'medicion': 'resumen', 'etiquetas': etiquetas, 'marca': normalizada['fin'], 't': None,
+           'datos': normalizada['resumen']}
+    for punto in normalizada['series']:
+        etiquetas_punto = dict(etiquetas, etapa=punto['etapa']) if punto['etapa'] else etiquetas
+        yield {'medicion': 'intervalo', 'etiquetas': etiquetas_punto, 'marca': punto['marca'], 't': punto['t'],
+               'datos': punto['datos']}
+
+def cuantil(percentil):
+    return f"{float(percentil[1:]) / 100:g}"
+
+class EscritorPorLotes:
+    """Acumular líneas y escribirlas en bloques de `tamano_lote`"""
+
+    def __init__(self, salida, tamano_lote=TAMANO_LOTE, url=None, cabeceras=None):
+        self.salida = salida
+        self.tamano_lote = tamano_lote
+        self.url = url
+        self.cabeceras = cabeceras or {}
+        self.pendientes = []
+        self.lineas = 0
+        self.lotes = 0
+
+    def agregar(self, linea):
+        self.pendientes.append(linea)
+        if len(self.pendientes) >= self.tamano_lote:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self.pendientes:
+            return
+        bloque = '\n'.join(self.pendientes) + '\n'
+        if self.url:
+            solicitud = urllib.request.Request(self.url, data=bloque.encode(), method='POST', headers={
+                'Content-Type': 'text/plain; charset=utf-8', **self.cabeceras
+            })
+            with urllib.request.urlopen(solicitud, timeout=30):
+                pass
+        else:
+            self.salida.write(bloque)
+        self.lineas += len(self.pendientes)
+        self.lotes += 1
+        self.pendientes = []
+
+class ExportadorInflux:
+    """Protocolo de línea: una medición por tipo de punto, etiquetas de prueba y marca en nanosegundos"""
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+
+    @staticmethod
+    def escapar(texto):
+        return str(texto).replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+    def exportar(self, punto):
+        datos = punto['datos']
+        campos = {nombre: datos[clave] for clave, nombre in CAMPOS_METRICAS if datos.get(clave) is not None}
+        campos.update({k.replace('.', '_'): v for k, v in datos.get('percentiles', {}).items()})
+        campos.update({f"errores_{k}": v for k, v in datos.get('errores', {}).items()})
+        campos.update({f"codigo_{k}": v for k, v in datos.get('codigos_estado', {}).items()})
+        if punto['t'] is not None:
+            campos['t_segundos'] = punto['t']
+        if not campos:
+            return
+        etiquetas = ','.join(f"{k}={self.escapar(v)}" for k, v in sorted(punto['etiquetas'].items()))
+        valores = ','.join(
+            f"{k}={v}i" if isinstance(v, int) else f"{k}={float(v)!r}" for k, v in campos.items()
+        )
+        self.escritor.agregar(f"wrk_{punto['medicion']},{etiquetas} {valores} {int(punto['marca'] * 1e9)}")
+
+    def finalizar(self):
+        self.escritor.vaciar()
+
+class ExportadorCSV:
+    """Una fila por punto con columnas fijas para que el archivo sea cargable sin esquema"""
+
+    COLUMNAS = (['medicion', 'prueba', 'ejecucion', 'etapa', 'marca_tiempo', 't_segundos']
+                + [nombre for _, nombre in CAMPOS_METRICAS] + PERCENTILES_CSV
+                + [f"errores_{tipo}" for tipo in TIPOS_ERROR])
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.escritor.agregar(','.join(self.COLUMNAS))
+
+    def exportar(self, punto):
+        datos = punto['datos']
+        fila = [punto['medicion'], punto['etiquetas']['prueba'], punto['etiquetas']['ejecucion'],
+                punto['etiquetas'].get('etapa', ''), f"{punto['marca']:.3f}",
+                '' if punto['t'] is None else f"{punto['t']:.3f}"]
+        fila += [datos.get(clave, '') for clave, _ in CAMPOS_METRICAS]
+        fila += [datos.get('percentiles', {}).get(p, '') for p in PERCENTILES_CSV]
+        fila += [datos.get('errores', {}).get(tipo, '') for tipo in TIPOS_ERROR]
+        texto = io.StringIO()
+        csv.writer(texto, lineterminator='').writerow(fila)
+        self.escritor.agregar(texto.getvalue())
+
+    def finalizar(self):
+        self.escritor.vaciar()
+
+class ExportadorOpenMetrics:
+    """OpenMetrics exige que cada familia aparezca contigua: las muestras se acumulan en un
+    archivo temporal por familia y se concatenan al final, sin retenerlas en memoria"""
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.directorio = tempfile.mkdtemp(prefix='exportar_openmetrics_')
+        self.familias = {}
+
+    def familia(self, nombre, tipo, ayuda):
+        if nombre not in self.familias:
+            archivo = open(os.path.join(self.directorio, nombre), 'w+', encoding='utf-8')
+            self.familias[nombre] = {'tipo': tipo, 'ayuda': ayuda, 'archivo': archivo}
+        return self.familias[nombre]['archivo']
+
+    @staticmethod
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def etiquetas(self, etiquetas):
+        return '{' + ','.join(f'{k}="{self.escapar(v)}"' for k, v in sorted(etiquetas.items())) + '}'
+
+    def exportar(self, punto):
+        datos = punto['datos']
+        prefijo = f"wrk_{punto['medicion']}"
+        marca = f"{punto['marca']:.3f}"
+        for clave, nombre in CAMPOS_METRICAS:
+            if datos.get(clave) is not None:
+                self.familia(f"{prefijo}_{nombre}", 'gauge', f"{nombre} de wrk por {punto['medicion']}").write(
+                    f"{prefijo}_{nombre}{self.etiquetas(punto['etiquetas'])} {datos[clave]} {marca}\n")
+        percentiles = datos.get('percentiles', {})
+        if percentiles:
+            archivo = self.familia(f"{prefijo}_latencia_ms", 'summary', f"Percentiles de latencia por {punto['medicion']}")
+            for percentil, valor in percentiles.items():
+                etiquetas = dict(punto['etiquetas'], quantile=cuantil(percentil))
+                archivo.write(f"{prefijo}_latencia_ms{self.etiquetas(etiquetas)} {valor} {marca}\n")
+        for tipo, cantidad in datos.get('errores', {}).items():
+            etiquetas = dict(punto['etiquetas'], tipo=tipo)
+            self.familia(f"{prefijo}_errores", 'gauge', 'Errores de socket por tipo').write(
+                f"{prefijo}_errores{self.etiquetas(etiquetas)} {cantidad} {marca}\n")
+        for codigo, cantidad in datos.get('codigos_estado', {}).items():
+            etiquetas = dict(punto['etiquetas'], codigo=codigo)
+            self.familia(f"{prefijo}_codigos_estado", 'gauge', 'Respuestas por código HTTP').write(
+                f"{prefijo}_codigos_estado{self.etiquetas(etiquetas)} {cantidad} {marca}\n")
+
+    def finalizar(self):
+        for nombre, familia in self.familias.items():
+            self.escritor.agregar(f"# TYPE {nombre} {familia['tipo']}")
+            self.escritor.agregar(f"# HELP {nombre} {familia['ayuda']}")
+            familia['archivo'].seek(0)
+            for linea in familia['archivo']:
+                self.escritor.agregar(linea.rstrip('\n'))
+            familia['archivo'].close()
+        self.escritor.agregar('# EOF')
+        self.escritor.vaciar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+EXPORTADORES = {'openmetrics': ExportadorOpenMetrics, 'influx': ExportadorInflux, 'csv': ExportadorCSV}
+
+def leer_marca_agua(archivo):
+    if not os.path.exists(archivo):
+        return None
+    with open(archivo, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def guardar_marca_agua(archivo, marca):
+    temporal = f"{archivo}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(marca, f)
+    os.replace(temporal, archivo)
+
+def exportar(formato, salida, directorio='.', desde=None, tamano_lote=TAMANO_LOTE, url=None, cabeceras=None):
+    """Exportar todas las ejecuciones posteriores a `desde`; devuelve estadísticas y la nueva marca de agua
+
+    La marca de agua se detiene antes del primer archivo que no se pudo leer (p. ej. uno a
+    medio escribir), para que la próxima exportación incremental lo vuelva a intentar.
+    """
+    archivos = listar_resultados(directorio, desde)
+    escritor = EscritorPorLotes(salida, tamano_lote, url, cabeceras)
+    exportador = EXPORTADORES[formato](escritor)
+    analizador = crear_analizador()
+    pruebas = 0
+    omitidos = []
+    for ejecucion in iterar_ejecuciones(archivos=archivos, omitidos=omitidos):
+        for punto in puntos_ejecucion(ejecucion, analizador):
+            exportador.exportar(punto)
+        pruebas += 1
+    exportador.finalizar()
+    completos = archivos[:archivos.index(omitidos[0])] if omitidos else archivos
+    nueva_marca = marca_de_agua(*completos[-1]) if completos else desde
+    return {'archivos': len(archivos), 'omitidos': len(omitidos), 'pruebas': pruebas, 'lineas': escritor.lineas,
+            'lotes': escritor.lotes}, nueva_marca
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Exporta los resultados guardados a OpenMetrics, InfluxDB (protocolo de línea) o CSV'
+    )
+    parser.add_argument('formato', nargs='?', choices=FORMATOS, help='Formato de salida')
+    parser.add_argument('--directorio', default='.', help='Directorio con los resultados_pruebas_carga_*.json')
+    parser.add_argument('--salida', help='Archivo de salida (por defecto la salida estándar)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Exportar solo las ejecuciones posteriores a la última exportación')
+    parser.add_argument('--marca-agua', help='Archivo de la marca de agua (por defecto uno por formato)')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Líneas por escritura')
+    parser.add_argument('--url', help='Enviar los lotes por POST (p. ej. /api/v2/write de InfluxDB)')
+    parser.add_argument('--token', help='Token para --url (cabecera Authorization: Token ...)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.formato:
+        parser.error("Indica el formato")
+
+    archivo_marca = args.marca_agua or os.path.join(args.directorio, ARCHIVO_MARCA_AGUA.format(formato=args.formato))
+    desde = leer_marca_agua(archivo_marca) if args.incremental else None
+    cabeceras = {'Authorization': f"Token {args.token}"} if args.token else None
+
+    salida = open(args.salida, 'w', encoding='utf-8', newline='') if args.salida else sys.stdout
+    try:
+        estadisticas, nueva_marca = exportar(args.formato, salida, args.directorio, desde, args.lote, args.url, cabeceras)
+    finally:
+        if args.salida:
+            salida.close()
+
+    # Los mensajes van a stderr para no mezclarse con la exportación por salida estándar
+    print(f"📤 {estadisticas['pruebas']} pruebas de {estadisticas['archivos']} archivos → "
+          f"{estadisticas['lineas']:,} líneas en {estadisticas['lotes']} lotes ({args.formato})", file=sys.stderr)
+    if estadisticas['omitidos']:
+        print(f"⚠️  {estadisticas['omitidos']} archivos omitidos por no poder leerse", file=sys.stderr)
+    if args.incremental:
+        if nueva_marca != desde:
+            guardar_marca_agua(archivo_marca, nueva_marca)
+            print(f"🔖 Marca de agua: {nueva_marca['archivo']}", file=sys.stderr)
+        elif estadisticas['archivos']:
+            print("🔖 La marca de agua no avanza: el primer archivo nuevo no se pudo leer", file=sys.stderr)
+        else:
+            print("🔖 Sin ejecuciones nuevas desde la última exportación", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,257 @@ import os
 import sys
 from jinja2 import Template
 
+from calibrar_generador import cargar_perfil_generador, comparar_con_generador, crear_seccion_generador
+from ciclo_vida_conexiones import analizar_ciclo_vida, crear_seccion_ciclo_vida
+from comparar_destinos import crear_seccion_destinos
+from duracion_adaptativa import crear_seccion_convergencia
+from ensayos_repetidos import crear_seccion_ensayos, formatear_ic, resumir_ensayos
+from estadisticas import resumir_ejecuciones
+from metricas_servidor import correlacionar, crear_seccion_metricas_servidor, derivar_series_servidor, serie_cliente
+from modelo_escalabilidad import ajustar_puntos, crear_seccion_escalabilidad
+from perfilado import PERFILADOR
+from perfiles_carga import analizar_resultado_perfil
+from sonda_fases import crear_seccion_fases
+from utilidades_wrk import datos_desde_resumen_json, extraer_resumen_json
+
+# Colores asignados a las pruebas en orden (se repiten si hay más pruebas)
+COLORES_PRUEBAS = ['#FF6B6B', '#4ECDC4', '#FFE66D', '#95E1D3', '#F38BA8', '#FFA07A', '#98D8C8', '#A8E6CF', '#FFD93D']
+
+ESTILOS_DASHBOARD = """
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    margin: 0;
+    padding: 20px;
+    background-color: #f5f5f5;
+}
+.header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 30px;
+    border-radius: 10px;
+    margin-bottom: 30px;
+    text-align: center;
+}
+.header h1 {
+    margin: 0;
+    font-size: 2.5em;
+}
+.dashboard-container {
+    background: white;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    margin-bottom: 30px;
+    overflow: hidden;
+}
+.footer {
+    text-align: center;
+    margin-top: 30px;
+    padding: 20px;
+    background: #333;
+    color: white;
+    border-radius: 10px;
+}
+.info-section {
+    background: white;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    padding: 20px;
+    margin-bottom: 20px;
+}
+.info-section h3 {
+    color: #667eea;
+    margin-top: 0;
+}
+.command-box {
+    background: #f8f9fa;
+    border-left: 4px solid #667eea;
+    padding: 15px;
+    margin: 10px 0;
+    border-radius: 5px;
+    font-family: 'Courier New', monospace;
+    font-size: 14px;
+}
+.metrics-explanation {
+    background: #f8f9fa;
+    border-radius: 10px;
+    padding: 20px;
+    margin-bottom: 20px;
+}
+.metric-item {
+    margin-bottom: 15px;
+    padding: 10px;
+    background: white;
+    border-radius: 5px;
+    border-left: 4px solid #667eea;
+}
+.metric-title {
+    font-weight: bold;
+    color: #667eea;
+    margin-bottom: 5px;
+}
+.metric-description {
+    color: #666;
+    font-size: 14px;
+}
+.warning-box {
+    background: #fff3cd;
+    border: 1px solid #ffeaa7;
+    border-radius: 5px;
+    padding: 15px;
+    margin: 10px 0;
+}
+.warning-title {
+    font-weight: bold;
+    color: #856404;
+    margin-bottom: 5px;
+}
+.tabla-etapas {
+    width: 100%;
+    border-collapse: collapse;
+    margin-bottom: 15px;
+}
+.tabla-etapas th {
+    background: #4ECDC4;
+    color: white;
+    padding: 8px;
+}
+.tabla-etapas td {
+    padding: 6px 8px;
+    border-bottom: 1px solid #eee;
+    text-align: center;
+}
+.enlace-indice {
+    color: white;
+}
+"""
+
+PLANTILLA_DASHBOARD = """
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Dashboard de Resultados de Pruebas de Carga</title>
+    {% if hoja_estilos %}
+    <link rel="stylesheet" href="{{ hoja_estilos }}">
+    {% else %}
+    <style>
+{{ estilos }}
+    </style>
+    {% endif %}
+</head>
+<body>
+    <div class="header">
+        <h1>🚀 Dashboard de Pruebas de Carga</h1>
+        <p>Análisis Completo de Rendimiento - Generado el {{ timestamp }}</p>
+        {% if enlace_indice %}<p><a class="enlace-indice" href="{{ enlace_indice }}">← Todas las ejecuciones</a></p>{% endif %}
+    </div>
+    
+    <div class="info-section">
+        <h3>📋 Información de las Pruebas</h3>
+        <p><strong>Comandos ejecutados:</strong></p>
+        <div class="command-box">
+            wrk -t32 -c50000 -d300s -s get_verify_number_enhanced.lua https://yasta.bancounion.com.bo/gateway/user/verify/number?username=65663503
+        </div>
+        <div class="command-box">
+            wrk -t32 -c50000 -d300s -s post_pagos_enhanced.lua https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage
+        </div>
+        <p><strong>Configuración:</strong> 32 threads, 50000 conexiones concurrentes, 300 segundos de duración</p>
+    </div>
+    
+    <div class="info-section">
+        <h3>📊 Explicación de Métricas</h3>
+        <div class="metrics-explanation">
+            <div class="metric-item">
+                <div class="metric-title">🚀 Requests por Segundo (RPS)</div>
+                <div class="metric-description">Número de peticiones HTTP completadas exitosamente por segundo. Mayor RPS = mejor rendimiento.</div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">⏱️ Latencia Promedio</div>
+                <div class="metric-description">Tiempo promedio que tarda el servidor en responder a una petición (en milisegundos). Menor latencia = respuesta más rápida.</div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">🔗 Conexiones Exitosas vs Fallidas</div>
+                <div class="metric-description">
+                    <strong>Exitosas:</strong> Peticiones que se completaron correctamente<br>
+                    <strong>Fallidas:</strong> Conexiones que no pudieron establecerse (errores de red, servidor sobrecargado, etc.)
+                </div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">❌ Tasa de Errores</div>
+                <div class="metric-description">
+                    Porcentaje de errores respecto al total de peticiones. Se calcula: (Total Errores / Total Requests) × 100
+                </div>
+                <div class="warning-box">
+                    <div class="warning-title">⚠️ Importante sobre Tasa de Errores > 100%</div>
+                    Si ves una tasa de errores superior al 100% (como 307.04%), significa que hubo más errores de conexión que peticiones exitosas. 
+                    Esto ocurre cuando el servidor está sobrecargado y rechaza muchas conexiones antes de procesarlas.
+                </div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">📈 Percentiles de Latencia</div>
+                <div class="metric-description">
+                    <strong>P50:</strong> 50% de las peticiones tardaron menos que este tiempo<br>
+                    <strong>P90:</strong> 90% de las peticiones tardaron menos que este tiempo<br>
+                    <strong>P95:</strong> 95% de las peticiones tardaron menos que este tiempo<br>
+                    <strong>P99:</strong> 99% de las peticiones tardaron menos que este tiempo
+                </div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">🔧 Tipos de Errores</div>
+                <div class="metric-description">
+                    <strong>Conexión:</strong> No se pudo conectar al servidor<br>
+                    <strong>Lectura:</strong> Error al leer la respuesta<br>
+                    <strong>Escritura:</strong> Error al enviar la petición<br>
+                    <strong>Timeout:</strong> El servidor tardó demasiado en responder
+                </div>
+            </div>
+            
+            <div class="metric-item">
+                <div class="metric-title">📊 Total de Requests</div>
+                <div class="metric-description">Número total de peticiones HTTP que se completaron exitosamente durante la prueba.</div>
+            </div>
+        </div>
+    </div>
+    
+    <div class="dashboard-container">
+        {{ chart_html }}
+    </div>
+    
+    {% for seccion in secciones %}
+    <div class="info-section">
+        <h3>{{ seccion.titulo }}</h3>
+        {{ seccion.html }}
+    </div>
+    {% endfor %}
+    
+    <div class="footer">
+        <p>Generado automáticamente por el Sistema de Análisis de Carga</p>
+        <p>Timestamp: {{ timestamp }}</p>
+    </div>
+</body>
+</html>
+"""
+
 class AnalizadorHTML:
     def __init__(self, archivo_resultados=None):
         self.archivo_resultados = archivo_resultados
         self.datos_parseados = {}
+        self.secciones_adicionales = []
+        self.analisis_ciclo_vida = None
         
     def parsear_salida_wrk(self, texto_salida):
         """Parsear la salida de wrk y extraer métricas"""
+        # Camino rápido: los scripts mejorados imprimen un resumen JSON completo
+        resumen_json = extraer_resumen_json(texto_salida)
+        if resumen_json is not None:
+            return datos_desde_resumen_json(resumen_json)
+
         datos = {}
         
         # Extraer métricas básicas
@@ -70,6 +314,12 @@ class AnalizadorHTML:
             datos['errores'] = {'conexion': 0, 'lectura': 0, 'escritura': 0, 'timeout': 0}
             datos['total_errores'] = 0
         
+        # Respuestas HTTP fuera de 2xx/3xx (p. ej. 401 por token expirado) no cuentan como throughput útil
+        non_2xx_match = re.search(r'Non-2xx or 3xx responses:\s+(\d+)', texto_salida)
+        datos['respuestas_no_exitosas'] = int(non_2xx_match.group(1)) if non_2xx_match else 0
+        if datos.get('duracion'):
+            datos['rps_exitosos'] = (datos['total_requests'] - datos['respuestas_no_exitosas']) / datos['duracion']
+        
         # Calcular conexiones exitosas y fallidas
         total_requests = datos.get('total_requests', 0)
         total_errores_conexion = datos['errores']['conexion']
@@ -112,14 +362,185 @@ class AnalizadorHTML:
     
     def cargar_resultados(self, archivo_resultados):
         """Cargar resultados desde archivo JSON"""
-        with open(archivo_resultados, 'r') as f:
-            resultados_raw = json.load(f)
+        with PERFILADOR.etapa('cargar_json', 'io'):
+            with open(archivo_resultados, 'r') as f:
+                resultados_raw = json.load(f)
         
+        with PERFILADOR.etapa('parsear_resultados', 'reporte', reporte=True):
+            self.parsear_resultados(resultados_raw)
+    
+    def parsear_resultados(self, resultados_raw):
+        """Parsear todas las pruebas de un diccionario de resultados"""
         for nombre_prueba, datos_prueba in resultados_raw.items():
-            if 'stdout' in datos_prueba:
+            # Las claves con '_' al inicio son metadatos (p. ej. tiempos del perfilado)
+            if nombre_prueba.startswith('_'):
+                continue
+            if 'etapas' in datos_prueba:
+                self.cargar_resultado_perfil(nombre_prueba, datos_prueba)
+            elif 'intervalos' in datos_prueba:
+                self.cargar_resultado_intervalos(nombre_prueba, datos_prueba)
+            elif 'ensayos' in datos_prueba:
+                self.cargar_resultado_ensayos(nombre_prueba, datos_prueba)
+            elif 'stdout' in datos_prueba:
                 self.datos_parseados[nombre_prueba] = self.parsear_salida_wrk(datos_prueba['stdout'])
                 self.datos_parseados[nombre_prueba]['salida_raw'] = datos_prueba['stdout']
                 self.datos_parseados[nombre_prueba]['tiempo_ejecucion'] = datos_prueba.get('execution_time', 0)
+                for clave in ('modo_conexion', 'reutilizacion', 'conexiones'):
+                    if clave in datos_prueba:
+                        self.datos_parseados[nombre_prueba][clave] = datos_prueba[clave]
+        
+        # Desglose por fase de la sonda que corrió junto a wrk y convergencia de la duración adaptativa
+        for nombre_prueba, datos_prueba in resultados_raw.items():
+            if not nombre_prueba.startswith('_') and isinstance(datos_prueba, dict) and datos_prueba.get('sonda_fases'):
+                self.agregar_seccion(f"🔬 Fases de Latencia - {nombre_prueba.replace('_', ' ')}",
+                                     crear_seccion_fases(datos_prueba['sonda_fases']))
+            if not nombre_prueba.startswith('_') and isinstance(datos_prueba, dict) and datos_prueba.get('duracion_adaptativa'):
+                self.agregar_seccion(f"⏱️ Duración Adaptativa - {nombre_prueba.replace('_', ' ')}",
+                                     crear_seccion_convergencia(datos_prueba['duracion_adaptativa']))
+        
+        # Pruebas del perfilado de ciclo de vida de conexiones
+        modos_conexion = {
+            datos['modo_conexion']: datos for datos in self.datos_parseados.values() if 'modo_conexion' in datos
+        }
+        if modos_conexion:
+            self.analisis_ciclo_vida = analizar_ciclo_vida(modos_conexion)
+            if self.analisis_ciclo_vida:
+                self.agregar_seccion('🔌 Ciclo de Vida de Conexiones', crear_seccion_ciclo_vida(self.analisis_ciclo_vida))
+        
+        # Comparación A/B entre destinos ejecutados a la vez o intercalados
+        if resultados_raw.get('_comparacion_destinos'):
+            self.agregar_seccion('🆚 Comparación de Destinos', crear_seccion_destinos(resultados_raw['_comparacion_destinos']))
+        
+        # Comparación con el techo y el piso del generador calibrado en la máquina que corrió las pruebas
+        maquina = resultados_raw.get('_maquina')
+        perfil = cargar_perfil_generador(maquina['host']) if maquina else None
+        if perfil:
+            comparaciones = {}
+            for nombre_prueba, datos in self.datos_parseados.items():
+                comando = resultados_raw.get(nombre_prueba, {}).get('comando')
+                comparacion = comparar_con_generador(comando, datos, perfil) if comando else None
+                if comparacion:
+                    comparaciones[nombre_prueba] = comparacion
+            if comparaciones:
+                self.agregar_seccion('🧮 Techo del Generador', crear_seccion_generador(comparaciones, perfil['maquina']))
+    
+    def cargar_resultado_perfil(self, nombre_prueba, datos_prueba):
+        """Cargar una prueba ejecutada con perfil de carga por etapas"""
+        resumen, etapas, recuperaciones = analizar_resultado_perfil(datos_prueba, self)
+        resumen['salida_raw'] = '\n'.join(
+            tramo.get('stdout', '') for etapa in datos_prueba['etapas'] for tramo in etapa['tramos']
+        )
+        resumen['tiempo_ejecucion'] = datos_prueba.get('execution_time', 0)
+        resumen['etapas'] = etapas
+        resumen['recuperacion'] = recuperaciones
+        self.datos_parseados[nombre_prueba] = resumen
+        self.agregar_seccion(
+            f"📐 Perfil de Carga - {nombre_prueba.replace('_', ' ')} ({datos_prueba.get('perfil', '')})",
+            self.crear_seccion_perfil(etapas, recuperaciones)
+        )
+        
+        # Con varios niveles de conexiones las etapas sirven de puntos throughput vs concurrencia
+        modelo = ajustar_puntos([
+            {'concurrencia': etapa['conexiones'], 'etapa': etapa['nombre'],
+             'rps': etapa['estadisticas'].get('rps_reportado') or etapa['estadisticas'].get('rps', 0)}
+            for etapa in etapas if etapa['estadisticas'].get('total_requests')
+        ])
+        if modelo:
+            self.agregar_seccion(f"📈 Escalabilidad (USL) - {nombre_prueba.replace('_', ' ')}",
+                                 crear_seccion_escalabilidad(modelo))
+    
+    def cargar_resultado_ensayos(self, nombre_prueba, datos_prueba):
+        """Cargar una prueba de ensayos repetidos descartando los atípicos"""
+        resumen, detalle = resumir_ensayos(datos_prueba, self)
+        if not resumen:
+            print(f"⚠️  {nombre_prueba}: ningún ensayo válido")
+            return
+        resumen['salida_raw'] = '\n'.join(ensayo.get('stdout', '') for ensayo in datos_prueba['ensayos'])
+        resumen['tiempo_ejecucion'] = datos_prueba.get('execution_time', 0)
+        self.datos_parseados[nombre_prueba] = resumen
+        self.agregar_seccion(f"🎲 Ensayos Repetidos - {nombre_prueba.replace('_', ' ')}",
+                             crear_seccion_ensayos(resumen, detalle))
+    
+    def cargar_resultado_intervalos(self, nombre_prueba, datos_prueba):
+        """Cargar una prueba ejecutada por intervalos y correlacionarla con las métricas del servidor"""
+        puntos = serie_cliente(datos_prueba, self)
+        resumen = resumir_ejecuciones([punto['datos'] for punto in puntos])
+        resumen['salida_raw'] = '\n'.join(tramo.get('stdout', '') for tramo in datos_prueba['intervalos'])
+        resumen['tiempo_ejecucion'] = datos_prueba.get('execution_time', 0)
+        self.datos_parseados[nombre_prueba] = resumen
+        
+        metricas = datos_prueba.get('metricas_servidor')
+        if metricas and metricas['t']:
+            derivadas = derivar_series_servidor(metricas)
+            self.agregar_seccion(
+                f"🖥️ Métricas del Servidor - {nombre_prueba.replace('_', ' ')}",
+                crear_seccion_metricas_servidor(puntos, derivadas, correlacionar(puntos, derivadas))
+            )
+    
+    def agregar_seccion(self, titulo, html):
+        """Agregar una sección HTML adicional al dashboard"""
+        self.secciones_adicionales.append({'titulo': titulo, 'html': html})
+    
+    def crear_seccion_perfil(self, etapas, recuperaciones):
+        """Crear la tabla por etapas, la línea de tiempo y el tiempo de recuperación"""
+        filas = []
+        for etapa in etapas:
+            est = etapa['estadisticas']
+            filas.append(
+                f"<tr><td>{etapa['nombre']}</td><td>{etapa['tipo']}</td>"
+                f"<td>{etapa['conexiones']:,}</td><td>{etapa['duracion']:.0f}s</td>"
+                f"<td>{est.get('rps_reportado', 0):.1f}</td><td>{est.get('latencia_promedio', 0):.1f}</td>"
+                f"<td>{est.get('percentiles', {}).get('p99', 0):.1f}</td><td>{est.get('total_errores', 0):,}</td>"
+                f"<td>{'Excluida' if etapa['excluir_de_resumen'] else 'Incluida'}</td></tr>"
+            )
+        tabla = (
+            "<table class=\"tabla-etapas\"><tr><th>Etapa</th><th>Tipo</th><th>Conexiones</th><th>Duración</th>"
+            "<th>RPS</th><th>Latencia Prom (ms)</th><th>P99 (ms)</th><th>Errores</th><th>Resumen</th></tr>"
+            + ''.join(filas) + "</table>"
+        )
+        
+        textos_recuperacion = []
+        for rec in recuperaciones:
+            if rec['recuperado']:
+                textos_recuperacion.append(
+                    f"<p><strong>⏱️ Tiempo de recuperación tras {rec['pico']}:</strong> "
+                    f"{rec['tiempo_recuperacion']:.0f}s (línea base {rec['linea_base']}: "
+                    f"{rec['latencia_base']:.1f}ms, {rec['rps_base']:.1f} RPS, tolerancia {rec['tolerancia']:.0%})</p>"
+                )
+            else:
+                textos_recuperacion.append(
+                    f"<p><strong>⏱️ Tiempo de recuperación tras {rec['pico']}:</strong> "
+                    f"no recuperado ({rec.get('motivo', '')})</p>"
+                )
+        
+        # Línea de tiempo de RPS y latencia por tramo
+        tiempos, rps, latencias, nombres = [], [], [], []
+        inicio_etapa = 0.0
+        for etapa in etapas:
+            if len(etapa['tramos']) > 1 and 't_inicio' in etapa['tramos'][0]:
+                for tramo, datos in zip(etapa['tramos'], etapa['datos_tramos']):
+                    tiempos.append(inicio_etapa + tramo['t_fin'])
+                    rps.append(datos.get('rps_reportado', 0))
+                    latencias.append(datos.get('latencia_promedio', 0))
+                    nombres.append(etapa['nombre'])
+            else:
+                tiempos.append(inicio_etapa + etapa['duracion'])
+                rps.append(etapa['estadisticas'].get('rps_reportado', 0))
+                latencias.append(etapa['estadisticas'].get('latencia_promedio', 0))
+                nombres.append(etapa['nombre'])
+            inicio_etapa += etapa['duracion']
+        
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        fig.add_trace(go.Scatter(x=tiempos, y=rps, name='RPS', mode='lines+markers', line_shape='hv',
+                                 text=nombres, marker_color='#4ECDC4'), secondary_y=False)
+        fig.add_trace(go.Scatter(x=tiempos, y=latencias, name='Latencia Prom (ms)', mode='lines+markers',
+                                 line_shape='hv', text=nombres, marker_color='#FF6B6B'), secondary_y=True)
+        fig.update_layout(height=400, title_text='Evolución por Etapas', title_x=0.5)
+        fig.update_xaxes(title_text='Tiempo (s)')
+        fig.update_yaxes(title_text='RPS', secondary_y=False)
+        fig.update_yaxes(title_text='Latencia (ms)', secondary_y=True)
+        
+        return tabla + ''.join(textos_recuperacion) + fig.to_html(full_html=False, include_plotlyjs=False)
     
     def crear_graficos_interactivos(self):
         """Crear dashboard HTML interactivo con Plotly"""
@@ -132,12 +553,11 @@ class AnalizadorHTML:
             return self.crear_dashboard_prueba_unica()
     
     def crear_dashboard_comparacion(self):
-        """Crear dashboard de comparación para dos pruebas"""
+        """Crear dashboard de comparación para dos o más pruebas"""
         nombres_pruebas = list(self.datos_parseados.keys())
-        nombre_prueba1 = nombres_pruebas[0]
-        nombre_prueba2 = nombres_pruebas[1]
-        datos_prueba1 = self.datos_parseados[nombre_prueba1]
-        datos_prueba2 = self.datos_parseados[nombre_prueba2]
+        etiquetas = [nombre.replace('_', ' ') for nombre in nombres_pruebas]
+        pruebas = [self.datos_parseados[nombre] for nombre in nombres_pruebas]
+        colores = [COLORES_PRUEBAS[i % len(COLORES_PRUEBAS)] for i in range(len(pruebas))]
         
         # Crear subplots
         fig = make_subplots(
@@ -145,165 +565,114 @@ class AnalizadorHTML:
             subplot_titles=[
                 'Requests por Segundo', 'Latencia Promedio', 'Conexiones Exitosas vs Fallidas',
                 'Tasa de Errores', 'Percentiles de Latencia', 'Total de Requests',
-                'Tipos de Errores', 'Distribución de Conexiones', 'Resumen de Rendimiento'
+                'Tipos de Errores', 'Distribución de Conexiones (%)', 'Resumen de Rendimiento'
             ],
             specs=[
                 [{"type": "bar"}, {"type": "bar"}, {"type": "bar"}],
                 [{"type": "bar"}, {"type": "bar"}, {"type": "bar"}],
-                [{"type": "pie"}, {"type": "pie"}, {"type": "table"}]
+                [{"type": "bar"}, {"type": "bar"}, {"type": "table"}]
             ]
         )
         
+        def semianchos(metrica):
+            """Semiancho del IC entre ensayos de cada prueba (0 si se ejecutó una sola vez)"""
+            return [(d.get('intervalos_confianza', {}).get(metrica) or {}).get('semiancho') or 0 for d in pruebas]
+        
+        def barra_por_prueba(valores, nombre, formato, fila, columna, errores=None):
+            fig.add_trace(
+                go.Bar(
+                    x=etiquetas,
+                    y=valores,
+                    name=nombre,
+                    marker_color=colores,
+                    text=[formato.format(v) for v in valores],
+                    textposition='auto',
+                    error_y=dict(type='data', array=errores, visible=True) if errores and any(errores) else None,
+                    showlegend=False
+                ),
+                row=fila, col=columna
+            )
+        
         # 1. RPS Comparación
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=[datos_prueba1.get('rps_reportado', 0), datos_prueba2.get('rps_reportado', 0)],
-                name='RPS',
-                marker_color=['#FF6B6B', '#4ECDC4'],
-                text=[f"{datos_prueba1.get('rps_reportado', 0):.1f}", f"{datos_prueba2.get('rps_reportado', 0):.1f}"],
-                textposition='auto'
-            ),
-            row=1, col=1
-        )
+        barra_por_prueba([d.get('rps_reportado', 0) for d in pruebas], 'RPS', '{:.1f}', 1, 1, semianchos('rps'))
         
         # 2. Latencia Comparación
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=[datos_prueba1.get('latencia_promedio', 0), datos_prueba2.get('latencia_promedio', 0)],
-                name='Latencia',
-                marker_color=['#FFE66D', '#FF6B6B'],
-                text=[f"{datos_prueba1.get('latencia_promedio', 0):.1f}ms", f"{datos_prueba2.get('latencia_promedio', 0):.1f}ms"],
-                textposition='auto'
-            ),
-            row=1, col=2
-        )
+        barra_por_prueba([d.get('latencia_promedio', 0) for d in pruebas], 'Latencia', '{:.1f}ms', 1, 2,
+                         semianchos('latencia_promedio'))
         
         # 3. Conexiones Exitosas vs Fallidas
-        conexiones_exitosas = [datos_prueba1.get('conexiones_exitosas', 0), datos_prueba2.get('conexiones_exitosas', 0)]
-        conexiones_fallidas = [datos_prueba1.get('conexiones_fallidas', 0), datos_prueba2.get('conexiones_fallidas', 0)]
-        
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=conexiones_exitosas,
-                name='Conexiones Exitosas',
-                marker_color='#4ECDC4',
-                text=[f"{conexiones_exitosas[0]:,}", f"{conexiones_exitosas[1]:,}"],
-                textposition='auto'
-            ),
-            row=1, col=3
-        )
-        
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=conexiones_fallidas,
-                name='Conexiones Fallidas',
-                marker_color='#FF6B6B',
-                text=[f"{conexiones_fallidas[0]:,}", f"{conexiones_fallidas[1]:,}"],
-                textposition='auto'
-            ),
-            row=1, col=3
-        )
+        conexiones_exitosas = [d.get('conexiones_exitosas', 0) for d in pruebas]
+        conexiones_fallidas = [d.get('conexiones_fallidas', 0) for d in pruebas]
+        for nombre, valores, color in (('Conexiones Exitosas', conexiones_exitosas, '#4ECDC4'),
+                                       ('Conexiones Fallidas', conexiones_fallidas, '#FF6B6B')):
+            fig.add_trace(
+                go.Bar(
+                    x=etiquetas,
+                    y=valores,
+                    name=nombre,
+                    marker_color=color,
+                    text=[f"{v:,}" for v in valores],
+                    textposition='auto'
+                ),
+                row=1, col=3
+            )
         
         # 4. Tasa de errores
-        tasas_error = []
-        for datos_prueba in [datos_prueba1, datos_prueba2]:
-            total_errores = datos_prueba.get('total_errores', 0)
-            total_requests = datos_prueba.get('total_requests', 1)
-            tasa_error = (total_errores / total_requests) * 100
-            tasas_error.append(tasa_error)
-        
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=tasas_error,
-                name='Tasa de Errores',
-                marker_color=['#FFA07A', '#98D8C8'],
-                text=[f"{tasas_error[0]:.2f}%", f"{tasas_error[1]:.2f}%"],
-                textposition='auto'
-            ),
-            row=2, col=1
-        )
+        tasas_error = [d.get('total_errores', 0) / (d.get('total_requests', 0) or 1) * 100 for d in pruebas]
+        barra_por_prueba(tasas_error, 'Tasa de Errores', '{:.2f}%', 2, 1)
         
         # 5. Percentiles
         percentiles = ['p50', 'p90', 'p95', 'p99']
-        prueba1_percs = [datos_prueba1.get('percentiles', {}).get(p, 0) for p in percentiles]
-        prueba2_percs = [datos_prueba2.get('percentiles', {}).get(p, 0) for p in percentiles]
-        
-        fig.add_trace(
-            go.Bar(
-                x=percentiles,
-                y=prueba1_percs,
-                name=nombre_prueba1.replace('_', ' '),
-                marker_color='#FF6B6B'
-            ),
-            row=2, col=2
-        )
-        
-        fig.add_trace(
-            go.Bar(
-                x=percentiles,
-                y=prueba2_percs,
-                name=nombre_prueba2.replace('_', ' '),
-                marker_color='#4ECDC4'
-            ),
-            row=2, col=2
-        )
+        for etiqueta, datos_prueba, color, semiancho_p99 in zip(etiquetas, pruebas, colores, semianchos('p99')):
+            fig.add_trace(
+                go.Bar(
+                    x=percentiles,
+                    y=[datos_prueba.get('percentiles', {}).get(p, 0) for p in percentiles],
+                    name=etiqueta,
+                    marker_color=color,
+                    error_y=dict(type='data', array=[0, 0, 0, semiancho_p99], visible=True) if semiancho_p99 else None
+                ),
+                row=2, col=2
+            )
         
         # 6. Total de Requests
-        fig.add_trace(
-            go.Bar(
-                x=[nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-                y=[datos_prueba1.get('total_requests', 0), datos_prueba2.get('total_requests', 0)],
-                name='Total Requests',
-                marker_color=['#95E1D3', '#F38BA8'],
-                text=[f"{datos_prueba1.get('total_requests', 0):,}", f"{datos_prueba2.get('total_requests', 0):,}"],
-                textposition='auto'
-            ),
-            row=2, col=3
-        )
+        barra_por_prueba([d.get('total_requests', 0) for d in pruebas], 'Total Requests', '{:,}', 2, 3)
         
-        # 7. Tipos de Errores - Prueba 1
-        errores1 = datos_prueba1.get('errores', {})
-        if sum(errores1.values()) > 0:
+        # 7. Tipos de Errores por prueba
+        tipos_error = [('conexion', 'Conexión', '#FF6B6B'), ('lectura', 'Lectura', '#FFE66D'),
+                       ('escritura', 'Escritura', '#95E1D3'), ('timeout', 'Timeout', '#F38BA8')]
+        for clave, nombre, color in tipos_error:
             fig.add_trace(
-                go.Pie(
-                    labels=['Conexión', 'Lectura', 'Escritura', 'Timeout'],
-                    values=[errores1.get('conexion', 0), errores1.get('lectura', 0), errores1.get('escritura', 0), errores1.get('timeout', 0)],
-                    name=f"Errores {nombre_prueba1}",
-                    title=f"Errores - {nombre_prueba1.replace('_', ' ')}"
+                go.Bar(
+                    x=etiquetas,
+                    y=[d.get('errores', {}).get(clave, 0) for d in pruebas],
+                    name=f"Errores de {nombre.lower()}",
+                    marker_color=color
                 ),
                 row=3, col=1
             )
         
-        # 8. Distribución de Conexiones - Prueba 2
-        if len(self.datos_parseados) >= 2:
-            conexiones_data = {
-                'Exitosas': datos_prueba2.get('conexiones_exitosas', 0),
-                'Fallidas': datos_prueba2.get('conexiones_fallidas', 0)
-            }
-            fig.add_trace(
-                go.Pie(
-                    labels=list(conexiones_data.keys()),
-                    values=list(conexiones_data.values()),
-                    name=f"Conexiones {nombre_prueba2}",
-                    title=f"Conexiones - {nombre_prueba2.replace('_', ' ')}"
-                ),
-                row=3, col=2
-            )
+        # 8. Distribución de Conexiones (porcentaje de fallidas sobre las intentadas)
+        porcentaje_fallidas = [
+            d.get('conexiones_fallidas', 0) / (d.get('total_conexiones_intentadas', 0) or 1) * 100 for d in pruebas
+        ]
+        barra_por_prueba(porcentaje_fallidas, 'Conexiones Fallidas (%)', '{:.2f}%', 3, 2)
         
         # 9. Tabla resumen
         datos_resumen = [
-            ['Métrica', nombre_prueba1.replace('_', ' '), nombre_prueba2.replace('_', ' ')],
-            ['RPS', f"{datos_prueba1.get('rps_reportado', 0):.1f}", f"{datos_prueba2.get('rps_reportado', 0):.1f}"],
-            ['Latencia Prom (ms)', f"{datos_prueba1.get('latencia_promedio', 0):.1f}", f"{datos_prueba2.get('latencia_promedio', 0):.1f}"],
-            ['Total Requests', f"{datos_prueba1.get('total_requests', 0):,}", f"{datos_prueba2.get('total_requests', 0):,}"],
-            ['Conexiones Exitosas', f"{datos_prueba1.get('conexiones_exitosas', 0):,}", f"{datos_prueba2.get('conexiones_exitosas', 0):,}"],
-            ['Conexiones Fallidas', f"{datos_prueba1.get('conexiones_fallidas', 0):,}", f"{datos_prueba2.get('conexiones_fallidas', 0):,}"],
-            ['Tasa de Errores (%)', f"{tasas_error[0]:.2f}", f"{tasas_error[1]:.2f}"]
+            ['Métrica'] + etiquetas,
+            ['RPS'] + [formatear_ic(d['intervalos_confianza']['rps']) if 'intervalos_confianza' in d
+                       else f"{d.get('rps_reportado', 0):.1f}" for d in pruebas],
+            ['Latencia Prom (ms)'] + [f"{d.get('latencia_promedio', 0):.1f}" for d in pruebas],
+            ['Total Requests'] + [f"{d.get('total_requests', 0):,}" for d in pruebas],
+            ['Ensayos (aceptados)'] + [f"{d['ensayos_aceptados']}/{d['ensayos_aceptados'] + d['ensayos_rechazados']}"
+                                       if 'ensayos_aceptados' in d else '1' for d in pruebas],
+            ['Conexiones Exitosas'] + [f"{v:,}" for v in conexiones_exitosas],
+            ['Conexiones Fallidas'] + [f"{v:,}" for v in conexiones_fallidas],
+            ['Tasa de Errores (%)'] + [f"{v:.2f}" for v in tasas_error],
+            ['RPS Exitosos (2xx/3xx)'] + [f"{d.get('rps_exitosos', 0):.1f}" for d in pruebas],
+            ['Goodput (válidas/s)'] + [f"{d['goodput']:.1f} ({d['validacion']['fraccion_valida']:.1%})"
+                                       if 'goodput' in d else '-' for d in pruebas]
         ]
         
         fig.add_trace(
@@ -388,6 +757,9 @@ class AnalizadorHTML:
             ['Total Requests', f"{datos_prueba.get('total_requests', 0):,}"],
             ['Duración', f"{datos_prueba.get('duracion', 0):.1f}s"],
             ['RPS', f"{datos_prueba.get('rps_reportado', 0):.1f}"],
+            ['RPS Exitosos (2xx/3xx)', f"{datos_prueba.get('rps_exitosos', 0):.1f}"],
+            ['Goodput (válidas/s)', f"{datos_prueba['goodput']:.1f} ({datos_prueba['validacion']['fraccion_valida']:.1%})"
+             if 'goodput' in datos_prueba else '-'],
             ['Latencia Prom', f"{datos_prueba.get('latencia_promedio', 0):.1f}ms"],
             ['Tasa de Errores', f"{tasa_error:.2f}%"]
         ]
@@ -410,212 +782,38 @@ class AnalizadorHTML:
         
         return fig
     
-    def generar_reporte_html(self):
+    def renderizar_html(self, include_plotlyjs='cdn', hoja_estilos=None, enlace_indice=None):
+        """Construir el HTML del dashboard; los recursos pueden ser externos para compartirlos entre páginas"""
+        with PERFILADOR.etapa('construir_figuras_plotly', 'reporte', reporte=True):
+            fig = self.crear_graficos_interactivos()
+            if not fig:
+                return None
+            
+            chart_html = fig.to_html(include_plotlyjs=include_plotlyjs, div_id="dashboard")
+        
+        with PERFILADOR.etapa('render_jinja', 'reporte', reporte=True):
+            template = Template(PLANTILLA_DASHBOARD)
+            return template.render(
+                chart_html=chart_html,
+                secciones=self.secciones_adicionales,
+                timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                estilos=ESTILOS_DASHBOARD,
+                hoja_estilos=hoja_estilos,
+                enlace_indice=enlace_indice
+            )
+    
+    def generar_reporte_html(self, prefijo='dashboard_pruebas_carga'):
         """Generar reporte HTML completo"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        fig = self.crear_graficos_interactivos()
-        if not fig:
+        html_final = self.renderizar_html()
+        if not html_final:
             return None
         
-        chart_html = fig.to_html(include_plotlyjs='cdn', div_id="dashboard")
-        
-        plantilla_html = """
-<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Dashboard de Resultados de Pruebas de Carga</title>
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }
-        .header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-            text-align: center;
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 2.5em;
-        }
-        .dashboard-container {
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            margin-bottom: 30px;
-            overflow: hidden;
-        }
-        .footer {
-            text-align: center;
-            margin-top: 30px;
-            padding: 20px;
-            background: #333;
-            color: white;
-            border-radius: 10px;
-        }
-        .info-section {
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            padding: 20px;
-            margin-bottom: 20px;
-        }
-        .info-section h3 {
-            color: #667eea;
-            margin-top: 0;
-        }
-        .command-box {
-            background: #f8f9fa;
-            border-left: 4px solid #667eea;
-            padding: 15px;
-            margin: 10px 0;
-            border-radius: 5px;
-            font-family: 'Courier New', monospace;
-            font-size: 14px;
-        }
-        .metrics-explanation {
-            background: #f8f9fa;
-            border-radius: 10px;
-            padding: 20px;
-            margin-bottom: 20px;
-        }
-        .metric-item {
-            margin-bottom: 15px;
-            padding: 10px;
-            background: white;
-            border-radius: 5px;
-            border-left: 4px solid #667eea;
-        }
-        .metric-title {
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 5px;
-        }
-        .metric-description {
-            color: #666;
-            font-size: 14px;
-        }
-        .warning-box {
-            background: #fff3cd;
-            border: 1px solid #ffeaa7;
-            border-radius: 5px;
-            padding: 15px;
-            margin: 10px 0;
-        }
-        .warning-title {
-            font-weight: bold;
-            color: #856404;
-            margin-bottom: 5px;
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🚀 Dashboard de Pruebas de Carga</h1>
-        <p>Análisis Completo de Rendimiento - Generado el {{ timestamp }}</p>
-    </div>
-    
-    <div class="info-section">
-        <h3>📋 Información de las Pruebas</h3>
-        <p><strong>Comandos ejecutados:</strong></p>
-        <div class="command-box">
-            wrk -t32 -c50000 -d300s -s get_verify_number_enhanced.lua https://yasta.bancounion.com.bo/gateway/user/verify/number?username=65663503
-        </div>
-        <div class="command-box">
-            wrk -t32 -c50000 -d300s -s post_pagos_enhanced.lua https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage
-        </div>
-        <p><strong>Configuración:</strong> 32 threads, 50000 conexiones concurrentes, 300 segundos de duración</p>
-    </div>
-    
-    <div class="info-section">
-        <h3>📊 Explicación de Métricas</h3>
-        <div class="metrics-explanation">
-            <div class="metric-item">
-                <div class="metric-title">🚀 Requests por Segundo (RPS)</div>
-                <div class="metric-description">Número de peticiones HTTP completadas exitosamente por segundo. Mayor RPS = mejor rendimiento.</div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">⏱️ Latencia Promedio</div>
-                <div class="metric-description">Tiempo promedio que tarda el servidor en responder a una petición (en milisegundos). Menor latencia = respuesta más rápida.</div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">🔗 Conexiones Exitosas vs Fallidas</div>
-                <div class="metric-description">
-                    <strong>Exitosas:</strong> Peticiones que se completaron correctamente<br>
-                    <strong>Fallidas:</strong> Conexiones que no pudieron establecerse (errores de red, servidor sobrecargado, etc.)
-                </div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">❌ Tasa de Errores</div>
-                <div class="metric-description">
-                    Porcentaje de errores respecto al total de peticiones. Se calcula: (Total Errores / Total Requests) × 100
-                </div>
-                <div class="warning-box">
-                    <div class="warning-title">⚠️ Importante sobre Tasa de Errores > 100%</div>
-                    Si ves una tasa de errores superior al 100% (como 307.04%), significa que hubo más errores de conexión que peticiones exitosas. 
-                    Esto ocurre cuando el servidor está sobrecargado y rechaza muchas conexiones antes de procesarlas.
-                </div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">📈 Percentiles de Latencia</div>
-                <div class="metric-description">
-                    <strong>P50:</strong> 50% de las peticiones tardaron menos que este tiempo<br>
-                    <strong>P90:</strong> 90% de las peticiones tardaron menos que este tiempo<br>
-                    <strong>P95:</strong> 95% de las peticiones tardaron menos que este tiempo<br>
-                    <strong>P99:</strong> 99% de las peticiones tardaron menos que este tiempo
-                </div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">🔧 Tipos de Errores</div>
-                <div class="metric-description">
-                    <strong>Conexión:</strong> No se pudo conectar al servidor<br>
-                    <strong>Lectura:</strong> Error al leer la respuesta<br>
-                    <strong>Escritura:</strong> Error al enviar la petición<br>
-                    <strong>Timeout:</strong> El servidor tardó demasiado en responder
-                </div>
-            </div>
-            
-            <div class="metric-item">
-                <div class="metric-title">📊 Total de Requests</div>
-                <div class="metric-description">Número total de peticiones HTTP que se completaron exitosamente durante la prueba.</div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="dashboard-container">
-        {{ chart_html }}
-    </div>
-    
-    <div class="footer">
-        <p>Generado automáticamente por el Sistema de Análisis de Carga</p>
-        <p>Timestamp: {{ timestamp }}</p>
-    </div>
-</body>
-</html>
-        """
-        
-        template = Template(plantilla_html)
-        html_final = template.render(
-            chart_html=chart_html,
-            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        )
-        
-        nombre_archivo_html = f'dashboard_pruebas_carga_{timestamp}.html'
-        with open(nombre_archivo_html, 'w', encoding='utf-8') as f:
-            f.write(html_final)
+        nombre_archivo_html = f'{prefijo}_{timestamp}.html'
+        with PERFILADOR.etapa('escribir_html', 'io'):
+            with open(nombre_archivo_html, 'w', encoding='utf-8') as f:
+                f.write(html_final)
         
         print(f"Dashboard HTML guardado como: {nombre_archivo_html}")
         return nombre_archivo_html
@@ -14,10 +14,15 @@ from datetime import datetime
 import os
 import sys
 
+from utilidades_wrk import extraer_resumen_json
+
 # Set style for beautiful plots
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+# Colors assigned to tests in order (cycled when there are more tests)
+TEST_COLORS = ['#FF6B6B', '#4ECDC4', '#FFE66D', '#95E1D3', '#F38BA8', '#FFA07A', '#98D8C8', '#A8E6CF', '#FFD93D']
+
 class LoadTestAnalyzer:
     def __init__(self, results_file=None):
         self.results_file = results_file
@@ -25,6 +30,11 @@ class LoadTestAnalyzer:
         
     def parse_wrk_output(self, output_text):
         """Parse wrk output and extract metrics"""
+        # Fast path: the enhanced Lua scripts print a full JSON summary
+        summary = extraer_resumen_json(output_text)
+        if summary is not None:
+            return self.parse_json_summary(summary)
+
         data = {}
         
         # Extract basic metrics
@@ -83,6 +93,30 @@ class LoadTestAnalyzer:
         
         return data
     
+    def parse_json_summary(self, summary):
+        """Map the JSON summary printed by the Lua done() to parse_wrk_output keys"""
+        totals = summary.get('summary', {})
+        latency = summary.get('latency_us', {})
+        lua_errors = summary.get('errors', {})
+        duration = totals.get('duration_us', 0) / 1e6
+        data = {
+            'total_requests': totals.get('requests', 0),
+            'duration': duration,
+            'rps': totals.get('requests', 0) / duration if duration else 0,
+            'mb_read': totals.get('bytes', 0) / 1024 / 1024,
+            'rps_reported': totals.get('requests_per_sec', 0),
+            'transfer_per_sec': totals.get('bytes_per_sec', 0) / 1024 / 1024,
+            'latency_avg': (latency.get('mean') or 0) / 1000,
+            'latency_stdev': (latency.get('stdev') or 0) / 1000,
+            'latency_max': (latency.get('max') or 0) / 1000,
+            'percentiles': {f'p{p}': value / 1000 for p, value in sorted(
+                latency.get('percentiles', {}).items(), key=lambda pair: float(pair[0]))},
+            'errors': {key: lua_errors.get(key, 0) for key in ('connect', 'read', 'write', 'timeout')},
+            'status_codes': {int(code): count for code, count in summary.get('status_codes', {}).items()}
+        }
+        data['total_errors'] = sum(data['errors'].values())
+        return data
+
     def parse_enhanced_metrics(self, output_text):
         """Parse enhanced metrics from Lua script output"""
         enhanced = {}
@@ -115,95 +149,93 @@ class LoadTestAnalyzer:
         with open(results_file, 'r') as f:
             raw_results = json.load(f)
         
+        # Staged, interval and repeated-trial runs have no single stdout: they go through the
+        # same loaders as the HTML dashboard (stage summary, batch means, trial CIs)
+        aggregated = {}
         for test_name, test_data in raw_results.items():
-            if 'stdout' in test_data:
+            # Keys starting with '_' hold metadata (e.g. profiling timings)
+            if test_name.startswith('_'):
+                continue
+            if any(key in test_data for key in ('etapas', 'intervalos', 'ensayos')):
+                aggregated[test_name] = test_data
+            elif 'stdout' in test_data:
                 self.parsed_data[test_name] = self.parse_wrk_output(test_data['stdout'])
                 self.parsed_data[test_name]['raw_output'] = test_data['stdout']
                 self.parsed_data[test_name]['execution_time'] = test_data.get('execution_time', 0)
             else:
                 print(f"Warning: No stdout data for {test_name}")
+        
+        if aggregated:
+            from generar_reporte_html import AnalizadorHTML
+            from reporte_completo import datos_para_png
+            
+            analyzer = AnalizadorHTML()
+            analyzer.parsear_resultados(aggregated)
+            for test_name, datos in analyzer.datos_parseados.items():
+                self.parsed_data[test_name] = datos_para_png(datos)
+                self.parsed_data[test_name]['raw_output'] = datos.get('salida_raw', '')
+            # Keep the order of the results file
+            self.parsed_data = {name: self.parsed_data[name] for name in raw_results if name in self.parsed_data}
     
-    def create_comparison_charts(self):
-        """Create comprehensive comparison charts"""
-        if len(self.parsed_data) < 2:
-            print("Need at least 2 test results for comparison")
+    def create_comparison_charts(self, filename=None, show=True):
+        """Create comprehensive comparison charts for any number of tests"""
+        if not self.parsed_data:
+            print("Need at least 1 test result for comparison")
             return
         
         # Create figure with subplots
         fig = plt.figure(figsize=(20, 15))
         
-        # Extract data for both tests
         test_names = list(self.parsed_data.keys())
-        test1_name = test_names[0]
-        test2_name = test_names[1]
-        test1_data = self.parsed_data[test1_name]
-        test2_data = self.parsed_data[test2_name]
+        tests = [self.parsed_data[name] for name in test_names]
+        bar_labels = [name.replace('_', '\n') for name in test_names]
+        legend_labels = [name.replace('_', ' ') for name in test_names]
+        colors = [TEST_COLORS[i % len(TEST_COLORS)] for i in range(len(tests))]
+        
+        def half_widths(metric):
+            """Confidence interval half-width across repeated trials (0 for single runs)"""
+            return [d.get('confidence_intervals', {}).get(metric, 0) for d in tests]
+        
+        def bar_chart(position, values, title, ylabel, label_format, errors=None):
+            plt.subplot(3, 3, position)
+            bars = plt.bar(bar_labels, values, color=colors,
+                           yerr=errors if errors and any(errors) else None, capsize=6)
+            plt.title(title, fontsize=14, fontweight='bold')
+            plt.ylabel(ylabel)
+            for i, bar in enumerate(bars):
+                height = bar.get_height()
+                plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                        label_format.format(values[i]), ha='center', va='bottom', fontweight='bold')
+        
+        error_rates = []
+        for test_data in tests:
+            total_errors = test_data.get('total_errors', 0)
+            total_requests = test_data.get('total_requests', 0) or 1
+            error_rates.append((total_errors / total_requests) * 100)
         
         # 1. Requests per Second Comparison
-        plt.subplot(3, 3, 1)
-        rps_data = [test1_data.get('rps_reported', 0), test2_data.get('rps_reported', 0)]
-        bars = plt.bar([test1_name.replace('_', '\n'), test2_name.replace('_', '\n')], rps_data, 
-                      color=['#FF6B6B', '#4ECDC4'])
-        plt.title('Requests per Second', fontsize=14, fontweight='bold')
-        plt.ylabel('RPS')
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{rps_data[i]:.1f}', ha='center', va='bottom', fontweight='bold')
+        bar_chart(1, [d.get('rps_reported', 0) for d in tests], 'Requests per Second', 'RPS', '{:.1f}',
+                  half_widths('rps'))
         
         # 2. Average Latency Comparison
-        plt.subplot(3, 3, 2)
-        latency_data = [test1_data.get('latency_avg', 0), test2_data.get('latency_avg', 0)]
-        bars = plt.bar([test1_name.replace('_', '\n'), test2_name.replace('_', '\n')], latency_data,
-                      color=['#FFE66D', '#FF6B6B'])
-        plt.title('Average Latency', fontsize=14, fontweight='bold')
-        plt.ylabel('Latency (ms)')
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{latency_data[i]:.1f}ms', ha='center', va='bottom', fontweight='bold')
+        bar_chart(2, [d.get('latency_avg', 0) for d in tests], 'Average Latency', 'Latency (ms)', '{:.1f}ms',
+                  half_widths('latency_avg'))
         
         # 3. Total Requests Comparison
-        plt.subplot(3, 3, 3)
-        total_req_data = [test1_data.get('total_requests', 0), test2_data.get('total_requests', 0)]
-        bars = plt.bar([test1_name.replace('_', '\n'), test2_name.replace('_', '\n')], total_req_data,
-                      color=['#95E1D3', '#F38BA8'])
-        plt.title('Total Requests', fontsize=14, fontweight='bold')
-        plt.ylabel('Requests')
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{total_req_data[i]:,}', ha='center', va='bottom', fontweight='bold')
+        bar_chart(3, [d.get('total_requests', 0) for d in tests], 'Total Requests', 'Requests', '{:,}')
         
         # 4. Error Rate Comparison
-        plt.subplot(3, 3, 4)
-        error_rates = []
-        for test_data in [test1_data, test2_data]:
-            total_errors = test_data.get('total_errors', 0)
-            total_requests = test_data.get('total_requests', 1)
-            error_rate = (total_errors / total_requests) * 100
-            error_rates.append(error_rate)
-        
-        bars = plt.bar([test1_name.replace('_', '\n'), test2_name.replace('_', '\n')], error_rates,
-                      color=['#FFA07A', '#98D8C8'])
-        plt.title('Error Rate', fontsize=14, fontweight='bold')
-        plt.ylabel('Error Rate (%)')
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{error_rates[i]:.2f}%', ha='center', va='bottom', fontweight='bold')
+        bar_chart(4, error_rates, 'Error Rate', 'Error Rate (%)', '{:.2f}%')
         
         # 5. Latency Percentiles Comparison
         plt.subplot(3, 3, 5)
         percentiles = ['p50', 'p90', 'p95', 'p99']
-        test1_percs = [test1_data.get('percentiles', {}).get(p, 0) for p in percentiles]
-        test2_percs = [test2_data.get('percentiles', {}).get(p, 0) for p in percentiles]
-        
         x = np.arange(len(percentiles))
-        width = 0.35
-        
-        plt.bar(x - width/2, test1_percs, width, label=test1_name.replace('_', ' '), color='#FF6B6B')
-        plt.bar(x + width/2, test2_percs, width, label=test2_name.replace('_', ' '), color='#4ECDC4')
+        width = 0.8 / len(tests)
+        for i, (test_data, p99_error) in enumerate(zip(tests, half_widths('p99'))):
+            values = [test_data.get('percentiles', {}).get(p, 0) for p in percentiles]
+            plt.bar(x - 0.4 + width * (i + 0.5), values, width, label=legend_labels[i], color=colors[i],
+                    yerr=[0, 0, 0, p99_error] if p99_error else None, capsize=4)
         
         plt.title('Latency Percentiles', fontsize=14, fontweight='bold')
         plt.ylabel('Latency (ms)')
@@ -211,57 +243,57 @@ class LoadTestAnalyzer:
         plt.xticks(x, percentiles)
         plt.legend()
         
-        # 6. Status Code Distribution for Test 1
+        # 6. Status Code Distribution (share of responses per test)
         plt.subplot(3, 3, 6)
-        if 'status_codes' in test1_data:
-            status_codes = test1_data['status_codes']
-            plt.pie(status_codes.values(), labels=[f'HTTP {k}' for k in status_codes.keys()], 
-                   autopct='%1.1f%%', startangle=90)
-            plt.title(f'{test1_name.replace("_", " ")} - Status Codes', fontsize=12, fontweight='bold')
+        codes = sorted({code for d in tests for code in d.get('status_codes', {})})
+        if codes:
+            bottom = np.zeros(len(tests))
+            for j, code in enumerate(codes):
+                shares = np.array([
+                    d.get('status_codes', {}).get(code, 0) / (sum(d.get('status_codes', {}).values()) or 1) * 100
+                    for d in tests
+                ])
+                plt.bar(bar_labels, shares, bottom=bottom, label=f'HTTP {code}',
+                        color=TEST_COLORS[j % len(TEST_COLORS)])
+                bottom += shares
+            plt.ylabel('Responses (%)')
+            plt.legend(fontsize=8)
         else:
             plt.text(0.5, 0.5, 'No status code data', ha='center', va='center', transform=plt.gca().transAxes)
-            plt.title(f'{test1_name.replace("_", " ")} - Status Codes', fontsize=12, fontweight='bold')
+        plt.title('Status Codes', fontsize=14, fontweight='bold')
         
-        # 7. Status Code Distribution for Test 2
+        # 7. Error Types
         plt.subplot(3, 3, 7)
-        if 'status_codes' in test2_data:
-            status_codes = test2_data['status_codes']
-            plt.pie(status_codes.values(), labels=[f'HTTP {k}' for k in status_codes.keys()], 
-                   autopct='%1.1f%%', startangle=90)
-            plt.title(f'{test2_name.replace("_", " ")} - Status Codes', fontsize=12, fontweight='bold')
-        else:
-            plt.text(0.5, 0.5, 'No status code data', ha='center', va='center', transform=plt.gca().transAxes)
-            plt.title(f'{test2_name.replace("_", " ")} - Status Codes', fontsize=12, fontweight='bold')
+        error_types = ['connect', 'read', 'write', 'timeout']
+        x = np.arange(len(error_types))
+        for i, test_data in enumerate(tests):
+            values = [test_data.get('errors', {}).get(e, 0) for e in error_types]
+            plt.bar(x - 0.4 + width * (i + 0.5), values, width, label=legend_labels[i], color=colors[i])
+        plt.title('Socket Error Types', fontsize=14, fontweight='bold')
+        plt.ylabel('Errors')
+        plt.xticks(x, error_types)
+        plt.legend(fontsize=8)
         
         # 8. Transfer Rate Comparison
-        plt.subplot(3, 3, 8)
-        transfer_data = [test1_data.get('transfer_per_sec', 0), test2_data.get('transfer_per_sec', 0)]
-        bars = plt.bar([test1_name.replace('_', '\n'), test2_name.replace('_', '\n')], transfer_data,
-                      color=['#A8E6CF', '#FFD93D'])
-        plt.title('Transfer Rate', fontsize=14, fontweight='bold')
-        plt.ylabel('MB/sec')
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{transfer_data[i]:.2f}', ha='center', va='bottom', fontweight='bold')
+        bar_chart(8, [d.get('transfer_per_sec', 0) for d in tests], 'Transfer Rate', 'MB/sec', '{:.2f}')
         
         # 9. Performance Summary Table
         plt.subplot(3, 3, 9)
         plt.axis('off')
         
         summary_data = [
-            ['Metric', test1_name.replace('_', ' '), test2_name.replace('_', ' ')],
-            ['RPS', f"{test1_data.get('rps_reported', 0):.1f}", f"{test2_data.get('rps_reported', 0):.1f}"],
-            ['Avg Latency (ms)', f"{test1_data.get('latency_avg', 0):.1f}", f"{test2_data.get('latency_avg', 0):.1f}"],
-            ['Total Requests', f"{test1_data.get('total_requests', 0):,}", f"{test2_data.get('total_requests', 0):,}"],
-            ['Error Rate (%)', f"{error_rates[0]:.2f}", f"{error_rates[1]:.2f}"],
-            ['Transfer (MB/s)', f"{test1_data.get('transfer_per_sec', 0):.2f}", f"{test2_data.get('transfer_per_sec', 0):.2f}"]
+            ['Metric'] + legend_labels,
+            ['RPS'] + [f"{d.get('rps_reported', 0):.1f}" for d in tests],
+            ['Avg Latency (ms)'] + [f"{d.get('latency_avg', 0):.1f}" for d in tests],
+            ['Total Requests'] + [f"{d.get('total_requests', 0):,}" for d in tests],
+            ['Error Rate (%)'] + [f"{rate:.2f}" for rate in error_rates],
+            ['Transfer (MB/s)'] + [f"{d.get('transfer_per_sec', 0):.2f}" for d in tests]
         ]
         
         table = plt.table(cellText=summary_data[1:], colLabels=summary_data[0],
                          cellLoc='center', loc='center', bbox=[0, 0, 1, 1])
         table.auto_set_font_size(False)
-        table.set_fontsize(10)
+        table.set_fontsize(10 if len(tests) <= 3 else 7)
         table.scale(1, 2)
         
         # Style the table
@@ -279,18 +311,22 @@ class LoadTestAnalyzer:
         plt.suptitle('Load Test Results Comparison Dashboard', fontsize=18, fontweight='bold', y=0.98)
         
         # Save the plot
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f'load_test_comparison_{timestamp}.png'
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f'load_test_comparison_{timestamp}.png'
         plt.savefig(filename, dpi=300, bbox_inches='tight')
         print(f"Comparison chart saved as: {filename}")
         
-        plt.show()
+        if show:
+            plt.show()
+        plt.close(fig)
         return filename
     
-    def generate_detailed_report(self):
+    def generate_detailed_report(self, report_file=None):
         """Generate a detailed text report"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_file = f'load_test_report_{timestamp}.txt'
+        if report_file is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            report_file = f'load_test_report_{timestamp}.txt'
         
         with open(report_file, 'w') as f:
             f.write("="*80 + "\n")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Historial de Resultados
+Recorre los archivos resultados_pruebas_carga_*.json de uno en uno y normaliza cada
+ejecución (simple, por etapas o por intervalos) en un resumen y una serie temporal
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+PATRON_RESULTADOS = 'resultados_pruebas_carga_*.json'
+
+def marca_archivo(ruta):
+    """Instante de la ejecución según el timestamp del nombre (o la fecha de modificación)"""
+    match = re.search(r'(\d{8}_\d{6})', os.path.basename(ruta))
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+        except ValueError:
+            # Un nombre con una fecha imposible (p. ej. mes 01, día 00) no debe abortar a quien lista
+            pass
+    return os.path.getmtime(ruta)
+
+def listar_resultados(directorio='.', desde=None, patron=PATRON_RESULTADOS):
+    """Listar (marca, ruta) en orden cronológico; con `desde` solo los posteriores a esa marca de agua
+
+    La marca de agua es {'marca': segundos, 'archivo': nombre}; el nombre desempata
+    archivos escritos en el mismo segundo.
+    """
+    archivos = sorted(
+        ((marca_archivo(ruta), ruta) for ruta in glob.glob(os.path.join(directorio, patron))),
+        key=lambda par: (par[0], os.path.basename(par[1]))
+    )
+    if desde:
+        limite = (desde['marca'], desde['archivo'])
+        archivos = [(m, r) for m, r in archivos if (m, os.path.basename(r)) > limite]
+    return archivos
+
+def marca_de_agua(marca, ruta):
+    return {'marca': marca, 'archivo': os.path.basename(ruta)}
+
+def iterar_ejecuciones(directorio='.', desde=None, archivos=None, omitidos=None):
+    """Producir cada prueba de cada archivo sin mantener más de un archivo en memoria
+
+    Los archivos que no se pueden leer se agregan a la lista `omitidos` (si se pasa) como
+    (marca, ruta), para que quien avanza una marca de agua no pase por encima de ellos.
+    """
+    for marca, ruta in (archivos if archivos is not None else listar_resultados(directorio, desde)):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                resultados = json.load(f)
+        except (OSError, ValueError) as e:
+            # A stderr: la salida estándar puede ser el flujo de una exportación
+            print(f"⚠️  Se omite {ruta}: {e}", file=sys.stderr)
+            if omitidos is not None:
+                omitidos.append((marca, ruta))
+            continue
+        for clave, datos in resultados.items():
+            # Las claves con '_' al inicio son metadatos (p. ej. tiempos del perfilado)
+            if clave.startswith('_') or not isinstance(datos, dict):
+                continue
+            yield {'archivo': ruta, 'marca': marca, 'clave': clave, 'datos': datos}
+
+def _marca_iso(texto, respaldo):
+    try:
+        return datetime.fromisoformat(texto).timestamp()
+    except (TypeError, ValueError):
+        return respaldo
+
+def resumir_ejecucion(ejecucion, analizador):
+    """Normalizar una prueba en {'inicio', 'resumen', 'series'}
+
+    `series` tiene un punto por intervalo, tramo o ensayo con su desfase `t` (mitad del
+    tramo, en segundos desde el inicio), su instante real `marca` y las métricas
+    parseadas. Devuelve None si la prueba no tiene salida de wrk.
+    """
+    from estadisticas import resumir_ejecuciones
+    from perfiles_carga import analizar_resultado_perfil
+
+    datos = ejecucion['datos']
+    fin = _marca_iso(datos.get('timestamp'), ejecucion['marca'])
+    inicio = datos.get('inicio') or fin - datos.get('execution_time', 0)
+    series = []
+
+    if 'etapas' in datos:
+        resumen, etapas, _ = analizar_resultado_perfil(datos, analizador)
+        desfase = 0.0
+        for etapa in etapas:
+            if len(etapa['tramos']) > 1 and 't_inicio' in etapa['tramos'][0]:
+                for tramo, datos_tramo in zip(etapa['tramos'], etapa['datos_tramos']):
+                    t = desfase + (tramo['t_inicio'] + tramo['t_fin']) / 2
+                    series.append({'t': t, 'marca': inicio + t, 'etapa': etapa['nombre'], 'datos': datos_tramo})
+            else:
+                t = desfase + etapa['duracion'] / 2
+                series.append({'t': t, 'marca': inicio + t, 'etapa': etapa['nombre'], 'datos': etapa['estadisticas']})
+            desfase += etapa['duracion']
+    elif 'intervalos' in datos:
+        for tramo in datos['intervalos']:
+            datos_tramo = analizador.parsear_salida_wrk(tramo.get('stdout', ''))
+            marca_tramo = tramo.get('marca_inicio', inicio + tramo['t_inicio']) + (tramo['t_fin'] - tramo['t_inicio']) / 2
+            series.append({'t': marca_tramo - inicio, 'marca': marca_tramo, 'etapa': None, 'datos': datos_tramo})
+        resumen = resumir_ejecuciones([punto['datos'] for punto in series])
+    elif 'ensayos' in datos:
+        from ensayos_repetidos import resumir_ensayos
+        resumen, detalle = resumir_ensayos(datos, analizador)
+        # Un punto por ensayo aceptado, a la mitad de su ejecución
+        for registro, ensayo in zip(datos['ensayos'], detalle):
+            if ensayo['aceptado']:
+                marca = _marca_iso(registro.get('timestamp'), fin) - registro.get('execution_time', 0) / 2
+                series.append({'t': marca - inicio, 'marca': marca, 'etapa': f"ensayo_{ensayo['ensayo']}",
+                               'datos': ensayo['datos']})
+    elif 'stdout' in datos:
+        resumen = analizador.parsear_salida_wrk(datos['stdout'])
+    else:
+        return None
+
+    if not resumen.get('total_requests'):
+        return None
+    return {'inicio': inicio, 'fin': fin, 'resumen': resumen, 'series': series}
+
+def crear_analizador():
+    """Analizador con el parser de wrk del dashboard"""
+    from generar_reporte_html import AnalizadorHTML
+    return AnalizadorHTML()
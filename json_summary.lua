@@ -0,0 +1,300 @@
+-- Shared helpers for the enhanced scripts: per-response collection levels,
+-- merge of the per-thread status codes and a single delimited JSON document
+-- that Python reads without regexes
+--
+-- Each script loads this file with dofile() and must:
+--   * keep `status_codes` as a global (thread:get can only read globals)
+--   * call track_thread(thread) from setup() so done() can reach every thread
+--   * call configure_collection(args) from init(args)
+--
+-- Collection level, chosen with the script arguments (wrk ... <url> -- <level> [rate]):
+--   full     count every response (default)
+--   sampled  count 1 in `rate` responses; done() scales the counts to summary.requests
+--   none     no response() hook, so wrk neither buffers headers/bodies nor calls
+--            into Lua per response; only wrk's own non-2xx/3xx count is available
+--
+-- Response validation (goodput): a wrapper can define, before loading the script,
+--   VALIDATION_RULES  list of {name = ..., status = code} or {name = ..., pattern = lua_pattern,
+--                     negate = bool}; a response is valid when it passes every rule
+--   VALIDATION_RATE   check 1 in N responses (default 1)
+-- Only the sampled responses pay for the body search; the JSON document then
+-- reports the valid fraction and the goodput (valid responses per second).
+
+JSON_SUMMARY_BEGIN = "=== JSON SUMMARY BEGIN ==="
+JSON_SUMMARY_END = "=== JSON SUMMARY END ==="
+
+-- Dense percentile table (tail included) reported in the JSON document
+JSON_SUMMARY_PERCENTILES = {1, 5, 10, 25, 50, 75, 90, 95, 97.5, 99, 99.5, 99.9, 99.95, 99.99, 99.999, 100}
+
+DEFAULT_SAMPLE_RATE = 10
+
+collection_level = "full"
+sample_rate = 1
+
+local tracked_threads = {}
+local sample_countdown = 1
+local validation_countdown = 1
+
+-- Per-thread validation counters (globals, read by done() through thread:get)
+validation_counts = {checked = 0, valid = 0}
+validation_failures = {}
+
+local function count_every_response(status, headers, body)
+    status_codes[status] = (status_codes[status] or 0) + 1
+end
+
+local function count_sampled_response(status, headers, body)
+    sample_countdown = sample_countdown - 1
+    if sample_countdown == 0 then
+        sample_countdown = sample_rate
+        status_codes[status] = (status_codes[status] or 0) + 1
+    end
+end
+
+response = count_every_response
+
+local function validate_response(status, body)
+    validation_counts.checked = validation_counts.checked + 1
+    for _, rule in ipairs(VALIDATION_RULES) do
+        local passed
+        if rule.status then
+            passed = status == rule.status
+        else
+            passed = (body ~= nil and string.find(body, rule.pattern) ~= nil) ~= (rule.negate == true)
+        end
+        if not passed then
+            validation_failures[rule.name] = (validation_failures[rule.name] or 0) + 1
+            return
+        end
+    end
+    validation_counts.valid = validation_counts.valid + 1
+end
+
+-- Wrap the collection hook so that 1 in VALIDATION_RATE responses is also validated
+local function add_validation(collect)
+    local rate = math.max(1, math.floor(tonumber(VALIDATION_RATE) or 1))
+    validation_countdown = rate
+    return function(status, headers, body)
+        if collect then
+            collect(status, headers, body)
+        end
+        validation_countdown = validation_countdown - 1
+        if validation_countdown == 0 then
+            validation_countdown = rate
+            validate_response(status, body)
+        end
+    end
+end
+
+-- wrk checks whether response() exists right after init(), so it can still be removed here
+function configure_collection(args)
+    collection_level = args and args[1] or "full"
+    if collection_level == "sampled" then
+        sample_rate = math.max(1, math.floor(tonumber(args[2]) or DEFAULT_SAMPLE_RATE))
+        sample_countdown = sample_rate
+        response = count_sampled_response
+    elseif collection_level == "none" then
+        sample_rate = 0
+        response = nil
+    else
+        collection_level = "full"
+        sample_rate = 1
+        response = count_every_response
+    end
+    validation_counts = {checked = 0, valid = 0}
+    validation_failures = {}
+    if VALIDATION_RULES then
+        response = add_validation(response)
+    end
+end
+
+function track_thread(thread)
+    table.insert(tracked_threads, thread)
+end
+
+-- The collection level is set by init(), which only runs in the thread states
+local function thread_collection()
+    local thread = tracked_threads[1]
+    if thread then
+        return thread:get("collection_level") or "full", thread:get("sample_rate") or 1
+    end
+    return collection_level, sample_rate
+end
+
+-- status_codes lives in each thread's Lua state; done() runs in the main state.
+-- Sampled counts are scaled so that they add up to the completed requests.
+function merge_status_codes(summary)
+    local merged = {}
+    if #tracked_threads == 0 then
+        for status, count in pairs(status_codes or {}) do
+            merged[status] = count
+        end
+    end
+    for _, thread in ipairs(tracked_threads) do
+        for status, count in pairs(thread:get("status_codes") or {}) do
+            merged[status] = (merged[status] or 0) + count
+        end
+    end
+
+    local level = thread_collection()
+    if level == "sampled" and summary then
+        local sampled = 0
+        for _, count in pairs(merged) do
+            sampled = sampled + count
+        end
+        if sampled > 0 then
+            local scale = summary.requests / sampled
+            for status, count in pairs(merged) do
+                merged[status] = math.floor(count * scale + 0.5)
+            end
+        end
+    end
+    return merged
+end
+
+-- Validation counters of every thread, or nil when the script does not validate
+local function merge_validation()
+    if not VALIDATION_RULES then
+        return nil
+    end
+    local merged = {
+        rate = math.max(1, math.floor(tonumber(VALIDATION_RATE) or 1)),
+        checked = 0,
+        valid = 0,
+        failures = {}
+    }
+    for _, thread in ipairs(tracked_threads) do
+        local counts = thread:get("validation_counts") or {}
+        merged.checked = merged.checked + (counts.checked or 0)
+        merged.valid = merged.valid + (counts.valid or 0)
+        for name, count in pairs(thread:get("validation_failures") or {}) do
+            merged.failures[name] = (merged.failures[name] or 0) + count
+        end
+    end
+    return merged
+end
+
+local function encode_string(value)
+    local escaped = value:gsub('[%c"\\]', function(c)
+        if c == '"' then return '\\"' end
+        if c == "\\" then return "\\\\" end
+        if c == "\n" then return "\\n" end
+        if c == "\r" then return "\\r" end
+        if c == "\t" then return "\\t" end
+        return string.format("\\u%04x", c:byte())
+    end)
+    return '"' .. escaped .. '"'
+end
+
+local function encode_number(value)
+    if value ~= value or value == math.huge or value == -math.huge then
+        return "null"
+    end
+    if value == math.floor(value) and math.abs(value) < 2^53 then
+        return string.format("%d", value)
+    end
+    return string.format("%.10g", value)
+end
+
+local function encode(value)
+    local kind = type(value)
+    if kind == "table" then
+        local parts = {}
+        if #value > 0 then
+            for _, item in ipairs(value) do
+                table.insert(parts, encode(item))
+            end
+            return "[" .. table.concat(parts, ",") .. "]"
+        end
+        for key, item in pairs(value) do
+            table.insert(parts, encode_string(tostring(key)) .. ":" .. encode(item))
+        end
+        return "{" .. table.concat(parts, ",") .. "}"
+    elseif kind == "string" then
+        return encode_string(value)
+    elseif kind == "number" then
+        return encode_number(value)
+    elseif kind == "boolean" then
+        return tostring(value)
+    end
+    return "null"
+end
+
+local function per_second(value, duration_s)
+    if duration_s > 0 then
+        return value / duration_s
+    end
+    return 0
+end
+
+function print_json_summary(scenario, summary, latency, requests, codes)
+    local duration_s = summary.duration / 1000000
+    local percentiles = {}
+    for _, p in ipairs(JSON_SUMMARY_PERCENTILES) do
+        percentiles[string.format("%g", p)] = latency:percentile(p)
+    end
+
+    local level, rate = thread_collection()
+    local status = {}
+    for code, count in pairs(codes) do
+        status[tostring(code)] = count
+    end
+
+    local document = {
+        version = 1,
+        scenario = {
+            name = scenario.name,
+            script = scenario.script,
+            method = wrk.method,
+            scheme = wrk.scheme,
+            host = wrk.host,
+            port = wrk.port,
+            path = wrk.path,
+            threads = #tracked_threads
+        },
+        collection = {
+            level = level,
+            sample_rate = rate
+        },
+        summary = {
+            requests = summary.requests,
+            duration_us = summary.duration,
+            bytes = summary.bytes,
+            requests_per_sec = per_second(summary.requests, duration_s),
+            bytes_per_sec = per_second(summary.bytes, duration_s)
+        },
+        errors = {
+            connect = summary.errors.connect,
+            read = summary.errors.read,
+            write = summary.errors.write,
+            status = summary.errors.status,
+            timeout = summary.errors.timeout
+        },
+        status_codes = status,
+        latency_us = {
+            min = latency.min,
+            max = latency.max,
+            mean = latency.mean,
+            stdev = latency.stdev,
+            percentiles = percentiles
+        },
+        thread_requests_per_sec = {
+            min = requests.min,
+            max = requests.max,
+            mean = requests.mean,
+            stdev = requests.stdev
+        }
+    }
+
+    local validation = merge_validation()
+    if validation then
+        local valid_fraction = validation.checked > 0 and validation.valid / validation.checked or 0
+        validation.valid_fraction = valid_fraction
+        validation.goodput_per_sec = per_second(summary.requests, duration_s) * valid_fraction
+        document.validation = validation
+    end
+
+    print(JSON_SUMMARY_BEGIN)
+    print(encode(document))
+    print(JSON_SUMMARY_END)
+end
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Correlación con Métricas del Servidor
+Recolecta un endpoint en formato Prometheus durante la prueba y alinea CPU, profundidad
+de cola y GC del servidor con el RPS y la latencia que mide wrk por intervalos
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+import urllib.request
+
+from utilidades_wrk import (agregar_opcion_wrk, ajustar_comando_wrk, ejecutar_wrk_por_intervalos,
+                            parsear_duracion)
+
+INTERVALO_RECOLECCION = 1.0
+INTERVALO_WRK = 10
+
+# Familias que se guardan por defecto; de cada grupo se grafica la primera presente en la recolección
+METRICAS_CPU = ['process_cpu_seconds_total']
+METRICAS_COLA = [
+    'servidor_solicitudes_en_curso',
+    'http_requests_in_flight',
+    'http_server_requests_in_flight',
+    'http_server_active_requests',
+    'queue_depth',
+    'nginx_connections_waiting'
+]
+# (familia, es tiempo acumulado): los contadores de colecciones se grafican como colecciones/s,
+# los de tiempo como fracción del tiempo en GC
+METRICAS_GC = [
+    ('python_gc_collections_total', False),
+    ('go_gc_duration_seconds_count', False),
+    ('jvm_gc_collection_seconds_count', False),
+    ('dotnet_collection_count_total', False),
+    ('go_gc_duration_seconds_sum', True),
+    ('jvm_gc_collection_seconds_sum', True)
+]
+
+PATRON_MUESTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)(?:\s+-?\d+)?$')
+
+def parsear_prometheus(texto, familias=None):
+    """Parsear el formato de texto Prometheus en {'nombre{etiquetas}': valor}
+
+    Con `familias` solo se conservan las muestras de esos nombres.
+    """
+    muestras = {}
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea or linea.startswith('#'):
+            continue
+        match = PATRON_MUESTRA.match(linea)
+        if not match:
+            continue
+        nombre, etiquetas, valor = match.groups()
+        if familias is not None and nombre not in familias:
+            continue
+        try:
+            muestras[nombre + (etiquetas or '')] = float(valor)
+        except ValueError:
+            continue
+    return muestras
+
+def familia_de_serie(serie):
+    return serie.split('{', 1)[0]
+
+class RecolectorPrometheus:
+    """Recolecta el endpoint a intervalo fijo y guarda las muestras en columnas alineadas por tiempo"""
+
+    def __init__(self, url, intervalo=INTERVALO_RECOLECCION, familias_extra=None, timeout=None):
+        self.url = url
+        self.intervalo = intervalo
+        self.timeout = timeout or max(0.5, min(intervalo, 5))
+        self.familias = set(METRICAS_CPU + METRICAS_COLA + [f for f, _ in METRICAS_GC] + list(familias_extra or []))
+        self.inicio = None
+        self.tiempos = []
+        self.series = {}
+        self.errores = 0
+        self.ultimo_error = None
+        self._detener = threading.Event()
+        self._hebra = None
+
+    def recolectar(self):
+        """Tomar una muestra; las series nuevas se rellenan con None hacia atrás"""
+        marca = time.time()
+        try:
+            with urllib.request.urlopen(self.url, timeout=self.timeout) as respuesta:
+                muestras = parsear_prometheus(respuesta.read().decode('utf-8', 'replace'), self.familias)
+        except Exception as e:
+            self.errores += 1
+            self.ultimo_error = str(e)
+            return
+        self.tiempos.append(round(marca - self.inicio, 3))
+        for serie, valores in self.series.items():
+            valores.append(muestras.pop(serie, None))
+        for serie, valor in muestras.items():
+            self.series[serie] = [None] * (len(self.tiempos) - 1) + [valor]
+
+    def iniciar(self, inicio=None):
+        """Recolectar en segundo plano; `inicio` fija el instante cero compartido con wrk"""
+        self.inicio = inicio or time.time()
+
+        def ciclo():
+            numero = 0
+            while True:
+                self.recolectar()
+                numero += 1
+                # Se agenda respecto al inicio para que el intervalo no derive con la duración del scrape
+                espera = self.inicio + numero * self.intervalo - time.time()
+                if self._detener.wait(max(0, espera)):
+                    break
+
+        self._hebra = threading.Thread(target=ciclo, daemon=True)
+        self._hebra.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hebra:
+            self._hebra.join()
+        return self.exportar()
+
+    def exportar(self):
+        """Forma compacta que se guarda en el JSON de resultados"""
+        return {
+            'url': self.url,
+            'intervalo': self.intervalo,
+            'inicio': self.inicio,
+            't': self.tiempos,
+            'series': self.series,
+            'errores_recoleccion': self.errores,
+            'ultimo_error': self.ultimo_error
+        }
+
+def ejecutar_con_metricas(comando, url_metricas, intervalo_wrk=INTERVALO_WRK,
+                          intervalo_recoleccion=INTERVALO_RECOLECCION, familias_extra=None):
+    """Ejecutar wrk por intervalos mientras se recolectan las métricas del servidor"""
+    comando = agregar_opcion_wrk(comando, '--latency')
+    inicio = time.time()
+    recolector = RecolectorPrometheus(url_metricas, intervalo_recoleccion, familias_extra).iniciar(inicio)
+    try:
+        intervalos = ejecutar_wrk_por_intervalos(comando, intervalo_wrk)
+    finally:
+        metricas = recolector.detener()
+    return {
+        'comando': comando,
+        'inicio': inicio,
+        'intervalos': intervalos,
+        'metricas_servidor': metricas,
+        'execution_time': time.time() - inicio
+    }
+
+def _sumar_familia(metricas, familia):
+    """Sumar todas las series (etiquetas) de una familia en cada instante"""
+    columnas = [v for s, v in metricas['series'].items() if familia_de_serie(s) == familia]
+    if not columnas:
+        return None
+    return [None if all(v is None for v in fila) else sum(v for v in fila if v is not None)
+            for fila in zip(*columnas)]
+
+def _tasa(tiempos, valores):
+    """Derivar un contador en tasa por segundo; los reinicios del contador quedan como None"""
+    tasa = [None]
+    for i in range(1, len(valores)):
+        previo, actual, dt = valores[i - 1], valores[i], tiempos[i] - tiempos[i - 1]
+        if previo is None or actual is None or dt <= 0 or actual < previo:
+            tasa.append(None)
+        else:
+            tasa.append((actual - previo) / dt)
+    return tasa
+
+def derivar_series_servidor(metricas):
+    """Obtener CPU (núcleos), profundidad de cola y actividad del GC a partir de las muestras"""
+    tiempos = metricas['t']
+    derivadas = {'t': tiempos}
+
+    cpu = _sumar_familia(metricas, METRICAS_CPU[0])
+    if cpu:
+        derivadas['cpu'] = {'nombre': 'CPU (núcleos)', 'fuente': METRICAS_CPU[0], 'valores': _tasa(tiempos, cpu)}
+
+    for familia in METRICAS_COLA:
+        valores = _sumar_familia(metricas, familia)
+        if valores:
+            derivadas['cola'] = {'nombre': 'Profundidad de cola', 'fuente': familia, 'valores': valores}
+            break
+
+    for familia, es_tiempo in METRICAS_GC:
+        valores = _sumar_familia(metricas, familia)
+        if valores:
+            derivadas['gc'] = {
+                'nombre': 'Fracción de tiempo en GC' if es_tiempo else 'Colecciones GC/s',
+                'fuente': familia,
+                'valores': _tasa(tiempos, valores)
+            }
+            break
+    return derivadas
+
+def serie_cliente(datos_prueba, analizador):
+    """Parsear los intervalos de wrk y ubicarlos en el eje de tiempo de la recolección"""
+    inicio = datos_prueba.get('inicio') or datos_prueba['intervalos'][0].get('marca_inicio', 0)
+    puntos = []
+    for tramo in datos_prueba['intervalos']:
+        datos = analizador.parsear_salida_wrk(tramo.get('stdout', ''))
+        desde = tramo.get('marca_inicio', inicio + tramo['t_inicio']) - inicio
+        puntos.append({
+            't': desde + (tramo['t_fin'] - tramo['t_inicio']) / 2,
+            'datos': datos
+        })
+    return puntos
+
+def correlacionar(puntos, derivadas):
+    """Promediar cada serie del servidor dentro de cada intervalo de wrk y correlacionarla con el p99"""
+    import numpy as np
+
+    tiempos = np.array(derivadas['t'], dtype=float)
+    p99 = [p['datos'].get('percentiles', {}).get('p99') for p in puntos]
+    mitad = [(puntos[i + 1]['t'] - puntos[i]['t']) / 2 if i + 1 < len(puntos) else None for i in range(len(puntos))]
+    correlaciones = {}
+    for clave in ('cpu', 'cola', 'gc'):
+        if clave not in derivadas:
+            continue
+        valores = np.array([np.nan if v is None else v for v in derivadas[clave]['valores']], dtype=float)
+        medias = []
+        for i, punto in enumerate(puntos):
+            ancho = mitad[i] if mitad[i] is not None else (mitad[i - 1] if i else 0)
+            mascara = (tiempos >= punto['t'] - ancho) & (tiempos <= punto['t'] + ancho) & ~np.isnan(valores)
+            medias.append(float(valores[mascara].mean()) if mascara.any() else np.nan)
+        pares = [(m, q) for m, q in zip(medias, p99) if q is not None and not np.isnan(m)]
+        if len(pares) >= 3 and np.std([m for m, _ in pares]) > 0 and np.std([q for _, q in pares]) > 0:
+            correlaciones[clave] = float(np.corrcoef(*zip(*pares))[0, 1])
+    return correlaciones
+
+def crear_seccion_metricas_servidor(puntos, derivadas, correlaciones):
+    """Gráficos del cliente y del servidor sobre el mismo eje de tiempo"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    paneles = [('rps', 'RPS (cliente)'), ('latencia', 'Latencia (ms, cliente)')]
+    paneles += [(clave, f"{derivadas[clave]['nombre']} · {derivadas[clave]['fuente']}")
+                for clave in ('cpu', 'cola', 'gc') if clave in derivadas]
+    fig = make_subplots(rows=len(paneles), cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        subplot_titles=[titulo for _, titulo in paneles])
+
+    t_cliente = [p['t'] for p in puntos]
+    fig.add_trace(go.Scatter(x=t_cliente, y=[p['datos'].get('rps_reportado', 0) for p in puntos],
+                             name='RPS', mode='lines+markers', marker_color='#4ECDC4'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=t_cliente, y=[p['datos'].get('latencia_promedio', 0) for p in puntos],
+                             name='Latencia Prom', mode='lines+markers', marker_color='#FFE66D'), row=2, col=1)
+    fig.add_trace(go.Scatter(x=t_cliente, y=[p['datos'].get('percentiles', {}).get('p99') for p in puntos],
+                             name='P99', mode='lines+markers', marker_color='#FF6B6B'), row=2, col=1)
+    colores = {'cpu': '#A8E6CF', 'cola': '#45B7D1', 'gc': '#C06C84'}
+    for fila, (clave, _) in enumerate(paneles[2:], start=3):
+        fig.add_trace(go.Scatter(x=derivadas['t'], y=derivadas[clave]['valores'], name=derivadas[clave]['nombre'],
+                                 mode='lines', connectgaps=False, marker_color=colores[clave]), row=fila, col=1)
+
+    fig.update_layout(height=220 * len(paneles), title_text='Cliente vs Servidor', title_x=0.5)
+    fig.update_xaxes(title_text='Tiempo desde el inicio (s)', row=len(paneles), col=1)
+
+    texto = ''
+    if correlaciones:
+        texto = "<p><strong>Correlación con el P99 por intervalo:</strong> " + ', '.join(
+            f"{derivadas[clave]['nombre']}: {valor:+.2f}" for clave, valor in correlaciones.items()
+        ) + "</p>"
+    faltantes = [nombre for clave, nombre in (('cpu', 'CPU'), ('cola', 'cola'), ('gc', 'GC')) if clave not in derivadas]
+    if faltantes:
+        texto += f"<p>El endpoint no expuso métricas de: {', '.join(faltantes)}.</p>"
+    return texto + fig.to_html(full_html=False, include_plotlyjs=False)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta una prueba recolectando métricas Prometheus del servidor en paralelo'
+    )
+    parser.add_argument('tipo', nargs='?', choices=['get', 'post'], help='Prueba a ejecutar')
+    parser.add_argument('--url-metricas', help='Endpoint en formato Prometheus (p. ej. http://host:9100/metrics)')
+    parser.add_argument('--simulado', action='store_true',
+                        help='Usar el servidor simulado local como destino y fuente de métricas')
+    parser.add_argument('--retardo-simulado', type=float, default=5, help='Retardo por request del simulado (ms)')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_RECOLECCION, help='Segundos entre recolecciones')
+    parser.add_argument('--intervalo-wrk', type=int, default=INTERVALO_WRK, help='Duración de cada intervalo de wrk')
+    parser.add_argument('--metrica', action='append', default=[], help='Familia adicional a guardar (repetible)')
+    parser.add_argument('--duracion', help='Duración total (por defecto la del escenario)')
+    parser.add_argument('--conexiones', type=int, help='Conexiones concurrentes (por defecto las del escenario)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.tipo:
+        parser.error("Indica el tipo de prueba")
+    if not args.url_metricas and not args.simulado:
+        parser.error("Indica --url-metricas o --simulado")
+
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    ejecutor = EjecutorPruebasCarga()
+    info = dict(ejecutor.comandos_disponibles[args.tipo])
+    duracion = parsear_duracion(args.duracion) if args.duracion else None
+    info['comando'] = ajustar_comando_wrk(info['comando'], duracion=duracion, conexiones=args.conexiones)
+
+    servidor = None
+    if args.simulado:
+        from servidor_simulado import ServidorSimulado
+        servidor = ServidorSimulado(retardo_ms=args.retardo_simulado).iniciar()
+        ruta = '/gateway/user/verify/number?username=65663503' if args.tipo == 'get' else '/api/pagos/ProcessMessage'
+        info['comando'] = ajustar_comando_wrk(info['comando'], url=f"{servidor.url}{ruta}")
+        args.url_metricas = args.url_metricas or f"{servidor.url}/metrics"
+        print(f"🧪 Servidor simulado en {servidor.url}")
+
+    ejecutor.metricas = {'url': args.url_metricas, 'intervalo': args.intervalo,
+                         'intervalo_wrk': args.intervalo_wrk, 'familias': args.metrica}
+    try:
+        ejecutor.ejecutar_comando_wrk(f"{args.tipo}_test", info)
+    finally:
+        if servidor:
+            servidor.detener()
+    ejecutor.guardar_resultados()
+    print("\nPara generar el dashboard ejecuta: python3 generar_reporte_html.py")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Modelo de Escalabilidad
+Ajusta la Ley de Escalabilidad Universal (USL) y un modelo de colas cerrado a los puntos
+throughput vs concurrencia de las ejecuciones guardadas para pronosticar la capacidad
+en concurrencias que no se pueden generar
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from estadisticas import cuantil_t
+from historial_resultados import crear_analizador, iterar_ejecuciones, listar_resultados, resumir_ejecucion
+from utilidades_wrk import parsear_comando_wrk
+
+CONFIANZA_MODELO = 0.95
+MINIMO_NIVELES = 3
+ITERACIONES_AJUSTE = 200
+
+def usl(n, parametros):
+    """X(N) = λN / (1 + σ(N-1) + κN(N-1))"""
+    lam, sigma, kappa = parametros
+    return lam * n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+def colas_cerradas(n, parametros):
+    """Modelo de colas cerrado: un servidor con demanda S y un retardo puro Z (red), sin pensar
+
+    Es el modelo del reparador de máquinas: X(N) = (1 - P0(N)) / S, con P0 la probabilidad
+    de servidor ocioso. Se calcula en logaritmos para N de decenas de miles de conexiones.
+    """
+    servicio, retardo = parametros
+    resultado = []
+    for conexiones in np.atleast_1d(n):
+        if retardo <= 0:
+            resultado.append(1 / servicio)
+            continue
+        k = np.arange(int(round(conexiones)) + 1)
+        # log(N!/(N-k)!) + k·log(S/Z)
+        logs = np.concatenate(([0.0], np.cumsum(np.log(conexiones - k[:-1])))) + k * np.log(servicio / retardo)
+        maximo = logs.max()
+        p0 = np.exp(-maximo) / np.exp(logs - maximo).sum()
+        resultado.append((1 - p0) / servicio)
+    return np.array(resultado)
+
+MODELOS = {
+    'usl': {
+        'nombre': 'USL',
+        'funcion': usl,
+        'parametros': ['lambda', 'sigma', 'kappa'],
+        'inferiores': [1e-12, 0.0, 0.0]
+    },
+    'colas': {
+        'nombre': 'Colas cerrado (MVA)',
+        'funcion': colas_cerradas,
+        'parametros': ['servicio', 'retardo'],
+        'inferiores': [1e-12, 0.0]
+    }
+}
+
+def ajustar_minimos_cuadrados(funcion, iniciales, n, x, inferiores, iteraciones=ITERACIONES_AJUSTE):
+    """Levenberg-Marquardt con jacobiano numérico; devuelve (parámetros, covarianza, SSR)
+
+    La covarianza es s²(JᵀJ)⁻¹ en el óptimo y es None si no hay grados de libertad.
+    """
+    inferiores = np.array(inferiores, dtype=float)
+    parametros = np.maximum(np.array(iniciales, dtype=float), inferiores)
+
+    def residuos(p):
+        return x - funcion(n, p)
+
+    def jacobiano(p):
+        base = funcion(n, p)
+        columnas = []
+        for i in range(len(p)):
+            paso = 1e-6 * max(abs(p[i]), 1e-9)
+            desplazado = p.copy()
+            desplazado[i] += paso
+            columnas.append((funcion(n, desplazado) - base) / paso)
+        return np.column_stack(columnas)
+
+    ssr = float(residuos(parametros) @ residuos(parametros))
+    amortiguamiento = 1e-3
+    for _ in range(iteraciones):
+        j = jacobiano(parametros)
+        a = j.T @ j
+        g = j.T @ residuos(parametros)
+        try:
+            paso = np.linalg.solve(a + amortiguamiento * np.diag(np.diag(a) + 1e-30), g)
+        except np.linalg.LinAlgError:
+            amortiguamiento *= 10
+            continue
+        candidato = np.maximum(parametros + paso, inferiores)
+        ssr_candidato = float(residuos(candidato) @ residuos(candidato))
+        if ssr_candidato < ssr:
+            mejora = (ssr - ssr_candidato) / max(ssr, 1e-300)
+            parametros, ssr = candidato, ssr_candidato
+            amortiguamiento = max(amortiguamiento / 10, 1e-12)
+            if mejora < 1e-10:
+                break
+        else:
+            amortiguamiento *= 10
+            if amortiguamiento > 1e12:
+                break
+
+    grados = len(x) - len(parametros)
+    covarianza = None
+    if grados > 0:
+        j = jacobiano(parametros)
+        covarianza = ssr / grados * np.linalg.pinv(j.T @ j)
+    return parametros, covarianza, ssr
+
+def iniciales_usl(n, x):
+    """Estimación lineal: N/X = 1/λ + (σ/λ)(N-1) + (κ/λ)N(N-1)"""
+    a = np.column_stack([np.ones_like(n), n - 1, n * (n - 1)])
+    coeficientes = np.linalg.lstsq(a, n / x, rcond=None)[0]
+    if coeficientes[0] <= 0:
+        return [float(np.max(x / n)), 0.0, 0.0]
+    return [1 / coeficientes[0], max(coeficientes[1] / coeficientes[0], 0.0),
+            max(coeficientes[2] / coeficientes[0], 0.0)]
+
+def iniciales_colas(n, x):
+    """S desde el throughput máximo y Z desde el punto de menor concurrencia"""
+    servicio = 1 / float(np.max(x))
+    menor = int(np.argmin(n))
+    return [servicio, max(n[menor] / x[menor] - servicio, servicio * 0.01)]
+
+def _propagar(funcion_derivada, parametros, covarianza):
+    """Varianza de una función de los parámetros por el método delta (gradiente numérico)"""
+    if covarianza is None:
+        return None
+    base = funcion_derivada(parametros)
+    gradiente = []
+    for i in range(len(parametros)):
+        paso = 1e-6 * max(abs(parametros[i]), 1e-9)
+        desplazado = parametros.copy()
+        desplazado[i] += paso
+        gradiente.append((funcion_derivada(desplazado) - base) / paso)
+    gradiente = np.array(gradiente)
+    return max(float(gradiente @ covarianza @ gradiente), 0.0)
+
+def pico_usl(parametros):
+    """Concurrencia del pico N* = sqrt((1-σ)/κ); sin coherencia (κ=0) no hay pico finito"""
+    lam, sigma, kappa = parametros
+    if kappa <= 0 or sigma >= 1:
+        return None
+    return float(np.sqrt((1 - sigma) / kappa))
+
+def ajustar_modelo(clave, n, x, confianza=CONFIANZA_MODELO):
+    """Ajustar un modelo y devolver coeficientes, bondad del ajuste y capacidad máxima con incertidumbre"""
+    modelo = MODELOS[clave]
+    iniciales = iniciales_usl(n, x) if clave == 'usl' else iniciales_colas(n, x)
+    parametros, covarianza, ssr = ajustar_minimos_cuadrados(modelo['funcion'], iniciales, n, x, modelo['inferiores'])
+    grados = len(x) - len(parametros)
+    t = cuantil_t(0.5 + confianza / 2, grados) if grados > 0 else None
+
+    def semiancho(varianza):
+        return t * varianza ** 0.5 if varianza is not None and t is not None else None
+
+    coeficientes = {}
+    for i, nombre in enumerate(modelo['parametros']):
+        varianza = float(covarianza[i, i]) if covarianza is not None else None
+        coeficientes[nombre] = {'valor': float(parametros[i]), 'semiancho': semiancho(varianza)}
+
+    if clave == 'usl':
+        n_pico = pico_usl(parametros)
+        if n_pico is not None:
+            pico = {
+                'concurrencia': n_pico,
+                'concurrencia_semiancho': semiancho(_propagar(lambda p: pico_usl(p) or 0.0, parametros, covarianza)),
+                'throughput': float(usl(n_pico, parametros)),
+                'throughput_semiancho': semiancho(_propagar(
+                    lambda p: float(usl(pico_usl(p) or 1.0, p)), parametros, covarianza)),
+                'tipo': 'maximo'
+            }
+        else:
+            # Sin retroceso el throughput tiende a λ/σ (límite de Amdahl) o crece sin límite
+            asintota = parametros[0] / parametros[1] if parametros[1] > 0 else None
+            pico = {
+                'concurrencia': None,
+                'concurrencia_semiancho': None,
+                'throughput': float(asintota) if asintota is not None else None,
+                'throughput_semiancho': semiancho(_propagar(lambda p: p[0] / p[1], parametros, covarianza))
+                if asintota is not None else None,
+                'tipo': 'asintota'
+            }
+    else:
+        pico = {
+            'concurrencia': float((parametros[0] + parametros[1]) / parametros[0]),
+            'concurrencia_semiancho': semiancho(_propagar(lambda p: (p[0] + p[1]) / p[0], parametros, covarianza)),
+            'throughput': float(1 / parametros[0]),
+            'throughput_semiancho': semiancho(_propagar(lambda p: 1 / p[0], parametros, covarianza)),
+            'tipo': 'asintota'
+        }
+
+    total = float(((x - x.mean()) ** 2).sum())
+    return {
+        'modelo': clave,
+        'nombre': modelo['nombre'],
+        'coeficientes': coeficientes,
+        'parametros': [float(p) for p in parametros],
+        'covarianza': covarianza.tolist() if covarianza is not None else None,
+        'r2': 1 - ssr / total if total else None,
+        'rmse': float(np.sqrt(ssr / len(x))),
+        # AIC de mínimos cuadrados para elegir entre modelos con distinto número de parámetros
+        'aic': float(len(x) * np.log(max(ssr, 1e-300) / len(x)) + 2 * len(parametros)),
+        'pico': pico,
+        'confianza': confianza
+    }
+
+def predecir(ajuste, concurrencias):
+    """Throughput pronosticado en cada concurrencia con su semiancho"""
+    funcion = MODELOS[ajuste['modelo']]['funcion']
+    parametros = np.array(ajuste['parametros'])
+    covarianza = np.array(ajuste['covarianza']) if ajuste['covarianza'] is not None else None
+    grados = ajuste.get('grados')
+    predicciones = []
+    for n in concurrencias:
+        varianza = _propagar(lambda p: float(funcion(np.array([float(n)]), p)[0]), parametros, covarianza)
+        semiancho = cuantil_t(0.5 + ajuste['confianza'] / 2, grados) * varianza ** 0.5 \
+            if varianza is not None and grados else None
+        predicciones.append({'concurrencia': n, 'throughput': float(funcion(np.array([float(n)]), parametros)[0]),
+                             'semiancho': semiancho})
+    return predicciones
+
+def ajustar_puntos(puntos, confianza=CONFIANZA_MODELO):
+    """Ajustar ambos modelos a [{'concurrencia', 'rps', ...}]; None si hay menos de MINIMO_NIVELES niveles"""
+    validos = [p for p in puntos if p['rps'] > 0 and p['concurrencia'] > 0]
+    if len({p['concurrencia'] for p in validos}) < MINIMO_NIVELES:
+        return None
+    n = np.array([p['concurrencia'] for p in validos], dtype=float)
+    x = np.array([p['rps'] for p in validos], dtype=float)
+    ajustes = {}
+    for clave in MODELOS:
+        ajustes[clave] = ajustar_modelo(clave, n, x, confianza)
+        ajustes[clave]['grados'] = len(x) - len(MODELOS[clave]['parametros'])
+    return {
+        'puntos': validos,
+        'ajustes': ajustes,
+        'mejor': min(ajustes, key=lambda clave: ajustes[clave]['aic'])
+    }
+
+def puntos_de_ejecucion(ejecucion, analizador):
+    """Puntos (concurrencia, RPS) de una prueba guardada: uno por etapa o uno por prueba simple"""
+    datos = ejecucion['datos']
+    comando = datos.get('comando')
+    if not comando:
+        return []
+    opciones = parsear_comando_wrk(comando)
+    escenario = f"{os.path.basename(opciones['script'] or 'sin_script')} {opciones['url'] or ''}".strip()
+    base = {'escenario': escenario, 'archivo': os.path.basename(ejecucion['archivo']), 'prueba': ejecucion['clave']}
+
+    if 'etapas' in datos:
+        from perfiles_carga import analizar_resultado_perfil
+        _, etapas, _ = analizar_resultado_perfil(datos, analizador)
+        return [dict(base, concurrencia=etapa['conexiones'], etapa=etapa['nombre'],
+                     rps=etapa['estadisticas'].get('rps_reportado') or etapa['estadisticas'].get('rps', 0))
+                for etapa in etapas if etapa['estadisticas'].get('total_requests')]
+
+    normalizada = resumir_ejecucion(ejecucion, analizador)
+    if not normalizada or not opciones['conexiones']:
+        return []
+    resumen = normalizada['resumen']
+    return [dict(base, concurrencia=opciones['conexiones'], etapa=None,
+                 rps=resumen.get('rps_reportado') or resumen.get('rps', 0))]
+
+def recolectar_puntos(directorio='.', archivos=None, filtro=None):
+    """Puntos de todas las ejecuciones guardadas agrupados por escenario (script y URL)"""
+    analizador = crear_analizador()
+    grupos = {}
+    for ejecucion in iterar_ejecuciones(directorio, archivos=archivos):
+        for punto in puntos_de_ejecucion(ejecucion, analizador):
+            if filtro and filtro not in punto['escenario']:
+                continue
+            grupos.setdefault(punto['escenario'], []).append(punto)
+    return grupos
+
+def _formatear(valor, semiancho, formato):
+    texto = format(valor, formato)
+    return texto + (f" ± {format(semiancho, formato)}" if semiancho is not None else '')
+
+def describir_pico(ajuste):
+    pico = ajuste['pico']
+    if pico['throughput'] is None:
+        return 'sin límite estimable'
+    texto = f"{_formatear(pico['throughput'], pico['throughput_semiancho'], ',.0f')} RPS"
+    if pico['concurrencia'] is not None:
+        prefijo = 'pico en N* ≈' if pico['tipo'] == 'maximo' else 'saturación desde N* ≈'
+        texto += f" ({prefijo} {_formatear(pico['concurrencia'], pico['concurrencia_semiancho'], ',.0f')})"
+    elif pico['tipo'] == 'asintota':
+        texto += ' (asíntota, sin retroceso)'
+    return texto
+
+def crear_seccion_escalabilidad(modelo):
+    """Curvas ajustadas sobre las mediciones y tabla de coeficientes, para el dashboard"""
+    import plotly.graph_objects as go
+
+    puntos, ajustes = modelo['puntos'], modelo['ajustes']
+    filas = []
+    for clave, ajuste in ajustes.items():
+        coeficientes = ', '.join(
+            f"{nombre} = {_formatear(c['valor'], c['semiancho'], '.4g')}" for nombre, c in ajuste['coeficientes'].items()
+        )
+        marca = ' ⭐' if clave == modelo['mejor'] else ''
+        r2 = '-' if ajuste['r2'] is None else f"{ajuste['r2']:.4f}"
+        filas.append(f"<tr><td>{ajuste['nombre']}{marca}</td><td>{coeficientes}</td><td>{r2}</td>"
+                     f"<td>{ajuste['rmse']:,.1f}</td><td>{describir_pico(ajuste)}</td></tr>")
+    usl_ajuste = ajustes['usl']
+    texto = (
+        f"<p>{len(puntos)} mediciones en {len({p['concurrencia'] for p in puntos})} niveles de concurrencia. "
+        f"USL: σ (contención) = {_formatear(usl_ajuste['coeficientes']['sigma']['valor'], usl_ajuste['coeficientes']['sigma']['semiancho'], '.4g')}, "
+        f"κ (coherencia) = {_formatear(usl_ajuste['coeficientes']['kappa']['valor'], usl_ajuste['coeficientes']['kappa']['semiancho'], '.4g')}. "
+        f"Semianchos al {usl_ajuste['confianza']:.0%} por el método delta; ⭐ menor AIC.</p>"
+        "<table class=\"tabla-etapas\"><tr><th>Modelo</th><th>Coeficientes</th><th>R²</th><th>RMSE (RPS)</th>"
+        "<th>Capacidad máxima</th></tr>" + ''.join(filas) + "</table>"
+    )
+
+    maximo = max(p['concurrencia'] for p in puntos)
+    for ajuste in ajustes.values():
+        if ajuste['pico']['concurrencia'] is not None:
+            maximo = max(maximo, min(ajuste['pico']['concurrencia'] * 1.5, maximo * 4))
+    malla = np.unique(np.linspace(1, maximo * 1.1, 200).round())
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[p['concurrencia'] for p in puntos], y=[p['rps'] for p in puntos], mode='markers',
+                             name='Medido', marker=dict(color='#FF6B6B', size=9),
+                             text=[p.get('etapa') or p.get('archivo', '') for p in puntos]))
+    for (clave, ajuste), color in zip(ajustes.items(), ('#4ECDC4', '#FFA07A')):
+        fig.add_trace(go.Scatter(x=malla, y=MODELOS[clave]['funcion'](malla, np.array(ajuste['parametros'])),
+                                 mode='lines', name=ajuste['nombre'], line=dict(color=color)))
+    if usl_ajuste['pico']['tipo'] == 'maximo':
+        fig.add_vline(x=usl_ajuste['pico']['concurrencia'], line_dash='dot', line_color='#4ECDC4',
+                      annotation_text='N* USL')
+    fig.update_layout(height=450, title_text='Throughput vs Concurrencia', title_x=0.5)
+    fig.update_xaxes(title_text='Conexiones concurrentes')
+    fig.update_yaxes(title_text='RPS')
+    return texto + fig.to_html(full_html=False, include_plotlyjs=False)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ajusta USL y un modelo de colas a throughput vs concurrencia de las ejecuciones guardadas'
+    )
+    parser.add_argument('archivos', nargs='*', help='Archivos de resultados (por defecto todos los del directorio)')
+    parser.add_argument('--directorio', default='.', help='Directorio con resultados_pruebas_carga_*.json')
+    parser.add_argument('--escenario', help='Solo escenarios cuyo script o URL contenga este texto (p. ej. post_pagos)')
+    parser.add_argument('--predecir', type=int, action='append', default=[],
+                        help='Concurrencia a pronosticar (repetible)')
+    parser.add_argument('--confianza', type=float, default=CONFIANZA_MODELO, help='Nivel de confianza')
+    parser.add_argument('--html', action='store_true', help='Guardar también las curvas ajustadas en HTML')
+
+    args = parser.parse_args()
+    archivos = [(os.path.getmtime(ruta), ruta) for ruta in args.archivos] if args.archivos \
+        else listar_resultados(args.directorio)
+    if not archivos:
+        print("No se encontraron archivos de resultados. Por favor ejecuta las pruebas de carga primero.")
+        sys.exit(1)
+
+    grupos = recolectar_puntos(args.directorio, archivos, args.escenario)
+    modelos = {}
+    for escenario, puntos in grupos.items():
+        niveles = len({p['concurrencia'] for p in puntos})
+        print(f"\n📈 {escenario}: {len(puntos)} mediciones, {niveles} niveles de concurrencia")
+        modelo = ajustar_puntos(puntos, args.confianza)
+        if not modelo:
+            print(f"  ⚠️  Se necesitan al menos {MINIMO_NIVELES} niveles de concurrencia distintos")
+            continue
+        for clave, ajuste in modelo['ajustes'].items():
+            coeficientes = ', '.join(f"{nombre}={_formatear(c['valor'], c['semiancho'], '.4g')}"
+                                     for nombre, c in ajuste['coeficientes'].items())
+            r2 = '-' if ajuste['r2'] is None else f"{ajuste['r2']:.4f}"
+            print(f"  {'⭐' if clave == modelo['mejor'] else '  '} {ajuste['nombre']:<20} {coeficientes} | R² {r2}")
+            print(f"     Capacidad máxima: {describir_pico(ajuste)}")
+            if args.predecir:
+                ajuste['predicciones'] = predecir(ajuste, args.predecir)
+                for prediccion in ajuste['predicciones']:
+                    print(f"     N={prediccion['concurrencia']:,}: "
+                          f"{_formatear(prediccion['throughput'], prediccion['semiancho'], ',.0f')} RPS")
+        modelos[escenario] = modelo
+
+    if not modelos:
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    archivo = f"modelo_escalabilidad_{timestamp}.json"
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump({'generado': datetime.now().isoformat(), 'archivos': [os.path.basename(r) for _, r in archivos],
+                   'modelos': modelos}, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Modelos guardados en: {archivo}")
+
+    if args.html:
+        secciones = ''.join(f"<h2>{escenario}</h2>{crear_seccion_escalabilidad(modelo)}"
+                            for escenario, modelo in modelos.items())
+        archivo_html = f"modelo_escalabilidad_{timestamp}.html"
+        with open(archivo_html, 'w', encoding='utf-8') as f:
+            f.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Modelo de Escalabilidad</title>"
+                    "<script src=\"https://cdn.plot.ly/plotly-latest.min.js\"></script></head>"
+                    f"<body><h1>📈 Modelo de Escalabilidad</h1>{secciones}</body></html>")
+        print(f"📊 Curvas ajustadas en: {archivo_html}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Perfilado de Etapas del Pipeline
+Mide cada etapa, captura cProfile/tracemalloc opcionales y exporta trazas Chrome/Perfetto
+"""
+
+import atexit
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Variables de entorno con las que el orquestador activa el perfilado en los subprocesos
+VARIABLE_DIRECTORIO = 'PERFIL_PRUEBAS_DIR'
+VARIABLE_OPCIONES = 'PERFIL_PRUEBAS_OPCIONES'
+
+def _marca_us():
+    return time.time_ns() // 1000
+
+class Perfilador:
+    def __init__(self, directorio=None, cprofile=False, memoria=False, nombre_proceso=None):
+        self.directorio = directorio
+        self.activo = directorio is not None
+        self.cprofile = cprofile
+        self.memoria = memoria
+        self.nombre_proceso = nombre_proceso or os.path.basename(sys.argv[0] or 'python')
+        self.eventos = []
+        self.mediciones = []
+        self._bloqueo = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls):
+        """Crear el perfilador del proceso según las variables de entorno del orquestador"""
+        directorio = os.environ.get(VARIABLE_DIRECTORIO)
+        opciones = os.environ.get(VARIABLE_OPCIONES, '').split(',')
+        perfilador = cls(directorio, cprofile='cprofile' in opciones, memoria='memoria' in opciones)
+        if perfilador.activo:
+            atexit.register(perfilador.guardar_fragmento)
+        return perfilador
+
+    @contextmanager
+    def etapa(self, nombre, categoria='pipeline', reporte=False):
+        """Medir una etapa; con `reporte=True` aplica cProfile y tracemalloc si están habilitados"""
+        if not self.activo:
+            yield
+            return
+
+        perfil = cProfile.Profile() if reporte and self.cprofile else None
+        medir_memoria = reporte and self.memoria and not tracemalloc.is_tracing()
+        if medir_memoria:
+            tracemalloc.start()
+        inicio_us = _marca_us()
+        inicio = time.perf_counter()
+        if perfil:
+            perfil.enable()
+        try:
+            yield
+        finally:
+            if perfil:
+                perfil.disable()
+            duracion = time.perf_counter() - inicio
+            argumentos = {}
+            if medir_memoria:
+                argumentos['pico_memoria_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                instantanea = tracemalloc.take_snapshot()
+                argumentos['top_asignaciones'] = [
+                    f"{estadistica.traceback[0]}: {estadistica.size / 1024:.1f} KiB"
+                    for estadistica in instantanea.statistics('lineno')[:10]
+                ]
+                tracemalloc.stop()
+            if perfil:
+                argumentos['cprofile'] = self.guardar_cprofile(perfil, nombre)
+            self.registrar(nombre, categoria, inicio_us, duracion, argumentos)
+
+    def registrar(self, nombre, categoria, inicio_us, duracion, argumentos=None):
+        """Registrar una etapa como evento completo ('X') del formato Chrome trace"""
+        with self._bloqueo:
+            self.eventos.append({
+                'name': nombre,
+                'cat': categoria,
+                'ph': 'X',
+                'ts': inicio_us,
+                'dur': int(duracion * 1_000_000),
+                'pid': os.getpid(),
+                'tid': threading.get_ident() % 1_000_000,
+                'args': argumentos or {}
+            })
+            self.mediciones.append({
+                'etapa': nombre,
+                'categoria': categoria,
+                'proceso': self.nombre_proceso,
+                'duracion_s': duracion,
+                **{k: v for k, v in (argumentos or {}).items() if k == 'pico_memoria_mb'}
+            })
+
+    def guardar_cprofile(self, perfil, nombre):
+        """Guardar el .prof de una etapa y devolver las 15 funciones con más tiempo acumulado"""
+        seguro = ''.join(c if c.isalnum() else '_' for c in nombre)
+        archivo = os.path.join(self.directorio, f"cprofile_{seguro}_{os.getpid()}.prof")
+        perfil.dump_stats(archivo)
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(15)
+        return {'archivo': archivo, 'resumen': texto.getvalue().splitlines()[-25:]}
+
+    def guardar_fragmento(self):
+        """Escribir los eventos de este proceso para que el orquestador los combine"""
+        if not self.activo or not self.eventos:
+            return
+        archivo = os.path.join(self.directorio, f"fragmento_{os.getpid()}.json")
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump({
+                'pid': os.getpid(),
+                'proceso': self.nombre_proceso,
+                'eventos': self.eventos,
+                'mediciones': self.mediciones
+            }, f, ensure_ascii=False)
+
+def combinar_trazas(directorio, archivo_traza):
+    """Combinar los fragmentos de todos los procesos en un único archivo Chrome/Perfetto"""
+    eventos = []
+    mediciones = []
+    for archivo in sorted(glob.glob(os.path.join(directorio, 'fragmento_*.json'))):
+        with open(archivo, 'r', encoding='utf-8') as f:
+            fragmento = json.load(f)
+        eventos.append({
+            'name': 'process_name', 'ph': 'M', 'pid': fragmento['pid'],
+            'args': {'name': fragmento['proceso']}
+        })
+        eventos.extend(fragmento['eventos'])
+        mediciones.extend(fragmento['mediciones'])
+
+    with open(archivo_traza, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return mediciones
+
+# Perfilador del proceso actual; inactivo salvo que el orquestador lo habilite
+PERFILADOR = Perfilador.desde_entorno()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Perfiles de Carga por Etapas
+Calentamiento, rampas escalonadas, carga sostenida, picos, recuperación y enfriamiento
+"""
+
+import json
+import os
+import threading
+import time
+
+from estadisticas import resumir_ejecuciones
+from utilidades_wrk import ajustar_comando_wrk, ejecutar_wrk, ejecutar_wrk_por_intervalos, parsear_duracion
+
+TIPOS_ETAPA = ['calentamiento', 'rampa', 'sostenido', 'pico', 'recuperacion', 'enfriamiento']
+
+# Etapas que no entran en las cifras principales salvo que el perfil indique "excluir": false
+TIPOS_EXCLUIDOS_POR_DEFECTO = ['calentamiento', 'enfriamiento']
+
+# Tolerancia relativa para considerar que el sistema volvió a su línea base tras un pico
+TOLERANCIA_RECUPERACION = 0.10
+
+PERFILES_PREDEFINIDOS = {
+    'escalonado': {
+        'descripcion': 'Rampa en escalones hasta la carga objetivo y carga sostenida',
+        'hilos': 32,
+        'etapas': [
+            {'tipo': 'calentamiento', 'conexiones': 500, 'duracion': '30s'},
+            {'tipo': 'rampa', 'desde': 5000, 'hasta': 50000, 'escalones': 5, 'duracion': '150s'},
+            {'tipo': 'sostenido', 'conexiones': 50000, 'duracion': '120s',
+             'apertura_escalonada': {'lotes': 10, 'separacion': '2s'}},
+            {'tipo': 'enfriamiento', 'conexiones': 1000, 'duracion': '30s'}
+        ]
+    },
+    'pico': {
+        'descripcion': 'Carga sostenida, pico repentino y medición del tiempo de recuperación',
+        'hilos': 32,
+        'etapas': [
+            {'tipo': 'calentamiento', 'conexiones': 500, 'duracion': '30s'},
+            {'tipo': 'rampa', 'desde': 2000, 'hasta': 10000, 'escalones': 4, 'duracion': '60s'},
+            {'tipo': 'sostenido', 'conexiones': 10000, 'duracion': '90s'},
+            {'tipo': 'pico', 'conexiones': 50000, 'duracion': '30s'},
+            {'tipo': 'recuperacion', 'conexiones': 10000, 'duracion': '120s', 'intervalo': '10s'},
+            {'tipo': 'enfriamiento', 'conexiones': 1000, 'duracion': '30s'}
+        ]
+    }
+}
+
+def cargar_perfil(nombre_o_archivo):
+    """Cargar un perfil predefinido o desde un archivo JSON"""
+    if os.path.exists(nombre_o_archivo):
+        with open(nombre_o_archivo, 'r', encoding='utf-8') as f:
+            perfil = json.load(f)
+        perfil.setdefault('nombre', os.path.splitext(os.path.basename(nombre_o_archivo))[0])
+    elif nombre_o_archivo in PERFILES_PREDEFINIDOS:
+        perfil = dict(PERFILES_PREDEFINIDOS[nombre_o_archivo], nombre=nombre_o_archivo)
+    else:
+        raise ValueError(
+            f"Perfil '{nombre_o_archivo}' no encontrado. "
+            f"Predefinidos: {', '.join(PERFILES_PREDEFINIDOS)}"
+        )
+    validar_perfil(perfil)
+    return perfil
+
+def validar_perfil(perfil):
+    """Validar la estructura de un perfil de carga"""
+    if not perfil.get('etapas'):
+        raise ValueError("El perfil debe definir al menos una etapa")
+    for i, etapa in enumerate(perfil['etapas'], 1):
+        tipo = etapa.get('tipo')
+        if tipo not in TIPOS_ETAPA:
+            raise ValueError(f"Etapa {i}: tipo '{tipo}' no válido ({', '.join(TIPOS_ETAPA)})")
+        if 'duracion' not in etapa:
+            raise ValueError(f"Etapa {i}: falta 'duracion'")
+        parsear_duracion(etapa['duracion'])
+        if tipo == 'rampa':
+            for clave in ('desde', 'hasta'):
+                if clave not in etapa:
+                    raise ValueError(f"Etapa {i}: la rampa necesita '{clave}'")
+        elif 'conexiones' not in etapa:
+            raise ValueError(f"Etapa {i}: falta 'conexiones'")
+
+def expandir_etapas(perfil):
+    """Expandir las rampas del perfil en escalones individuales"""
+    hilos = perfil.get('hilos', 32)
+    expandidas = []
+    for i, etapa in enumerate(perfil['etapas'], 1):
+        duracion = parsear_duracion(etapa['duracion'])
+        base = {
+            'tipo': etapa['tipo'],
+            'hilos': etapa.get('hilos', hilos),
+            'excluir_de_resumen': etapa.get('excluir', etapa['tipo'] in TIPOS_EXCLUIDOS_POR_DEFECTO),
+            'apertura_escalonada': etapa.get('apertura_escalonada')
+        }
+        if etapa['tipo'] == 'rampa':
+            escalones = max(1, int(etapa.get('escalones', 5)))
+            for n in range(escalones):
+                if escalones > 1:
+                    conexiones = etapa['desde'] + (etapa['hasta'] - etapa['desde']) * n / (escalones - 1)
+                else:
+                    conexiones = etapa['hasta']
+                expandidas.append(dict(
+                    base,
+                    nombre=etapa.get('nombre', f"rampa_{i}") + f"_{n + 1}de{escalones}",
+                    conexiones=int(conexiones),
+                    duracion=duracion / escalones
+                ))
+        else:
+            expandidas.append(dict(
+                base,
+                nombre=etapa.get('nombre', f"{etapa['tipo']}_{i}"),
+                conexiones=int(etapa['conexiones']),
+                duracion=duracion,
+                intervalo=parsear_duracion(etapa.get('intervalo', '10s'))
+            ))
+    return expandidas
+
+class EjecutorPerfilCarga:
+    def __init__(self, perfil, comando_base):
+        self.perfil = perfil
+        self.comando_base = comando_base
+
+    def ejecutar(self):
+        """Ejecutar todas las etapas del perfil y devolver el registro para el JSON de resultados"""
+        etapas = expandir_etapas(self.perfil)
+        duracion_total = sum(e['duracion'] for e in etapas)
+        print(f"📐 Perfil '{self.perfil['nombre']}': {len(etapas)} etapas, {duracion_total:.0f}s en total")
+
+        tiempo_inicio = time.time()
+        registros_etapas = []
+        for numero, etapa in enumerate(etapas, 1):
+            print(f"\n  ▶ Etapa {numero}/{len(etapas)}: {etapa['nombre']} "
+                  f"({etapa['conexiones']:,} conexiones, {etapa['duracion']:.0f}s)")
+            if etapa['tipo'] == 'recuperacion':
+                tramos = self.ejecutar_por_intervalos(etapa)
+                concurrente = False
+            elif etapa.get('apertura_escalonada'):
+                tramos = self.ejecutar_apertura_escalonada(etapa)
+                concurrente = True
+            else:
+                tramos = [ejecutar_wrk(self.comando_etapa(etapa, etapa['conexiones'], etapa['hilos'], etapa['duracion']))]
+                concurrente = False
+
+            for tramo in tramos:
+                if 'error' in tramo:
+                    print(f"    ❌ {tramo['error']}")
+            registros_etapas.append({
+                'nombre': etapa['nombre'],
+                'tipo': etapa['tipo'],
+                'conexiones': etapa['conexiones'],
+                'hilos': etapa['hilos'],
+                'duracion': etapa['duracion'],
+                'excluir_de_resumen': etapa['excluir_de_resumen'],
+                'concurrente': concurrente,
+                'tramos': tramos
+            })
+
+        return {
+            'comando': self.comando_base,
+            'perfil': self.perfil['nombre'],
+            'definicion_perfil': self.perfil,
+            'etapas': registros_etapas,
+            'execution_time': time.time() - tiempo_inicio
+        }
+
+    def comando_etapa(self, etapa, conexiones, hilos, duracion):
+        """Construir el comando wrk de una etapa a partir del comando base"""
+        return ajustar_comando_wrk(self.comando_base, hilos=hilos, conexiones=conexiones, duracion=duracion)
+
+    def ejecutar_por_intervalos(self, etapa):
+        """Ejecutar la etapa en tramos cortos para seguir la recuperación en el tiempo"""
+        comando = self.comando_etapa(etapa, etapa['conexiones'], etapa['hilos'], etapa['duracion'])
+        return ejecutar_wrk_por_intervalos(comando, etapa['intervalo'], etapa['duracion'])
+
+    def ejecutar_apertura_escalonada(self, etapa):
+        """Abrir las conexiones en lotes desfasados que terminan a la vez"""
+        config = etapa['apertura_escalonada']
+        lotes = max(1, int(config.get('lotes', 5)))
+        separacion = parsear_duracion(config.get('separacion', '2s'))
+        # El último lote debe disponer de al menos un tercio de la etapa
+        separacion = min(separacion, etapa['duracion'] * 2 / 3 / max(1, lotes - 1))
+
+        tramos = [None] * lotes
+        hilos_lote = max(1, etapa['hilos'] // lotes)
+
+        def ejecutar_lote(indice):
+            desfase = indice * separacion
+            time.sleep(desfase)
+            conexiones = etapa['conexiones'] // lotes + (1 if indice < etapa['conexiones'] % lotes else 0)
+            registro = ejecutar_wrk(self.comando_etapa(etapa, conexiones, hilos_lote, etapa['duracion'] - desfase))
+            registro['desfase'] = desfase
+            tramos[indice] = registro
+
+        hebras = [threading.Thread(target=ejecutar_lote, args=(i,)) for i in range(lotes)]
+        for hebra in hebras:
+            hebra.start()
+        for hebra in hebras:
+            hebra.join()
+        return tramos
+
+def estadisticas_etapa(registro_etapa, analizador):
+    """Parsear los tramos de una etapa y combinarlos en sus estadísticas"""
+    datos_tramos = [analizador.parsear_salida_wrk(t.get('stdout', '')) for t in registro_etapa['tramos']]
+    if len(datos_tramos) == 1:
+        return datos_tramos[0], datos_tramos
+    return resumir_ejecuciones(datos_tramos, concurrentes=registro_etapa.get('concurrente', False)), datos_tramos
+
+def metrica_latencia(datos):
+    """Latencia de referencia para la recuperación: p99 si existe, si no la media"""
+    return datos.get('percentiles', {}).get('p99') or datos.get('latencia_promedio', 0)
+
+def calcular_recuperacion(etapas_analizadas, tolerancia=TOLERANCIA_RECUPERACION):
+    """Calcular el tiempo hasta volver a la línea base después de cada pico"""
+    recuperaciones = []
+    linea_base = None
+    for i, etapa in enumerate(etapas_analizadas):
+        if etapa['tipo'] == 'sostenido':
+            linea_base = etapa
+        if etapa['tipo'] != 'pico':
+            continue
+
+        siguiente = etapas_analizadas[i + 1] if i + 1 < len(etapas_analizadas) else None
+        recuperacion = {'pico': etapa['nombre'], 'tiempo_recuperacion': None, 'recuperado': False}
+        if linea_base is None or siguiente is None or siguiente['tipo'] != 'recuperacion':
+            recuperacion['motivo'] = 'Falta una etapa sostenida antes o una de recuperación después del pico'
+            recuperaciones.append(recuperacion)
+            continue
+
+        latencia_base = metrica_latencia(linea_base['estadisticas'])
+        rps_base = linea_base['estadisticas'].get('rps_reportado', 0)
+        recuperacion.update({
+            'linea_base': linea_base['nombre'],
+            'latencia_base': latencia_base,
+            'rps_base': rps_base,
+            'tolerancia': tolerancia
+        })
+        for tramo, datos in zip(siguiente['tramos'], siguiente['datos_tramos']):
+            if (datos.get('total_requests')
+                    and metrica_latencia(datos) <= latencia_base * (1 + tolerancia)
+                    and datos.get('rps_reportado', 0) >= rps_base * (1 - tolerancia)):
+                recuperacion['tiempo_recuperacion'] = tramo.get('t_fin', 0)
+                recuperacion['recuperado'] = True
+                break
+        if not recuperacion['recuperado']:
+            recuperacion['motivo'] = 'No volvió a la línea base durante la etapa de recuperación'
+        recuperaciones.append(recuperacion)
+    return recuperaciones
+
+def analizar_resultado_perfil(datos_prueba, analizador):
+    """Analizar un resultado con etapas: estadísticas por etapa, resumen principal y recuperación"""
+    etapas_analizadas = []
+    datos_resumen = []
+    for registro_etapa in datos_prueba['etapas']:
+        estadisticas, datos_tramos = estadisticas_etapa(registro_etapa, analizador)
+        etapas_analizadas.append({
+            'nombre': registro_etapa['nombre'],
+            'tipo': registro_etapa['tipo'],
+            'conexiones': registro_etapa['conexiones'],
+            'duracion': registro_etapa['duracion'],
+            'excluir_de_resumen': registro_etapa['excluir_de_resumen'],
+            'estadisticas': estadisticas,
+            'tramos': registro_etapa['tramos'],
+            'datos_tramos': datos_tramos
+        })
+        if not registro_etapa['excluir_de_resumen']:
+            datos_resumen.append(estadisticas)
+
+    # El calentamiento y las etapas excluidas no entran en las cifras principales
+    resumen = resumir_ejecuciones(datos_resumen)
+    return resumen, etapas_analizadas, calcular_recuperacion(etapas_analizadas)
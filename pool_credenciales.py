@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Pool de Credenciales para el Escenario POST Pagos
+Carga o emite N tokens (por defecto tantos como conexiones), reparte una porción distinta a cada
+hilo de wrk, que la rota por request, y los renueva antes de expirar
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from utilidades_wrk import ajustar_comando_wrk, escribir_script_envoltorio, parsear_comando_wrk, parsear_duracion
+
+# Segundos antes del 'exp' en los que un token se reemplaza
+MARGEN_RENOVACION = 120
+# Cada cuántos segundos los hilos de wrk releen el archivo del pool
+RECARGA_LUA = 30
+
+# Cada hilo toma su propia porción del pool (tokens id_hilo, id_hilo + HILOS, ...) y la recorre
+# en turno rotativo por request: wrk no expone la conexión en Lua, así que ninguna conexión
+# conserva un token fijo. Los requests se preformatean por token; el archivo se relee cada
+# RECARGA_SEGUNDOS (comprobado cada 256 requests) sin detener la carga.
+LUA_POOL = """
+local setup_base = setup
+local init_base = init
+local solicitudes = {}
+local indice = 0
+local contador = 0
+local proxima_recarga = 0
+local hilos_creados = 0
+
+function setup(thread)
+    if setup_base then setup_base(thread) end
+    hilos_creados = hilos_creados + 1
+    thread:set("id_hilo", hilos_creados)
+end
+
+local function cargar_tokens()
+    local archivo = io.open(POOL_TOKENS, "r")
+    if not archivo then return nil end
+    local tokens = {}
+    for linea in archivo:lines() do
+        if #linea > 0 then tokens[#tokens + 1] = linea end
+    end
+    archivo:close()
+    return tokens
+end
+
+local function preparar_solicitudes()
+    local tokens = cargar_tokens()
+    if not tokens or #tokens == 0 then return false end
+    local propios = {}
+    for i = id_hilo, #tokens, HILOS do propios[#propios + 1] = tokens[i] end
+    if #propios == 0 then propios[1] = tokens[(id_hilo - 1) % #tokens + 1] end
+
+    local nuevas = {}
+    for _, token in ipairs(propios) do
+        local cabeceras = {}
+        for clave, valor in pairs(wrk.headers) do cabeceras[clave] = valor end
+        cabeceras["Authorization"] = "Bearer " .. token
+        nuevas[#nuevas + 1] = wrk.format(nil, nil, cabeceras)
+    end
+    solicitudes = nuevas
+    return true
+end
+
+function init(args)
+    if init_base then init_base(args) end
+    -- En una recarga posterior se conservan los tokens anteriores; al inicio no hay con qué seguir
+    if not preparar_solicitudes() then error("sin tokens en " .. POOL_TOKENS) end
+    proxima_recarga = os.time() + RECARGA_SEGUNDOS
+end
+
+function request()
+    contador = contador + 1
+    if contador % 256 == 0 and os.time() >= proxima_recarga then
+        preparar_solicitudes()
+        proxima_recarga = os.time() + RECARGA_SEGUNDOS
+    end
+    indice = indice % #solicitudes + 1
+    return solicitudes[indice]
+end
+"""
+
+def expiracion_jwt(token):
+    """Leer el 'exp' de la carga de un JWT sin verificar la firma"""
+    try:
+        carga = token.split('.')[1]
+        datos = json.loads(base64.urlsafe_b64decode(carga + '=' * (-len(carga) % 4)))
+        return float(datos['exp'])
+    except (IndexError, KeyError, ValueError, TypeError):
+        return None
+
+def emitir_token(url_emisor, credenciales=None, timeout=10):
+    """Solicitar un token al emisor; acepta JSON con token/access_token o texto plano"""
+    cuerpo = json.dumps(credenciales or {}).encode()
+    solicitud = urllib.request.Request(url_emisor, data=cuerpo, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(solicitud, timeout=timeout) as respuesta:
+        texto = respuesta.read().decode().strip()
+    try:
+        datos = json.loads(texto)
+    except ValueError:
+        return texto
+    if isinstance(datos, str):
+        return datos
+    for clave in ('token', 'access_token', 'Token', 'accessToken'):
+        if clave in datos:
+            return datos[clave]
+    raise ValueError(f"Respuesta del emisor sin token: {texto[:200]}")
+
+class PoolCredenciales:
+    def __init__(self, archivo_pool, url_emisor=None, credenciales=None, margen=MARGEN_RENOVACION):
+        self.archivo_pool = archivo_pool
+        self.url_emisor = url_emisor
+        self.credenciales = credenciales
+        self.margen = margen
+        self.tokens = []
+        self.renovados = 0
+        self.fallos_renovacion = 0
+        self._detener = threading.Event()
+        self._hebra = None
+
+    def cargar(self, archivo):
+        """Cargar tokens desde un archivo (uno por línea o lista JSON)"""
+        with open(archivo, 'r', encoding='utf-8') as f:
+            contenido = f.read().strip()
+        if contenido.startswith('['):
+            self.tokens = [t.strip() for t in json.loads(contenido) if t.strip()]
+        else:
+            self.tokens = [linea.strip() for linea in contenido.splitlines() if linea.strip()]
+        self.guardar()
+        return self.tokens
+
+    def emitir(self, cantidad, paralelismo=16):
+        """Emitir `cantidad` tokens nuevos en paralelo"""
+        with ThreadPoolExecutor(max_workers=min(paralelismo, cantidad)) as ejecutor:
+            self.tokens = list(ejecutor.map(lambda _: emitir_token(self.url_emisor, self.credenciales),
+                                            range(cantidad)))
+        self.guardar()
+        return self.tokens
+
+    def guardar(self):
+        """Escribir el pool de forma atómica para que wrk nunca lea un archivo a medias"""
+        temporal = f"{self.archivo_pool}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.tokens) + '\n')
+        os.replace(temporal, self.archivo_pool)
+
+    def expiracion_minima(self):
+        expiraciones = [e for e in (expiracion_jwt(t) for t in self.tokens) if e is not None]
+        return min(expiraciones) if expiraciones else None
+
+    def renovar_proximos_a_expirar(self):
+        """Reemplazar los tokens que expiran dentro del margen; devuelve cuántos se renovaron"""
+        limite = time.time() + self.margen
+        pendientes = [i for i, t in enumerate(self.tokens)
+                      if (expiracion_jwt(t) or float('inf')) <= limite]
+        if not pendientes or not self.url_emisor:
+            return 0
+        nuevos = list(self.tokens)
+        with ThreadPoolExecutor(max_workers=min(16, len(pendientes))) as ejecutor:
+            futuros = {i: ejecutor.submit(emitir_token, self.url_emisor, self.credenciales) for i in pendientes}
+            for i, futuro in futuros.items():
+                try:
+                    nuevos[i] = futuro.result()
+                except Exception as e:
+                    self.fallos_renovacion += 1
+                    print(f"⚠️  No se pudo renovar un token: {e}")
+        renovados = sum(1 for i in pendientes if nuevos[i] != self.tokens[i])
+        self.tokens = nuevos
+        self.guardar()
+        self.renovados += renovados
+        return renovados
+
+    def iniciar_renovacion(self, intervalo=10):
+        """Renovar tokens en segundo plano mientras corre la carga"""
+        def ciclo():
+            while not self._detener.wait(intervalo):
+                cantidad = self.renovar_proximos_a_expirar()
+                if cantidad:
+                    print(f"🔑 {cantidad} tokens renovados antes de expirar")
+
+        self._hebra = threading.Thread(target=ciclo, daemon=True)
+        self._hebra.start()
+
+    def detener_renovacion(self):
+        self._detener.set()
+        if self._hebra:
+            self._hebra.join()
+
+    def preparar_script(self, comando):
+        """Generar el script Lua con el pool y devolver el comando wrk que lo usa"""
+        opciones = parsear_comando_wrk(comando)
+        base = opciones['script'].rsplit('.', 1)[0]
+        script = escribir_script_envoltorio(
+            opciones['script'], f"{base}_pool", LUA_POOL,
+            globales={
+                'POOL_TOKENS': os.path.abspath(self.archivo_pool),
+                'HILOS': opciones['hilos'] or 1,
+                'RECARGA_SEGUNDOS': RECARGA_LUA
+            }
+        )
+        return ajustar_comando_wrk(comando, script=script)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta el escenario POST pagos con un pool de tokens rotados por hilo'
+    )
+    parser.add_argument('--tokens', type=int,
+                        help='Cantidad de tokens a emitir (por defecto una por conexión del comando)')
+    parser.add_argument('--archivo-tokens', help='Cargar tokens existentes (uno por línea o lista JSON)')
+    parser.add_argument('--emisor', help='URL que emite tokens (POST); con --simulado se usa el emisor local')
+    parser.add_argument('--credenciales', help='Archivo JSON con el cuerpo enviado al emisor')
+    parser.add_argument('--simulado', action='store_true',
+                        help='Usar el servidor simulado local como emisor y destino (pruebas sin conexión)')
+    parser.add_argument('--ttl-simulado', type=int, default=300, help='Vida de los tokens del emisor simulado')
+    parser.add_argument('--duracion', help='Duración de la prueba (por defecto la del escenario)')
+    parser.add_argument('--conexiones', type=int, help='Conexiones concurrentes (por defecto las del escenario)')
+    parser.add_argument('--pool', default='pool_tokens.txt', help='Archivo del pool que leen los hilos de wrk')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+
+    from ejecutar_pruebas_carga import EjecutorPruebasCarga
+    ejecutor = EjecutorPruebasCarga()
+    info = dict(ejecutor.comandos_disponibles['post'])
+    duracion = parsear_duracion(args.duracion) if args.duracion else None
+    comando = ajustar_comando_wrk(info['comando'], duracion=duracion, conexiones=args.conexiones)
+
+    servidor = None
+    url_emisor = args.emisor
+    if args.simulado:
+        from servidor_simulado import ServidorSimulado
+        servidor = ServidorSimulado(ttl_token=args.ttl_simulado).iniciar()
+        url_emisor = url_emisor or f"{servidor.url}/token"
+        comando = ajustar_comando_wrk(comando, url=f"{servidor.url}/api/pagos/ProcessMessage")
+        print(f"🧪 Servidor simulado en {servidor.url}")
+
+    credenciales = None
+    if args.credenciales:
+        with open(args.credenciales, 'r', encoding='utf-8') as f:
+            credenciales = json.load(f)
+
+    pool = PoolCredenciales(args.pool, url_emisor, credenciales)
+    try:
+        if args.archivo_tokens:
+            pool.cargar(args.archivo_tokens)
+        elif url_emisor:
+            cantidad = args.tokens or parsear_comando_wrk(comando)['conexiones'] or 1
+            print(f"🔑 Emitiendo {cantidad} tokens desde {url_emisor}...")
+            pool.emitir(cantidad)
+        else:
+            parser.error("Indica --archivo-tokens, --emisor o --simulado")
+        error = None if pool.tokens else "el pool no tiene tokens; wrk no tendría credenciales que enviar"
+    except (OSError, ValueError) as e:
+        error = f"no se pudo preparar el pool: {e}"
+    if error:
+        if servidor:
+            servidor.detener()
+        print(f"❌ ERROR: {error}")
+        sys.exit(1)
+
+    expiracion = pool.expiracion_minima()
+    print(f"🔑 Pool listo: {len(pool.tokens)} tokens"
+          + (f", el primero expira en {expiracion - time.time():.0f}s" if expiracion else ""))
+    opciones = parsear_comando_wrk(comando)
+    if len(pool.tokens) < (opciones['hilos'] or 1):
+        print("⚠️  Hay menos tokens que hilos: algunos hilos compartirán token")
+    elif len(pool.tokens) < (opciones['conexiones'] or 1):
+        print(f"⚠️  Hay menos tokens ({len(pool.tokens)}) que conexiones ({opciones['conexiones']}): "
+              f"cada token se repite en varias conexiones a la vez")
+
+    info['comando'] = pool.preparar_script(comando)
+    if url_emisor:
+        pool.iniciar_renovacion()
+    try:
+        ejecutor.ejecutar_comando_wrk('POST_pagos_pool', info)
+    finally:
+        pool.detener_renovacion()
+        if servidor:
+            servidor.detener()
+
+    ejecutor.resultados['POST_pagos_pool'].update({
+        'tokens_pool': len(pool.tokens),
+        'tokens_renovados': pool.renovados,
+        'fallos_renovacion': pool.fallos_renovacion
+    })
+    archivo = ejecutor.guardar_resultados()
+    print(f"🔑 Tokens renovados durante la prueba: {pool.renovados} (fallos: {pool.fallos_renovacion})")
+    print(f"\nPara generar el dashboard ejecuta: python3 generar_reporte_html.py  ({archivo})")
+
+if __name__ == "__main__":
+    main()
@@ -21,31 +21,25 @@ wrk.headers = {
 }
 
 
--- Metrics collection
-local responses = {}
-local status_codes = {}
-local errors = {}
+-- Shared JSON summary helpers, loaded from this script's directory
+local script_dir = debug.getinfo(1, "S").source:match("^@(.*[/\\])") or ""
+dofile(script_dir .. "json_summary.lua")
 
-function init(args)
-    responses = {}
-    status_codes = {}
-    errors = {}
+-- Metrics collection (global: done() merges every thread's table via thread:get)
+status_codes = {}
+
+function setup(thread)
+    track_thread(thread)
 end
 
-function response(status, headers, body)
-    if status_codes[status] == nil then
-        status_codes[status] = 0
-    end
-    status_codes[status] = status_codes[status] + 1
-    
-    table.insert(responses, {
-        status = status,
-        size = string.len(body),
-        timestamp = os.time()
-    })
+function init(args)
+    status_codes = {}
+    configure_collection(args)
 end
 
 function done(summary, latency, requests)
+    local merged_status_codes = merge_status_codes(summary)
+
     print("=== POST PAGOS RESULTS ===")
     print(string.format("Requests: %d", summary.requests))
     print(string.format("Duration: %.2fs", summary.duration / 1000000))
@@ -54,7 +48,7 @@ function done(summary, latency, requests)
     print(string.format("RPS: %.2f", summary.requests / (summary.duration / 1000000)))
     
     print("\nStatus Code Distribution:")
-    for status, count in pairs(status_codes) do
+    for status, count in pairs(merged_status_codes) do
         print(string.format("  %d: %d requests", status, count))
     end
     
@@ -67,4 +61,7 @@ function done(summary, latency, requests)
     print(string.format("  95th: %.2f", latency:percentile(95) / 1000))
     print(string.format("  99th: %.2f", latency:percentile(99) / 1000))
     print("=== END POST PAGOS ===")
+
+    print_json_summary({name = "POST PAGOS", script = "post_pagos_enhanced.lua"},
+                       summary, latency, requests, merged_status_codes)
 end
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Proxy de Emulación WAN
+Proxy TCP local entre wrk y el destino que agrega latencia, jitter, límite de ancho de banda
+y bloqueos tipo pérdida de paquetes a cada conexión, sin root ni `tc`. Con --medir publica
+el throughput del propio proxy para confirmar que no es el cuello de botella
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from calibrar_generador import ServidorLoopback
+from utilidades_wrk import construir_comando_wrk, ejecutar_wrk, parsear_duracion
+
+TAMANO_LECTURA = 16384
+# Fragmentos en vuelo por sentido antes de dejar de leer (contrapresión hacia el emisor)
+FRAGMENTOS_EN_VUELO = 64
+# Bloqueo por defecto de una "pérdida": el RTO mínimo de TCP en Linux
+BLOQUEO_PERDIDA_MS = 200
+
+# asyncio guarda solo referencias débiles a las tareas; una conexión cuyo cliente ya cerró no debe recolectarse a medias
+_CONEXIONES_ACTIVAS = set()
+
+# Condiciones típicas de red; la latencia es la que se suma al RTT y el ancho de banda es por conexión y sentido
+PERFILES_RED = {
+    '3g': {'latencia': 200, 'jitter': 50, 'ancho_banda': '1m', 'perdida': 0.01},
+    '4g': {'latencia': 60, 'jitter': 15, 'ancho_banda': '10m', 'perdida': 0.002},
+    'movil_malo': {'latencia': 400, 'jitter': 150, 'ancho_banda': '256k', 'perdida': 0.03},
+    'wifi': {'latencia': 20, 'jitter': 5, 'ancho_banda': '30m', 'perdida': 0.0}
+}
+
+def parsear_ancho_banda(texto):
+    """Convertir '512k', '2m', '1g' o un número (bits/s) a bytes por segundo; None o 0 = sin límite"""
+    if texto in (None, '', 0, '0'):
+        return None
+    match = re.fullmatch(r'([\d.]+)\s*([kmg])?(?:bit|bps|b)?(?:/s)?', str(texto).strip().lower())
+    if not match:
+        raise ValueError(f"Ancho de banda no válido: {texto}")
+    factores = {None: 1, 'k': 1e3, 'm': 1e6, 'g': 1e9}
+    return float(match.group(1)) * factores[match.group(2)] / 8
+
+def crear_condiciones(latencia=0, jitter=0, ancho_banda=None, perdida=0.0, bloqueo=BLOQUEO_PERDIDA_MS, perfil=None):
+    """Condiciones de red a partir de un perfil de PERFILES_RED y valores explícitos que lo reemplazan"""
+    base = dict(PERFILES_RED[perfil]) if perfil else {}
+    condiciones = {
+        'latencia': latencia if latencia else base.get('latencia', 0),
+        'jitter': jitter if jitter else base.get('jitter', 0),
+        'ancho_banda': ancho_banda if ancho_banda else base.get('ancho_banda'),
+        'perdida': perdida if perdida else base.get('perdida', 0.0),
+        'bloqueo': bloqueo
+    }
+    if condiciones['latencia'] < 0 or condiciones['jitter'] < 0 or condiciones['bloqueo'] < 0:
+        raise ValueError("La latencia, el jitter y el bloqueo no pueden ser negativos")
+    if not 0 <= condiciones['perdida'] < 1:
+        raise ValueError("La pérdida debe estar entre 0 y 1")
+    parsear_ancho_banda(condiciones['ancho_banda'])
+    return condiciones
+
+def describir_condiciones(condiciones):
+    partes = [f"+{condiciones['latencia']:g}ms RTT"]
+    if condiciones['jitter']:
+        partes.append(f"±{condiciones['jitter']:g}ms jitter")
+    if condiciones['ancho_banda']:
+        partes.append(f"{condiciones['ancho_banda']}bit/s por sentido")
+    if condiciones['perdida']:
+        partes.append(f"{condiciones['perdida']:.1%} bloqueos de {condiciones['bloqueo']:g}ms")
+    return ', '.join(partes)
+
+class SentidoWAN:
+    """Un sentido de una conexión: los fragmentos salen en orden, cada uno con su retardo y su turno de envío"""
+
+    def __init__(self, condiciones, rng):
+        self.retardo = condiciones['latencia'] / 2000
+        self.jitter = condiciones['jitter'] / 2000
+        self.bytes_por_segundo = parsear_ancho_banda(condiciones['ancho_banda'])
+        self.perdida = condiciones['perdida']
+        self.bloqueo = condiciones['bloqueo'] / 1000
+        self.rng = rng
+        self.ultima_entrega = 0.0
+
+    def momento_entrega(self, ahora):
+        """Instante de entrega de un fragmento leído ahora; TCP entrega en orden, así que nunca antes del anterior"""
+        retardo = self.retardo
+        if self.jitter:
+            retardo = max(0.0, retardo + self.rng.uniform(-self.jitter, self.jitter))
+        if self.perdida and self.rng.random() < self.perdida:
+            # Un segmento perdido retiene todo lo que viene detrás hasta la retransmisión
+            retardo += self.bloqueo
+        self.ultima_entrega = max(self.ultima_entrega, ahora + retardo)
+        return self.ultima_entrega
+
+async def _leer_sentido(lector, cola, sentido, reloj):
+    try:
+        while True:
+            datos = await lector.read(TAMANO_LECTURA)
+            if not datos:
+                break
+            await cola.put((sentido.momento_entrega(reloj()), datos))
+    except (ConnectionError, OSError):
+        pass
+    await cola.put(None)
+
+async def _escribir_sentido(escritor, cola, sentido, reloj):
+    libre = 0.0
+    while True:
+        elemento = await cola.get()
+        if elemento is None:
+            break
+        entrega, datos = elemento
+        if sentido.bytes_por_segundo:
+            # El enlace transmite un fragmento detrás de otro a la tasa configurada
+            libre = max(libre, entrega) + len(datos) / sentido.bytes_por_segundo
+            entrega = libre
+        espera = entrega - reloj()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        escritor.write(datos)
+        await escritor.drain()
+    if escritor.can_write_eof():
+        escritor.write_eof()
+
+async def _atender_conexion(lector_cliente, escritor_cliente, destino, condiciones):
+    reloj = asyncio.get_running_loop().time
+    _CONEXIONES_ACTIVAS.add(asyncio.current_task())
+    try:
+        if condiciones['latencia']:
+            # El handshake TCP también cruza la WAN: una ida y vuelta antes del primer byte
+            await asyncio.sleep(condiciones['latencia'] / 1000)
+        lector_destino, escritor_destino = await asyncio.open_connection(*destino)
+    except OSError:
+        _CONEXIONES_ACTIVAS.discard(asyncio.current_task())
+        escritor_cliente.close()
+        return
+    rng = random.Random()
+    subida, bajada = SentidoWAN(condiciones, rng), SentidoWAN(condiciones, rng)
+    cola_subida = asyncio.Queue(FRAGMENTOS_EN_VUELO)
+    cola_bajada = asyncio.Queue(FRAGMENTOS_EN_VUELO)
+    tareas = [
+        asyncio.create_task(_leer_sentido(lector_cliente, cola_subida, subida, reloj)),
+        asyncio.create_task(_escribir_sentido(escritor_destino, cola_subida, subida, reloj)),
+        asyncio.create_task(_leer_sentido(lector_destino, cola_bajada, bajada, reloj)),
+        asyncio.create_task(_escribir_sentido(escritor_cliente, cola_bajada, bajada, reloj))
+    ]
+    try:
+        # Si un sentido falla al escribir, la conexión completa se cierra
+        await asyncio.gather(*tareas)
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        escritor_cliente.close()
+        escritor_destino.close()
+        _CONEXIONES_ACTIVAS.discard(asyncio.current_task())
+
+def _proceso_proxy(conexion, destino, condiciones):
+    async def servir():
+        servidor = await asyncio.start_server(
+            lambda lector, escritor: _atender_conexion(lector, escritor, destino, condiciones),
+            sock=conexion, backlog=4096)
+        async with servidor:
+            await servidor.serve_forever()
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+class ProxyWAN:
+    """Proxy TCP con condiciones WAN, repartido en varios procesos sobre el mismo socket"""
+
+    def __init__(self, destino, condiciones, procesos=None, host='127.0.0.1', puerto=0):
+        partes = urlsplit(destino if '://' in destino else f"tcp://{destino}")
+        self.destino = (partes.hostname, partes.port or (443 if partes.scheme == 'https' else 80))
+        self.esquema = partes.scheme if partes.scheme in ('http', 'https') else 'http'
+        self.condiciones = condiciones
+        self.procesos = procesos or os.cpu_count() or 1
+        self.conexion = socket.create_server((host, puerto), backlog=4096)
+        self.hijos = []
+
+    @property
+    def url(self):
+        host, puerto = self.conexion.getsockname()[:2]
+        return f"{self.esquema}://{host}:{puerto}"
+
+    def iniciar(self):
+        contexto = multiprocessing.get_context('fork')
+        for _ in range(self.procesos):
+            hijo = contexto.Process(target=_proceso_proxy, args=(self.conexion, self.destino, self.condiciones),
+                                    daemon=True)
+            hijo.start()
+            self.hijos.append(hijo)
+        return self
+
+    def detener(self):
+        for hijo in self.hijos:
+            hijo.terminate()
+        for hijo in self.hijos:
+            hijo.join()
+        self.conexion.close()
+
+def _proceso_sumidero(conexion):
+    async def descartar(lector, escritor):
+        try:
+            while await lector.read(262144):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        escritor.close()
+
+    async def servir():
+        servidor = await asyncio.start_server(descartar, sock=conexion, backlog=4096)
+        async with servidor:
+            await servidor.serve_forever()
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+async def _enviar_volumen(host, puerto, conexiones, megabytes):
+    """Empujar `megabytes` repartidos en varias conexiones y esperar a que el sumidero cierre cada una"""
+    bloque = b'\0' * 65536
+    por_conexion = max(1, int(megabytes * 16 / conexiones))
+
+    async def una_conexion():
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        for _ in range(por_conexion):
+            escritor.write(bloque)
+            await escritor.drain()
+        escritor.write_eof()
+        await lector.read()
+        escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una_conexion() for _ in range(conexiones)))
+    return por_conexion * conexiones * len(bloque) / (time.perf_counter() - inicio) / 1e6
+
+async def _medir_ida_vuelta(host, puerto, repeticiones):
+    """Tiempos de ida y vuelta (ms) de un request pequeño sobre una conexión keep-alive"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    request = b"GET / HTTP/1.1\r\nHost: loopback\r\n\r\n"
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        escritor.write(request)
+        await escritor.drain()
+        await lector.readuntil(b"\r\n\r\n")
+        await lector.readexactly(15)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    escritor.close()
+    return tiempos
+
+def medir_rps_wrk(url, hilos, conexiones, duracion):
+    """RPS y latencia p50 de wrk contra una URL; None si wrk no está disponible"""
+    from generar_reporte_html import AnalizadorHTML
+    if not shutil.which('wrk'):
+        return None
+    registro = ejecutar_wrk(construir_comando_wrk(hilos, conexiones, duracion, url, extra=['--latency']))
+    if 'error' in registro or registro.get('return_code'):
+        raise RuntimeError(registro.get('error') or registro.get('stderr', '').strip()
+                           or f"wrk terminó con código {registro['return_code']}")
+    datos = AnalizadorHTML().parsear_salida_wrk(registro['stdout'])
+    return {
+        'rps': datos.get('rps_reportado') or datos.get('rps', 0),
+        'latencia_p50': datos.get('percentiles', {}).get('p50', datos.get('latencia_promedio', 0))
+    }
+
+def medir_proxy(condiciones, procesos, hilos=2, conexiones=64, duracion=5, megabytes=512, repeticiones=200):
+    """Throughput del proxy sin condiciones (RPS con wrk y MB/s) y precisión de la latencia configurada"""
+    resultado = {'timestamp': datetime.now().isoformat(), 'procesos': procesos, 'condiciones': condiciones}
+
+    destino = ServidorLoopback(procesos).iniciar()
+    proxy = ProxyWAN(destino.url, crear_condiciones(), procesos).iniciar()
+    try:
+        directo = medir_rps_wrk(destino.url, hilos, conexiones, duracion)
+        if directo:
+            via_proxy = medir_rps_wrk(proxy.url, hilos, conexiones, duracion)
+            resultado['wrk'] = {
+                'hilos': hilos, 'conexiones': conexiones, 'duracion': duracion,
+                'directo': directo, 'proxy': via_proxy,
+                'fraccion_rps': via_proxy['rps'] / directo['rps'] if directo['rps'] else None
+            }
+    finally:
+        proxy.detener()
+
+    proxy = ProxyWAN(destino.url, condiciones, procesos).iniciar()
+    try:
+        directo = asyncio.run(_medir_ida_vuelta(*proxy.destino, repeticiones))
+        via_proxy = asyncio.run(_medir_ida_vuelta(*proxy.conexion.getsockname()[:2], repeticiones))
+        resultado['ida_vuelta'] = {
+            'repeticiones': repeticiones,
+            'directo_p50': statistics.median(directo),
+            'proxy_p50': statistics.median(via_proxy),
+            'agregada_p50': statistics.median(via_proxy) - statistics.median(directo),
+            'configurada': condiciones['latencia']
+        }
+    finally:
+        proxy.detener()
+        destino.detener()
+
+    sumidero = socket.create_server(('127.0.0.1', 0), backlog=4096)
+    hijo = multiprocessing.get_context('fork').Process(target=_proceso_sumidero, args=(sumidero,), daemon=True)
+    hijo.start()
+    proxy = ProxyWAN(f"tcp://127.0.0.1:{sumidero.getsockname()[1]}", crear_condiciones(), procesos).iniciar()
+    try:
+        conexiones_volumen = max(4, procesos * 4)
+        resultado['volumen'] = {
+            'megabytes': megabytes,
+            'conexiones': conexiones_volumen,
+            'directo_mb_s': asyncio.run(_enviar_volumen(*sumidero.getsockname()[:2], conexiones_volumen, megabytes)),
+            'proxy_mb_s': asyncio.run(_enviar_volumen(*proxy.conexion.getsockname()[:2], conexiones_volumen, megabytes))
+        }
+    finally:
+        proxy.detener()
+        hijo.terminate()
+        hijo.join()
+        sumidero.close()
+    return resultado
+
+def mostrar_medicion(resultado):
+    print(f"\n{'='*64}")
+    print(f"📶 THROUGHPUT DEL PROXY WAN ({resultado['procesos']} procesos)")
+    print(f"{'='*64}")
+    wrk = resultado.get('wrk')
+    if wrk:
+        print(f"wrk -t{wrk['hilos']} -c{wrk['conexiones']}: directo {wrk['directo']['rps']:,.0f} RPS "
+              f"(p50 {wrk['directo']['latencia_p50']:.2f}ms) | proxy {wrk['proxy']['rps']:,.0f} RPS "
+              f"(p50 {wrk['proxy']['latencia_p50']:.2f}ms) → {wrk['fraccion_rps']:.0%} del directo")
+    else:
+        print("wrk no está disponible: se omite la medición de RPS")
+    volumen = resultado['volumen']
+    print(f"Volumen ({volumen['megabytes']} MB, {volumen['conexiones']} conexiones): "
+          f"directo {volumen['directo_mb_s']:,.0f} MB/s | proxy {volumen['proxy_mb_s']:,.0f} MB/s")
+    ida_vuelta = resultado['ida_vuelta']
+    print(f"Ida y vuelta p50: directo {ida_vuelta['directo_p50']:.2f}ms | proxy {ida_vuelta['proxy_p50']:.2f}ms "
+          f"(agregada {ida_vuelta['agregada_p50']:.2f}ms, configurada {ida_vuelta['configurada']:g}ms)")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Proxy TCP local que emula una red WAN (latencia, jitter, ancho de banda, bloqueos) para wrk'
+    )
+    parser.add_argument('destino', nargs='?', help='URL base o host:puerto del destino real')
+    parser.add_argument('--perfil', choices=list(PERFILES_RED), help='Condiciones de red predefinidas')
+    parser.add_argument('--latencia', type=float, default=0, help='Milisegundos agregados al RTT')
+    parser.add_argument('--jitter', type=float, default=0, help='Variación del RTT en milisegundos (±)')
+    parser.add_argument('--ancho-banda', help="Límite por conexión y sentido en bits/s (p. ej. '512k', '2m')")
+    parser.add_argument('--perdida', type=float, default=0, help='Probabilidad de bloqueo por fragmento (0-1)')
+    parser.add_argument('--bloqueo', type=float, default=BLOQUEO_PERDIDA_MS,
+                        help='Duración de cada bloqueo en milisegundos')
+    parser.add_argument('--puerto', type=int, default=8099, help='Puerto local del proxy')
+    parser.add_argument('--host', default='127.0.0.1', help='Interfaz local del proxy')
+    parser.add_argument('--procesos', type=int, help='Procesos del proxy (por defecto uno por CPU)')
+    parser.add_argument('--medir', action='store_true', help='Medir el throughput del proxy en esta máquina y salir')
+    parser.add_argument('--duracion', default='5s', help='Duración de cada medición con wrk (--medir)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    try:
+        condiciones = crear_condiciones(args.latencia, args.jitter, args.ancho_banda, args.perdida, args.bloqueo,
+                                        args.perfil)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    procesos = args.procesos or os.cpu_count() or 1
+
+    if args.medir:
+        print(f"📶 Midiendo el proxy con {procesos} procesos ({describir_condiciones(condiciones)})...")
+        resultado = medir_proxy(condiciones, procesos, duracion=parsear_duracion(args.duracion))
+        mostrar_medicion(resultado)
+        archivo = f"proxy_wan_medicion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Medición guardada en: {archivo}")
+        return
+
+    if not args.destino:
+        parser.error("Indica el destino (o --medir)")
+    proxy = ProxyWAN(args.destino, condiciones, procesos, args.host, args.puerto).iniciar()
+    print(f"📶 Proxy WAN en {proxy.url} → {proxy.destino[0]}:{proxy.destino[1]} ({procesos} procesos)")
+    print(f"   Condiciones: {describir_condiciones(condiciones)}")
+    print(f"   Ejemplo: wrk -t4 -c100 -d30s -H 'Host: {proxy.destino[0]}' {proxy.url}/gateway/user/verify/number")
+    print("   Ctrl+C para detener")
+    try:
+        for hijo in proxy.hijos:
+            hijo.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Proxy detenido")
+    finally:
+        proxy.detener()
+
+if __name__ == "__main__":
+    main()
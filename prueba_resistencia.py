@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Pruebas de Resistencia (Soak) por Segmentos
+Ejecuta segmentos consecutivos de wrk, guarda cada uno en disco al terminar y permite reanudar
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from estadisticas import resumir_ejecuciones
+from utilidades_wrk import agregar_opcion_wrk, ajustar_comando_wrk, ejecutar_wrk, parsear_duracion
+
+# Métricas de cada segmento que se guardan en el checkpoint (la salida cruda no se conserva)
+METRICAS_SEGMENTO = [
+    'total_requests', 'duracion', 'rps_reportado', 'latencia_promedio', 'latencia_stdev',
+    'latencia_max', 'percentiles', 'errores', 'total_errores', 'codigos_estado'
+]
+
+# Métricas para las que se calcula la deriva a lo largo de la prueba
+METRICAS_DERIVA = {
+    'p99': 'P99 (ms)',
+    'latencia_promedio': 'Latencia Prom (ms)',
+    'rps_reportado': 'RPS',
+    'total_errores': 'Errores'
+}
+
+def leer_checkpoint(archivo):
+    """Leer cabecera y segmentos completos; descarta una última línea a medio escribir"""
+    cabecera = None
+    segmentos = 0
+    transcurrido = 0.0
+    bytes_validos = 0
+    with open(archivo, 'rb') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                break
+            if not linea.endswith(b'\n'):
+                break
+            bytes_validos += len(linea)
+            if registro.get('tipo') == 'cabecera':
+                cabecera = registro
+            elif registro.get('tipo') == 'segmento':
+                segmentos = registro['indice'] + 1
+                transcurrido = registro['t_fin']
+    if cabecera is None:
+        raise ValueError(f"{archivo} no es un checkpoint de prueba de resistencia")
+    return cabecera, segmentos, transcurrido, bytes_validos
+
+def iterar_segmentos(archivo):
+    """Recorrer los segmentos guardados sin cargar el archivo completo en memoria"""
+    with open(archivo, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+            if registro.get('tipo') == 'segmento':
+                yield registro
+
+class PruebaResistencia:
+    def __init__(self, archivo_checkpoint):
+        self.archivo_checkpoint = archivo_checkpoint
+        self.cabecera, self.segmentos_completos, self.transcurrido, bytes_validos = \
+            leer_checkpoint(archivo_checkpoint)
+
+        # Eliminar una línea parcial que haya dejado una interrupción brusca
+        if os.path.getsize(archivo_checkpoint) != bytes_validos:
+            with open(archivo_checkpoint, 'r+b') as f:
+                f.truncate(bytes_validos)
+
+    @classmethod
+    def crear(cls, nombre_prueba, comando, duracion_total, duracion_segmento):
+        """Crear un checkpoint nuevo con la configuración de la prueba"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archivo = f"resistencia_{nombre_prueba}_{timestamp}.jsonl"
+        cabecera = {
+            'tipo': 'cabecera',
+            'nombre_prueba': nombre_prueba,
+            # --latency hace que wrk reporte percentiles; sin ellos no hay deriva de p99
+            'comando': agregar_opcion_wrk(comando, '--latency'),
+            'duracion_total': duracion_total,
+            'duracion_segmento': duracion_segmento,
+            'inicio': datetime.now().isoformat()
+        }
+        with open(archivo, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(cabecera, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(archivo)
+
+    def guardar_segmento(self, registro):
+        """Agregar un segmento al checkpoint y forzarlo a disco"""
+        with open(self.archivo_checkpoint, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def ejecutar(self):
+        """Ejecutar los segmentos pendientes uno tras otro"""
+        from generar_reporte_html import AnalizadorHTML
+        analizador = AnalizadorHTML()
+
+        duracion_total = self.cabecera['duracion_total']
+        duracion_segmento = self.cabecera['duracion_segmento']
+        if self.segmentos_completos:
+            print(f"♻️  Reanudando desde el segmento {self.segmentos_completos + 1} "
+                  f"({self.transcurrido / 3600:.2f}h de {duracion_total / 3600:.2f}h completadas)")
+
+        while self.transcurrido < duracion_total:
+            indice = self.segmentos_completos
+            duracion = min(duracion_segmento, duracion_total - self.transcurrido)
+            comando = ajustar_comando_wrk(self.cabecera['comando'], duracion=duracion)
+            print(f"\n🔄 Segmento {indice + 1}: {self.transcurrido / 3600:.2f}h → "
+                  f"{(self.transcurrido + duracion) / 3600:.2f}h")
+
+            resultado = ejecutar_wrk(comando)
+            datos = analizador.parsear_salida_wrk(resultado.get('stdout', ''))
+            registro = {
+                'tipo': 'segmento',
+                'indice': indice,
+                't_inicio': self.transcurrido,
+                't_fin': self.transcurrido + duracion,
+                'timestamp': resultado['timestamp'],
+                'return_code': resultado.get('return_code'),
+                'metricas': {k: datos[k] for k in METRICAS_SEGMENTO if k in datos}
+            }
+            if 'error' in resultado:
+                registro['error'] = resultado['error']
+                print(f"  ❌ {resultado['error']}")
+            else:
+                print(f"  📈 RPS {datos.get('rps_reportado', 0):.1f} | "
+                      f"P99 {datos.get('percentiles', {}).get('p99', 0):.1f}ms | "
+                      f"Errores {datos.get('total_errores', 0):,}")
+            self.guardar_segmento(registro)
+
+            self.segmentos_completos += 1
+            self.transcurrido += duracion
+
+        print(f"\n✅ Prueba de resistencia completada: {self.segmentos_completos} segmentos")
+        print(f"💾 Checkpoint: {self.archivo_checkpoint}")
+        return self.archivo_checkpoint
+
+def calcular_deriva(archivo):
+    """Calcular series por segmento y la pendiente por hora de cada métrica"""
+    import numpy as np
+
+    horas = []
+    series = {clave: [] for clave in METRICAS_DERIVA}
+    metricas = []
+    for segmento in iterar_segmentos(archivo):
+        datos = segmento['metricas']
+        if not datos.get('total_requests'):
+            continue
+        horas.append(segmento['t_fin'] / 3600)
+        series['p99'].append(datos.get('percentiles', {}).get('p99', 0))
+        for clave in ('latencia_promedio', 'rps_reportado', 'total_errores'):
+            series[clave].append(datos.get(clave, 0))
+        metricas.append(datos)
+
+    deriva = {}
+    for clave, valores in series.items():
+        if len(valores) < 3:
+            continue
+        pendiente, ordenada = np.polyfit(horas, valores, 1)
+        media = float(np.mean(valores))
+        deriva[clave] = {
+            'pendiente_por_hora': float(pendiente),
+            'ordenada': float(ordenada),
+            'cambio_relativo_por_hora': float(pendiente / media) if media else 0.0
+        }
+    return horas, series, deriva, metricas
+
+def generar_dashboard_resistencia(archivo):
+    """Generar el dashboard de una prueba de resistencia con la deriva entre segmentos"""
+    from generar_reporte_html import AnalizadorHTML
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    cabecera = leer_checkpoint(archivo)[0]
+    horas, series, deriva, metricas = calcular_deriva(archivo)
+    if not metricas:
+        print("No hay segmentos con datos en el checkpoint.")
+        return None
+
+    analizador = AnalizadorHTML()
+    nombre = f"resistencia_{cabecera['nombre_prueba']}"
+    analizador.datos_parseados[nombre] = resumir_ejecuciones(metricas)
+
+    fig = make_subplots(rows=2, cols=2, subplot_titles=list(METRICAS_DERIVA.values()))
+    for posicion, (clave, titulo) in enumerate(METRICAS_DERIVA.items()):
+        fila, columna = posicion // 2 + 1, posicion % 2 + 1
+        fig.add_trace(go.Scatter(x=horas, y=series[clave], mode='lines+markers', name=titulo,
+                                 marker_color='#4ECDC4'), row=fila, col=columna)
+        if clave in deriva:
+            tendencia = [deriva[clave]['ordenada'] + deriva[clave]['pendiente_por_hora'] * h for h in horas]
+            fig.add_trace(go.Scatter(x=horas, y=tendencia, mode='lines', name=f"Tendencia {titulo}",
+                                     line=dict(dash='dash', color='#FF6B6B')), row=fila, col=columna)
+        fig.update_xaxes(title_text='Horas', row=fila, col=columna)
+    fig.update_layout(height=700, title_text='Deriva entre Segmentos', title_x=0.5, showlegend=False)
+
+    filas = ''.join(
+        f"<tr><td>{METRICAS_DERIVA[clave]}</td><td>{valores['pendiente_por_hora']:+.3f}</td>"
+        f"<td>{valores['cambio_relativo_por_hora']:+.2%}</td></tr>"
+        for clave, valores in deriva.items()
+    )
+    tabla = (
+        "<table class=\"tabla-etapas\"><tr><th>Métrica</th><th>Pendiente por hora</th>"
+        "<th>Cambio relativo por hora</th></tr>" + filas + "</table>"
+        f"<p>{len(horas)} segmentos de {cabecera['duracion_segmento']:.0f}s · "
+        f"{horas[-1]:.2f}h de {cabecera['duracion_total'] / 3600:.2f}h</p>"
+    )
+    analizador.agregar_seccion('📉 Deriva de la Prueba de Resistencia',
+                               tabla + fig.to_html(full_html=False, include_plotlyjs=False))
+    return analizador.generar_reporte_html(prefijo='dashboard_resistencia')
+
+def main():
+    parser = argparse.ArgumentParser(description='Pruebas de resistencia (soak) por segmentos con checkpoint')
+    parser.add_argument('tipo', nargs='?', choices=['get', 'post'], help='Prueba a ejecutar')
+    parser.add_argument('--duracion', default='6h', help='Duración total (p. ej. 6h, 24h)')
+    parser.add_argument('--segmento', default='5m', help='Duración de cada segmento de wrk')
+    parser.add_argument('--reanudar', metavar='ARCHIVO', help='Reanudar desde un checkpoint .jsonl')
+    parser.add_argument('--dashboard', metavar='ARCHIVO', help='Solo generar el dashboard de un checkpoint')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+
+    if args.dashboard:
+        generar_dashboard_resistencia(args.dashboard)
+        return
+
+    if args.reanudar:
+        prueba = PruebaResistencia(args.reanudar)
+    elif args.tipo:
+        from ejecutar_pruebas_carga import EjecutorPruebasCarga
+        info = EjecutorPruebasCarga().comandos_disponibles[args.tipo]
+        prueba = PruebaResistencia.crear(
+            f"{args.tipo}_test", info['comando'],
+            parsear_duracion(args.duracion), parsear_duracion(args.segmento)
+        )
+    else:
+        parser.error("Indica el tipo de prueba o --reanudar ARCHIVO")
+
+    print("="*60)
+    print("⏳ PRUEBA DE RESISTENCIA")
+    print(f"📁 Checkpoint: {prueba.archivo_checkpoint}")
+    print("="*60)
+    try:
+        prueba.ejecutar()
+    except KeyboardInterrupt:
+        print(f"\n⚠️  Interrumpida. Reanuda con: python3 prueba_resistencia.py --reanudar {prueba.archivo_checkpoint}")
+        sys.exit(130)
+
+    generar_dashboard_resistencia(prueba.archivo_checkpoint)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Recorridos de Usuario
+Escenarios de varios pasos (p. ej. verificar el número y luego pagar) con estado por sesión:
+cada sesión es una máquina de estados con su propia conexión keep-alive, tiempos de
+espera entre pasos y variables extraídas de las respuestas anteriores. Reporta la
+latencia por paso y los recorridos completados por segundo
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import ssl
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from string import Template
+from urllib.parse import urlsplit
+
+from comparar_destinos import cambiar_base
+from estadisticas import (fusionar_histogramas, media_histograma, nuevo_histograma, percentil_histograma,
+                          registrar_en_histograma)
+from utilidades_wrk import parsear_duracion
+
+TIMEOUT_PASO = 10
+VENTANA_RECORRIDOS = 10
+# Margen para que todos los procesos arranquen antes del instante cero común
+ARRANQUE_RECORRIDOS = 1.0
+# Descriptores por sesión además de sus conexiones (margen para el proceso)
+MARGEN_DESCRIPTORES = 64
+
+METODOS_PASO = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+RECORRIDOS_PREDEFINIDOS = {
+    'verificar_y_pagar': {
+        'descripcion': 'Obtiene un token, verifica el número del usuario y paga con el token de la sesión',
+        'variables': {'usuario': {'desde': 60000000, 'hasta': 69999999}},
+        'pasos': [
+            {'nombre': 'token', 'metodo': 'POST', 'url': 'https://ws.pagosbolivia.com.bo:8443/token',
+             'extraer': {'token': 'token'}},
+            {'nombre': 'verificar', 'metodo': 'GET',
+             'url': 'https://yasta.bancounion.com.bo/gateway/user/verify/number?username=${usuario}',
+             'extraer': {'existe': 'exists'}, 'espera': ['1s', '3s']},
+            {'nombre': 'pagar', 'metodo': 'POST', 'url': 'https://ws.pagosbolivia.com.bo:8443/api/pagos/ProcessMessage',
+             'cabeceras': {'Authorization': 'Bearer ${token}', 'Content-Type': 'application/json'},
+             'cuerpo': '{"Usuario":"${usuario}","Verificado":${existe}}', 'espera': ['2s', '5s']}
+        ]
+    }
+}
+
+def cargar_recorrido(nombre_o_archivo):
+    """Cargar un recorrido predefinido o desde un archivo JSON"""
+    if os.path.exists(nombre_o_archivo):
+        with open(nombre_o_archivo, 'r', encoding='utf-8') as f:
+            recorrido = json.load(f)
+        recorrido.setdefault('nombre', os.path.splitext(os.path.basename(nombre_o_archivo))[0])
+    elif nombre_o_archivo in RECORRIDOS_PREDEFINIDOS:
+        recorrido = dict(RECORRIDOS_PREDEFINIDOS[nombre_o_archivo], nombre=nombre_o_archivo)
+    else:
+        raise ValueError(
+            f"Recorrido '{nombre_o_archivo}' no encontrado. "
+            f"Predefinidos: {', '.join(RECORRIDOS_PREDEFINIDOS)}"
+        )
+    validar_recorrido(recorrido)
+    return recorrido
+
+def validar_recorrido(recorrido):
+    """Validar pasos, métodos, esperas y que cada variable usada esté definida antes de su paso"""
+    if not recorrido.get('pasos'):
+        raise ValueError("El recorrido debe definir al menos un paso")
+    disponibles = set(recorrido.get('variables', {}))
+    nombres = set()
+    for i, paso in enumerate(recorrido['pasos'], 1):
+        nombre = paso.get('nombre') or f"paso{i}"
+        if nombre in nombres:
+            raise ValueError(f"Paso {i}: nombre '{nombre}' repetido")
+        nombres.add(nombre)
+        if paso.get('metodo', 'GET').upper() not in METODOS_PASO:
+            raise ValueError(f"Paso {i}: método '{paso['metodo']}' no válido ({', '.join(METODOS_PASO)})")
+        if not urlsplit(paso.get('url', '')).netloc:
+            raise ValueError(f"Paso {i}: falta una 'url' absoluta")
+        if 'espera' in paso:
+            parsear_espera(paso['espera'])
+        plantillas = [paso['url'], paso.get('cuerpo') or ''] + list(paso.get('cabeceras', {}).values())
+        for plantilla in plantillas:
+            for variable in variables_de(plantilla):
+                if variable not in disponibles:
+                    raise ValueError(f"Paso {i}: la variable '{variable}' no está definida antes de este paso")
+        disponibles.update(paso.get('extraer', {}))
+
+def variables_de(plantilla):
+    """Nombres de variable ${x} usados en una plantilla"""
+    return {coincidencia.group('braced') or coincidencia.group('named')
+            for coincidencia in Template.pattern.finditer(plantilla)
+            if coincidencia.group('braced') or coincidencia.group('named')}
+
+def parsear_espera(espera):
+    """Tiempo de espera fijo ('2s') o (mínimo, máximo) para un valor uniforme, en segundos"""
+    if isinstance(espera, (list, tuple)):
+        minimo, maximo = (parsear_duracion(valor) for valor in espera)
+        if maximo < minimo:
+            raise ValueError(f"Espera {espera}: el máximo es menor que el mínimo")
+        return minimo, maximo
+    valor = parsear_duracion(espera)
+    return valor, valor
+
+def compilar_recorrido(recorrido, destino=None):
+    """Preparar los pasos una sola vez: plantillas, origen de la conexión y esperas en segundos"""
+    pasos = []
+    for i, paso in enumerate(recorrido['pasos'], 1):
+        url = cambiar_base(paso['url'], destino) if destino else paso['url']
+        partes = urlsplit(url)
+        pasos.append({
+            'nombre': paso.get('nombre') or f"paso{i}",
+            'metodo': paso.get('metodo', 'GET').upper(),
+            'origen': (partes.scheme, partes.hostname, partes.port or (443 if partes.scheme == 'https' else 80)),
+            'host': partes.netloc,
+            'ruta': Template((partes.path or '/') + (f"?{partes.query}" if partes.query else '')),
+            'cabeceras': {clave: Template(valor) for clave, valor in paso.get('cabeceras', {}).items()},
+            'cuerpo': Template(paso['cuerpo']) if paso.get('cuerpo') is not None else None,
+            'extraer': paso.get('extraer', {}),
+            'espera': parsear_espera(paso['espera']) if 'espera' in paso else None
+        })
+    return pasos
+
+def extraer_valor(documento, cabeceras, ruta):
+    """'a.b.0' dentro del JSON de la respuesta o 'cabecera:Nombre'; None si no existe"""
+    if ruta.startswith('cabecera:'):
+        return cabeceras.get(ruta[9:].strip().lower())
+    valor = documento
+    for parte in ruta.split('.'):
+        if isinstance(valor, dict):
+            valor = valor.get(parte)
+        elif isinstance(valor, list) and parte.isdigit() and int(parte) < len(valor):
+            valor = valor[int(parte)]
+        else:
+            return None
+    return valor
+
+def valor_plantilla(valor):
+    """Texto para sustituir en una plantilla: los valores no textuales van como JSON (true, 3, ...)"""
+    return valor if isinstance(valor, str) else json.dumps(valor)
+
+class ErrorPaso(Exception):
+    def __init__(self, tipo):
+        super().__init__(tipo)
+        self.tipo = tipo
+
+class ClienteSesion:
+    """Conexiones keep-alive de una sesión (una por origen) sobre streams de asyncio"""
+
+    def __init__(self, contexto_ssl, timeout=TIMEOUT_PASO):
+        self.contexto_ssl = contexto_ssl
+        self.timeout = timeout
+        self.conexiones = {}
+
+    async def enviar(self, paso, ruta, cabeceras, cuerpo):
+        """Enviar un request y devolver (estado, cabeceras en minúsculas, cuerpo)"""
+        origen = paso['origen']
+        try:
+            if origen not in self.conexiones:
+                esquema, host, puerto = origen
+                self.conexiones[origen] = await asyncio.wait_for(asyncio.open_connection(
+                    host, puerto, ssl=self.contexto_ssl if esquema == 'https' else None), self.timeout)
+            lector, escritor = self.conexiones[origen]
+            datos = cuerpo.encode() if cuerpo is not None else b''
+            lineas = [f"{paso['metodo']} {ruta} HTTP/1.1", f"Host: {paso['host']}", f"Content-Length: {len(datos)}"]
+            lineas.extend(f"{clave}: {valor}" for clave, valor in cabeceras.items())
+            escritor.write(('\r\n'.join(lineas) + '\r\n\r\n').encode() + datos)
+            await escritor.drain()
+            return await asyncio.wait_for(self.leer_respuesta(lector, origen), self.timeout)
+        except ErrorPaso:
+            self.cerrar(origen)
+            raise
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            self.cerrar(origen)
+            raise ErrorPaso(type(e).__name__)
+
+    async def leer_respuesta(self, lector, origen):
+        linea_estado = await lector.readline()
+        if not linea_estado:
+            raise asyncio.IncompleteReadError(b'', None)
+        partes = linea_estado.split(b' ', 2)
+        if len(partes) < 2 or not partes[0].startswith(b'HTTP/') or not partes[1].isdigit():
+            # Una línea de estado malformada falla el paso, no la sesión ni la partición
+            raise ErrorPaso('respuesta_invalida')
+        estado = int(partes[1])
+        cabeceras = {}
+        while True:
+            linea = await lector.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            clave, _, valor = linea.decode('latin-1').partition(':')
+            cabeceras[clave.strip().lower()] = valor.strip()
+        if cabeceras.get('transfer-encoding', '').lower() == 'chunked':
+            partes = []
+            while True:
+                tamano = int((await lector.readline()).split(b';')[0].strip(), 16)
+                if not tamano:
+                    await lector.readline()
+                    break
+                partes.append(await lector.readexactly(tamano))
+                await lector.readexactly(2)
+            cuerpo = b''.join(partes)
+        else:
+            cuerpo = await lector.readexactly(int(cabeceras.get('content-length', 0)))
+        if cabeceras.get('connection', '').lower() == 'close':
+            self.cerrar(origen)
+        return estado, cabeceras, cuerpo
+
+    def cerrar(self, origen=None):
+        for clave in ([origen] if origen else list(self.conexiones)):
+            conexion = self.conexiones.pop(clave, None)
+            if conexion:
+                conexion[1].close()
+
+class EjecutorRecorridos:
+    """Sesiones concurrentes de un proceso, todas en un solo bucle de eventos"""
+
+    def __init__(self, recorrido, sesiones, duracion, inicio, rampa=0.0, destino=None, ventana=VENTANA_RECORRIDOS,
+                 semilla=None, timeout=TIMEOUT_PASO):
+        self.variables = recorrido.get('variables', {})
+        self.pasos = compilar_recorrido(recorrido, destino)
+        self.sesiones = sesiones
+        self.duracion = duracion
+        self.inicio = inicio
+        self.rampa = rampa
+        self.ventana = ventana
+        self.timeout = timeout
+        self.rng = random.Random(semilla)
+        self.contexto_ssl = ssl.create_default_context()
+        self.contexto_ssl.check_hostname = False
+        self.contexto_ssl.verify_mode = ssl.CERT_NONE
+        self.resultado = {
+            'pasos': {paso['nombre']: {'enviados': 0, 'errores': 0, 'codigos_estado': {}, 'tipos_error': {},
+                                       'latencia': nuevo_histograma()} for paso in self.pasos},
+            'completados': 0,
+            'fallidos': 0,
+            'fallas_por_paso': {},
+            'tiempo_respuesta': nuevo_histograma(),
+            'duracion_recorrido': nuevo_histograma(),
+            'ventanas': {}
+        }
+
+    def nuevas_variables(self):
+        """Variables iniciales de un recorrido: enteros en un rango, un valor de una lista o un literal"""
+        valores = {}
+        for nombre, definicion in self.variables.items():
+            if isinstance(definicion, dict) and 'desde' in definicion:
+                valores[nombre] = str(self.rng.randint(definicion['desde'], definicion['hasta']))
+            elif isinstance(definicion, dict) and 'valores' in definicion:
+                valores[nombre] = valor_plantilla(self.rng.choice(definicion['valores']))
+            else:
+                valores[nombre] = valor_plantilla(definicion)
+        return valores
+
+    def registrar_falla(self, paso, tipo):
+        resultado = self.resultado['pasos'][paso['nombre']]
+        resultado['errores'] += 1
+        resultado['tipos_error'][tipo] = resultado['tipos_error'].get(tipo, 0) + 1
+        self.resultado['fallidos'] += 1
+        self.resultado['fallas_por_paso'][paso['nombre']] = self.resultado['fallas_por_paso'].get(paso['nombre'], 0) + 1
+
+    async def sesion(self, indice, fin):
+        """Máquina de estados de una sesión: repite el recorrido hasta el final de la prueba"""
+        reloj = asyncio.get_running_loop().time
+        await asyncio.sleep(max(0.0, self.inicio - time.time()) + self.rampa * indice / self.sesiones)
+        cliente = ClienteSesion(self.contexto_ssl, self.timeout)
+        try:
+            while reloj() < fin:
+                variables = self.nuevas_variables()
+                comienzo, respuesta_total = reloj(), 0.0
+                for paso in self.pasos:
+                    if reloj() >= fin:
+                        return
+                    ruta = paso['ruta'].safe_substitute(variables)
+                    cabeceras = {clave: valor.safe_substitute(variables) for clave, valor in paso['cabeceras'].items()}
+                    cuerpo = paso['cuerpo'].safe_substitute(variables) if paso['cuerpo'] else None
+                    enviado = reloj()
+                    try:
+                        estado, cabeceras_respuesta, contenido = await cliente.enviar(paso, ruta, cabeceras, cuerpo)
+                    except ErrorPaso as e:
+                        self.registrar_falla(paso, e.tipo)
+                        break
+                    latencia = (reloj() - enviado) * 1000
+                    respuesta_total += latencia
+                    resultado = self.resultado['pasos'][paso['nombre']]
+                    resultado['enviados'] += 1
+                    registrar_en_histograma(resultado['latencia'], latencia)
+                    resultado['codigos_estado'][str(estado)] = resultado['codigos_estado'].get(str(estado), 0) + 1
+                    if not 200 <= estado < 400:
+                        self.registrar_falla(paso, f"HTTP {estado}")
+                        break
+                    if paso['extraer']:
+                        try:
+                            documento = json.loads(contenido) if contenido else None
+                        except ValueError:
+                            documento = None
+                        extraidos = {variable: extraer_valor(documento, cabeceras_respuesta, ruta_valor)
+                                     for variable, ruta_valor in paso['extraer'].items()}
+                        if any(valor is None for valor in extraidos.values()):
+                            self.registrar_falla(paso, 'extraccion')
+                            break
+                        variables.update({variable: valor_plantilla(valor) for variable, valor in extraidos.items()})
+                    if paso['espera']:
+                        await asyncio.sleep(self.rng.uniform(*paso['espera']))
+                else:
+                    self.resultado['completados'] += 1
+                    registrar_en_histograma(self.resultado['tiempo_respuesta'], respuesta_total)
+                    registrar_en_histograma(self.resultado['duracion_recorrido'], (reloj() - comienzo) * 1000)
+                    clave = str(int((time.time() - self.inicio) // self.ventana))
+                    self.resultado['ventanas'][clave] = self.resultado['ventanas'].get(clave, 0) + 1
+                    continue
+                # Recorrido fallido: la sesión descansa lo mismo que tras el último paso antes de reintentar
+                ultima_espera = self.pasos[-1]['espera']
+                if ultima_espera:
+                    await asyncio.sleep(self.rng.uniform(*ultima_espera))
+        finally:
+            cliente.cerrar()
+
+    async def ejecutar(self):
+        fin = asyncio.get_running_loop().time() + (self.inicio - time.time()) + self.duracion
+        await asyncio.gather(*(self.sesion(indice, fin) for indice in range(self.sesiones)))
+        return self.resultado
+
+def ejecutar_particion(recorrido, sesiones, duracion, inicio, rampa, destino, ventana, semilla):
+    """Ejecutar las sesiones de un proceso (se ejecuta en un proceso hijo)"""
+    return asyncio.run(EjecutorRecorridos(recorrido, sesiones, duracion, inicio, rampa, destino, ventana,
+                                          semilla).ejecutar())
+
+def verificar_descriptores(sesiones_por_proceso, origenes):
+    """Aviso si el límite de archivos abiertos no alcanza para una conexión por sesión y origen"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    necesarios = sesiones_por_proceso * origenes + MARGEN_DESCRIPTORES
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando != resource.RLIM_INFINITY and blando < necesarios:
+        if duro == resource.RLIM_INFINITY or duro >= necesarios:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (necesarios, duro))
+            return None
+        return f"el límite de archivos abiertos ({blando}) no alcanza para {necesarios} conexiones por proceso"
+    return None
+
+def ejecutar_recorridos(recorrido, sesiones, duracion, procesos=1, rampa=0.0, destino=None,
+                        ventana=VENTANA_RECORRIDOS, semilla=None):
+    """Repartir las sesiones entre procesos con un instante cero común y fusionar los resultados"""
+    por_proceso = [sesiones // procesos + (1 if i < sesiones % procesos else 0) for i in range(procesos)]
+    semilla = semilla if semilla is not None else random.randrange(2 ** 32)
+    inicio = time.time() + ARRANQUE_RECORRIDOS
+    argumentos = [(recorrido, n, duracion, inicio, rampa, destino, ventana, semilla + i)
+                  for i, n in enumerate(por_proceso) if n]
+    if len(argumentos) == 1:
+        parciales = [ejecutar_particion(*argumentos[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(argumentos)) as ejecutor:
+            parciales = [futuro.result() for futuro in [ejecutor.submit(ejecutar_particion, *a) for a in argumentos]]
+    duracion_real = time.time() - inicio
+
+    pasos = {}
+    for paso in parciales[0]['pasos']:
+        pasos[paso] = {
+            'enviados': sum(p['pasos'][paso]['enviados'] for p in parciales),
+            'errores': sum(p['pasos'][paso]['errores'] for p in parciales),
+            'codigos_estado': {}, 'tipos_error': {},
+            'latencia': fusionar_histogramas([p['pasos'][paso]['latencia'] for p in parciales])
+        }
+        for parcial in parciales:
+            for campo in ('codigos_estado', 'tipos_error'):
+                for clave, cantidad in parcial['pasos'][paso][campo].items():
+                    pasos[paso][campo][clave] = pasos[paso][campo].get(clave, 0) + cantidad
+    fallas, ventanas = {}, {}
+    for parcial in parciales:
+        for clave, cantidad in parcial['fallas_por_paso'].items():
+            fallas[clave] = fallas.get(clave, 0) + cantidad
+        for clave, cantidad in parcial['ventanas'].items():
+            ventanas[int(clave)] = ventanas.get(int(clave), 0) + cantidad
+    completados = sum(p['completados'] for p in parciales)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'recorrido': recorrido.get('nombre'),
+        'definicion': recorrido,
+        'destino': destino,
+        'sesiones': sesiones,
+        'procesos': len(argumentos),
+        'duracion': duracion,
+        'duracion_real': duracion_real,
+        'semilla': semilla,
+        'completados': completados,
+        'fallidos': sum(p['fallidos'] for p in parciales),
+        'recorridos_por_segundo': completados / duracion if duracion else 0,
+        'fallas_por_paso': fallas,
+        'pasos': pasos,
+        'tiempo_respuesta': fusionar_histogramas([p['tiempo_respuesta'] for p in parciales]),
+        'duracion_recorrido': fusionar_histogramas([p['duracion_recorrido'] for p in parciales]),
+        'ventanas': [{'t_inicio': i * ventana, 't_fin': (i + 1) * ventana, 'completados': ventanas[i],
+                      'recorridos_por_segundo': ventanas[i] / ventana} for i in sorted(ventanas)]
+    }
+
+def mostrar_recorridos(resultado):
+    def ms(valor):
+        return '-' if valor is None else f"{valor:.2f}"
+
+    print(f"\n{'='*72}")
+    print(f"🧭 RECORRIDO {resultado['recorrido']}: {resultado['sesiones']:,} sesiones en {resultado['procesos']} procesos")
+    print(f"{'='*72}")
+    print(f"Completados: {resultado['completados']:,} ({resultado['recorridos_por_segundo']:,.2f}/s) | "
+          f"fallidos: {resultado['fallidos']:,}")
+    if resultado['fallas_por_paso']:
+        print("Fallas por paso: " + ', '.join(f"{p}: {n:,}" for p, n in resultado['fallas_por_paso'].items()))
+    print(f"\n{'Paso':<20}{'Requests':>10}{'Errores':>9}{'Media':>9}{'P50':>9}{'P90':>9}{'P99':>9}  (ms)")
+    for nombre, paso in resultado['pasos'].items():
+        h = paso['latencia']
+        print(f"{nombre:<20}{paso['enviados']:>10,}{paso['errores']:>9,}{ms(media_histograma(h)):>9}"
+              f"{ms(percentil_histograma(h, 50)):>9}{ms(percentil_histograma(h, 90)):>9}{ms(percentil_histograma(h, 99)):>9}")
+        if paso['tipos_error']:
+            print(f"{'':<20}  " + ', '.join(f"{t}: {n:,}" for t, n in paso['tipos_error'].items()))
+    for titulo, h in (('Respuesta total', resultado['tiempo_respuesta']), ('Recorrido (con esperas)',
+                                                                           resultado['duracion_recorrido'])):
+        print(f"{titulo:<29}{ms(media_histograma(h)):>18}{ms(percentil_histograma(h, 50)):>9}"
+              f"{ms(percentil_histograma(h, 90)):>9}{ms(percentil_histograma(h, 99)):>9}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta recorridos de usuario de varios pasos con estado por sesión y tiempos de espera'
+    )
+    parser.add_argument('recorrido', nargs='?', help=f"Recorrido predefinido ({', '.join(RECORRIDOS_PREDEFINIDOS)}) "
+                                                     "o archivo JSON")
+    parser.add_argument('--sesiones', type=int, default=1000, help='Sesiones concurrentes en total')
+    parser.add_argument('--procesos', type=int, default=1, help='Procesos (un bucle de eventos cada uno)')
+    parser.add_argument('--duracion', default='60s', help='Duración de la prueba')
+    parser.add_argument('--rampa', default='0s', help='Tiempo en que se abren todas las sesiones')
+    parser.add_argument('--destino', help='esquema://host[:puerto] para todos los pasos (p. ej. el servidor simulado)')
+    parser.add_argument('--ventana', type=float, default=VENTANA_RECORRIDOS,
+                        help='Segundos por ventana de recorridos completados')
+    parser.add_argument('--semilla', type=int, help='Semilla de variables y esperas')
+    parser.add_argument('--salida', help='Archivo JSON (por defecto recorridos_usuario_<ts>.json)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.recorrido:
+        parser.error("Indica el recorrido")
+    if args.sesiones < 1 or args.procesos < 1:
+        parser.error("--sesiones y --procesos deben ser al menos 1")
+
+    try:
+        recorrido = cargar_recorrido(args.recorrido)
+        duracion, rampa = parsear_duracion(args.duracion), parsear_duracion(args.rampa)
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    procesos = min(args.procesos, args.sesiones)
+    origenes = len({paso['origen'] for paso in compilar_recorrido(recorrido, args.destino)})
+    aviso = verificar_descriptores(-(-args.sesiones // procesos), origenes)
+    if aviso:
+        print(f"⚠️  {aviso}; sube el límite con 'ulimit -n'")
+
+    print(f"🧭 {recorrido['nombre']}: {len(recorrido['pasos'])} pasos, {args.sesiones:,} sesiones, "
+          f"{procesos} procesos, {duracion:g}s" + (f" contra {args.destino}" if args.destino else ''))
+    resultado = ejecutar_recorridos(recorrido, args.sesiones, duracion, procesos, rampa, args.destino,
+                                    args.ventana, args.semilla)
+    mostrar_recorridos(resultado)
+
+    salida = args.salida or f"recorridos_usuario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Recorridos guardados en: {salida}")
+
+if __name__ == "__main__":
+    main()
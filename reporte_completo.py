@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Reporte Completo en una Pasada
+Parsea los resultados una sola vez y genera en paralelo el dashboard HTML (Plotly),
+los gráficos PNG (matplotlib) y el reporte de texto, para cualquier número de pruebas
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from perfilado import PERFILADOR
+
+SALIDAS = ['html', 'png', 'texto']
+
+def datos_para_png(datos):
+    """Traducir las claves de parsear_salida_wrk a las que usa LoadTestAnalyzer"""
+    errores = datos.get('errores', {})
+    convertidos = {
+        'total_requests': datos.get('total_requests', 0),
+        'duration': datos.get('duracion', 0),
+        'rps': datos.get('rps', 0),
+        'rps_reported': datos.get('rps_reportado', 0),
+        'transfer_per_sec': datos.get('transferencia_por_seg', 0),
+        'mb_read': datos.get('transferencia_por_seg', 0) * datos.get('duracion', 0),
+        'latency_avg': datos.get('latencia_promedio', 0),
+        'latency_stdev': datos.get('latencia_stdev', 0),
+        'latency_max': datos.get('latencia_max', 0),
+        'percentiles': datos.get('percentiles', {}),
+        'errors': {
+            'connect': errores.get('conexion', 0),
+            'read': errores.get('lectura', 0),
+            'write': errores.get('escritura', 0),
+            'timeout': errores.get('timeout', 0)
+        },
+        'total_errors': datos.get('total_errores', 0),
+        'execution_time': datos.get('tiempo_ejecucion', 0)
+    }
+    if datos.get('codigos_estado'):
+        convertidos['status_codes'] = datos['codigos_estado']
+    if datos.get('intervalos_confianza'):
+        # Semiancho del IC entre ensayos repetidos, para las barras de error
+        convertidos['confidence_intervals'] = {
+            {'rps': 'rps', 'latencia_promedio': 'latency_avg', 'p99': 'p99'}[metrica]: ic['semiancho'] or 0
+            for metrica, ic in datos['intervalos_confianza'].items()
+        }
+    return convertidos
+
+def renderizar_html(analizador, archivo):
+    """Escribir el dashboard Plotly (se ejecuta en un proceso hijo)"""
+    html = analizador.renderizar_html()
+    if not html:
+        return None
+    with open(archivo, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return archivo
+
+def renderizar_png(datos_png, archivo):
+    """Escribir los gráficos de matplotlib sin abrir ventanas (se ejecuta en un proceso hijo)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from generate_graphics import LoadTestAnalyzer
+
+    analyzer = LoadTestAnalyzer()
+    analyzer.parsed_data = datos_png
+    return analyzer.create_comparison_charts(filename=archivo, show=False)
+
+def renderizar_texto(datos_png, archivo):
+    """Escribir el reporte de texto detallado (se ejecuta en un proceso hijo)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from generate_graphics import LoadTestAnalyzer
+
+    analyzer = LoadTestAnalyzer()
+    analyzer.parsed_data = datos_png
+    return analyzer.generate_detailed_report(report_file=archivo)
+
+def cargar_archivos(analizador, archivos):
+    """Parsear varios archivos de resultados en un único analizador
+
+    Si dos archivos tienen una prueba con el mismo nombre, la repetida se
+    renombra con el timestamp de su archivo.
+    """
+    for archivo in archivos:
+        with PERFILADOR.etapa('cargar_json', 'io'):
+            with open(archivo, 'r', encoding='utf-8') as f:
+                resultados_raw = json.load(f)
+        sufijo = os.path.basename(archivo).rsplit('.', 1)[0].replace('resultados_pruebas_carga_', '')
+        renombrados = {}
+        for clave, datos in resultados_raw.items():
+            if clave in analizador.datos_parseados or clave in renombrados:
+                clave = f"{clave}_{sufijo}"
+            renombrados[clave] = datos
+        with PERFILADOR.etapa('parsear_resultados', 'reporte', reporte=True):
+            analizador.parsear_resultados(renombrados)
+
+def generar_reporte_completo(archivos, salidas=None, procesos=None, prefijo=''):
+    """Parsear una vez y generar las salidas pedidas; devuelve {salida: archivo}"""
+    from generar_reporte_html import AnalizadorHTML
+
+    salidas = salidas or SALIDAS
+    analizador = AnalizadorHTML()
+    cargar_archivos(analizador, archivos)
+    if not analizador.datos_parseados:
+        return {}
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    datos_png = {nombre: datos_para_png(datos) for nombre, datos in analizador.datos_parseados.items()}
+    tareas = {
+        'html': (renderizar_html, analizador, f"{prefijo}dashboard_pruebas_carga_{timestamp}.html"),
+        'png': (renderizar_png, datos_png, f"{prefijo}load_test_comparison_{timestamp}.png"),
+        'texto': (renderizar_texto, datos_png, f"{prefijo}load_test_report_{timestamp}.txt")
+    }
+    tareas = {salida: tareas[salida] for salida in salidas}
+
+    generados = {}
+    with PERFILADOR.etapa('renderizar_salidas', 'reporte', reporte=True):
+        procesos = min(procesos or len(tareas), len(tareas))
+        if procesos <= 1:
+            for salida, (funcion, datos, archivo) in tareas.items():
+                generados[salida] = funcion(datos, archivo)
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                futuros = {salida: ejecutor.submit(funcion, datos, archivo)
+                           for salida, (funcion, datos, archivo) in tareas.items()}
+                for salida, futuro in futuros.items():
+                    try:
+                        generados[salida] = futuro.result()
+                    except Exception as e:
+                        print(f"❌ Error generando {salida}: {type(e).__name__}: {e}")
+                        generados[salida] = None
+    return generados
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera dashboard HTML, gráficos PNG y reporte de texto en paralelo parseando una sola vez'
+    )
+    parser.add_argument('archivos', nargs='*',
+                        help='Archivos de resultados (por defecto el resultados_pruebas_carga_*.json más reciente)')
+    parser.add_argument('--solo', choices=SALIDAS, action='append', help='Generar solo algunas salidas (repetible)')
+    parser.add_argument('--procesos', type=int, help='Procesos de renderizado (1 = en serie; por defecto uno por salida)')
+    args = parser.parse_args()
+
+    archivos = args.archivos
+    if not archivos:
+        archivos = sorted(glob.glob('resultados_pruebas_carga_*.json'))[-1:]
+        if not archivos:
+            print("No se encontraron archivos de resultados. Por favor ejecuta las pruebas de carga primero.")
+            sys.exit(1)
+    for archivo in archivos:
+        print(f"Usando archivo de resultados: {archivo}")
+
+    generados = generar_reporte_completo(archivos, args.solo, args.procesos)
+    if not generados:
+        print("No se encontraron datos válidos en los archivos de resultados.")
+        sys.exit(1)
+
+    print("\n📊 Reporte generado:")
+    for salida, archivo in generados.items():
+        print(f"  {salida:<6} {archivo or 'sin generar'}")
+    if any(archivo is None for archivo in generados.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
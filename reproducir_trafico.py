@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Reproducción de Tráfico Grabado
+Compila un HAR o un access log (formato common/combined) a un plan compacto e indexado
+y lo reproduce respetando los tiempos entre llegadas originales, con factor de
+aceleración, reparto entre procesos e hilos y medición del retraso frente al plan
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import re
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from estadisticas import (fusionar_histogramas, media_histograma, nuevo_histograma, percentil_histograma,
+                          registrar_en_histograma)
+
+VERSION_PLAN = 1
+TIMEOUT_REPRODUCCION = 10
+UMBRAL_RETRASO_MS = 10
+VENTANA_REPRODUCCION = 10
+# Margen para que todos los procesos arranquen antes del instante cero común
+ARRANQUE_REPRODUCCION = 1.0
+
+# Cabeceras que dependen de la conexión original y no se reproducen
+CABECERAS_OMITIDAS = {'host', 'content-length', 'connection', 'keep-alive', 'transfer-encoding',
+                      'proxy-connection', 'upgrade'}
+
+# Formato common/combined de Apache y nginx; acepta fracciones de segundo en la fecha
+PATRON_ACCESS_LOG = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<fecha>[^\]]+)\] "(?P<metodo>[A-Z]+) (?P<ruta>\S+)[^"]*" (?P<estado>\d{3}) \S+'
+    r'(?: "(?P<referer>[^"]*)" "(?P<agente>[^"]*)")?'
+)
+
+def _fecha_iso(texto):
+    """startedDateTime de un HAR a epoch (Python 3.10 no acepta la 'Z' final)"""
+    return datetime.fromisoformat(texto.replace('Z', '+00:00')).timestamp()
+
+def _fecha_access_log(texto):
+    fecha, _, zona = texto.partition(' ')
+    formato = '%d/%b/%Y:%H:%M:%S.%f' if '.' in fecha else '%d/%b/%Y:%H:%M:%S'
+    return datetime.strptime(f"{fecha} {zona}", f"{formato} %z").timestamp(), '.' in fecha
+
+def leer_har(ruta, dominio=None):
+    """Devolver [(epoch, metodo, origen, ruta, cabeceras, cuerpo)] de log.entries"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        har = json.load(f)
+    eventos = []
+    for entrada in har.get('log', {}).get('entries', []):
+        request = entrada['request']
+        partes = urlsplit(request['url'])
+        if partes.scheme not in ('http', 'https'):
+            continue
+        if dominio and partes.hostname != dominio:
+            continue
+        cabeceras = {
+            c['name']: c['value'] for c in request.get('headers', [])
+            if not c['name'].startswith(':') and c['name'].lower() not in CABECERAS_OMITIDAS
+        }
+        cuerpo = (request.get('postData') or {}).get('text') or None
+        eventos.append((
+            _fecha_iso(entrada['startedDateTime']),
+            request['method'],
+            f"{partes.scheme}://{partes.netloc}",
+            (partes.path or '/') + (f"?{partes.query}" if partes.query else ''),
+            cabeceras,
+            cuerpo
+        ))
+    return eventos
+
+def leer_access_log(ruta):
+    """Devolver [(epoch, metodo, None, ruta, cabeceras, None)] de un access log
+
+    Con fechas de resolución de segundo, los requests de un mismo segundo se reparten
+    uniformemente dentro de él en vez de salir todos juntos.
+    """
+    leidos = []
+    descartadas = 0
+    with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+        for linea in f:
+            coincidencia = PATRON_ACCESS_LOG.match(linea)
+            if not coincidencia:
+                descartadas += 1
+                continue
+            marca, fraccionaria = _fecha_access_log(coincidencia['fecha'])
+            cabeceras = {}
+            if coincidencia['agente'] and coincidencia['agente'] != '-':
+                cabeceras['User-Agent'] = coincidencia['agente']
+            if coincidencia['referer'] and coincidencia['referer'] != '-':
+                cabeceras['Referer'] = coincidencia['referer']
+            leidos.append((marca, fraccionaria, coincidencia['metodo'], coincidencia['ruta'], cabeceras))
+    if descartadas:
+        print(f"⚠️  {descartadas:,} líneas no tienen formato common/combined y se ignoraron")
+
+    leidos.sort(key=lambda evento: evento[0])
+    eventos = []
+    for marca, grupo in itertools.groupby(leidos, key=lambda evento: evento[0]):
+        grupo = list(grupo)
+        for posicion, (_, fraccionaria, metodo, ruta_request, cabeceras) in enumerate(grupo):
+            desfase = 0 if fraccionaria else posicion / len(grupo)
+            eventos.append((marca + desfase, metodo, None, ruta_request, cabeceras, None))
+    return eventos
+
+def compilar_plan(eventos, origen, formato):
+    """Plan compacto: tabla de requests únicos y, por evento, su desfase en µs y su índice"""
+    eventos = sorted(eventos, key=lambda evento: evento[0])
+    if not eventos:
+        raise ValueError("la grabación no contiene requests reproducibles")
+    primero = eventos[0][0]
+    solicitudes = []
+    indice_de = {}
+    desfases, indices = [], []
+    for marca, metodo, origen_request, ruta, cabeceras, cuerpo in eventos:
+        clave = (metodo, origen_request, ruta, tuple(sorted(cabeceras.items())), cuerpo)
+        if clave not in indice_de:
+            indice_de[clave] = len(solicitudes)
+            solicitudes.append([metodo, origen_request, ruta, cabeceras, cuerpo])
+        desfases.append(round((marca - primero) * 1_000_000))
+        indices.append(indice_de[clave])
+    return {
+        'version': VERSION_PLAN,
+        'origen': origen,
+        'formato': formato,
+        'compilado': datetime.now().isoformat(),
+        'inicio_grabacion': datetime.fromtimestamp(primero).isoformat(),
+        'duracion': desfases[-1] / 1_000_000,
+        'eventos': len(indices),
+        # Cada solicitud: [metodo, origen (esquema://host o null), ruta, cabeceras, cuerpo]
+        'solicitudes': solicitudes,
+        'desfases_us': desfases,
+        'indices': indices
+    }
+
+def cargar_plan(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != VERSION_PLAN:
+        raise ValueError(f"{ruta} no es un plan de reproducción compatible")
+    return plan
+
+class ClienteReproduccion:
+    """Una conexión keep-alive por hilo y por origen; si falla se descarta y se reabre"""
+
+    def __init__(self, timeout=TIMEOUT_REPRODUCCION):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._contexto = ssl.create_default_context()
+        self._contexto.check_hostname = False
+        self._contexto.verify_mode = ssl.CERT_NONE
+
+    def conexion(self, origen):
+        conexiones = self._local.__dict__.setdefault('conexiones', {})
+        if origen not in conexiones:
+            partes = urlsplit(origen)
+            if partes.scheme == 'https':
+                conexiones[origen] = http.client.HTTPSConnection(partes.netloc, timeout=self.timeout,
+                                                                  context=self._contexto)
+            else:
+                conexiones[origen] = http.client.HTTPConnection(partes.netloc, timeout=self.timeout)
+        return conexiones[origen]
+
+    def enviar(self, origen, metodo, ruta, cabeceras, cuerpo):
+        conexion = self.conexion(origen)
+        try:
+            conexion.request(metodo, ruta, body=cuerpo.encode() if cuerpo else None, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        except Exception:
+            conexion.close()
+            del self._local.conexiones[origen]
+            raise
+
+def reproducir_particion(ruta_plan, particion, particiones, velocidad, destino, hilos, inicio,
+                         umbral_retraso=UMBRAL_RETRASO_MS, ventana=VENTANA_REPRODUCCION, limite=None):
+    """Reproducir los eventos particion, particion+particiones, ... del plan (se ejecuta en un proceso hijo)
+
+    El retraso de cada evento es cuánto después de su instante planificado empezó a
+    enviarse; crece cuando el despachador o los hilos no dan abasto.
+    """
+    plan = cargar_plan(ruta_plan)
+    total = min(plan['eventos'], limite or plan['eventos'])
+    cliente = ClienteReproduccion()
+    candado = threading.Lock()
+    resultado = {
+        'enviados': 0,
+        'errores': 0,
+        'tipos_error': {},
+        'codigos_estado': {},
+        'tarde': 0,
+        'retraso_max': 0.0,
+        'latencia': nuevo_histograma(),
+        'retraso': nuevo_histograma(),
+        'ventanas': {}
+    }
+
+    def ejecutar(indice, programado):
+        comienzo = time.time()
+        retraso = max(0.0, (comienzo - programado) * 1000)
+        metodo, origen, ruta, cabeceras, cuerpo = plan['solicitudes'][indice]
+        try:
+            estado = cliente.enviar(destino or origen, metodo, ruta, cabeceras, cuerpo)
+            error = None
+        except Exception as e:
+            estado, error = None, type(e).__name__
+        latencia = (time.time() - comienzo) * 1000
+
+        with candado:
+            resultado['enviados'] += 1
+            registrar_en_histograma(resultado['retraso'], retraso)
+            resultado['retraso_max'] = max(resultado['retraso_max'], retraso)
+            clave_ventana = str(int((programado - inicio) // ventana))
+            datos_ventana = resultado['ventanas'].setdefault(clave_ventana, {'enviados': 0, 'tarde': 0,
+                                                                             'retraso_max': 0.0})
+            datos_ventana['enviados'] += 1
+            datos_ventana['retraso_max'] = max(datos_ventana['retraso_max'], retraso)
+            if retraso > umbral_retraso:
+                resultado['tarde'] += 1
+                datos_ventana['tarde'] += 1
+            if error:
+                resultado['errores'] += 1
+                resultado['tipos_error'][error] = resultado['tipos_error'].get(error, 0) + 1
+            else:
+                registrar_en_histograma(resultado['latencia'], latencia)
+                clave = str(estado)
+                resultado['codigos_estado'][clave] = resultado['codigos_estado'].get(clave, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        for posicion in range(particion, total, particiones):
+            programado = inicio + plan['desfases_us'][posicion] / 1_000_000 / velocidad
+            espera = programado - time.time()
+            if espera > 0:
+                time.sleep(espera)
+            ejecutor.submit(ejecutar, plan['indices'][posicion], programado)
+    return resultado
+
+def reproducir_plan(ruta_plan, velocidad=1.0, destino=None, procesos=1, hilos=16,
+                    umbral_retraso=UMBRAL_RETRASO_MS, ventana=VENTANA_REPRODUCCION, limite=None):
+    """Repartir el plan en `procesos` particiones con un instante cero común y fusionar los resultados"""
+    plan = cargar_plan(ruta_plan)
+    if not destino and any(origen is None for _, origen, _, _, _ in plan['solicitudes']):
+        raise ValueError("el plan viene de un access log sin host; indica --destino")
+
+    inicio = time.time() + ARRANQUE_REPRODUCCION
+    argumentos = (velocidad, destino, hilos, inicio, umbral_retraso, ventana, limite)
+    if procesos <= 1:
+        parciales = [reproducir_particion(ruta_plan, 0, 1, *argumentos)]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = [ejecutor.submit(reproducir_particion, ruta_plan, particion, procesos, *argumentos)
+                       for particion in range(procesos)]
+            parciales = [futuro.result() for futuro in futuros]
+    fin = time.time()
+
+    ventanas = {}
+    for parcial in parciales:
+        for clave, datos in parcial['ventanas'].items():
+            acumulado = ventanas.setdefault(int(clave), {'enviados': 0, 'tarde': 0, 'retraso_max': 0.0})
+            acumulado['enviados'] += datos['enviados']
+            acumulado['tarde'] += datos['tarde']
+            acumulado['retraso_max'] = max(acumulado['retraso_max'], datos['retraso_max'])
+
+    enviados = sum(p['enviados'] for p in parciales)
+    codigos, tipos_error = {}, {}
+    for parcial in parciales:
+        for clave, cantidad in parcial['codigos_estado'].items():
+            codigos[clave] = codigos.get(clave, 0) + cantidad
+        for clave, cantidad in parcial['tipos_error'].items():
+            tipos_error[clave] = tipos_error.get(clave, 0) + cantidad
+    duracion_plan = plan['duracion'] * min(enviados, plan['eventos']) / plan['eventos'] / velocidad
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'plan': ruta_plan,
+        'origen_grabacion': plan['origen'],
+        'destino': destino,
+        'velocidad': velocidad,
+        'procesos': procesos,
+        'hilos': hilos,
+        'umbral_retraso_ms': umbral_retraso,
+        'enviados': enviados,
+        'errores': sum(p['errores'] for p in parciales),
+        'tipos_error': tipos_error,
+        'codigos_estado': codigos,
+        'duracion_planificada': duracion_plan,
+        'duracion_real': fin - inicio,
+        'tarde': sum(p['tarde'] for p in parciales),
+        'retraso_max': max(p['retraso_max'] for p in parciales),
+        'retraso': fusionar_histogramas([p['retraso'] for p in parciales]),
+        'latencia': fusionar_histogramas([p['latencia'] for p in parciales]),
+        'ventanas': [dict(ventanas[indice], t_inicio=indice * ventana, t_fin=(indice + 1) * ventana)
+                     for indice in sorted(ventanas)]
+    }
+
+def mostrar_reproduccion(resultado):
+    retraso, latencia = resultado['retraso'], resultado['latencia']
+    enviados = resultado['enviados'] or 1
+
+    def ms(valor):
+        return '-' if valor is None else f"{valor:.2f} ms"
+
+    print(f"\n{'='*60}")
+    print("🎞️  RESULTADO DE LA REPRODUCCIÓN")
+    print(f"{'='*60}")
+    print(f"Requests: {resultado['enviados']:,} | errores: {resultado['errores']:,} | "
+          f"duración {resultado['duracion_real']:.1f}s (plan {resultado['duracion_planificada']:.1f}s)")
+    if resultado['codigos_estado']:
+        print("Códigos: " + ', '.join(f"{c}: {n:,}" for c, n in sorted(resultado['codigos_estado'].items())))
+    if resultado['tipos_error']:
+        print("Errores: " + ', '.join(f"{t}: {n:,}" for t, n in resultado['tipos_error'].items()))
+    print(f"Latencia: media {ms(media_histograma(latencia))} | p50 {ms(percentil_histograma(latencia, 50))} | "
+          f"p99 {ms(percentil_histograma(latencia, 99))}")
+    print(f"Retraso vs plan: p50 {ms(percentil_histograma(retraso, 50))} | "
+          f"p99 {ms(percentil_histograma(retraso, 99))} | máx {ms(resultado['retraso_max'])}")
+
+    fraccion = resultado['tarde'] / enviados
+    if resultado['tarde']:
+        print(f"⚠️  {resultado['tarde']:,} requests ({fraccion:.1%}) salieron más de "
+              f"{resultado['umbral_retraso_ms']:g} ms tarde: el generador no mantuvo el ritmo grabado")
+        for v in resultado['ventanas']:
+            if v['tarde']:
+                print(f"  {v['t_inicio']:>7g}-{v['t_fin']:<7g}s {v['tarde']:>8,}/{v['enviados']:<8,} tarde | "
+                      f"retraso máx {v['retraso_max']:.1f} ms")
+    else:
+        print(f"✅ Todos los requests salieron a menos de {resultado['umbral_retraso_ms']:g} ms de su instante planificado")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compila un HAR o access log a un plan indexado y lo reproduce con los tiempos originales'
+    )
+    subparsers = parser.add_subparsers(dest='accion')
+
+    compilar = subparsers.add_parser('compilar', help='Convertir un HAR o access log en un plan de reproducción')
+    compilar.add_argument('entrada', help='Archivo .har o access log (common/combined)')
+    compilar.add_argument('--formato', choices=['har', 'log'], help='Por defecto según la extensión (.har)')
+    compilar.add_argument('--dominio', help='En un HAR, conservar solo los requests a este host')
+    compilar.add_argument('--salida', help='Plan JSON (por defecto <entrada>.plan.json)')
+
+    reproducir = subparsers.add_parser('reproducir', help='Reproducir un plan compilado')
+    reproducir.add_argument('plan', help='Plan JSON generado con compilar')
+    reproducir.add_argument('--destino',
+                            help='esquema://host[:puerto] al que enviar en lugar del original (obligatorio para access logs)')
+    reproducir.add_argument('--velocidad', type=float, default=1.0, help='Factor de aceleración (10 = 10x)')
+    reproducir.add_argument('--procesos', type=int, default=1, help='Procesos que se reparten los eventos')
+    reproducir.add_argument('--hilos', type=int, default=16, help='Hilos de envío por proceso')
+    reproducir.add_argument('--limite', type=int, help='Reproducir solo los primeros N eventos')
+    reproducir.add_argument('--umbral-retraso', type=float, default=UMBRAL_RETRASO_MS,
+                            help='Retraso (ms) a partir del cual un request cuenta como tarde')
+    reproducir.add_argument('--ventana', type=float, default=VENTANA_REPRODUCCION,
+                            help='Segundos por ventana al reportar dónde se acumuló el retraso')
+    reproducir.add_argument('--salida', help='Archivo JSON (por defecto reproduccion_trafico_<ts>.json)')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.accion:
+        parser.error("Indica la acción: compilar o reproducir")
+
+    try:
+        if args.accion == 'compilar':
+            formato = args.formato or ('har' if args.entrada.lower().endswith('.har') else 'log')
+            eventos = leer_har(args.entrada, args.dominio) if formato == 'har' else leer_access_log(args.entrada)
+            plan = compilar_plan(eventos, os.path.basename(args.entrada), formato)
+            salida = args.salida or f"{args.entrada}.plan.json"
+            with open(salida, 'w', encoding='utf-8') as f:
+                json.dump(plan, f, ensure_ascii=False, separators=(',', ':'))
+            print(f"🗜️  {plan['eventos']:,} eventos ({len(plan['solicitudes']):,} requests únicos) en "
+                  f"{plan['duracion']:.1f}s grabados")
+            print(f"💾 Plan guardado en: {salida}")
+            return
+
+        if args.velocidad <= 0:
+            parser.error("--velocidad debe ser mayor que 0")
+        if args.procesos < 1 or args.hilos < 1:
+            parser.error("--procesos y --hilos deben ser al menos 1")
+        print(f"🎞️  Reproduciendo {args.plan} a {args.velocidad:g}x con {args.procesos} procesos x "
+              f"{args.hilos} hilos" + (f" contra {args.destino}" if args.destino else ''))
+        resultado = reproducir_plan(args.plan, args.velocidad, args.destino, args.procesos, args.hilos,
+                                    args.umbral_retraso, args.ventana, args.limite)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+    mostrar_reproduccion(resultado)
+    salida = args.salida or f"reproduccion_trafico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reproducción guardada en: {salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Servidor Simulado para Pruebas sin Conexión
+Imita los endpoints GET verify number y POST pagos, emite tokens JWT de prueba
+y expone métricas en formato Prometheus en /metrics
+"""
+
+import argparse
+import base64
+import gc
+import hashlib
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECRETO_JWT = b'clave-de-pruebas-locales'
+TTL_TOKEN = 300
+
+def _base64url(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b'=').decode('ascii')
+
+def _base64url_decodificar(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+def emitir_jwt(ttl=TTL_TOKEN, secreto=SECRETO_JWT, sujeto='baseWebApiSubject'):
+    """Emitir un JWT HS256 con la misma forma que los tokens del gateway de pagos"""
+    ahora = int(time.time())
+    cabecera = {'alg': 'HS256', 'typ': 'JWT'}
+    carga = {
+        'sub': sujeto,
+        'jti': str(uuid.uuid4()),
+        'iat': ahora,
+        'empresa': 'PRUEBAS',
+        'exp': ahora + int(ttl),
+        'iss': 'http://localhost/',
+        'aud': 'http://localhost/'
+    }
+    partes = [_base64url(json.dumps(p, separators=(',', ':')).encode()) for p in (cabecera, carga)]
+    firma = hmac.new(secreto, '.'.join(partes).encode(), hashlib.sha256).digest()
+    return '.'.join(partes + [_base64url(firma)])
+
+def validar_jwt(token, secreto=SECRETO_JWT):
+    """Devolver True si el token tiene firma válida y no ha expirado"""
+    try:
+        cabecera, carga, firma = token.split('.')
+        esperada = hmac.new(secreto, f"{cabecera}.{carga}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(esperada, _base64url_decodificar(firma)):
+            return False
+        return json.loads(_base64url_decodificar(carga)).get('exp', 0) > time.time()
+    except (ValueError, TypeError):
+        return False
+
+class EstadoServidor:
+    """Contadores que el servidor publica en /metrics"""
+    def __init__(self):
+        self.en_curso = 0
+        self.total = 0
+        self._bloqueo = threading.Lock()
+
+    @contextmanager
+    def atendiendo(self):
+        with self._bloqueo:
+            self.en_curso += 1
+            self.total += 1
+        try:
+            yield
+        finally:
+            with self._bloqueo:
+                self.en_curso -= 1
+
+    def texto_prometheus(self):
+        """Exponer CPU, solicitudes en curso y colecciones del GC en formato de texto Prometheus"""
+        lineas = [
+            '# HELP process_cpu_seconds_total Tiempo de CPU de usuario y sistema en segundos.',
+            '# TYPE process_cpu_seconds_total counter',
+            f'process_cpu_seconds_total {time.process_time()}',
+            '# HELP servidor_solicitudes_en_curso Solicitudes que se están atendiendo.',
+            '# TYPE servidor_solicitudes_en_curso gauge',
+            f'servidor_solicitudes_en_curso {self.en_curso}',
+            '# HELP servidor_solicitudes_total Solicitudes atendidas desde el inicio.',
+            '# TYPE servidor_solicitudes_total counter',
+            f'servidor_solicitudes_total {self.total}',
+            '# HELP python_gc_collections_total Colecciones del GC por generación.',
+            '# TYPE python_gc_collections_total counter'
+        ]
+        for generacion, estadistica in enumerate(gc.get_stats()):
+            lineas.append(f'python_gc_collections_total{{generation="{generacion}"}} {estadistica["collections"]}')
+        return '\n'.join(lineas) + '\n'
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    ttl_token = TTL_TOKEN
+    retardo = 0.0
+    fraccion_error = 0.0
+
+    def log_message(self, formato, *args):
+        pass
+
+    def responder(self, estado, cuerpo, tipo='application/json'):
+        datos = cuerpo if isinstance(cuerpo, bytes) else json.dumps(cuerpo).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(datos)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def leer_cuerpo(self):
+        longitud = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(longitud) if longitud else b''
+
+    def do_GET(self):
+        ruta = self.path.split('?', 1)[0]
+        if ruta == '/metrics':
+            self.responder(200, self.server.estado.texto_prometheus().encode(), 'text/plain; version=0.0.4')
+            return
+        with self.server.estado.atendiendo():
+            if self.retardo:
+                time.sleep(self.retardo)
+            if ruta == '/gateway/user/verify/number':
+                self.responder(200, {'exists': True})
+            else:
+                self.responder(404, {'error': 'no encontrado'})
+
+    def do_POST(self):
+        with self.server.estado.atendiendo():
+            if self.retardo:
+                time.sleep(self.retardo)
+            self.atender_post()
+
+    def atender_post(self):
+        ruta = self.path.split('?', 1)[0]
+        self.leer_cuerpo()
+        if ruta == '/token':
+            self.responder(200, {'token': emitir_jwt(self.ttl_token)})
+        elif ruta == '/api/pagos/ProcessMessage':
+            autorizacion = self.headers.get('Authorization', '')
+            if not autorizacion.startswith('Bearer ') or not validar_jwt(autorizacion[7:]):
+                self.responder(401, {'error': 'token inválido o expirado'})
+            elif self.fraccion_error and random.random() < self.fraccion_error:
+                # Error de negocio con HTTP 200, como el que a veces devuelve el servicio real
+                self.responder(200, {'CodigoRespuesta': 99, 'Mensaje': 'error', 'error': 'transacción rechazada'})
+            else:
+                self.responder(200, {'CodigoRespuesta': 0, 'Mensaje': 'OK'})
+        else:
+            self.responder(404, {'error': 'no encontrado'})
+
+class ServidorHTTPSimulado(ThreadingHTTPServer):
+    # La cola de escucha por defecto (5) descarta SYN con cientos de clientes; igual que el backlog de los loopback
+    request_queue_size = 4096
+    daemon_threads = True
+
+class ServidorSimulado:
+    def __init__(self, host='127.0.0.1', puerto=0, ttl_token=TTL_TOKEN, retardo_ms=0, fraccion_error=0.0):
+        manejador = type('ManejadorConfigurado', (ManejadorSimulado,),
+                         {'ttl_token': ttl_token, 'retardo': retardo_ms / 1000, 'fraccion_error': fraccion_error})
+        self.servidor = ServidorHTTPSimulado((host, puerto), manejador)
+        self.servidor.estado = EstadoServidor()
+        self.hebra = None
+
+    @property
+    def url(self):
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        """Atender requests en segundo plano dentro del proceso actual"""
+        self.hebra = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hebra.start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor simulado para pruebas de carga sin conexión')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8089)
+    parser.add_argument('--ttl-token', type=int, default=TTL_TOKEN, help='Vida de los tokens emitidos (segundos)')
+    parser.add_argument('--retardo-ms', type=float, default=0, help='Retardo artificial por request (ms)')
+    parser.add_argument('--fraccion-error', type=float, default=0,
+                        help='Fracción de POST de pagos que responden 200 con un error en el cuerpo')
+    args = parser.parse_args()
+
+    servidor = ServidorSimulado(args.host, args.puerto, args.ttl_token, args.retardo_ms, args.fraccion_error)
+    print(f"🧪 Servidor simulado escuchando en {servidor.url}")
+    print("   GET  /gateway/user/verify/number")
+    print("   POST /api/pagos/ProcessMessage (requiere Bearer válido)")
+    print(f"   POST /token (emite JWT con vida de {args.ttl_token}s)")
+    print("   GET  /metrics (formato Prometheus)")
+    try:
+        servidor.servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
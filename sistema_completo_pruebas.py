@@ -8,8 +8,13 @@ import subprocess
 import sys
 import os
 import argparse
+import json
+import re
+import time
 from datetime import datetime
 
+from perfilado import VARIABLE_DIRECTORIO, VARIABLE_OPCIONES, Perfilador, combinar_trazas
+
 def verificar_dependencias():
     """Verificar e instalar dependencias necesarias"""
     paquetes_requeridos = ['matplotlib', 'seaborn', 'pandas', 'numpy', 'plotly', 'jinja2']
@@ -30,8 +35,54 @@ def verificar_dependencias():
     else:
         print("✅ Todas las dependencias están instaladas!")
 
-def ejecutar_pruebas_y_generar_reporte(tipo_prueba):
-    """Ejecutar pruebas y generar reporte HTML automáticamente"""
+def preparar_perfilado(cprofile=False, memoria=False):
+    """Crear el directorio de perfilado y habilitarlo en los subprocesos del pipeline"""
+    directorio = f"perfilado_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(directorio, exist_ok=True)
+    opciones = [nombre for nombre, activa in (('cprofile', cprofile), ('memoria', memoria)) if activa]
+    os.environ[VARIABLE_DIRECTORIO] = os.path.abspath(directorio)
+    os.environ[VARIABLE_OPCIONES] = ','.join(opciones)
+    return Perfilador(os.path.abspath(directorio), cprofile, memoria, nombre_proceso='sistema_completo_pruebas.py')
+
+def archivo_resultados_guardado(salida):
+    """Archivo que guardó ejecutar_pruebas_carga.py según su salida (el último si hay varios), o None"""
+    coincidencias = re.findall(r'Resultados guardados en: (\S+)', salida or '')
+    return coincidencias[-1] if coincidencias else None
+
+def finalizar_perfilado(perfilador, total_s, archivo_resultados=None):
+    """Combinar las trazas de todos los procesos y guardar los tiempos en el JSON de resultados de esta ejecución"""
+    perfilador.guardar_fragmento()
+    archivo_traza = os.path.join(perfilador.directorio, 'traza.json')
+    mediciones = combinar_trazas(perfilador.directorio, archivo_traza)
+
+    print("\n" + "="*50)
+    print("⏱️  TIEMPO POR ETAPA")
+    print("="*50)
+    for medicion in mediciones:
+        memoria = f" | pico {medicion['pico_memoria_mb']:.1f} MB" if 'pico_memoria_mb' in medicion else ""
+        print(f"  {medicion['etapa']:<35} {medicion['duracion_s']:>9.3f}s  ({medicion['proceso']}){memoria}")
+    print(f"  {'TOTAL':<35} {total_s:>9.3f}s")
+
+    # Solo el archivo que escribió esta ejecución: otro sería una ejecución histórica ajena
+    if archivo_resultados and os.path.exists(archivo_resultados):
+        with open(archivo_resultados, 'r', encoding='utf-8') as f:
+            resultados = json.load(f)
+        resultados['_perfil_etapas'] = {
+            'total_s': total_s,
+            'traza': archivo_traza,
+            'mediciones': mediciones
+        }
+        with open(archivo_resultados, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"💾 Tiempos por etapa agregados a: {archivo_resultados}")
+    else:
+        print("⚠️  Esta ejecución no guardó resultados: los tiempos por etapa quedan solo en la traza")
+
+    print(f"🧭 Traza Chrome/Perfetto: {archivo_traza} (abrir en ui.perfetto.dev o chrome://tracing)")
+
+def ejecutar_pruebas_y_generar_reporte(tipo_prueba, perfilador=None):
+    """Ejecutar pruebas y generar reporte HTML automáticamente; devuelve (éxito, archivo de resultados)"""
+    perfilador = perfilador or Perfilador()
     print("="*80)
     print("🚀 SISTEMA COMPLETO DE PRUEBAS DE CARGA")
     print("="*80)
@@ -40,38 +91,42 @@ def ejecutar_pruebas_y_generar_reporte(tipo_prueba):
     print()
     
     # Verificar dependencias
-    verificar_dependencias()
+    with perfilador.etapa('verificar_dependencias'):
+        verificar_dependencias()
     
     # Paso 1: Ejecutar pruebas de carga
     print("\n" + "="*50)
     print("📊 PASO 1: Ejecutando pruebas de carga...")
     print("="*50)
     
-    resultado = subprocess.run([sys.executable, 'ejecutar_pruebas_carga.py', tipo_prueba], 
-                              capture_output=True, text=True)
+    with perfilador.etapa('ejecutar_pruebas_carga.py', 'subproceso'):
+        resultado = subprocess.run([sys.executable, 'ejecutar_pruebas_carga.py', tipo_prueba], 
+                                  capture_output=True, text=True)
     
     if resultado.returncode != 0:
         print("❌ ERROR: Las pruebas de carga fallaron!")
         print("STDOUT:", resultado.stdout)
         print("STDERR:", resultado.stderr)
-        return False
+        return False, archivo_resultados_guardado(resultado.stdout)
     
     print("✅ Pruebas de carga completadas exitosamente!")
     print(resultado.stdout)
+    archivo_resultados = archivo_resultados_guardado(resultado.stdout)
     
     # Paso 2: Generar reporte HTML
     print("\n" + "="*50)
     print("🎨 PASO 2: Generando reporte HTML interactivo...")
     print("="*50)
     
-    resultado = subprocess.run([sys.executable, 'generar_reporte_html.py'], 
-                              capture_output=True, text=True)
+    with perfilador.etapa('generar_reporte_html.py', 'subproceso'):
+        resultado = subprocess.run([sys.executable, 'generar_reporte_html.py'], 
+                                  capture_output=True, text=True)
     
     if resultado.returncode != 0:
         print("❌ ERROR: La generación del reporte HTML falló!")
         print("STDOUT:", resultado.stdout)
         print("STDERR:", resultado.stderr)
-        return False
+        return False, archivo_resultados
     
     print("✅ Reporte HTML generado exitosamente!")
     print(resultado.stdout)
@@ -99,7 +154,7 @@ def ejecutar_pruebas_y_generar_reporte(tipo_prueba):
         print(f"\n🌐 Para ver el dashboard interactivo, abre en tu navegador:")
         print(f"   {os.path.abspath(archivo_html_reciente)}")
     
-    return True
+    return True, archivo_resultados
 
 def mostrar_ayuda():
     """Mostrar información de ayuda del sistema completo"""
@@ -115,10 +170,15 @@ def mostrar_ayuda():
     print("  get     - Solo prueba GET (verify number)")
     print("  post    - Solo prueba POST (pagos)")
     print("  ambas   - Ambas pruebas secuencialmente")
+    print("\nOpciones:")
+    print("  --profile            Medir cada etapa y exportar una traza Chrome/Perfetto")
+    print("  --profile-cprofile   Con --profile, capturar cProfile de las etapas del reporte")
+    print("  --profile-memoria    Con --profile, capturar tracemalloc de las etapas del reporte")
     print("\nEjemplos:")
     print("  python3 sistema_completo_pruebas.py get")
     print("  python3 sistema_completo_pruebas.py post")
     print("  python3 sistema_completo_pruebas.py ambas")
+    print("  python3 sistema_completo_pruebas.py get --profile --profile-cprofile --profile-memoria")
     print("\nEl sistema generará:")
     print("  📊 Archivo JSON con resultados detallados")
     print("  🌐 Dashboard HTML interactivo con gráficos")
@@ -136,6 +196,12 @@ def main():
     parser.add_argument('tipo', nargs='?', 
                        choices=['get', 'post', 'ambas', 'help', '-h'], 
                        help='Tipo de prueba a ejecutar')
+    parser.add_argument('--profile', action='store_true',
+                       help='Medir cada etapa del pipeline y exportar una traza Chrome/Perfetto')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                       help='Capturar cProfile de las etapas del reporte (requiere --profile)')
+    parser.add_argument('--profile-memoria', action='store_true',
+                       help='Capturar tracemalloc de las etapas del reporte (requiere --profile)')
     
     # Si no hay argumentos, mostrar ayuda
     if len(sys.argv) == 1:
@@ -153,8 +219,18 @@ def main():
         mostrar_ayuda()
         return
     
+    if (args.profile_cprofile or args.profile_memoria) and not args.profile:
+        parser.error("--profile-cprofile y --profile-memoria requieren --profile")
+    
     # Ejecutar sistema completo
-    exito = ejecutar_pruebas_y_generar_reporte(args.tipo)
+    perfilador = None
+    if args.profile:
+        perfilador = preparar_perfilado(args.profile_cprofile, args.profile_memoria)
+        print(f"⏱️  Perfilado activo en: {perfilador.directorio}")
+    inicio = time.perf_counter()
+    exito, archivo_resultados = ejecutar_pruebas_y_generar_reporte(args.tipo, perfilador)
+    if perfilador:
+        finalizar_perfilado(perfilador, time.perf_counter() - inicio, archivo_resultados)
     sys.exit(0 if exito else 1)
 
 if __name__ == "__main__":
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Sitio Estático de Resultados
+Índice con filtros y una página por ejecución; solo se regeneran las ejecuciones nuevas o
+modificadas, en paralelo, con los recursos JS/CSS compartidos y modo de observación
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from jinja2 import Template
+
+from historial_resultados import listar_resultados
+
+DIRECTORIO_SITIO = 'sitio_resultados'
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+# Cambiar al modificar el formato de las páginas para forzar que todas se regeneren
+VERSION_SITIO = 2
+
+ESTILOS_INDICE = """
+.filtros {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 12px;
+    margin-bottom: 15px;
+}
+.filtros label {
+    display: flex;
+    flex-direction: column;
+    font-size: 0.85em;
+    color: #555;
+}
+.filtros input, .filtros select {
+    padding: 6px;
+    border: 1px solid #ccc;
+    border-radius: 5px;
+}
+.tabla-etapas th {
+    cursor: pointer;
+}
+.tabla-etapas td.error {
+    color: #c0392b;
+}
+"""
+
+FILTROS_JS = """
+(function () {
+    var tabla = document.getElementById('ejecuciones');
+    var filas = Array.prototype.slice.call(tabla.querySelectorAll('tbody tr'));
+    var campos = ['texto', 'tipo', 'desde', 'hasta', 'rps-min'].map(function (id) {
+        return document.getElementById('filtro-' + id);
+    });
+
+    function filtrar() {
+        var texto = campos[0].value.toLowerCase();
+        var tipo = campos[1].value;
+        var desde = campos[2].value ? Date.parse(campos[2].value) / 1000 : -Infinity;
+        var hasta = campos[3].value ? Date.parse(campos[3].value) / 1000 + 86400 : Infinity;
+        var rpsMin = parseFloat(campos[4].value) || 0;
+        var visibles = 0;
+        filas.forEach(function (fila) {
+            var d = fila.dataset;
+            var visible = d.busqueda.indexOf(texto) !== -1
+                && (!tipo || d.tipo === tipo)
+                && +d.marca >= desde && +d.marca < hasta
+                && +d.rps >= rpsMin;
+            fila.style.display = visible ? '' : 'none';
+            if (visible) { visibles++; }
+        });
+        document.getElementById('conteo').textContent = visibles + ' de ' + filas.length;
+    }
+
+    function ordenar(columna, numerica, ascendente) {
+        filas.sort(function (a, b) {
+            var x = a.children[columna].dataset.valor || a.children[columna].textContent;
+            var y = b.children[columna].dataset.valor || b.children[columna].textContent;
+            var r = numerica ? (+x) - (+y) : x.localeCompare(y);
+            return ascendente ? r : -r;
+        });
+        var cuerpo = tabla.querySelector('tbody');
+        filas.forEach(function (fila) { cuerpo.appendChild(fila); });
+    }
+
+    campos.forEach(function (campo) { campo.addEventListener('input', filtrar); });
+    Array.prototype.forEach.call(tabla.querySelectorAll('th'), function (th, indice) {
+        var ascendente = false;
+        th.addEventListener('click', function () {
+            ascendente = !ascendente;
+            ordenar(indice, th.dataset.numerica === '1', ascendente);
+        });
+    });
+    filtrar();
+})();
+"""
+
+PLANTILLA_INDICE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Historial de Pruebas de Carga</title>
+    <link rel="stylesheet" href="assets/estilos.css">
+</head>
+<body>
+    <div class="header">
+        <h1>🚀 Historial de Pruebas de Carga</h1>
+        <p>{{ ejecuciones|length }} ejecuciones - Actualizado el {{ timestamp }}</p>
+    </div>
+
+    <div class="info-section">
+        <div class="filtros">
+            <label>Buscar<input id="filtro-texto" type="search" placeholder="prueba o archivo"></label>
+            <label>Tipo
+                <select id="filtro-tipo">
+                    <option value="">Todos</option>
+                    {% for tipo in tipos %}<option value="{{ tipo }}">{{ tipo }}</option>{% endfor %}
+                </select>
+            </label>
+            <label>Desde<input id="filtro-desde" type="date"></label>
+            <label>Hasta<input id="filtro-hasta" type="date"></label>
+            <label>RPS mínimo<input id="filtro-rps-min" type="number" min="0"></label>
+        </div>
+        <p>Mostrando <span id="conteo"></span> pruebas</p>
+        <table class="tabla-etapas" id="ejecuciones">
+            <thead>
+                <tr>
+                    <th>Fecha</th><th>Prueba</th><th>Tipo</th><th data-numerica="1">RPS</th>
+                    <th data-numerica="1">RPS Exitosos</th><th data-numerica="1">Latencia Prom (ms)</th>
+                    <th data-numerica="1">P99 (ms)</th><th data-numerica="1">Errores</th><th>Archivo</th>
+                </tr>
+            </thead>
+            <tbody>
+            {% for fila in filas %}
+                <tr data-busqueda="{{ (fila.prueba ~ ' ' ~ fila.archivo)|lower }}" data-tipo="{{ fila.tipo }}"
+                    data-marca="{{ fila.marca }}" data-rps="{{ fila.rps }}">
+                    <td data-valor="{{ fila.marca }}">{{ fila.fecha }}</td>
+                    <td>{% if fila.pagina %}<a href="{{ fila.pagina }}">{{ fila.prueba|e }}</a>{% else %}{{ fila.prueba|e }}{% endif %}</td>
+                    <td>{{ fila.tipo }}</td>
+                    <td data-valor="{{ fila.rps }}">{{ '%.1f'|format(fila.rps) }}</td>
+                    <td data-valor="{{ fila.rps_exitosos }}">{{ '%.1f'|format(fila.rps_exitosos) }}</td>
+                    <td data-valor="{{ fila.latencia_promedio }}">{{ '%.1f'|format(fila.latencia_promedio) }}</td>
+                    <td data-valor="{{ fila.p99 }}">{{ '%.1f'|format(fila.p99) if fila.p99 is not none else '-' }}</td>
+                    <td data-valor="{{ fila.errores }}">{{ fila.errores }}</td>
+                    <td{% if fila.error %} class="error" title="{{ fila.error|e }}"{% endif %}>{{ fila.archivo }}</td>
+                </tr>
+            {% endfor %}
+            </tbody>
+        </table>
+    </div>
+
+    <div class="footer">
+        <p>Generado automáticamente por el Sistema de Análisis de Carga</p>
+    </div>
+    <script src="assets/filtros.js"></script>
+</body>
+</html>
+"""
+
+def firma_archivo(ruta):
+    """Identificar el contenido de un archivo de resultados sin leerlo completo"""
+    estado = os.stat(ruta)
+    return f"{estado.st_size}:{estado.st_mtime_ns}:{VERSION_SITIO}"
+
+def tipo_prueba(datos):
+    if 'etapas' in datos:
+        return 'perfil'
+    if 'intervalos' in datos:
+        return 'intervalos'
+    if 'ensayos' in datos:
+        return 'ensayos'
+    if 'modo_conexion' in datos:
+        return 'ciclo_vida'
+    return 'simple'
+
+def renderizar_ejecucion(ruta, directorio_sitio):
+    """Generar la página de una ejecución y devolver su entrada del manifiesto (se ejecuta en un proceso hijo)"""
+    from generar_reporte_html import AnalizadorHTML
+
+    nombre = os.path.basename(ruta).rsplit('.', 1)[0]
+    entrada = {'archivo': os.path.basename(ruta), 'pagina': None, 'pruebas': [], 'error': None}
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            tipos = {clave: tipo_prueba(datos) for clave, datos in json.load(f).items()
+                     if not clave.startswith('_') and isinstance(datos, dict)}
+        analizador = AnalizadorHTML()
+        analizador.cargar_resultados(ruta)
+        for clave, datos in analizador.datos_parseados.items():
+            entrada['pruebas'].append({
+                'prueba': clave,
+                'tipo': tipos.get(clave, 'simple'),
+                'rps': datos.get('rps_reportado', 0),
+                'rps_exitosos': datos.get('rps_exitosos', datos.get('rps_reportado', 0)),
+                'latencia_promedio': datos.get('latencia_promedio', 0),
+                'p99': datos.get('percentiles', {}).get('p99'),
+                'errores': datos.get('total_errores', 0)
+            })
+        html = analizador.renderizar_html(
+            include_plotlyjs='../assets/plotly.min.js',
+            hoja_estilos='../assets/estilos.css',
+            enlace_indice='../index.html'
+        ) if analizador.datos_parseados else None
+        if html:
+            entrada['pagina'] = f"ejecuciones/{nombre}.html"
+            escribir_atomico(os.path.join(directorio_sitio, entrada['pagina']), html)
+    except Exception as e:
+        entrada['error'] = f"{type(e).__name__}: {e}"
+    return entrada
+
+def escribir_atomico(ruta, contenido):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+
+class SitioResultados:
+    def __init__(self, directorio_resultados='.', directorio_sitio=DIRECTORIO_SITIO, procesos=None):
+        self.directorio_resultados = directorio_resultados
+        self.directorio_sitio = directorio_sitio
+        self.procesos = procesos or os.cpu_count() or 1
+        self.archivo_manifiesto = os.path.join(directorio_sitio, ARCHIVO_MANIFIESTO)
+        self.manifiesto = {'version': VERSION_SITIO, 'recursos': {}, 'ejecuciones': {}}
+        if os.path.exists(self.archivo_manifiesto):
+            with open(self.archivo_manifiesto, 'r', encoding='utf-8') as f:
+                self.manifiesto = json.load(f)
+
+    def escribir_recursos(self):
+        """Escribir plotly.js, la hoja de estilos y el script de filtros solo si cambiaron"""
+        import plotly
+        from plotly.offline import get_plotlyjs
+        from generar_reporte_html import ESTILOS_DASHBOARD
+
+        os.makedirs(os.path.join(self.directorio_sitio, 'assets'), exist_ok=True)
+        recursos = {
+            'plotly.min.js': (f"plotly-{plotly.__version__}", get_plotlyjs),
+            'estilos.css': (None, lambda: ESTILOS_DASHBOARD + ESTILOS_INDICE),
+            'filtros.js': (None, lambda: FILTROS_JS)
+        }
+        escritos = []
+        for nombre, (version, generar) in recursos.items():
+            ruta = os.path.join(self.directorio_sitio, 'assets', nombre)
+            # plotly.js pesa varios MB: se identifica por versión en lugar de generarlo y hashearlo cada vez
+            contenido = None if version else generar()
+            huella = version or hashlib.sha1(contenido.encode()).hexdigest()
+            if self.manifiesto['recursos'].get(nombre) == huella and os.path.exists(ruta):
+                continue
+            escribir_atomico(ruta, contenido if contenido is not None else generar())
+            self.manifiesto['recursos'][nombre] = huella
+            escritos.append(nombre)
+        return escritos
+
+    def pendientes(self):
+        """Comparar los resultados con el manifiesto: (por regenerar, eliminados)"""
+        actuales = {os.path.basename(ruta): (marca, ruta) for marca, ruta in listar_resultados(self.directorio_resultados)}
+        ejecuciones = self.manifiesto['ejecuciones']
+        por_regenerar = []
+        for nombre, (marca, ruta) in actuales.items():
+            anterior = ejecuciones.get(nombre)
+            pagina = anterior and anterior.get('pagina')
+            if (not anterior or anterior['firma'] != firma_archivo(ruta)
+                    or (pagina and not os.path.exists(os.path.join(self.directorio_sitio, pagina)))):
+                por_regenerar.append((marca, ruta))
+        eliminados = [nombre for nombre in ejecuciones if nombre not in actuales]
+        return por_regenerar, eliminados
+
+    def generar(self):
+        """Actualizar el sitio; devuelve cuántas páginas se regeneraron y cuántas se eliminaron"""
+        os.makedirs(os.path.join(self.directorio_sitio, 'ejecuciones'), exist_ok=True)
+        if self.manifiesto.get('version') != VERSION_SITIO:
+            self.manifiesto = {'version': VERSION_SITIO, 'recursos': {}, 'ejecuciones': {}}
+        recursos = self.escribir_recursos()
+        por_regenerar, eliminados = self.pendientes()
+
+        for nombre in eliminados:
+            pagina = self.manifiesto['ejecuciones'].pop(nombre).get('pagina')
+            if pagina and os.path.exists(os.path.join(self.directorio_sitio, pagina)):
+                os.remove(os.path.join(self.directorio_sitio, pagina))
+
+        if por_regenerar:
+            # La firma se toma antes de renderizar: si el archivo cambia mientras tanto, se regenera otra vez
+            firmas = {ruta: firma_archivo(ruta) for _, ruta in por_regenerar}
+            with ProcessPoolExecutor(max_workers=min(self.procesos, len(por_regenerar))) as ejecutor:
+                futuros = {ejecutor.submit(renderizar_ejecucion, ruta, self.directorio_sitio): (marca, ruta)
+                           for marca, ruta in por_regenerar}
+                for futuro in as_completed(futuros):
+                    marca, ruta = futuros[futuro]
+                    entrada = futuro.result()
+                    entrada.update({'marca': marca, 'firma': firmas[ruta]})
+                    self.manifiesto['ejecuciones'][entrada['archivo']] = entrada
+                    if entrada['error']:
+                        print(f"⚠️  {entrada['archivo']}: {entrada['error']}")
+
+        if por_regenerar or eliminados or recursos or not os.path.exists(os.path.join(self.directorio_sitio, 'index.html')):
+            self.escribir_indice()
+        escribir_atomico(self.archivo_manifiesto, json.dumps(self.manifiesto, indent=1, ensure_ascii=False))
+        return len(por_regenerar), len(eliminados)
+
+    def escribir_indice(self):
+        ejecuciones = sorted(self.manifiesto['ejecuciones'].values(), key=lambda e: (e['marca'], e['archivo']),
+                             reverse=True)
+        filas = []
+        for ejecucion in ejecuciones:
+            fecha = datetime.fromtimestamp(ejecucion['marca']).strftime('%Y-%m-%d %H:%M:%S')
+            pruebas = ejecucion['pruebas'] or [{'prueba': '(sin datos)', 'tipo': '-', 'rps': 0, 'rps_exitosos': 0,
+                                                'latencia_promedio': 0, 'p99': None, 'errores': 0}]
+            for prueba in pruebas:
+                filas.append(dict(prueba, fecha=fecha, marca=ejecucion['marca'], archivo=ejecucion['archivo'],
+                                  pagina=ejecucion['pagina'], error=ejecucion['error']))
+        html = Template(PLANTILLA_INDICE).render(
+            ejecuciones=ejecuciones,
+            filas=filas,
+            tipos=sorted({fila['tipo'] for fila in filas}),
+            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        escribir_atomico(os.path.join(self.directorio_sitio, 'index.html'), html)
+
+    def observar(self, intervalo=5):
+        """Regenerar cada vez que aparecen o cambian resultados"""
+        print(f"👀 Observando {os.path.abspath(self.directorio_resultados)} cada {intervalo}s (Ctrl+C para salir)")
+        while True:
+            inicio = time.time()
+            regeneradas, eliminadas = self.generar()
+            if regeneradas or eliminadas:
+                print(f"🔁 {datetime.now().strftime('%H:%M:%S')} {regeneradas} páginas regeneradas, "
+                      f"{eliminadas} eliminadas en {time.time() - inicio:.1f}s")
+            time.sleep(intervalo)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera un sitio estático con el índice de todas las ejecuciones y una página por ejecución'
+    )
+    parser.add_argument('--directorio', default='.', help='Directorio con los resultados_pruebas_carga_*.json')
+    parser.add_argument('--salida', default=DIRECTORIO_SITIO, help='Directorio del sitio')
+    parser.add_argument('--procesos', type=int, help='Procesos para renderizar (por defecto la cantidad de CPU)')
+    parser.add_argument('--observar', action='store_true', help='Seguir regenerando al llegar nuevos resultados')
+    parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones con --observar')
+    parser.add_argument('--completo', action='store_true', help='Regenerar todas las páginas')
+    args = parser.parse_args()
+
+    sitio = SitioResultados(args.directorio, args.salida, args.procesos)
+    if args.completo:
+        sitio.manifiesto['ejecuciones'] = {}
+
+    if args.observar:
+        try:
+            sitio.observar(args.intervalo)
+        except KeyboardInterrupt:
+            return
+    else:
+        inicio = time.time()
+        regeneradas, eliminadas = sitio.generar()
+        print(f"🌐 Sitio actualizado en {time.time() - inicio:.1f}s: {regeneradas} páginas regeneradas, "
+              f"{eliminadas} eliminadas, {len(sitio.manifiesto['ejecuciones'])} ejecuciones en el índice")
+        print(f"   Abre: {os.path.abspath(os.path.join(args.salida, 'index.html'))}")
+
+if __name__ == "__main__":
+    main()
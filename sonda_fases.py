@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Sonda de Fases de Latencia
+Envía requests instrumentados a baja tasa junto a la carga de wrk y separa el tiempo en
+DNS, conexión TCP, handshake TLS, tiempo hasta el primer byte y transferencia del cuerpo.
+Cada request sale a su hora desde un pool pequeño de hebras, para que uno lento no frene
+a los siguientes
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from estadisticas import (fusionar_histogramas, media_histograma, nuevo_histograma, percentil_histograma,
+                          registrar_en_histograma)
+
+TASA_SONDA = 1.0
+VENTANA_SONDA = 10
+TIMEOUT_SONDA = 10
+# Requests de la sonda en vuelo a la vez; si están todos ocupados, el turno se cuenta como omitido
+HILOS_SONDA = 16
+
+FASES = ['dns', 'conexion', 'tls', 'primer_byte', 'transferencia']
+NOMBRES_FASES = {
+    'dns': 'DNS',
+    'conexion': 'Conexión TCP',
+    'tls': 'Handshake TLS',
+    'primer_byte': 'Primer byte (TTFB)',
+    'transferencia': 'Transferencia'
+}
+COLORES_FASES = {
+    'dns': '#95E1D3',
+    'conexion': '#4ECDC4',
+    'tls': '#FFE66D',
+    'primer_byte': '#FF6B6B',
+    'transferencia': '#A8E6CF'
+}
+
+class _ArchivoComoSocket:
+    """HTTPResponse lee de sock.makefile(); se le entrega el archivo ya abierto"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+
+    def makefile(self, *args, **kwargs):
+        return self.archivo
+
+class ErrorFase(Exception):
+    def __init__(self, fase, error):
+        super().__init__(f"{fase}: {error}")
+        self.fase = fase
+
+def medir_fases(url, metodo='GET', cabeceras=None, cuerpo=None, timeout=TIMEOUT_SONDA):
+    """Hacer un request en una conexión nueva y devolver (estado, {fase: ms})
+
+    Cada request abre su propia conexión para medir DNS, TCP y TLS siempre (TLS solo
+    en https; en http la fase no aparece). Igual que wrk, no se verifica el certificado.
+    Lanza ErrorFase con la fase que falló.
+    """
+    partes = urlsplit(url)
+    seguro = partes.scheme == 'https'
+    host = partes.hostname
+    puerto = partes.port or (443 if seguro else 80)
+    ruta = (partes.path or '/') + (f"?{partes.query}" if partes.query else '')
+    datos = cuerpo.encode() if isinstance(cuerpo, str) else cuerpo
+
+    lineas = [f"{metodo} {ruta} HTTP/1.1", f"Host: {partes.netloc}", "Connection: close"]
+    for clave, valor in (cabeceras or {}).items():
+        lineas.append(f"{clave}: {valor}")
+    if datos:
+        lineas.append(f"Content-Length: {len(datos)}")
+    solicitud = ('\r\n'.join(lineas) + '\r\n\r\n').encode() + (datos or b'')
+
+    tiempos = {}
+    fase = 'dns'
+    conexion = None
+    try:
+        t0 = time.perf_counter()
+        direccion = socket.getaddrinfo(host, puerto, type=socket.SOCK_STREAM)[0]
+        t1 = time.perf_counter()
+        tiempos['dns'] = (t1 - t0) * 1000
+
+        fase = 'conexion'
+        conexion = socket.socket(direccion[0], direccion[1], direccion[2])
+        conexion.settimeout(timeout)
+        conexion.connect(direccion[4])
+        t2 = time.perf_counter()
+        tiempos['conexion'] = (t2 - t1) * 1000
+
+        t3 = t2
+        if seguro:
+            fase = 'tls'
+            contexto = ssl.create_default_context()
+            contexto.check_hostname = False
+            contexto.verify_mode = ssl.CERT_NONE
+            conexion = contexto.wrap_socket(conexion, server_hostname=host)
+            t3 = time.perf_counter()
+            tiempos['tls'] = (t3 - t2) * 1000
+
+        fase = 'primer_byte'
+        conexion.sendall(solicitud)
+        archivo = conexion.makefile('rb')
+        if not archivo.peek(1):
+            raise ConnectionError('el servidor cerró la conexión sin responder')
+        t4 = time.perf_counter()
+        tiempos['primer_byte'] = (t4 - t3) * 1000
+
+        fase = 'transferencia'
+        respuesta = http.client.HTTPResponse(_ArchivoComoSocket(archivo), method=metodo)
+        respuesta.begin()
+        respuesta.read()
+        tiempos['transferencia'] = (time.perf_counter() - t4) * 1000
+        return respuesta.status, tiempos
+    except Exception as e:
+        raise ErrorFase(fase, e) from e
+    finally:
+        if conexion:
+            conexion.close()
+
+class SondaFases:
+    """Sonda a tasa fija que acumula histogramas por fase en ventanas de tiempo"""
+
+    def __init__(self, url, tasa=TASA_SONDA, ventana=VENTANA_SONDA, metodo='GET', cabeceras=None,
+                 cuerpo=None, timeout=TIMEOUT_SONDA, hilos=HILOS_SONDA):
+        self.url = url
+        self.tasa = tasa
+        self.ventana = ventana
+        self.metodo = metodo
+        self.cabeceras = cabeceras or {}
+        self.cuerpo = cuerpo
+        self.timeout = timeout
+        self.hilos = hilos
+        self.inicio = None
+        self.ventanas = {}
+        self.codigos_estado = {}
+        self.errores_por_fase = {}
+        self.ultimo_error = None
+        self._detener = threading.Event()
+        self._hebra = None
+        self._pool = None
+        self._libres = threading.BoundedSemaphore(hilos)
+        self._candado = threading.Lock()
+
+    def ventana_de(self, marca):
+        indice = int((marca - self.inicio) // self.ventana)
+        if indice not in self.ventanas:
+            self.ventanas[indice] = {
+                'muestras': 0,
+                'errores': 0,
+                'omitidas': 0,
+                'histogramas': {fase: nuevo_histograma() for fase in FASES}
+            }
+        return self.ventanas[indice]
+
+    def sondear(self, marca=None):
+        """Enviar un request instrumentado y registrarlo en la ventana de su turno"""
+        marca = marca or time.time()
+        try:
+            estado, tiempos = medir_fases(self.url, self.metodo, self.cabeceras, self.cuerpo, self.timeout)
+        except ErrorFase as e:
+            with self._candado:
+                self.ventana_de(marca)['errores'] += 1
+                self.errores_por_fase[e.fase] = self.errores_por_fase.get(e.fase, 0) + 1
+                self.ultimo_error = str(e)
+            return
+        with self._candado:
+            ventana = self.ventana_de(marca)
+            ventana['muestras'] += 1
+            clave = str(estado)
+            self.codigos_estado[clave] = self.codigos_estado.get(clave, 0) + 1
+            for fase, valor in tiempos.items():
+                registrar_en_histograma(ventana['histogramas'][fase], valor)
+
+    def omitir(self, marca):
+        """Turno que no se pudo enviar: todas las hebras seguían ocupadas con requests lentos"""
+        with self._candado:
+            self.ventana_de(marca)['omitidas'] += 1
+
+    def _enviar_turno(self, marca):
+        try:
+            self.sondear(marca)
+        finally:
+            self._libres.release()
+
+    def iniciar(self, inicio=None):
+        """Sondear en segundo plano; `inicio` fija el instante cero compartido con wrk"""
+        self.inicio = inicio or time.time()
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix='sonda')
+
+        def ciclo():
+            numero = 0
+            while not self._detener.wait(max(0, self.inicio + numero / self.tasa - time.time())):
+                marca = self.inicio + numero / self.tasa
+                # Cada turno sale a su hora aunque los anteriores sigan en vuelo; sin hebra libre se omite
+                if self._libres.acquire(blocking=False):
+                    self._pool.submit(self._enviar_turno, marca)
+                else:
+                    self.omitir(marca)
+                numero += 1
+
+        self._hebra = threading.Thread(target=ciclo, daemon=True)
+        self._hebra.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hebra:
+            self._hebra.join()
+        if self._pool:
+            self._pool.shutdown(wait=True)
+        return self.exportar()
+
+    def exportar(self):
+        """Forma compacta que se guarda en el JSON de resultados"""
+        return {
+            'url': self.url,
+            'metodo': self.metodo,
+            'tasa': self.tasa,
+            'ventana': self.ventana,
+            'inicio': self.inicio,
+            'ventanas': [
+                dict(self.ventanas[indice], t_inicio=indice * self.ventana, t_fin=(indice + 1) * self.ventana)
+                for indice in sorted(self.ventanas)
+            ],
+            'codigos_estado': self.codigos_estado,
+            'errores_por_fase': self.errores_por_fase,
+            'ultimo_error': self.ultimo_error
+        }
+
+def resumir_sonda(sonda):
+    """Histograma total por fase y serie temporal de mediana/p99 por ventana"""
+    totales = {fase: fusionar_histogramas([v['histogramas'][fase] for v in sonda['ventanas']]) for fase in FASES}
+    resumen = {
+        'muestras': sum(v['muestras'] for v in sonda['ventanas']),
+        'errores': sum(v['errores'] for v in sonda['ventanas']),
+        'omitidas': sum(v.get('omitidas', 0) for v in sonda['ventanas']),
+        'fases': {
+            fase: {
+                'media': media_histograma(h),
+                'p50': percentil_histograma(h, 50),
+                'p90': percentil_histograma(h, 90),
+                'p99': percentil_histograma(h, 99)
+            } for fase, h in totales.items()
+        },
+        'serie': []
+    }
+    for ventana in sonda['ventanas']:
+        resumen['serie'].append({
+            't': (ventana['t_inicio'] + ventana['t_fin']) / 2,
+            'muestras': ventana['muestras'],
+            'errores': ventana['errores'],
+            'omitidas': ventana.get('omitidas', 0),
+            'p50': {fase: percentil_histograma(ventana['histogramas'][fase], 50) for fase in FASES},
+            'p99': {fase: percentil_histograma(ventana['histogramas'][fase], 99) for fase in FASES}
+        })
+    return resumen
+
+def crear_seccion_fases(sonda):
+    """Desglose de la latencia por fase a lo largo de la prueba para el dashboard"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    resumen = resumir_sonda(sonda)
+    filas = ''.join(
+        f"<tr><td>{NOMBRES_FASES[fase]}</td>"
+        + ''.join(f"<td>{'-' if r[c] is None else f'{r[c]:.2f}'}</td>" for c in ('media', 'p50', 'p90', 'p99'))
+        + "</tr>"
+        for fase, r in resumen['fases'].items()
+    )
+    errores = ', '.join(f"{NOMBRES_FASES.get(f, f)}: {n}" for f, n in sonda.get('errores_por_fase', {}).items())
+    texto = (
+        f"<p>Sonda de {sonda['tasa']:g} req/s a {sonda['metodo']} {sonda['url']} en conexiones nuevas: "
+        f"{resumen['muestras']:,} muestras, {resumen['errores']:,} fallidas"
+        + (f" ({errores})" if errores else '')
+        + (f", {resumen['omitidas']:,} turnos omitidos con todas las hebras ocupadas (la latencia real es peor "
+           f"que la que muestran las muestras)" if resumen['omitidas'] else '') + ". Las fases se miden por separado; wrk solo reporta el total.</p>"
+        "<table class=\"tabla-etapas\"><tr><th>Fase</th><th>Media (ms)</th><th>P50 (ms)</th>"
+        "<th>P90 (ms)</th><th>P99 (ms)</th></tr>" + filas + "</table>"
+    )
+
+    t = [punto['t'] for punto in resumen['serie']]
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=['Mediana por fase (apilada, ms)', 'P99 por fase (ms)'])
+    for fase in FASES:
+        fig.add_trace(go.Bar(x=t, y=[punto['p50'][fase] or 0 for punto in resumen['serie']],
+                             name=NOMBRES_FASES[fase], marker_color=COLORES_FASES[fase],
+                             legendgroup=fase), row=1, col=1)
+        fig.add_trace(go.Scatter(x=t, y=[punto['p99'][fase] for punto in resumen['serie']],
+                                 name=NOMBRES_FASES[fase], mode='lines+markers', marker_color=COLORES_FASES[fase],
+                                 legendgroup=fase, showlegend=False), row=2, col=1)
+    fig.update_layout(height=650, barmode='stack', title_text='Desglose de Latencia por Fase', title_x=0.5)
+    fig.update_xaxes(title_text='Tiempo desde el inicio (s)', row=2, col=1)
+    return texto + fig.to_html(full_html=False, include_plotlyjs=False)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sonda de baja tasa que mide DNS, TCP, TLS, TTFB y transferencia por separado'
+    )
+    parser.add_argument('url', nargs='?', help='Endpoint a sondear')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de sondeo')
+    parser.add_argument('--tasa', type=float, default=TASA_SONDA, help='Requests por segundo')
+    parser.add_argument('--ventana', type=float, default=VENTANA_SONDA, help='Segundos por ventana de histogramas')
+    parser.add_argument('--metodo', default='GET')
+    parser.add_argument('--cabecera', action='append', default=[], help="Cabecera 'Nombre: valor' (repetible)")
+    parser.add_argument('--cuerpo', help='Cuerpo del request (texto)')
+    parser.add_argument('--salida', help='Guardar el resultado de la sonda en un JSON')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("Indica la URL a sondear")
+    if args.tasa <= 0:
+        parser.error("--tasa debe ser mayor que 0")
+    cabeceras = dict(c.split(':', 1) for c in args.cabecera)
+    cabeceras = {clave.strip(): valor.strip() for clave, valor in cabeceras.items()}
+
+    print(f"🔬 Sondeando {args.metodo} {args.url} a {args.tasa:g} req/s durante {args.duracion:g}s...")
+    sonda = SondaFases(args.url, args.tasa, args.ventana, args.metodo, cabeceras, args.cuerpo).iniciar()
+    try:
+        time.sleep(args.duracion)
+    except KeyboardInterrupt:
+        pass
+    resultado = sonda.detener()
+    resumen = resumir_sonda(resultado)
+
+    print(f"\n{'Fase':<20} {'Media':>10} {'P50':>10} {'P90':>10} {'P99':>10}   (ms)")
+    for fase, r in resumen['fases'].items():
+        print(f"{NOMBRES_FASES[fase]:<20} " + ' '.join(
+            f"{'-' if r[c] is None else f'{r[c]:.2f}':>10}" for c in ('media', 'p50', 'p90', 'p99')))
+    print(f"\nMuestras: {resumen['muestras']:,} | fallidas: {resumen['errores']:,} | omitidas: {resumen['omitidas']:,}")
+    if resultado['ultimo_error']:
+        print(f"⚠️  Último error: {resultado['ultimo_error']}")
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Sonda guardada en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
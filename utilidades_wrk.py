@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Utilidades Comunes para Ejecutar wrk
+Construcción de comandos, duraciones y ejecución capturada
+"""
+
+import json
+import os
+import re
+import shlex
+import subprocess
+import time
+from datetime import datetime
+
+# Margen adicional sobre la duración de wrk antes de considerar un timeout
+MARGEN_TIMEOUT = 100
+
+# Delimitadores del documento JSON que imprime done() en los scripts mejorados (json_summary.lua)
+INICIO_RESUMEN_JSON = '=== JSON SUMMARY BEGIN ==='
+FIN_RESUMEN_JSON = '=== JSON SUMMARY END ==='
+
+# Niveles de recolección por respuesta de los scripts mejorados (argumentos tras '--')
+NIVELES_RECOLECCION = ['none', 'sampled', 'full']
+MUESTREO_POR_DEFECTO = 10
+
+def parsear_duracion(texto):
+    """Convertir una duración estilo wrk ('30s', '5m', '1h' o número) a segundos"""
+    if isinstance(texto, (int, float)):
+        return float(texto)
+    texto = str(texto).strip().lower()
+    match = re.fullmatch(r'([\d.]+)\s*(ms|s|m|h)?', texto)
+    if not match:
+        raise ValueError(f"Duración no válida: {texto}")
+    valor = float(match.group(1))
+    unidad = match.group(2) or 's'
+    factores = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return valor * factores[unidad]
+
+def formatear_duracion(segundos):
+    """Formatear segundos como argumento -d de wrk"""
+    return f"{max(1, int(round(segundos)))}s"
+
+def parsear_comando_wrk(comando):
+    """Extraer hilos, conexiones, duración, script, URL y argumentos de un comando wrk"""
+    partes = shlex.split(comando)
+    opciones = {
+        'hilos': None,
+        'conexiones': None,
+        'duracion': None,
+        'script': None,
+        'url': None,
+        'extra': [],
+        'args_script': []
+    }
+    i = 1 if partes and partes[0].endswith('wrk') else 0
+    while i < len(partes):
+        parte = partes[i]
+        if parte == '--':
+            opciones['args_script'] = partes[i + 1:]
+            break
+        match = re.fullmatch(r'-([tcds])(.*)', parte)
+        if match:
+            valor = match.group(2)
+            if not valor:
+                i += 1
+                valor = partes[i]
+            clave = {'t': 'hilos', 'c': 'conexiones', 'd': 'duracion', 's': 'script'}[match.group(1)]
+            if clave in ('hilos', 'conexiones'):
+                opciones[clave] = int(valor)
+            elif clave == 'duracion':
+                opciones[clave] = parsear_duracion(valor)
+            else:
+                opciones[clave] = valor
+        elif parte.startswith('http://') or parte.startswith('https://'):
+            opciones['url'] = parte
+        else:
+            opciones['extra'].append(parte)
+        i += 1
+    return opciones
+
+def construir_comando_wrk(hilos, conexiones, duracion, url, script=None, extra=None, args_script=None):
+    """Construir un comando wrk a partir de sus parámetros"""
+    # wrk exige al menos una conexión por hilo
+    conexiones = max(1, int(conexiones))
+    hilos = max(1, min(int(hilos), conexiones))
+    partes = ['wrk', f'-t{hilos}', f'-c{conexiones}', f'-d{formatear_duracion(duracion)}']
+    partes.extend(extra or [])
+    if script:
+        partes.extend(['-s', script])
+    partes.append(url)
+    if args_script:
+        partes.append('--')
+        partes.extend(args_script)
+    return ' '.join(shlex.quote(p) for p in partes)
+
+def ajustar_comando_wrk(comando, **cambios):
+    """Devolver una copia del comando wrk con los parámetros indicados reemplazados"""
+    opciones = parsear_comando_wrk(comando)
+    opciones.update({k: v for k, v in cambios.items() if v is not None})
+    return construir_comando_wrk(
+        opciones['hilos'] or 1,
+        opciones['conexiones'] or 1,
+        opciones['duracion'] or 10,
+        opciones['url'],
+        script=opciones['script'],
+        extra=opciones['extra'],
+        args_script=opciones['args_script']
+    )
+
+def ejecutar_wrk(comando, timeout=None):
+    """Ejecutar un comando wrk y devolver un registro con el mismo formato del ejecutor"""
+    if timeout is None:
+        duracion = parsear_comando_wrk(comando)['duracion'] or 300
+        timeout = duracion + MARGEN_TIMEOUT
+
+    tiempo_inicio = time.time()
+    try:
+        resultado = subprocess.run(
+            comando,
+            shell=True,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        return {
+            'comando': comando,
+            'stdout': resultado.stdout,
+            'stderr': resultado.stderr,
+            'return_code': resultado.returncode,
+            'execution_time': time.time() - tiempo_inicio,
+            'timestamp': datetime.now().isoformat()
+        }
+    except subprocess.TimeoutExpired:
+        return {
+            'comando': comando,
+            'error': f'Timeout después de {timeout:.0f} segundos',
+            'execution_time': time.time() - tiempo_inicio,
+            'timestamp': datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            'comando': comando,
+            'error': str(e),
+            'execution_time': time.time() - tiempo_inicio,
+            'timestamp': datetime.now().isoformat()
+        }
+
+def ejecutar_wrk_por_intervalos(comando, intervalo, duracion=None):
+    """Ejecutar el comando en tramos consecutivos de `intervalo` segundos para obtener una serie temporal
+
+    Cada tramo guarda su desfase dentro de la ejecución (t_inicio/t_fin) y la
+    marca de tiempo real en que arrancó, para alinearlo con otras fuentes.
+    """
+    duracion = duracion or parsear_comando_wrk(comando)['duracion'] or 10
+    tramos = []
+    transcurrido = 0.0
+    while transcurrido < duracion:
+        duracion_tramo = min(intervalo, duracion - transcurrido)
+        marca_inicio = time.time()
+        registro = ejecutar_wrk(ajustar_comando_wrk(comando, duracion=duracion_tramo))
+        registro.update({
+            't_inicio': transcurrido,
+            't_fin': transcurrido + duracion_tramo,
+            'marca_inicio': marca_inicio
+        })
+        tramos.append(registro)
+        transcurrido += duracion_tramo
+    return tramos
+
+def agregar_opcion_wrk(comando, opcion):
+    """Agregar una opción sin valor (p. ej. '--latency') si el comando aún no la tiene"""
+    opciones = parsear_comando_wrk(comando)
+    if opcion in opciones['extra']:
+        return comando
+    return construir_comando_wrk(
+        opciones['hilos'] or 1,
+        opciones['conexiones'] or 1,
+        opciones['duracion'] or 10,
+        opciones['url'],
+        script=opciones['script'],
+        extra=opciones['extra'] + [opcion],
+        args_script=opciones['args_script']
+    )
+
+def valor_lua(valor):
+    """Convertir un valor de Python (str, número, bool, lista, dict) en un literal Lua"""
+    if valor is None:
+        return 'nil'
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    if isinstance(valor, (int, float)):
+        return repr(valor)
+    if isinstance(valor, str):
+        escapado = valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        return f'"{escapado}"'
+    if isinstance(valor, dict):
+        return '{' + ', '.join(f'[{valor_lua(k)}] = {valor_lua(v)}' for k, v in valor.items()) + '}'
+    return '{' + ', '.join(valor_lua(v) for v in valor) + '}'
+
+def escribir_script_envoltorio(script_base, nombre, cuerpo_lua='', globales=None):
+    """Generar un script Lua que carga `script_base` y agrega comportamiento encima
+
+    Las `globales` se definen antes de cargar el script base para que este pueda
+    leerlas; `cuerpo_lua` se ejecuta después y puede redefinir init/request/response.
+    """
+    lineas = [f"-- Generado automáticamente a partir de {os.path.basename(script_base)}: no editar"]
+    for clave, valor in (globales or {}).items():
+        lineas.append(f"{clave} = {valor_lua(valor)}")
+    lineas.append(f"dofile({valor_lua(os.path.abspath(script_base))})")
+    lineas.append(cuerpo_lua)
+    archivo = f"generado_{nombre}.lua"
+    with open(archivo, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lineas) + '\n')
+    return archivo
+
+def args_recoleccion(nivel, muestreo=MUESTREO_POR_DEFECTO):
+    """Argumentos de script para elegir el nivel de recolección de json_summary.lua"""
+    if nivel == 'sampled':
+        return [nivel, str(muestreo)]
+    return [nivel]
+
+def extraer_resumen_json(texto):
+    """Devolver el documento JSON de done() si la salida lo contiene (sin regex), o None"""
+    inicio = texto.find(INICIO_RESUMEN_JSON)
+    if inicio < 0:
+        return None
+    inicio += len(INICIO_RESUMEN_JSON)
+    fin = texto.find(FIN_RESUMEN_JSON, inicio)
+    if fin < 0:
+        return None
+    try:
+        return json.loads(texto[inicio:fin])
+    except ValueError:
+        return None
+
+def datos_desde_resumen_json(resumen):
+    """Traducir el resumen JSON de Lua a las claves de parsear_salida_wrk (latencias en ms)"""
+    totales = resumen.get('summary', {})
+    latencia = resumen.get('latency_us', {})
+    errores_lua = resumen.get('errors', {})
+    duracion = totales.get('duration_us', 0) / 1e6
+    total_requests = totales.get('requests', 0)
+
+    datos = {
+        'total_requests': total_requests,
+        'duracion': duracion,
+        'rps': total_requests / duracion if duracion else 0,
+        'rps_reportado': totales.get('requests_per_sec', 0),
+        'transferencia_por_seg': totales.get('bytes_per_sec', 0) / 1024 / 1024,
+        'latencia_min': (latencia.get('min') or 0) / 1000,
+        'latencia_promedio': (latencia.get('mean') or 0) / 1000,
+        'latencia_stdev': (latencia.get('stdev') or 0) / 1000,
+        'latencia_max': (latencia.get('max') or 0) / 1000,
+        'percentiles': {f'p{p}': valor / 1000 for p, valor in sorted(
+            latencia.get('percentiles', {}).items(), key=lambda par: float(par[0]))},
+        'errores': {
+            'conexion': errores_lua.get('connect', 0),
+            'lectura': errores_lua.get('read', 0),
+            'escritura': errores_lua.get('write', 0),
+            'timeout': errores_lua.get('timeout', 0)
+        },
+        'respuestas_no_exitosas': errores_lua.get('status', 0),
+        'codigos_estado': {int(codigo): cantidad for codigo, cantidad in resumen.get('status_codes', {}).items()},
+        'escenario': resumen.get('scenario', {}),
+        'recoleccion': resumen.get('collection', {})
+    }
+    datos['total_errores'] = sum(datos['errores'].values())
+    if duracion:
+        datos['rps_exitosos'] = (total_requests - datos['respuestas_no_exitosas']) / duracion
+    datos['conexiones_exitosas'] = total_requests
+    datos['conexiones_fallidas'] = datos['errores']['conexion']
+    datos['total_conexiones_intentadas'] = total_requests + datos['errores']['conexion']
+
+    validacion = resumen.get('validation')
+    if validacion:
+        datos['validacion'] = {
+            'muestreo': validacion.get('rate', 1),
+            'revisadas': validacion.get('checked', 0),
+            'validas': validacion.get('valid', 0),
+            'fraccion_valida': validacion.get('valid_fraction', 0),
+            'fallas': validacion.get('failures', {})
+        }
+        datos['goodput'] = validacion.get('goodput_per_sec', 0)
+    return datos
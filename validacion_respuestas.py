@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Validación de Respuestas (Goodput)
+Reglas por escenario (código de estado, campo JSON esperado, texto presente o ausente) que
+los scripts Lua verifican sobre una muestra de respuestas para reportar el goodput
+(respuestas válidas por segundo) junto al RPS bruto
+"""
+
+import json
+
+from utilidades_wrk import ajustar_comando_wrk, escribir_script_envoltorio, parsear_comando_wrk
+
+MUESTREO_VALIDACION = 10
+
+# Reglas por escenario; un 200 con un cuerpo de error no cuenta como respuesta válida
+REGLAS_VALIDACION = {
+    'get': [
+        {'estado': 200},
+        {'campo': 'exists'}
+    ],
+    'post': [
+        {'estado': 200},
+        {'campo': 'CodigoRespuesta', 'valor': 0},
+        {'no_contiene': '"error"'}
+    ]
+}
+
+# Caracteres especiales de los patrones de Lua
+_ESPECIALES_LUA = set('^$()%.[]*+-?')
+
+def escapar_patron_lua(texto):
+    return ''.join('%' + c if c in _ESPECIALES_LUA else c for c in texto)
+
+def compilar_regla(regla):
+    """Traducir una regla a la tabla Lua de json_summary.lua (status o patrón, opcionalmente negado)
+
+    Formas admitidas: {'estado': 200}, {'campo': 'X'}, {'campo': 'X', 'valor': v},
+    {'contiene': 'texto'} y {'no_contiene': 'texto'}. Los campos se buscan como texto
+    ("X": valor) sin decodificar el JSON, para que el costo por respuesta muestreada sea
+    una búsqueda en el cuerpo.
+    """
+    if 'estado' in regla:
+        return {'name': regla.get('nombre', f"estado {regla['estado']}"), 'status': int(regla['estado'])}
+    if 'campo' in regla:
+        patron = '"' + escapar_patron_lua(regla['campo']) + '"%s*:'
+        nombre = f"campo {regla['campo']}"
+        if 'valor' in regla:
+            valor = json.dumps(regla['valor'], ensure_ascii=False)
+            patron += '%s*' + escapar_patron_lua(valor)
+            # Un número o literal debe terminar ahí (0 no debe aceptar 01 ni 0.5)
+            if not isinstance(regla['valor'], str):
+                patron += '[%s,}%]]'
+            nombre += f" = {valor}"
+        return {'name': regla.get('nombre', nombre), 'pattern': patron}
+    if 'contiene' in regla:
+        return {'name': regla.get('nombre', f"contiene {regla['contiene']}"),
+                'pattern': escapar_patron_lua(regla['contiene'])}
+    if 'no_contiene' in regla:
+        return {'name': regla.get('nombre', f"sin {regla['no_contiene']}"),
+                'pattern': escapar_patron_lua(regla['no_contiene']), 'negate': True}
+    raise ValueError(f"Regla de validación no reconocida: {regla}")
+
+def cargar_reglas(archivo):
+    """Reglas por escenario desde un JSON {'get': [...], 'post': [...]}"""
+    with open(archivo, 'r', encoding='utf-8') as f:
+        reglas = json.load(f)
+    if not isinstance(reglas, dict) or not all(isinstance(v, list) for v in reglas.values()):
+        raise ValueError(f"{archivo}: se esperaba un objeto {{escenario: [reglas]}}")
+    for lista in reglas.values():
+        for regla in lista:
+            compilar_regla(regla)
+    return reglas
+
+def preparar_validacion(comando, escenario, reglas, muestreo=MUESTREO_VALIDACION):
+    """Envolver el script del comando para validar 1 de cada `muestreo` respuestas"""
+    script = parsear_comando_wrk(comando)['script']
+    if not script:
+        raise ValueError("La validación necesita un script Lua mejorado (-s)")
+    generado = escribir_script_envoltorio(script, f"validacion_{escenario}", globales={
+        'VALIDATION_RULES': [compilar_regla(regla) for regla in reglas],
+        'VALIDATION_RATE': max(1, int(muestreo))
+    })
+    return ajustar_comando_wrk(comando, script=generado)
+
+def describir_validacion(datos):
+    """Línea de texto con goodput, fracción válida y la regla que más falla"""
+    validacion = datos.get('validacion')
+    if not validacion or not validacion.get('revisadas'):
+        return None
+    texto = (f"Goodput {datos.get('goodput', 0):,.1f} válidas/s de {datos.get('rps_reportado', 0):,.1f} RPS "
+             f"({validacion['fraccion_valida']:.1%} válidas en {validacion['revisadas']:,} revisadas, "
+             f"1 de cada {validacion['muestreo']})")
+    if validacion['fallas']:
+        regla, cantidad = max(validacion['fallas'].items(), key=lambda par: par[1])
+        texto += f"; falla más común: {regla} ({cantidad:,})"
+    return texto